@@ -3,61 +3,94 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from starlette.websockets import WebSocketState
 import asyncio
 import uuid
-from openai import AsyncOpenAI
 from app.audio.whisper import WhisperService
-from app.rag.pipeline import RAGConfig, run_rag
+from app.llm.gateway import get_llm_client
+from app.llm.scheduler import set_llm_priority
+from app.audio.vad import CALL_VAD_ENABLED, VadSegmenter
+from app.rag.pipeline import RAG_PROGRESSIVE_CARDS, RAGConfig, run_rag, run_rag_progressive
+from app.rag.pipeline.session_scheduler import SessionRagScheduler
 from app.audio.diarizer_manager import DiarizationManager
 from app.core.prompt import DIAR_SYSTEM_PROMPT
 from fastapi.encoders import jsonable_encoder
 
 router = APIRouter()
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = get_llm_client("openai")
 
 @router.websocket("/ws/call")
 async def call_websocket_endpoint(websocket: WebSocket, consultation_id: str = None):
     os.environ.setdefault("RAG_LOG_TIMING", "1")
+    set_llm_priority("live")  # 이 세션에서 만드는 카드/가이드/화자분리 호출은 최우선
     await websocket.accept()
     session_id = consultation_id if consultation_id else str(uuid.uuid4())[:8]
     
     print(f"[{session_id}] 웹소켓 연결 완료")
     await websocket.send_json(session_id)
     
-    whisper_service = WhisperService()
+    whisper_service = WhisperService(session_id=session_id)
     diarizer_manager = DiarizationManager(session_id, client)
+    segmenter = VadSegmenter() if CALL_VAD_ENABLED else None
     session_state = {}
 
+    send_lock = asyncio.Lock()
+    background_tasks = set()
+
+    async def send_json_safe(payload):
+        # 여러 태스크(STT 에코 / RAG 결과)가 동시에 보내므로 직렬화
+        async with send_lock:
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await websocket.send_json(payload)
+
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        return task
+
+    async def emit_rag_message(message):
+        await send_json_safe(jsonable_encoder(message))
+
+    async def run_session_rag(text: str):
+        # RAG 실행 (top_k 증가 및 llm_card_top_n 명시적 설정)
+        config = RAGConfig(top_k=6, normalize_keywords=True, llm_card_top_n=4)
+        if RAG_PROGRESSIVE_CARDS:
+            # 규칙 카드 → LLM 카드 → 가이드 순으로 직접 전송 (결과 콜백 없음)
+            await run_rag_progressive(text, emit_rag_message, config=config, session_state=session_state)
+            return None
+        return await run_rag(text, config=config, session_state=session_state)
+
+    async def send_rag_result(query: str, result):
+        if result:
+            safe_result = jsonable_encoder(result)
+            await send_json_safe({"type": "rag", "data": safe_result})
+
+    # 짧은 파편은 모아서 한 번에, 새 발화가 오면 진행 중인 RAG는 취소
+    rag_scheduler = SessionRagScheduler(run_session_rag, send_rag_result, session_id=session_id)
+
     # --- 공통 처리 로직 (Whisper 이후 혹은 직접 입력된 텍스트) ---
-    async def process_text_payload(text: str, is_stt: bool = False):
+    def process_text_payload(text: str, is_stt: bool = False, timing: dict = None):
         if not text.strip():
             return
 
         print(f"[{session_id}] 처리할 텍스트 : {text}")
 
         # ⭐ [v24] STT 결과를 프론트엔드로 먼저 전송
-        if is_stt and websocket.client_state == WebSocketState.CONNECTED:
-            await websocket.send_json({"type": "stt", "text": text})
-
-        # Diarizer 적재
-        await diarizer_manager.add_fragment(text, DIAR_SYSTEM_PROMPT)
+        if is_stt:
+            spawn(send_json_safe({"type": "stt", "text": text}))
 
-        try:
-            # RAG 실행 (top_k 증가 및 llm_card_top_n 명시적 설정)
-            result = await run_rag(
-                text,
-                config=RAGConfig(top_k=6, normalize_keywords=True, llm_card_top_n=4),
-                session_state=session_state,
-            )
+        # Diarizer 적재 (생성 순서대로 실행되어 파편 순서 유지)
+        spawn(diarizer_manager.add_fragment(text, DIAR_SYSTEM_PROMPT, timing=timing))
 
-            if result and websocket.client_state == WebSocketState.CONNECTED:
-                safe_result = jsonable_encoder(result)
-                await websocket.send_json({"type": "rag", "data": safe_result})
-
-        except Exception as e:
-            print(f"[{session_id}] 처리 중 에러 : {e}")
+        # RAG 예약 (수신 루프를 막지 않음)
+        rag_scheduler.submit(text)
 
     # Whisper 콜백 함수도 분리된 로직을 사용하도록 수정
-    async def on_transcription_result(text: str):
-        await process_text_payload(text, is_stt=True)  # ⭐ STT 결과임을 표시
+    async def on_transcription_result(text: str, timing: dict = None):
+        process_text_payload(text, is_stt=True, timing=timing)  # ⭐ STT 결과임을 표시
+
+    # VAD로 발화 구간만 잘라 STT에 전달 (세그먼트 시각은 화자 분리로 전달)
+    def submit_audio_segments(segments):
+        for segment in segments:
+            whisper_service.add_audio(segment.audio, meta=None if segment.passthrough else segment.timing())
 
     loop = asyncio.get_running_loop()
     whisper_service.start(callback=on_transcription_result, loop=loop)
@@ -72,23 +105,34 @@ async def call_websocket_endpoint(websocket: WebSocket, consultation_id: str = N
 
             # 바이너리(음성) 데이터 처리
             if "bytes" in message:
-                whisper_service.add_audio(message["bytes"])
+                if segmenter:
+                    submit_audio_segments(segmenter.feed(message["bytes"]))
+                else:
+                    whisper_service.add_audio(message["bytes"])
             
             # 일반 텍스트 처리
             elif "text" in message:
                 text_data = message["text"]
-                await process_text_payload(text_data)
+                process_text_payload(text_data)
             
     except WebSocketDisconnect:
         print(f"[{session_id}] 연결 종료 (Exception)")
     
     finally:
-        whisper_service.stop()
+        if segmenter:
+            # 진행 중인 발화 마감 후 대기 중인 세그먼트까지 전사
+            submit_audio_segments(segmenter.flush())
+        whisper_service.stop(drain=segmenter is not None)
+        rag_scheduler.close()
 
         # 즉시 처리 중 상태 마커를 Redis에 저장 (followup API가 대기하도록)
         await diarizer_manager.mark_processing_started()
 
-        await asyncio.sleep(2)
+        # 남은 전사 결과가 콜백까지 끝나기를 기다림 (고정 2초 대기 대체)
+        await whisper_service.wait_drained()
+        if background_tasks:
+            # 화자 분리 적재가 끝난 뒤 최종 스크립트 생성
+            await asyncio.gather(*background_tasks, return_exceptions=True)
 
         final_script = await diarizer_manager.get_final_script(DIAR_SYSTEM_PROMPT)
         print(f"화자 분리 전문 : {final_script}")
\ No newline at end of file
@@ -3,11 +3,13 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from starlette.websockets import WebSocketState
 import asyncio
 import uuid
-from openai import AsyncOpenAI
 from app.audio.whisper import WhisperService
-from app.rag.pipeline import RAGConfig, run_rag
+from app.llm.gateway import get_llm_client
+from app.llm.scheduler import set_llm_priority
+from app.rag.pipeline import RAG_PROGRESSIVE_CARDS, RAGConfig, run_rag, run_rag_progressive
 from app.audio.diarizer_manager import DiarizationManager
 from app.core.prompt import DIAR_SYSTEM_PROMPT
+from fastapi.encoders import jsonable_encoder
 import time
 
 from app.llm.education.edu_handler import (
@@ -18,11 +20,12 @@ from app.llm.education.edu_handler import (
 )
 
 router = APIRouter()
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = get_llm_client("openai")
 
 @router.websocket("/ws/edu")
 async def call_websocket_endpoint(websocket: WebSocket, consultation_id: str = None):
     os.environ.setdefault("RAG_LOG_TIMING", "1")
+    set_llm_priority("edu")
     await websocket.accept()
     session_id = consultation_id if consultation_id else str(uuid.uuid4())[:8]
     
@@ -32,10 +35,14 @@ async def call_websocket_endpoint(websocket: WebSocket, consultation_id: str = N
         "ws_session_id": session_id
     })
     
-    whisper_service = WhisperService()
+    whisper_service = WhisperService(session_id=session_id)
     diarizer_manager = DiarizationManager(session_id, client)
     session_state = {}
 
+    async def emit_rag_message(message):
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.send_json(jsonable_encoder(message))
+
     async def on_transcription_result(text: str):
         if not text.strip():
             return
@@ -55,11 +62,13 @@ async def call_websocket_endpoint(websocket: WebSocket, consultation_id: str = N
 
         try:
             # --- RAG 실행 ---
-            result = await run_rag(
-                text,
-                config=RAGConfig(top_k=6, normalize_keywords=True, llm_card_top_n=4),
-                session_state=session_state,
-            )
+            config = RAGConfig(top_k=6, normalize_keywords=True, llm_card_top_n=4)
+            if RAG_PROGRESSIVE_CARDS:
+                # 규칙 카드 → LLM 카드 → 가이드 순으로 단계별 전송
+                await run_rag_progressive(text, emit_rag_message, config=config, session_state=session_state)
+                return
+
+            result = await run_rag(text, config=config, session_state=session_state)
                 
             if result and websocket.client_state == WebSocketState.CONNECTED:
                 await websocket.send_json({"type": "rag", "data": result})
@@ -88,7 +97,8 @@ async def call_websocket_endpoint(websocket: WebSocket, consultation_id: str = N
         # 즉시 처리 중 상태 마커를 Redis에 저장 (followup API가 대기하도록)
         await diarizer_manager.mark_processing_started()
 
-        await asyncio.sleep(2)
+        # 진행 중이던 전사 결과가 화자 분리 버퍼에 들어올 때까지 대기 (고정 2초 대기 대체)
+        await whisper_service.wait_drained()
 
         final_start = time.perf_counter()
         final_script = await diarizer_manager.get_final_script(DIAR_SYSTEM_PROMPT)
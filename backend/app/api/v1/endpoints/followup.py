@@ -5,7 +5,8 @@ from app.llm.follow_up.personality_generator import get_personality, determine_p
 from app.llm.education.similarity_calculator import calculate_consultation_similarity
 from app.db.scripts.modules.connect_db import connect_db
 from app.db.scripts.modules.update_customer import get_personality_history, update_customer, save_consultation_to_db
-from app.utils.get_dialogue import get_dialogue, refine_script
+from app.utils.get_dialogue import get_dialogue, refine_script, wait_for_dialogue
+from app.llm.scheduler import set_llm_priority
 from fastapi import APIRouter, HTTPException
 from app.core.prompt import FEEDBACK_SYSTEM_PROMPT, EDU_FEEDBACK_SYSTEM_PROMPT
 import time
@@ -23,22 +24,18 @@ class SummaryRequest(BaseModel):
 
 @router.post("")
 async def create_summary(request: SummaryRequest):
+    set_llm_priority("followup")
     try:
         script = None
         json_script = None
 
-        # 데이터 확보를 위한 재시도 루프 (LLM 처리 시간 고려하여 30회로 증가)
-        max_retries = 30
-        for i in range(max_retries):
-            script, json_script = await get_dialogue(request.consultation_id)
-            if script and len(script.strip()) > 0:
-                print(f"[{request.consultation_id}] {i+1}차 시도만에 데이터 확보 성공")
-                break
+        # 데이터 확보 대기 (화자 분리 완료 알림을 최대 30초 대기)
+        wait_start = time.perf_counter()
+        script, json_script = await wait_for_dialogue(request.consultation_id, timeout=30.0)
+        if script:
+            print(f"[{request.consultation_id}] 데이터 확보 성공 ({time.perf_counter() - wait_start:.2f}s)")
 
-            print(f"[{request.consultation_id}] 데이터 대기 중 ({i+1}/{max_retries})")
-            await asyncio.sleep(1)
-
-        # max_retries초가 지나도 데이터가 없으면 에러 반환
+        # 30초가 지나도 데이터가 없으면 에러 반환
         if not script or len(script.strip()) == 0:
             raise HTTPException(status_code=404, detail="상담 데이터를 찾을 수 없습니다. (처리 지연)")
 
@@ -129,6 +126,7 @@ class SaveConsultationRequest(BaseModel):
 
 @router.post("/save")
 async def save_consultation(data: SaveConsultationRequest):
+    set_llm_priority("followup")
     try:
         conn = connect_db()
 
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from app.audio.stt_scheduler import stt_stats
+
 router = APIRouter()
 
 
@@ -11,3 +13,9 @@ class HealthResponse(BaseModel):
 @router.get("/health", response_model=HealthResponse)
 async def health() -> HealthResponse:
     return HealthResponse(status="ok")
+
+
+@router.get("/health/stt")
+async def stt_health() -> dict:
+    # 공용 STT 스케줄러 큐 깊이 / 지연 지표
+    return stt_stats()
@@ -11,6 +11,12 @@ from collections import defaultdict, Counter
 
 from dotenv import load_dotenv
 from openai import OpenAI
+from app.llm.prompt_layout import cached_tokens, prompt_cache_params
+
+try:
+    from rapidfuzz.distance import Indel as _Indel  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    _Indel = None
 
 # =========================
 # Config / Prompts
@@ -175,6 +181,22 @@ def _norm_overlap(s: str) -> str:
     return s
 
 
+def _z_function(s: str) -> List[int]:
+    n = len(s)
+    z = [0] * n
+    if n:
+        z[0] = n
+    l = r = 0
+    for i in range(1, n):
+        if i < r:
+            z[i] = min(r - i, z[i - l])
+        while i + z[i] < n and s[z[i]] == s[i + z[i]]:
+            z[i] += 1
+        if i + z[i] > r:
+            l, r = i, i + z[i]
+    return z
+
+
 def find_best_fuzzy_overlap_suffix_prefix(a: str,
                                          b: str,
                                          min_chars: int = 12,
@@ -182,15 +204,47 @@ def find_best_fuzzy_overlap_suffix_prefix(a: str,
     """
     Find best overlap length L where suffix(a, L) ≈ prefix(b, L).
     Returns L (0 if none). Works on already-normalized strings.
+
+    L을 큰 값부터 보며 SequenceMatcher를 매번 만드는 대신 (결과는 동일):
+    - 정확 일치: b + a 의 Z-function으로 모든 L을 O(len) 한 번에 계산
+    - 상한 필터: 문자 multiset 교집합(quick_ratio)을 L마다 O(1)로 갱신,
+      rapidfuzz가 있으면 LCS 기반 Indel 유사도로 한 번 더 거름
+    - 두 상한을 통과한 소수의 L만 similarity()로 최종 확인
     """
     if not a or not b:
         return 0
     Lmax = min(len(a), len(b))
-    for L in range(Lmax, min_chars - 1, -1):
+    lo = max(min_chars, 1)
+    if Lmax < lo:
+        return 0
+
+    z = _z_function(b + a)
+    n = len(b) + len(a)
+
+    # quick_ratio 상한: suffix(a, L)와 prefix(b, L)의 문자 multiset 교집합 크기
+    ca = Counter(a[-Lmax:])
+    cb = Counter(b[:Lmax])
+    inter = sum(min(cnt, cb[ch]) for ch, cnt in ca.items())
+
+    for L in range(Lmax, lo - 1, -1):
+        if L < Lmax:
+            x = a[-L - 1]  # suffix에서 빠지는 문자
+            if ca[x] <= cb[x]:
+                inter -= 1
+            ca[x] -= 1
+            y = b[L]       # prefix에서 빠지는 문자
+            if cb[y] <= ca[y]:
+                inter -= 1
+            cb[y] -= 1
+        if 2.0 * inter / (L + L) < min_sim:
+            continue
+        if z[n - L] >= L:
+            return L
         sa = a[-L:]
         sb = b[:L]
-        if sa == sb:
-            return L
+        # Indel(LCS) 유사도 >= SequenceMatcher ratio 이므로 상한으로만 사용
+        if _Indel is not None and _Indel.normalized_similarity(sa, sb) < min_sim - 1e-9:
+            continue
         # allow small diffs
         if similarity(sa, sb) >= min_sim:
             return L
@@ -722,6 +776,103 @@ def merge_batches(global_items: List[Dict[str, str]],
 
     return merged
 
+
+def _is_settled_item(it: Dict[str, str]) -> bool:
+    # filter_spam_items를 다시 돌려도 그대로인 발화 (정리된 텍스트, 스팸 아님)
+    msg = it.get("message", "")
+    return (
+        len(it) == 2
+        and bool(msg)
+        and clean_text_basic(msg) == msg
+        and not is_spam_repetition(msg, min_len_nospace=10, max_unique_chars=2)
+    )
+
+
+def _is_stable_pair(prev: Dict[str, str], cur: Dict[str, str], ratio: float = 0.95) -> bool:
+    # merge_same_speaker / dedupe_near_duplicates가 건드리지 않는 인접 쌍
+    if prev["speaker"] == cur["speaker"]:
+        return False
+    a = normalize_for_compare(prev["message"])
+    b = normalize_for_compare(cur["message"])
+    if not a or not b:
+        return True
+    return similarity(a, b) < ratio
+
+
+class IncrementalMerger:
+    """
+    merge_batches를 누적 호출한 것과 같은 결과를 tail 구간만 다시 처리해서 만든다.
+
+    - settled: 내부 인접 쌍이 모두 안정(화자 다름, 근사 중복 아님)하고 정리된 발화만 있는 prefix
+      → merge_same_speaker / filter_spam_items / dedupe_near_duplicates가 바꾸지 않음
+    - tail: 마지막 max_overlap_utts개 이상을 유지하는 변경 가능 구간
+    - dedupe는 이전 출력 발화와만 비교하므로 settled 마지막 발화를 기준점(anchor)으로 함께 넘김
+    """
+
+    def __init__(self, max_overlap_utts: int = 8, min_partial_overlap_chars: int = 12):
+        self.max_overlap_utts = max_overlap_utts
+        self.min_partial_overlap_chars = min_partial_overlap_chars
+        # 경계 보정 함수들이 보는 global 끝 구간 길이 (drop_boundary_prefix lookback=3)
+        self.window = max(max_overlap_utts, 3, 1)
+        self.settled: List[Dict[str, str]] = []
+        self.tail: List[Dict[str, str]] = []
+
+    @property
+    def items(self) -> List[Dict[str, str]]:
+        return self.settled + self.tail
+
+    def __len__(self) -> int:
+        return len(self.settled) + len(self.tail)
+
+    def reset(self, items: List[Dict[str, str]]) -> None:
+        self.settled = []
+        self.tail = list(items)
+
+    def append(self, item: Dict[str, str]) -> None:
+        """병합 없이 원문 발화 추가 (에러 시 보관 등)"""
+        self.tail.append(item)
+
+    def merge(self, batch_items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        if not batch_items:
+            return self.items
+
+        need = max(0, self.window - len(self.tail))
+        recent = (self.settled[-need:] if need else []) + self.tail
+
+        # 0~3) 경계 보정: global 끝 window개만 참조
+        batch_items = drop_boundary_prefix(recent, batch_items, lookback_utts=3, sim_th=0.93)
+        batch_items = drop_exact_overlap_by_utterances(recent, batch_items, max_k=self.max_overlap_utts)
+        batch_items = drop_fuzzy_overlap_by_utterances(recent, batch_items, max_k=self.max_overlap_utts, sim_th=0.93)
+        batch_items = trim_partial_overlap_last_first(
+            recent, batch_items, min_chars=self.min_partial_overlap_chars, min_sim=0.92
+        )
+
+        # 4~6) settled는 고정점이므로 tail + batch만 다시 처리
+        merged = merge_same_speaker(self.tail + batch_items)
+        merged = filter_spam_items(merged, min_len_nospace=10, max_unique_chars=2)
+        if self.settled:
+            merged = [self.settled.pop()] + merged
+        self.tail = dedupe_near_duplicates(merged, ratio=0.95)
+
+        self._rebalance()
+        return self.items
+
+    def _rebalance(self) -> None:
+        # anchor가 더 긴 근사 중복으로 교체되면 settled 경계가 불안정해질 수 있음 → tail로 되돌림
+        while self.settled and self.tail and not _is_stable_pair(self.settled[-1], self.tail[0]):
+            self.tail.insert(0, self.settled.pop())
+
+        # tail 앞쪽에서 다음 발화와도 안정적인 발화를 settled로 이동
+        settle = 0
+        while len(self.tail) - settle > self.window:
+            it = self.tail[settle]
+            if not _is_settled_item(it) or not _is_stable_pair(it, self.tail[settle + 1]):
+                break
+            settle += 1
+        if settle:
+            self.settled.extend(self.tail[:settle])
+            del self.tail[:settle]
+
 def simulate_stt_fragments(raw_stream: str,
                            mean_chars: int = 24,
                            std_chars: int = 10,
@@ -856,6 +1007,7 @@ async def call_diarizer_fulltext(
                 temperature=temperature,
                 max_tokens=out_budget,
                 response_format={"type": "json_schema", "json_schema": schema},
+                **prompt_cache_params("diarizer"),
             )
             api_sec = time.time() - t0
             text = resp.choices[0].message.content or ""
@@ -883,6 +1035,7 @@ async def call_diarizer_fulltext(
                     "prompt_tokens": getattr(usage, "prompt_tokens", None),
                     "completion_tokens": getattr(usage, "completion_tokens", None),
                     "total_tokens": getattr(usage, "total_tokens", None),
+                    "cached_tokens": cached_tokens(usage),
                 }
             finish_reason = None
             try:
@@ -1,15 +1,39 @@
 import redis.asyncio as redis
 import json
+import os
+import time
 import asyncio
-from app.core.config import DIALOGUE_REDIS_URL
+from app.core.config import DIALOGUE_PARTIAL_TTL_SEC, DIALOGUE_REDIS_URL
 from app.audio.diarizer import (
     call_diarizer_fulltext, 
-    merge_batches, 
+    IncrementalMerger, 
     merge_same_speaker, 
     dedupe_near_duplicates
 )
 from app.llm.delivery.sllm_refiner import refine_diarized_batch
 
+# 배치 크기: 파편 수 고정 대신 글자 수 / 경과 시간 기준
+DIAR_BATCH_TARGET_CHARS = int(os.getenv("DIAR_BATCH_TARGET_CHARS", "120"))
+DIAR_BATCH_MIN_FRAGMENTS = int(os.getenv("DIAR_BATCH_MIN_FRAGMENTS", "2"))
+DIAR_BATCH_MAX_FRAGMENTS = int(os.getenv("DIAR_BATCH_MAX_FRAGMENTS", "8"))
+DIAR_BATCH_MAX_WAIT_SEC = float(os.getenv("DIAR_BATCH_MAX_WAIT_SEC", "8"))
+# 전체 세션 합계 화자 분리 LLM 동시 호출 수
+DIAR_MAX_CONCURRENCY = int(os.getenv("DIAR_MAX_CONCURRENCY", "4"))
+
+_DIAR_SEMAPHORE = None
+_DIAR_SEMAPHORE_LOOP = None
+
+
+def get_diarizer_semaphore():
+    """이벤트 루프당 하나의 전역 세마포어 (이벤트 루프 스레드에서 호출)"""
+    global _DIAR_SEMAPHORE, _DIAR_SEMAPHORE_LOOP
+    loop = asyncio.get_running_loop()
+    if _DIAR_SEMAPHORE is None or _DIAR_SEMAPHORE_LOOP is not loop:
+        _DIAR_SEMAPHORE = asyncio.Semaphore(max(1, DIAR_MAX_CONCURRENCY))
+        _DIAR_SEMAPHORE_LOOP = loop
+    return _DIAR_SEMAPHORE
+
+
 class DiarizationManager:
     def __init__(self, session_id, client):
         self.session_id = session_id
@@ -18,49 +42,214 @@ class DiarizationManager:
         self.redis = redis.from_url(self.redis_url, decode_responses=True)
         
         self.buffer = []               # 실시간 STT 파편
-        self.global_items = []         # 최종적으로 누적된 화자분리 결과물
-        self.batch_threshold = 3
+        self.buffer_timings = []       # 파편별 VAD 세그먼트 시각 (없으면 None)
+        self.segments = []             # 세션 전체 세그먼트 타임라인 [{text, start_ms, end_ms, ...}]
+        self.batch_spans = []          # 화자 분리 배치별 시간 범위
+        # 최종적으로 누적된 화자분리 결과물 (settled prefix + tail window만 재처리)
+        self.merger = IncrementalMerger(
+            max_overlap_utts=8,            # 이전 대화 8개까지 참조하여 겹침 확인
+            min_partial_overlap_chars=12   # 12자 이상 겹치면 트리밍
+        )
         self.active_tasks = set()
 
-    async def add_fragment(self, text, system_prompt):
-        """텍스트를 버퍼에 넣고 LLM 처리 후 비움"""
+        self.buffer_chars = 0
+        self.buffer_started_at = None  # 버퍼 첫 파편 시각
+        self.flush_timer = None
+        self.system_prompt = None
+
+        # 배치 순서 보장: 완료 순서와 무관하게 seq 순서대로 병합
+        self.next_seq = 0              # 다음 배치에 부여할 번호
+        self.merge_seq = 0             # 다음에 병합할 번호
+        self.pending_results = {}      # seq → ("items", new_items) | ("raw", batch_text)
+
+        # 점진 저장: settled 발화를 보정해 stt:{session_id}:items 리스트에 순서대로 추가
+        # (최종 stt:{session_id}가 늦으면 wait_for_dialogue가 이 리스트로 대체)
+        self.items_key = f"stt:{self.session_id}:items"
+        self.persisted_src = []        # 저장 요청한 원본(보정 전) 발화 → 최종 결과와 비교용
+        self.persist_task = None       # 마지막 저장 태스크 (순서 보장용 체인)
+        self.persist_ok = True
+        self.refine_cache = {}         # utterance_key → 교정 메시지 (세션별)
+
+    @property
+    def global_items(self):
+        return self.merger.items
+
+    @global_items.setter
+    def global_items(self, items):
+        self.merger.reset(items)
+
+    async def add_fragment(self, text, system_prompt, timing=None):
+        """텍스트를 버퍼에 넣고 배치 조건을 만족하면 LLM 처리 (timing: VAD 세그먼트 시각)"""
+        self.system_prompt = system_prompt
         if text.strip():
+            if not self.buffer:
+                self.buffer_started_at = time.monotonic()
             self.buffer.append(text)
-            
-        if len(self.buffer) >= self.batch_threshold:
-            batch_text = " ".join(self.buffer)
-            self.buffer = []
-            
-            task = asyncio.create_task(self.process_diarization(batch_text, system_prompt))
-            self.active_tasks.add(task)
-            task.add_done_callback(self.active_tasks.discard)
+            self.buffer_chars += len(text.strip())
+            self.buffer_timings.append(timing)
+            if timing:
+                self.segments.append({"text": text, **timing})
 
-    async def process_diarization(self, batch_text, system_prompt):
-        """병합"""
-        try:
-            new_items, _, _ = await call_diarizer_fulltext(
-                client=self.client,
-                model="gpt-4o",
-                system_prompt=system_prompt,
-                raw_stream_batch=batch_text
+        if self._should_flush():
+            self._flush_batch()
+        elif self.buffer and self.flush_timer is None:
+            # 말이 느리거나 끊겨도 최대 대기 시간 후에는 처리
+            self.flush_timer = asyncio.get_running_loop().call_later(
+                DIAR_BATCH_MAX_WAIT_SEC, self._on_flush_timer
             )
 
-            if new_items:
-                # 유사도 및 부분 겹침 트리밍 적용
-                self.global_items = merge_batches(
-                    self.global_items,
-                    new_items,
-                    max_overlap_utts=8,            # 이전 대화 8개까지 참조하여 겹침 확인
-                    min_partial_overlap_chars=12   # 12자 이상 겹치면 트리밍
+    def _should_flush(self):
+        n = len(self.buffer)
+        if n == 0:
+            return False
+        if n >= DIAR_BATCH_MAX_FRAGMENTS:
+            return True
+        if n < DIAR_BATCH_MIN_FRAGMENTS:
+            return False
+        if self.buffer_chars >= DIAR_BATCH_TARGET_CHARS:
+            return True
+        return time.monotonic() - self.buffer_started_at >= DIAR_BATCH_MAX_WAIT_SEC
+
+    def _on_flush_timer(self):
+        self.flush_timer = None
+        if len(self.buffer) >= DIAR_BATCH_MIN_FRAGMENTS:
+            self._flush_batch()
+
+    def _take_buffer(self):
+        """버퍼를 배치 텍스트로 꺼내고 비움"""
+        if self.flush_timer:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        batch_text = " ".join(self.buffer)
+        self._record_batch_span()
+        self.buffer = []
+        self.buffer_chars = 0
+        self.buffer_started_at = None
+        return batch_text
+
+    def _flush_batch(self):
+        batch_text = self._take_buffer()
+        seq = self._next_batch_seq()
+        task = asyncio.create_task(self.process_diarization(batch_text, self.system_prompt, seq=seq))
+        self.active_tasks.add(task)
+        task.add_done_callback(self.active_tasks.discard)
+
+    def _record_batch_span(self):
+        """현재 버퍼(배치)의 시간 범위 기록 후 타이밍 버퍼 비움"""
+        timings = [t for t in self.buffer_timings if t]
+        if timings:
+            self.batch_spans.append({
+                "start_ms": timings[0].get("start_ms"),
+                "end_ms": timings[-1].get("end_ms"),
+                "fragments": len(self.buffer),
+            })
+        self.buffer_timings = []
+
+    def _next_batch_seq(self):
+        seq = self.next_seq
+        self.next_seq += 1
+        return seq
+
+    async def process_diarization(self, batch_text, system_prompt, seq=None):
+        """LLM 화자 분리 후 배치 순서대로 병합 (seq: 버퍼에서 꺼낸 순서)"""
+        if seq is None:
+            seq = self._next_batch_seq()
+        try:
+            async with get_diarizer_semaphore():
+                new_items, _, _ = await call_diarizer_fulltext(
+                    client=self.client,
+                    model="gpt-4o",
+                    system_prompt=system_prompt,
+                    raw_stream_batch=batch_text
                 )
+            self.pending_results[seq] = ("items", new_items)
 
         except Exception as e:
             print(f"[{self.session_id}] 배치 처리 중 에러: {e}")
             # 에러 시 데이터 유실 방지를 위해 원문 보관
-            self.global_items.append({"speaker": "unknown", "message": batch_text})
+            self.pending_results[seq] = ("raw", batch_text)
+
+        finally:
+            # 취소 등으로 결과가 없어도 뒤 배치가 막히지 않도록 빈 결과 등록
+            self.pending_results.setdefault(seq, ("items", []))
+            self._drain_results()
+
+    def _drain_results(self):
+        """reorder 버퍼: 앞 번호 배치가 모두 도착한 만큼만 병합"""
+        while self.merge_seq in self.pending_results:
+            kind, payload = self.pending_results.pop(self.merge_seq)
+            self.merge_seq += 1
+            if kind == "raw":
+                self.merger.append({"speaker": "unknown", "message": payload})
+            elif payload:
+                # 유사도 및 부분 겹침 트리밍 적용 (merge_batches와 동일 결과)
+                self.merger.merge(payload)
+        self._persist_settled()
+
+    def _persist_settled(self):
+        """새로 확정된 발화를 보정 후 Redis 리스트에 추가 (settled 마지막 발화는 dedupe 기준점이라 보류)"""
+        ready = len(self.merger.settled) - 1
+        start = len(self.persisted_src)
+        if ready <= start:
+            return
+        items = [dict(it) for it in self.merger.settled[start:ready]]
+        self.persisted_src.extend(dict(it) for it in items)
+        self.persist_task = asyncio.create_task(
+            self._persist_chunk(items, self.persist_task, reset=start == 0)
+        )
+
+    async def _persist_chunk(self, items, prev_task, reset=False):
+        try:
+            # 보정(sLLM)은 앞 청크와 병렬로, Redis 추가는 앞 청크 이후에
+            refined = await refine_diarized_batch(items, cache=self.refine_cache)
+        except Exception as e:
+            print(f"[{self.session_id}] 점진 보정 실패, 원문 저장: {e}")
+            refined = [{"speaker": it["speaker"], "message": it["message"]} for it in items]
+        if prev_task:
+            await asyncio.gather(prev_task, return_exceptions=True)
+        try:
+            if reset:
+                # 같은 consultation_id 재연결 시 이전 통화 발화 제거
+                await self.redis.delete(self.items_key)
+            await self.redis.rpush(self.items_key, *[json.dumps(it, ensure_ascii=False) for it in refined])
+            await self.redis.expire(self.items_key, DIALOGUE_PARTIAL_TTL_SEC)
+        except Exception as e:
+            self.persist_ok = False
+            print(f"[{self.session_id}] 점진 저장 실패: {e}")
+
+    async def _finalize_items(self, final_items):
+        """
+        최종 결과 보정: 통화 중 교정된 발화는 캐시 재사용, 새로 생기거나 바뀐 발화만 sLLM 보정
+        점진 저장 리스트는 공통 prefix 이후만 교체
+        """
+        if self.persist_task:
+            await asyncio.gather(self.persist_task, return_exceptions=True)
+
+        refined = await refine_diarized_batch(final_items, cache=self.refine_cache)
+
+        keep = 0
+        if self.persist_ok:
+            limit = min(len(self.persisted_src), len(final_items))
+            while keep < limit and self.persisted_src[keep] == final_items[keep]:
+                keep += 1
+        try:
+            if keep:
+                await self.redis.ltrim(self.items_key, 0, keep - 1)
+            else:
+                await self.redis.delete(self.items_key)
+            if refined[keep:]:
+                await self.redis.rpush(
+                    self.items_key, *[json.dumps(it, ensure_ascii=False) for it in refined[keep:]]
+                )
+                await self.redis.expire(self.items_key, DIALOGUE_PARTIAL_TTL_SEC)
+        except Exception as e:
+            print(f"[{self.session_id}] 점진 저장 리스트 갱신 실패: {e}")
+        return refined
 
     async def mark_processing_started(self):
         """처리 시작 상태를 Redis에 저장 (followup API가 대기하도록)"""
+        # 같은 consultation_id의 이전 완료 알림 제거
+        await self.redis.delete(f"stt:{self.session_id}:ready")
         await self.redis.set(
             f"stt:{self.session_id}:status",
             "processing",
@@ -71,29 +260,44 @@ class DiarizationManager:
     async def save_to_redis(self):
         """최종 결과를 Redis에 저장"""
         if self.buffer:
-            combined = " ".join(self.buffer)
-            self.global_items.append({"speaker": "agent", "message": combined})
-            self.buffer = []
+            combined = self._take_buffer()
+            self.merger.append({"speaker": "agent", "message": combined})
+
+        if self.segments:
+            # VAD 세그먼트 타임라인 (발화 시각/간격 기반 후처리용)
+            await self.redis.set(
+                f"stt:{self.session_id}:segments",
+                json.dumps({"segments": self.segments, "batches": self.batch_spans}, ensure_ascii=False),
+                ex=DIALOGUE_PARTIAL_TTL_SEC,
+            )
 
         if self.global_items:
             # 저장 전 최종적으로 동일 화자 병합 및 근사 중복 제거
             self.global_items = merge_same_speaker(self.global_items)
             self.global_items = dedupe_near_duplicates(self.global_items, ratio=0.95)
             
-            # 대화 전문 보정
-            self.global_items = await refine_diarized_batch(self.global_items)
+            # 대화 전문 보정 (통화 중 저장된 발화는 재사용, 남은 tail만 보정)
+            self.global_items = await self._finalize_items(self.global_items)
             
             await self.redis.set(
                 f"stt:{self.session_id}",
                 json.dumps(self.global_items, ensure_ascii=False)
             )
-            # 처리 완료 후 상태 마커 삭제
-            await self.redis.delete(f"stt:{self.session_id}:status")
             print(f"===[{self.session_id}] Redis 최종 저장 완료===")
             print(f"[{self.session_id}] 처리 완료 / 현재 총 {len(self.global_items)}개 발화")
 
+        # 처리 완료 후 상태 마커 삭제 및 대기 중인 followup에 완료 알림
+        await self.redis.delete(f"stt:{self.session_id}:status")
+        await self.notify_ready()
+
         return self.global_items
 
+    async def notify_ready(self):
+        """완료 리스트에 push → followup의 BLPOP이 즉시 깨어남 (나중에 온 요청도 만료 전까지 확인 가능)"""
+        ready_key = f"stt:{self.session_id}:ready"
+        await self.redis.rpush(ready_key, "1")
+        await self.redis.expire(ready_key, 120)
+
     async def get_final_script(self, system_prompt: str):
         """종료 시 호출: 진행 중인 태스크 완료 대기 후 남은 버퍼 처리"""
         if self.active_tasks:
@@ -103,7 +307,7 @@ class DiarizationManager:
         # 마지막으로 버퍼에 남은 작업 처리
         if self.buffer:
             buffer_size = len(self.buffer)
-            batch_text = " ".join(self.buffer)
+            batch_text = self._take_buffer()
             
             if buffer_size >= 2:
                 # 2개 이상이면 LLM 호출
@@ -112,8 +316,6 @@ class DiarizationManager:
             else:
                 # 1개이면 상담원으로 즉시 할당
                 print(f"[{self.session_id}] 잔여 파편 1개 감지: 상담원(agent)으로 자동 할당")
-                self.global_items.append({"speaker": "agent", "message": batch_text})
-            
-            self.buffer = []
+                self.merger.append({"speaker": "agent", "message": batch_text})
 
         return await self.save_to_redis()
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+STT 백엔드 (SttScheduler의 전사 함수 구현체)
+
+- openai : OpenAI whisper-1 API (기본값)
+- local  : faster-whisper (CTranslate2) CPU int8 로컬 추론
+           여러 세션의 동시 요청을 짧게 모아 한 번의 배치로 디코딩
+
+환경변수:
+    STT_BACKEND=openai|local
+    STT_LOCAL_MODEL=small            (tiny/base/small/medium/large-v3 또는 모델 경로)
+    STT_LOCAL_COMPUTE_TYPE=int8
+    STT_LOCAL_CPU_THREADS=0          (0이면 CTranslate2 기본값)
+    STT_LOCAL_BATCH_SIZE=8
+    STT_LOCAL_BATCH_WAIT_MS=30
+    STT_LOCAL_BEAM_SIZE=1
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import io
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from app.core.prompt import WHISPER_PROMPT
+
+HALLUCINATION_KEYWORDS = [
+    "시청해주셔서", "시청해 주셔서", "구독과 좋아요",
+    "재택 플러스", "MBC", "뉴스", "투데이", "먹방", "영상편집", "영상", "편집", "진심으로"
+]
+
+SAMPLE_RATE = 16000
+_MAX_CHUNK_SEC = 30.0
+
+
+def is_hallucination(text: str) -> bool:
+    # 할루시네이션 방지
+    return any(keyword in text for keyword in HALLUCINATION_KEYWORDS)
+
+
+def clean_transcript(text: str) -> str:
+    """공백 제거 + 할루시네이션 필터 (걸러지면 빈 문자열)"""
+    text = (text or "").strip()
+    if not text or is_hallucination(text):
+        return ""
+    return text
+
+
+class SttBackend(abc.ABC):
+    """STT 백엔드 인터페이스"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def transcribe(self, audio_data: bytes) -> str:
+        """오디오(wav bytes) → 정리된 전사 텍스트 (걸러지면 빈 문자열)"""
+
+    def warmup(self) -> None:
+        """모델 로드 등 사전 준비 (필요 시)"""
+
+
+class OpenAISttBackend(SttBackend):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "whisper-1"):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.model = model
+
+    async def transcribe(self, audio_data: bytes) -> str:
+        audio_file = io.BytesIO(audio_data)
+        audio_file.name = "audio.wav"
+
+        transcript = await self.client.audio.transcriptions.create(
+            model=self.model,
+            file=audio_file,
+            language="ko",
+        )
+        return clean_transcript(transcript.text)
+
+
+class FasterWhisperBackend(SttBackend):
+    """
+    faster-whisper 로컬 백엔드
+    - 요청을 STT_LOCAL_BATCH_WAIT_MS 동안 모아 최대 STT_LOCAL_BATCH_SIZE개를 한 번에 encode/generate
+    - 배치 경로가 실패하면 청크별 WhisperModel.transcribe로 폴백
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        model_size: Optional[str] = None,
+        compute_type: Optional[str] = None,
+        cpu_threads: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+        beam_size: Optional[int] = None,
+    ):
+        self.model_size = model_size or os.getenv("STT_LOCAL_MODEL", "small")
+        self.compute_type = compute_type or os.getenv("STT_LOCAL_COMPUTE_TYPE", "int8")
+        self.cpu_threads = cpu_threads if cpu_threads is not None else int(os.getenv("STT_LOCAL_CPU_THREADS", "0"))
+        self.batch_size = max(1, batch_size or int(os.getenv("STT_LOCAL_BATCH_SIZE", "8")))
+        self.batch_wait_ms = batch_wait_ms if batch_wait_ms is not None else float(os.getenv("STT_LOCAL_BATCH_WAIT_MS", "30"))
+        self.beam_size = max(1, beam_size or int(os.getenv("STT_LOCAL_BEAM_SIZE", "1")))
+        self._model = None
+        self._tokenizer = None
+        self._prompt_tokens: Optional[List[int]] = None
+        self._model_lock = threading.Lock()
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._batch_task: Optional[asyncio.Task] = None
+        self._batched_ok = True
+
+    # ---- 모델 ----
+    def _load_model(self):
+        if self._model is not None:
+            return self._model
+        with self._model_lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+
+                start = time.perf_counter()
+                self._model = WhisperModel(
+                    self.model_size,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                )
+                print(
+                    f"[stt_backends] faster-whisper 로드 완료: {self.model_size} "
+                    f"({self.compute_type}, {time.perf_counter() - start:.1f}s)"
+                )
+        return self._model
+
+    def warmup(self) -> None:
+        self._load_model()
+
+    def _decode_audio(self, audio_data: bytes):
+        from faster_whisper import decode_audio
+
+        return decode_audio(io.BytesIO(audio_data), sampling_rate=SAMPLE_RATE)
+
+    def _transcribe_one(self, audio) -> str:
+        model = self._load_model()
+        segments, _ = model.transcribe(
+            audio,
+            language="ko",
+            beam_size=self.beam_size,
+            initial_prompt=WHISPER_PROMPT,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+        )
+        return clean_transcript("".join(segment.text for segment in segments))
+
+    def _transcribe_batch(self, audios: List) -> List[str]:
+        """30초 이하 청크 여러 개를 한 번의 encode/generate로 디코딩"""
+        import numpy as np
+        from faster_whisper.audio import pad_or_trim
+        from faster_whisper.tokenizer import Tokenizer
+
+        model = self._load_model()
+        if self._tokenizer is None:
+            self._tokenizer = Tokenizer(
+                model.hf_tokenizer,
+                model.model.is_multilingual,
+                task="transcribe",
+                language="ko",
+            )
+            self._prompt_tokens = self._tokenizer.encode(" " + WHISPER_PROMPT.strip())
+        tokenizer = self._tokenizer
+        features = np.stack(
+            [
+                pad_or_trim(model.feature_extractor(audio)[..., :-1])
+                for audio in audios
+            ]
+        )
+        encoder_output = model.encode(features)
+        prompt = model.get_prompt(tokenizer, self._prompt_tokens, without_timestamps=True)
+        results = model.model.generate(
+            encoder_output,
+            [prompt] * len(audios),
+            beam_size=self.beam_size,
+            max_length=model.max_length,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+        texts = []
+        for result in results:
+            tokens = [t for t in result.sequences_ids[0] if t < tokenizer.eot]
+            texts.append(clean_transcript(tokenizer.decode(tokens)))
+        return texts
+
+    def _run_batch(self, payloads: List[bytes]) -> List[str]:
+        audios = [self._decode_audio(data) for data in payloads]
+        short = all(len(audio) <= _MAX_CHUNK_SEC * SAMPLE_RATE for audio in audios)
+        if self._batched_ok and short and len(audios) > 1:
+            try:
+                return self._transcribe_batch(audios)
+            except Exception as e:
+                # faster-whisper 내부 API 변경 등: 이후 청크별 전사 사용
+                self._batched_ok = False
+                print(f"[stt_backends] 배치 디코딩 실패, 청크별 전사로 전환: {e}")
+        return [self._transcribe_one(audio) for audio in audios]
+
+    # ---- 배칭 ----
+    async def transcribe(self, audio_data: bytes) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((audio_data, future))
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_task = loop.create_task(self._batch_loop())
+        return await future
+
+    async def _batch_loop(self) -> None:
+        while self._pending:
+            if len(self._pending) < self.batch_size and self.batch_wait_ms > 0:
+                await asyncio.sleep(self.batch_wait_ms / 1000)
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            try:
+                texts = await asyncio.to_thread(self._run_batch, [data for data, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), text in zip(batch, texts):
+                if not future.done():
+                    future.set_result(text)
+
+
+_BACKEND: Optional[SttBackend] = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def create_stt_backend(name: Optional[str] = None) -> SttBackend:
+    name = (name or os.getenv("STT_BACKEND", "openai")).strip().lower()
+    if name == "local":
+        return FasterWhisperBackend()
+    if name != "openai":
+        print(f"[stt_backends] 알 수 없는 STT_BACKEND={name}, openai 사용")
+    return OpenAISttBackend()
+
+
+def get_stt_backend() -> SttBackend:
+    """프로세스 공용 STT 백엔드"""
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                _BACKEND = create_stt_backend()
+    return _BACKEND
+
+
+def warmup_stt_backend() -> None:
+    """로컬 백엔드면 시작 시 모델을 미리 로드 (실패해도 첫 요청 시 재시도)"""
+    backend = get_stt_backend()
+    try:
+        backend.warmup()
+    except Exception as e:
+        print(f"[stt_backends] 워밍업 실패: {e}")
@@ -0,0 +1,308 @@
+"""
+프로세스 공용 STT 스케줄러
+
+세션(웹소켓)마다 스레드/무제한 큐를 두는 대신 이벤트 루프 하나에서 모든 세션의 오디오를 처리한다.
+- 세션별 bounded 큐 (STT_SESSION_QUEUE_MAX)
+- 전역 동시 전사 수 제한 (STT_MAX_CONCURRENCY)
+- 세션 간 라운드로빈 (세션당 in-flight 1개 → 발화 순서 보장)
+- 큐 초과 시 정책 (STT_OVERFLOW_POLICY): merge(마지막 청크에 WAV 이어붙이기) | drop_oldest | drop_newest
+- 큐 깊이 / 대기 / 전사 지연 지표 (stt_stats)
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import time
+import uuid
+import wave
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+Transcriber = Callable[[bytes], Awaitable[str]]
+# callback(text) 또는 meta가 있으면 callback(text, meta)
+ResultCallback = Callable[..., Awaitable[None]]
+
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", "8"))
+STT_SESSION_QUEUE_MAX = int(os.getenv("STT_SESSION_QUEUE_MAX", "6"))
+STT_OVERFLOW_POLICY = os.getenv("STT_OVERFLOW_POLICY", "merge").strip().lower()
+STT_MERGE_MAX_SEC = float(os.getenv("STT_MERGE_MAX_SEC", "20"))
+_LATENCY_SAMPLES = 200
+
+
+def merge_wav(first: bytes, second: bytes, max_sec: float = STT_MERGE_MAX_SEC) -> Optional[bytes]:
+    """PCM WAV 두 개를 이어붙임 (포맷 불일치/비WAV/최대 길이 초과 시 None)"""
+    try:
+        with wave.open(io.BytesIO(first), "rb") as a, wave.open(io.BytesIO(second), "rb") as b:
+            params_a = a.getparams()
+            params_b = b.getparams()
+            if params_a[:3] != params_b[:3]:
+                return None
+            total_frames = params_a.nframes + params_b.nframes
+            if params_a.framerate and total_frames / params_a.framerate > max_sec:
+                return None
+            frames = a.readframes(params_a.nframes) + b.readframes(params_b.nframes)
+    except (wave.Error, EOFError):
+        return None
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(params_a.nchannels)
+        w.setsampwidth(params_a.sampwidth)
+        w.setframerate(params_a.framerate)
+        w.writeframes(frames)
+    return out.getvalue()
+
+
+def _percentile(values: Deque[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+@dataclass
+class _Chunk:
+    audio: bytes
+    enqueued_at: float
+    parts: int = 1
+    meta: Optional[Dict[str, Any]] = None  # VAD 세그먼트 시각 등 (콜백에 그대로 전달)
+
+
+@dataclass
+class _Session:
+    session_id: str
+    callback: ResultCallback
+    transcriber: Optional[Transcriber] = None
+    queue: Deque[_Chunk] = field(default_factory=deque)
+    scheduled: bool = False
+    closed: bool = False
+    submitted: int = 0
+    transcribed: int = 0
+    dropped: int = 0
+    merged: int = 0
+    errors: int = 0
+    inflight: int = 0
+    callbacks: Set[asyncio.Task] = field(default_factory=set)
+    idle: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __post_init__(self):
+        self.idle.set()
+
+
+class SttScheduler:
+    """모든 세션의 STT 요청을 하나의 이벤트 루프에서 라운드로빈으로 처리"""
+
+    def __init__(
+        self,
+        transcriber: Transcriber,
+        max_concurrency: int = STT_MAX_CONCURRENCY,
+        queue_max: int = STT_SESSION_QUEUE_MAX,
+        overflow_policy: str = STT_OVERFLOW_POLICY,
+    ):
+        self.transcriber = transcriber
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_max = max(1, queue_max)
+        if overflow_policy not in ("merge", "drop_oldest", "drop_newest"):
+            print(f"[stt_scheduler] 알 수 없는 STT_OVERFLOW_POLICY={overflow_policy}, drop_oldest 사용")
+            overflow_policy = "drop_oldest"
+        self.overflow_policy = overflow_policy
+        self._sessions: Dict[str, _Session] = {}
+        self._ready: Deque[_Session] = deque()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._inflight = 0
+        self._wait_ms: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._transcribe_ms: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._totals = {"submitted": 0, "transcribed": 0, "dropped": 0, "merged": 0, "errors": 0}
+
+    # ---- 세션 관리 ----
+    def register(self, session_id: str, callback: ResultCallback, transcriber: Optional[Transcriber] = None) -> None:
+        self._sessions[session_id] = _Session(session_id=session_id, callback=callback, transcriber=transcriber)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch_loop())
+
+    def unregister(self, session_id: str, drain: bool = False) -> Optional[_Session]:
+        """
+        세션 종료: 대기 중인 청크는 폐기 (진행 중인 전사 결과는 전달)
+        drain=True면 신규 제출만 막고 대기 중인 청크까지 전사
+        반환된 세션으로 wait_idle() 가능
+        """
+        session = self._sessions.pop(session_id, None)
+        if session is None or drain:
+            return session
+        session.closed = True
+        if session.queue:
+            session.dropped += len(session.queue)
+            self._totals["dropped"] += len(session.queue)
+            session.queue.clear()
+        self._check_idle(session)
+        return session
+
+    async def wait_idle(self, session: _Session, timeout: float) -> bool:
+        """세션의 대기 청크 / 진행 중 전사 / 결과 콜백이 모두 끝날 때까지 대기 (타임아웃 시 False)"""
+        try:
+            await asyncio.wait_for(session.idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _check_idle(self, session: _Session) -> None:
+        if not session.queue and session.inflight == 0 and not session.callbacks:
+            session.idle.set()
+
+    def submit(self, session_id: str, audio: bytes, meta: Optional[Dict[str, Any]] = None) -> bool:
+        """오디오 청크 등록 (drop_newest로 버려지면 False)"""
+        session = self._sessions.get(session_id)
+        if session is None or session.closed or not audio:
+            return False
+        session.submitted += 1
+        self._totals["submitted"] += 1
+        now = time.perf_counter()
+        if len(session.queue) >= self.queue_max:
+            if not self._handle_overflow(session, audio, meta):
+                return False
+        else:
+            session.queue.append(_Chunk(audio=audio, enqueued_at=now, meta=meta))
+        session.idle.clear()
+        if not session.scheduled:
+            session.scheduled = True
+            self._ready.append(session)
+            self._wakeup.set()
+        return True
+
+    def _handle_overflow(self, session: _Session, audio: bytes, meta: Optional[Dict[str, Any]]) -> bool:
+        if self.overflow_policy == "merge":
+            tail = session.queue[-1]
+            merged = merge_wav(tail.audio, audio)
+            if merged is not None:
+                tail.audio = merged
+                tail.parts += 1
+                if tail.meta is not None and meta is not None:
+                    tail.meta = {**tail.meta, "end_ms": meta.get("end_ms", tail.meta.get("end_ms")), "merged": tail.parts}
+                session.merged += 1
+                self._totals["merged"] += 1
+                return True
+        if self.overflow_policy == "drop_newest":
+            session.dropped += 1
+            self._totals["dropped"] += 1
+            return False
+        # drop_oldest (merge 불가 시 포함)
+        session.queue.popleft()
+        session.queue.append(_Chunk(audio=audio, enqueued_at=time.perf_counter(), meta=meta))
+        session.dropped += 1
+        self._totals["dropped"] += 1
+        return True
+
+    # ---- 디스패치 ----
+    async def _next_ready(self) -> _Session:
+        while True:
+            while not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            session = self._ready.popleft()
+            if session.closed or not session.queue:
+                session.scheduled = False
+                self._check_idle(session)
+                continue
+            return session
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._semaphore.acquire()
+            try:
+                session = await self._next_ready()
+            except asyncio.CancelledError:
+                self._semaphore.release()
+                raise
+            chunk = session.queue.popleft()
+            task = asyncio.get_running_loop().create_task(self._run(session, chunk))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, session: _Session, chunk: _Chunk) -> None:
+        self._inflight += 1
+        session.inflight += 1
+        started = time.perf_counter()
+        self._wait_ms.append((started - chunk.enqueued_at) * 1000)
+        try:
+            text = await (session.transcriber or self.transcriber)(chunk.audio)
+            self._transcribe_ms.append((time.perf_counter() - started) * 1000)
+            session.transcribed += 1
+            self._totals["transcribed"] += 1
+            if text:
+                # 콜백(RAG 등)은 전사 슬롯을 점유하지 않도록 별도 태스크로 실행
+                coro = session.callback(text) if chunk.meta is None else session.callback(text, chunk.meta)
+                task = asyncio.get_running_loop().create_task(coro)
+                self._tasks.add(task)
+                session.callbacks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                task.add_done_callback(lambda t: self._callback_done(session, t))
+        except Exception as e:
+            session.errors += 1
+            self._totals["errors"] += 1
+            print(f"[{session.session_id}] STT 처리 오류 발생: {e}")
+        finally:
+            self._inflight -= 1
+            session.inflight -= 1
+            self._semaphore.release()
+            if session.queue and not session.closed:
+                self._ready.append(session)
+                self._wakeup.set()
+            else:
+                session.scheduled = False
+            self._check_idle(session)
+
+    def _callback_done(self, session: _Session, task: asyncio.Task) -> None:
+        session.callbacks.discard(task)
+        self._check_idle(session)
+
+    # ---- 지표 ----
+    def stats(self) -> Dict[str, object]:
+        depths = {sid: len(s.queue) for sid, s in self._sessions.items()}
+        return {
+            "sessions": len(self._sessions),
+            "inflight": self._inflight,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth_total": sum(depths.values()),
+            "queue_depth_max": max(depths.values(), default=0),
+            "overflow_policy": self.overflow_policy,
+            **self._totals,
+            "wait_ms_p50": _percentile(self._wait_ms, 50),
+            "wait_ms_p95": _percentile(self._wait_ms, 95),
+            "transcribe_ms_p50": _percentile(self._transcribe_ms, 50),
+            "transcribe_ms_p95": _percentile(self._transcribe_ms, 95),
+        }
+
+
+_SCHEDULER: Optional[SttScheduler] = None
+_SCHEDULER_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _default_transcriber() -> Transcriber:
+    from app.audio.stt_backends import get_stt_backend
+
+    return get_stt_backend().transcribe
+
+
+def get_stt_scheduler(loop: Optional[asyncio.AbstractEventLoop] = None) -> SttScheduler:
+    """이벤트 루프당 하나의 스케줄러 (이벤트 루프 스레드에서 호출)"""
+    global _SCHEDULER, _SCHEDULER_LOOP
+    loop = loop or asyncio.get_running_loop()
+    if _SCHEDULER is None or _SCHEDULER_LOOP is not loop:
+        _SCHEDULER = SttScheduler(_default_transcriber())
+        _SCHEDULER_LOOP = loop
+    return _SCHEDULER
+
+
+def stt_stats() -> Dict[str, object]:
+    if _SCHEDULER is None:
+        return {"sessions": 0, "inflight": 0}
+    return _SCHEDULER.stats()
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex[:8]
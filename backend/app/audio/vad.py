@@ -0,0 +1,285 @@
+"""
+스트리밍 VAD 세그먼터 (/ws/call)
+
+브라우저가 보내는 WAV(16kHz mono 16-bit) 청크를 PCM 링 버퍼에 이어 붙이고
+30ms 프레임 단위 VAD로 발화 구간만 잘라 STT에 넘긴다.
+- VAD: webrtcvad (설치 시) 또는 RMS 에너지 임계값
+- 엔드포인팅: 연속 음성 프레임으로 시작, hangover(무음 지속) 후 종료, 최대 길이 강제 분할
+- 프레임/세그먼트는 링 버퍼의 memoryview 슬라이스로 다뤄 복사를 최소화
+- 세그먼트 시작/종료 시각(스트림 기준 ms)을 함께 반환 → 화자 분리로 전달
+
+환경변수:
+    CALL_VAD_ENABLED=1
+    CALL_VAD_BACKEND=webrtc|energy
+    CALL_VAD_MODE=2                 (webrtcvad 공격성 0~3)
+    CALL_VAD_ENERGY_THRESHOLD=0.02  (energy 모드 RMS, -1~1 스케일)
+    CALL_VAD_HANGOVER_MS=450
+    CALL_VAD_PREROLL_MS=210
+    CALL_VAD_MIN_SPEECH_MS=240
+    CALL_VAD_MAX_SEGMENT_MS=12000
+"""
+from __future__ import annotations
+
+import io
+import math
+import os
+import struct
+import wave
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+FRAME_MS = 30
+_WRITE_BLOCK_FRAMES = 10  # 링 버퍼 기록 단위 (VAD가 기록 위치를 따라가도록)
+
+CALL_VAD_ENABLED = os.getenv("CALL_VAD_ENABLED", "1") != "0"
+CALL_VAD_BACKEND = os.getenv("CALL_VAD_BACKEND", "webrtc").strip().lower()
+CALL_VAD_MODE = int(os.getenv("CALL_VAD_MODE", "2"))
+CALL_VAD_ENERGY_THRESHOLD = float(os.getenv("CALL_VAD_ENERGY_THRESHOLD", "0.02"))
+CALL_VAD_HANGOVER_MS = int(os.getenv("CALL_VAD_HANGOVER_MS", "450"))
+CALL_VAD_PREROLL_MS = int(os.getenv("CALL_VAD_PREROLL_MS", "210"))
+CALL_VAD_MIN_SPEECH_MS = int(os.getenv("CALL_VAD_MIN_SPEECH_MS", "240"))
+CALL_VAD_MAX_SEGMENT_MS = int(os.getenv("CALL_VAD_MAX_SEGMENT_MS", "12000"))
+
+
+def wav_header(data_len: int, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """16-bit mono PCM WAV 헤더 (44 bytes)"""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_len, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * SAMPLE_WIDTH, SAMPLE_WIDTH, 16,
+        b"data", data_len,
+    )
+
+
+def extract_pcm(payload: bytes) -> Optional[memoryview]:
+    """
+    WAV면 data 청크를 memoryview로 반환 (16kHz mono 16-bit가 아니면 None)
+    RIFF 헤더가 없으면 raw PCM으로 간주
+    """
+    view = memoryview(payload)
+    if view[:4] != b"RIFF":
+        return view[: len(view) - (len(view) % SAMPLE_WIDTH)]
+    try:
+        with wave.open(io.BytesIO(payload), "rb") as w:
+            if (w.getframerate(), w.getnchannels(), w.getsampwidth()) != (SAMPLE_RATE, 1, SAMPLE_WIDTH):
+                return None
+            n_bytes = w.getnframes() * SAMPLE_WIDTH
+    except (wave.Error, EOFError):
+        return None
+    # 표준 헤더 이후 data 청크 위치 탐색 (LIST 등 부가 청크 허용)
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_len = struct.unpack_from("<I", view, offset + 4)[0]
+        if chunk_id == b"data":
+            start = offset + 8
+            return view[start:start + min(chunk_len, n_bytes)]
+        offset += 8 + chunk_len + (chunk_len & 1)
+    return None
+
+
+class PcmRingBuffer:
+    """고정 크기 PCM 링 버퍼 (절대 바이트 오프셋으로 조회)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity - (capacity % SAMPLE_WIDTH)
+        self._buf = bytearray(self.capacity)
+        self._view = memoryview(self._buf)
+        self.total = 0  # 지금까지 기록한 바이트 수 (절대 오프셋)
+
+    def write(self, data: memoryview) -> None:
+        if len(data) > self.capacity:
+            skipped = len(data) - self.capacity
+            self.total += skipped
+            data = data[skipped:]
+        pos = self.total % self.capacity
+        first = min(len(data), self.capacity - pos)
+        self._view[pos:pos + first] = data[:first]
+        if first < len(data):
+            self._view[: len(data) - first] = data[first:]
+        self.total += len(data)
+
+    def oldest(self) -> int:
+        return max(0, self.total - self.capacity)
+
+    def slices(self, start: int, end: int) -> List[memoryview]:
+        """[start, end) 구간의 memoryview 1~2개 (덮어쓰인 구간은 잘림)"""
+        start = max(start, self.oldest())
+        if end <= start:
+            return []
+        s = start % self.capacity
+        e = s + (end - start)
+        if e <= self.capacity:
+            return [self._view[s:e]]
+        return [self._view[s:], self._view[: e - self.capacity]]
+
+
+@dataclass
+class SpeechSegment:
+    audio: bytes          # WAV (STT 입력)
+    start_ms: int         # 스트림 시작 기준
+    end_ms: int
+    voiced_ms: int
+    forced_cut: bool = False
+    passthrough: bool = False  # 포맷 불일치로 원본 청크를 그대로 전달
+
+    def timing(self) -> Dict[str, Any]:
+        return {
+            "start_ms": self.start_ms,
+            "end_ms": self.end_ms,
+            "voiced_ms": self.voiced_ms,
+            "forced_cut": self.forced_cut,
+            "passthrough": self.passthrough,
+        }
+
+
+class _EnergyVad:
+    def __init__(self, threshold: float):
+        self.threshold = threshold * 32768.0
+
+    def is_speech(self, frame: memoryview, sample_rate: int) -> bool:
+        samples = frame.cast("h")
+        if not len(samples):
+            return False
+        return math.sqrt(sum(v * v for v in samples) / len(samples)) > self.threshold
+
+
+def _create_vad(backend: str, mode: int, energy_threshold: float):
+    if backend == "webrtc":
+        try:
+            import webrtcvad
+
+            return webrtcvad.Vad(mode), True
+        except ImportError:
+            print("[vad] webrtcvad 미설치: energy VAD 사용")
+    return _EnergyVad(energy_threshold), False
+
+
+class VadSegmenter:
+    """WAV/PCM 청크 스트림 → 발화 세그먼트"""
+
+    def __init__(
+        self,
+        backend: str = CALL_VAD_BACKEND,
+        mode: int = CALL_VAD_MODE,
+        energy_threshold: float = CALL_VAD_ENERGY_THRESHOLD,
+        hangover_ms: int = CALL_VAD_HANGOVER_MS,
+        preroll_ms: int = CALL_VAD_PREROLL_MS,
+        min_speech_ms: int = CALL_VAD_MIN_SPEECH_MS,
+        max_segment_ms: int = CALL_VAD_MAX_SEGMENT_MS,
+        start_frames: int = 3,
+    ):
+        self.vad, self._needs_bytes = _create_vad(backend, mode, energy_threshold)
+        self.frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * SAMPLE_WIDTH
+        self.hangover_frames = max(1, hangover_ms // FRAME_MS)
+        self.preroll_bytes = self._ms_to_bytes(preroll_ms)
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.max_segment_bytes = self._ms_to_bytes(max_segment_ms)
+        self.start_frames = max(1, start_frames)
+        # 프레임이 링 경계에서 잘리지 않도록 프레임 배수 용량
+        ring_frames = -(-(self.max_segment_bytes + self.preroll_bytes) // self.frame_bytes) + 2 * _WRITE_BLOCK_FRAMES
+        self.ring = PcmRingBuffer(ring_frames * self.frame_bytes)
+        self._vad_pos = 0                     # 다음 VAD 프레임 시작 (절대 오프셋)
+        self._recent = deque(maxlen=self.start_frames)
+        self._triggered = False
+        self._seg_start = 0
+        self._last_voice_end = 0
+        self._silence_frames = 0
+        self._voiced_frames = 0
+        self.passthrough = 0                  # 포맷 불일치로 그대로 넘긴 청크 수
+
+    @staticmethod
+    def _ms_to_bytes(ms: int) -> int:
+        return SAMPLE_RATE * ms // 1000 * SAMPLE_WIDTH
+
+    @staticmethod
+    def _bytes_to_ms(n: int) -> int:
+        return n * 1000 // (SAMPLE_RATE * SAMPLE_WIDTH)
+
+    def _frame_is_speech(self, frame: memoryview) -> bool:
+        # webrtcvad는 읽기 전용 버퍼만 받으므로 30ms 프레임만 복사
+        return self.vad.is_speech(bytes(frame) if self._needs_bytes else frame, SAMPLE_RATE)
+
+    def _emit(self, end: int, forced: bool) -> Optional[SpeechSegment]:
+        start = max(self._seg_start, self.ring.oldest())
+        voiced = self._voiced_frames
+        self._voiced_frames = 0
+        if voiced < self.min_speech_frames or end <= start:
+            return None
+        parts = self.ring.slices(start, end)
+        data_len = sum(len(p) for p in parts)
+        audio = b"".join([wav_header(data_len), *parts])
+        return SpeechSegment(
+            audio=audio,
+            start_ms=self._bytes_to_ms(start),
+            end_ms=self._bytes_to_ms(end),
+            voiced_ms=voiced * FRAME_MS,
+            forced_cut=forced,
+        )
+
+    def feed(self, payload: bytes) -> List[SpeechSegment]:
+        pcm = extract_pcm(payload)
+        if pcm is None:
+            # 16kHz mono 16-bit가 아닌 청크는 분할하지 않고 그대로 STT로 전달
+            self.passthrough += 1
+            return [SpeechSegment(audio=payload, start_ms=-1, end_ms=-1, voiced_ms=0, passthrough=True)]
+        segments: List[SpeechSegment] = []
+        block = self.frame_bytes * _WRITE_BLOCK_FRAMES
+        for offset in range(0, len(pcm), block):
+            self.ring.write(pcm[offset:offset + block])
+            segments.extend(self._process_frames())
+        return segments
+
+    def _process_frames(self) -> List[SpeechSegment]:
+        segments: List[SpeechSegment] = []
+        while self._vad_pos + self.frame_bytes <= self.ring.total:
+            frame_start = self._vad_pos
+            frame_end = frame_start + self.frame_bytes
+            self._vad_pos = frame_end
+            parts = self.ring.slices(frame_start, frame_end)
+            if len(parts) != 1 or len(parts[0]) != self.frame_bytes:
+                continue
+            speech = self._frame_is_speech(parts[0])
+
+            if not self._triggered:
+                self._recent.append(speech)
+                if speech and len(self._recent) == self.start_frames and all(self._recent):
+                    self._triggered = True
+                    voiced_start = frame_end - self.start_frames * self.frame_bytes
+                    self._seg_start = max(voiced_start - self.preroll_bytes, self.ring.oldest())
+                    self._last_voice_end = frame_end
+                    self._silence_frames = 0
+                    self._voiced_frames = self.start_frames
+                    self._recent.clear()
+                continue
+
+            if speech:
+                self._voiced_frames += 1
+                self._silence_frames = 0
+                self._last_voice_end = frame_end
+            else:
+                self._silence_frames += 1
+
+            if self._silence_frames >= self.hangover_frames:
+                end = min(self._last_voice_end + self.preroll_bytes, frame_end)
+                segment = self._emit(end, forced=False)
+                if segment:
+                    segments.append(segment)
+                self._triggered = False
+            elif frame_end - self._seg_start >= self.max_segment_bytes:
+                segment = self._emit(frame_end, forced=True)
+                if segment:
+                    segments.append(segment)
+                self._seg_start = frame_end
+        return segments
+
+    def flush(self) -> List[SpeechSegment]:
+        """스트림 종료: 진행 중인 발화를 마감"""
+        if not self._triggered:
+            return []
+        self._triggered = False
+        segment = self._emit(min(self._last_voice_end + self.preroll_bytes, self.ring.total), forced=False)
+        return [segment] if segment else []
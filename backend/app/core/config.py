@@ -20,4 +20,6 @@ BATCH_SIZE = int(os.getenv("DB_LOAD_BATCH_SIZE", "100"))
 COMMIT_INTERVAL = int(os.getenv("DB_COMMIT_INTERVAL", "500"))
 
 # REDIS
-DIALOGUE_REDIS_URL = os.getenv("DIALOGUE_REDIS_URL")
\ No newline at end of file
+DIALOGUE_REDIS_URL = os.getenv("DIALOGUE_REDIS_URL")
+# 통화 중 점진 저장(stt:{id}:items)·세그먼트 타임라인(stt:{id}:segments) 보관 시간
+DIALOGUE_PARTIAL_TTL_SEC = int(os.getenv("DIALOGUE_PARTIAL_TTL_SEC", "86400"))
@@ -42,6 +42,7 @@ from modules.load_consultations import load_hana_data
 from modules.update_stats import update_employee_performance, update_customer_consultation_stats
 from modules.load_keywords import load_keyword_dictionary
 from modules.load_teddycard import load_teddycard_data
+from modules.compact_embeddings import sync_compact_embeddings
 from modules.load_frequent_inquiries import load_frequent_inquiries_data
 from modules.calculate_trends import calculate_all_trends
 from modules.generate_mock import generate_mock_simulation_data, generate_mock_audit_data
@@ -106,6 +107,9 @@ def main():
             if not args.skip_teddycard:
                 load_teddycard_data(conn)
 
+            # 5-1. halfvec 임베딩 컬럼 동기화 (15_migrate_compact_embeddings.py 적용 DB만)
+            sync_compact_embeddings(conn)
+
             # 6. 자주 찾는 문의 데이터 적재
             load_frequent_inquiries_data(conn)
 
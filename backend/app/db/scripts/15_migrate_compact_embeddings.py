@@ -0,0 +1,80 @@
+"""
+halfvec / 축소 차원 임베딩 마이그레이션 스크립트
+
+기능:
+- service_guide_documents, card_products, notices, consultation_documents에
+  embedding_compact halfvec(N) 컬럼 추가 (기존 embedding vector(1536)은 유지 → 롤백/비교용)
+- 기본: 기존 임베딩 앞 N차원 절단 + L2 정규화로 변환 (text-embedding-3 `dimensions`와 동일)
+- --reembed: OpenAI `dimensions=N`으로 재임베딩
+- HNSW(halfvec_cosine_ops) 인덱스 생성
+- --compare: 기존 vector(1536) 정확 검색 대비 recall@k, 인덱스 크기, 쿼리 지연 비교
+
+사용법:
+    python 15_migrate_compact_embeddings.py --dims 768
+    python 15_migrate_compact_embeddings.py --dims 768 --compare-only --k 10
+
+적용 후 백엔드 환경변수:
+    RAG_EMBED_STORAGE=halfvec
+    RAG_EMBED_DIMENSIONS=768
+"""
+
+import argparse
+import sys
+
+from modules import connect_db, DB_HOST, DB_PORT, DB_NAME
+from modules.compact_embeddings import COMPACT_TABLES, compare_recall, migrate_table
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='halfvec 임베딩 마이그레이션')
+    parser.add_argument('--dims', type=int, default=768, help='halfvec 차원 (기본 768, 최대 1536)')
+    parser.add_argument('--tables', nargs='+', default=list(COMPACT_TABLES.keys()),
+                        choices=list(COMPACT_TABLES.keys()), help='대상 테이블')
+    parser.add_argument('--reembed', action='store_true', help='OpenAI dimensions 파라미터로 재임베딩')
+    parser.add_argument('--model', default='text-embedding-3-small', help='재임베딩 모델')
+    parser.add_argument('--compare', action='store_true', help='마이그레이션 후 recall/지연 비교')
+    parser.add_argument('--compare-only', action='store_true', help='비교만 실행')
+    parser.add_argument('--k', type=int, default=10, help='recall@k의 k')
+    parser.add_argument('--samples', type=int, default=50, help='비교 쿼리 샘플 수')
+
+    args = parser.parse_args()
+    if not 1 <= args.dims <= 1536:
+        print(f"[ERROR] --dims는 1~1536 범위여야 합니다: {args.dims}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("halfvec 임베딩 마이그레이션")
+    print("=" * 60)
+    print(f"[INFO] Database: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    print(f"[INFO] dims={args.dims} tables={', '.join(args.tables)} reembed={args.reembed}")
+
+    conn = connect_db()
+
+    try:
+        if not args.compare_only:
+            for table in args.tables:
+                migrate_table(conn, table, args.dims, reembed=args.reembed, model=args.model)
+
+        if args.compare or args.compare_only:
+            print("\n[INFO] recall / 지연 비교")
+            for table in args.tables:
+                compare_recall(conn, table, args.dims, sample_size=args.samples, k=args.k)
+
+        print("\n" + "=" * 60)
+        print("[SUCCESS] 완료")
+        print(f"  백엔드 적용: RAG_EMBED_STORAGE=halfvec RAG_EMBED_DIMENSIONS={args.dims}")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n[ERROR] 작업 중 오류 발생: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
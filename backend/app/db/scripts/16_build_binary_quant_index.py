@@ -0,0 +1,81 @@
+"""
+이진 양자화(bit) 인덱스 생성 및 2단계 검색 벤치마크 스크립트
+
+기능:
+- binary_quantize(embedding)::bit(D) 표현식 HNSW(bit_hamming_ops) 인덱스 생성
+- 2단계 검색(Hamming 후보 → 원본 벡터 코사인 재정렬)의 recall@k / 지연을
+  현재 HNSW 경로와 비교 (정확 검색 기준)
+
+사용법:
+    python 16_build_binary_quant_index.py --tables consultation_documents
+    python 16_build_binary_quant_index.py --bench-only --k 10 --factors 4 10 20
+    python 16_build_binary_quant_index.py --column embedding_compact --dims 768
+
+적용 후 백엔드 환경변수 (테이블별 후보 배수 지정 가능):
+    RAG_BQ_TABLES=consultation_documents:10,service_guide_documents
+"""
+
+import argparse
+import sys
+
+from modules import connect_db, DB_HOST, DB_PORT, DB_NAME
+from modules.binary_quant_index import BQ_TABLES, build_binary_index, compare_binary_recall
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='이진 양자화 인덱스 생성 및 벤치마크')
+    parser.add_argument('--tables', nargs='+', default=BQ_TABLES, choices=BQ_TABLES, help='대상 테이블')
+    parser.add_argument('--column', default='embedding', choices=['embedding', 'embedding_compact'],
+                        help='임베딩 컬럼 (embedding_compact는 15_migrate_compact_embeddings.py 적용 후)')
+    parser.add_argument('--dims', type=int, default=1536, help='임베딩 차원 (embedding_compact는 RAG_EMBED_DIMENSIONS)')
+    parser.add_argument('--bench-only', action='store_true', help='인덱스 생성 없이 벤치마크만 실행')
+    parser.add_argument('--skip-bench', action='store_true', help='벤치마크 건너뛰기')
+    parser.add_argument('--k', type=int, default=10, help='recall@k의 k')
+    parser.add_argument('--factors', nargs='+', type=int, default=[4, 10, 20], help='1단계 후보 배수 (k × factor)')
+    parser.add_argument('--samples', type=int, default=50, help='벤치마크 쿼리 샘플 수')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("이진 양자화(bit) 인덱스 생성 및 벤치마크")
+    print("=" * 60)
+    print(f"[INFO] Database: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    print(f"[INFO] column={args.column} dims={args.dims} tables={', '.join(args.tables)}")
+
+    conn = connect_db()
+
+    try:
+        if not args.bench_only:
+            for table in args.tables:
+                build_binary_index(conn, table, args.column, args.dims)
+
+        if not args.skip_bench:
+            print("\n[INFO] recall / 지연 비교 (기준: 정확 검색)")
+            for table in args.tables:
+                compare_binary_recall(
+                    conn,
+                    table,
+                    args.column,
+                    args.dims,
+                    factors=args.factors,
+                    sample_size=args.samples,
+                    k=args.k,
+                )
+
+        print("\n" + "=" * 60)
+        print("[SUCCESS] 완료")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n[ERROR] 작업 중 오류 발생: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
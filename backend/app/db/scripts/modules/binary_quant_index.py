@@ -0,0 +1,174 @@
+"""
+이진 양자화(bit) 인덱스 생성 및 2단계 검색 recall 벤치마크 모듈
+
+- binary_quantize(embedding)::bit(D) 표현식 HNSW(bit_hamming_ops) 인덱스 생성
+- 2단계 검색(Hamming 후보 N개 → 원본 벡터 코사인 재정렬)과
+  현재 HNSW 경로를 정확 검색(ground truth) 대비 recall@k / 지연으로 비교
+- 백엔드 검색 SQL(app/rag/retriever/embedding_store.binary_expr)과 동일한 표현식을 사용해야
+  플래너가 인덱스를 선택함
+"""
+
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from psycopg2.extensions import connection as psycopg2_connection
+
+BQ_TABLES = ["consultation_documents", "service_guide_documents", "notices"]
+
+
+def _binary_expr(expr: str, dims: int) -> str:
+    return f"binary_quantize({expr})::bit({dims})"
+
+
+def _index_name(table: str, column: str) -> str:
+    return f"idx_{table}_{column}_bq_hnsw"
+
+
+def build_binary_index(conn: psycopg2_connection, table: str, column: str, dims: int) -> None:
+    """bit 표현식 HNSW 인덱스 (재)생성"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP INDEX IF EXISTS {_index_name(table, column)}")
+        cursor.execute(
+            f"CREATE INDEX {_index_name(table, column)} ON {table} "
+            f"USING hnsw (({_binary_expr(column, dims)}) bit_hamming_ops) "
+            "WITH (m = 16, ef_construction = 64)"
+        )
+        conn.commit()
+        print(f"[INFO] {table}: {_index_name(table, column)} 생성 완료")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _index_size(conn: psycopg2_connection, index_name: str) -> int:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_relation_size(to_regclass(%s))", (index_name,))
+        row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else 0
+    except Exception:
+        conn.rollback()
+        return 0
+    finally:
+        cursor.close()
+
+
+def _column_type(cursor, table: str, column: str) -> str:
+    """쿼리 벡터 파라미터 캐스트용 컬럼 타입 (예: vector(1536), halfvec(768))"""
+    cursor.execute(
+        "SELECT format_type(a.atttypid, a.atttypmod) FROM pg_attribute a "
+        "WHERE a.attrelid = %s::regclass AND a.attname = %s AND NOT a.attisdropped",
+        (table, column),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else "vector"
+
+
+def _timed_ids(cursor, sql: str, params: tuple) -> Tuple[Set[object], float]:
+    start = time.perf_counter()
+    cursor.execute(sql, params)
+    ids = {row[0] for row in cursor.fetchall()}
+    return ids, (time.perf_counter() - start) * 1000
+
+
+def compare_binary_recall(
+    conn: psycopg2_connection,
+    table: str,
+    column: str,
+    dims: int,
+    factors: Optional[List[int]] = None,
+    sample_size: int = 50,
+    k: int = 10,
+    seed: int = 42,
+) -> Dict[str, float]:
+    """
+    정확 검색(인덱스 미사용) 대비 현재 HNSW 경로 / 2단계 bit 검색의 recall@k 비교
+    factors: 1단계 후보 수 배수 목록 (후보 수 = k × factor)
+    """
+    factors = factors or [4, 10, 20]
+    bq = _binary_expr(column, dims)
+    cursor = conn.cursor()
+    try:
+        # 쿼리 벡터는 리터럴 파라미터로 바인딩 (조인 컬럼으로는 HNSW/bit 인덱스 스캔이 안 됨)
+        query_param = f"%s::{_column_type(cursor, table, column)}"
+        cursor.execute(f"SELECT id FROM {table} WHERE {column} IS NOT NULL")
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            print(f"[WARN] {table}.{column}: 임베딩이 없습니다 - 비교 스킵")
+            return {}
+        random.Random(seed).shuffle(ids)
+        sample_ids = ids[:sample_size]
+
+        hnsw_recall: List[float] = []
+        hnsw_ms: List[float] = []
+        bq_recall: Dict[int, List[float]] = {f: [] for f in factors}
+        bq_ms: Dict[int, List[float]] = {f: [] for f in factors}
+        for doc_id in sample_ids:
+            cursor.execute(f"SELECT {column}::text FROM {table} WHERE id = %s", (doc_id,))
+            row = cursor.fetchone()
+            if not row or row[0] is None:
+                continue
+            query_vec = row[0]
+
+            cursor.execute("SET LOCAL enable_indexscan = off")
+            truth, _ = _timed_ids(
+                cursor,
+                f"SELECT id FROM {table} "
+                f"WHERE {column} IS NOT NULL ORDER BY {column} <=> {query_param} LIMIT %s",
+                (query_vec, k),
+            )
+            conn.rollback()
+            if not truth:
+                continue
+
+            got, elapsed = _timed_ids(
+                cursor,
+                f"SELECT id FROM {table} ORDER BY {column} <=> {query_param} LIMIT %s",
+                (query_vec, k),
+            )
+            hnsw_recall.append(len(truth & got) / len(truth))
+            hnsw_ms.append(elapsed)
+
+            for factor in factors:
+                got, elapsed = _timed_ids(
+                    cursor,
+                    f"SELECT c.id FROM ("
+                    f"SELECT id, {column} FROM {table} "
+                    f"ORDER BY {bq} <~> {_binary_expr(query_param, dims)} LIMIT %s"
+                    f") c "
+                    f"ORDER BY c.{column} <=> {query_param} LIMIT %s",
+                    (query_vec, k * factor, query_vec, k),
+                )
+                bq_recall[factor].append(len(truth & got) / len(truth))
+                bq_ms[factor].append(elapsed)
+        conn.rollback()
+    finally:
+        cursor.close()
+
+    def _avg(values: List[float]) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    result: Dict[str, float] = {
+        "samples": float(len(hnsw_recall)),
+        f"hnsw_recall@{k}": _avg(hnsw_recall),
+        "hnsw_avg_ms": _avg(hnsw_ms),
+        "hnsw_index_bytes": float(_index_size(conn, f"idx_{table}_{column}_hnsw")),
+        "bq_index_bytes": float(_index_size(conn, _index_name(table, column))),
+    }
+    print(f"[INFO] {table}.{column} ({bq}) samples={len(hnsw_recall)}")
+    print(f"  - HNSW:      recall@{k}={result[f'hnsw_recall@{k}']:.3f} avg={result['hnsw_avg_ms']:.1f}ms")
+    for factor in factors:
+        result[f"bq_x{factor}_recall@{k}"] = _avg(bq_recall[factor])
+        result[f"bq_x{factor}_avg_ms"] = _avg(bq_ms[factor])
+        print(
+            f"  - BQ x{factor:<3} (후보 {k * factor}): recall@{k}={_avg(bq_recall[factor]):.3f} "
+            f"avg={_avg(bq_ms[factor]):.1f}ms"
+        )
+    print(
+        f"  - index bytes: hnsw={int(result['hnsw_index_bytes']):,} bq={int(result['bq_index_bytes']):,}"
+    )
+    return result
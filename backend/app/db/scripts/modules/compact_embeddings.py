@@ -0,0 +1,298 @@
+"""
+halfvec / 축소 차원 임베딩 마이그레이션 모듈
+
+vector(1536) embedding 컬럼 옆에 embedding_compact halfvec(N) 컬럼을 추가하고
+HNSW(halfvec_cosine_ops) 인덱스를 생성한다.
+- 기본: text-embedding-3 계열은 앞쪽 N차원 절단 + L2 정규화가 `dimensions=N` 결과와 동일하므로
+  DB 안에서 subvector/l2_normalize로 변환 (API 호출 없음)
+- --reembed: OpenAI `dimensions=N`으로 content를 다시 임베딩
+- 비교: 기존 vector(1536) 정확 검색 대비 recall@k, 인덱스 크기, 쿼리 지연
+"""
+
+import os
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+from psycopg2.extensions import connection as psycopg2_connection
+from psycopg2.extras import execute_batch
+
+from . import BATCH_SIZE
+
+FULL_DIMENSIONS = 1536
+COMPACT_COLUMN = "embedding_compact"
+
+# 테이블별 재임베딩 원문 컬럼
+COMPACT_TABLES: Dict[str, str] = {
+    "service_guide_documents": "COALESCE(title, '') || E'\\n' || COALESCE(content, '')",
+    "card_products": "COALESCE(name, '') || E'\\n' || COALESCE(main_benefits, '') || E'\\n' || COALESCE(performance_condition, '')",
+    "notices": "COALESCE(title, '') || E'\\n' || COALESCE(content, '')",
+    "consultation_documents": "COALESCE(title, '') || E'\\n' || COALESCE(content, '')",
+}
+
+
+def compact_dimensions() -> int:
+    return int(os.getenv("RAG_EMBED_DIMENSIONS", str(FULL_DIMENSIONS)))
+
+
+def _index_name(table: str) -> str:
+    return f"idx_{table}_{COMPACT_COLUMN}_hnsw"
+
+
+def has_compact_column(conn: psycopg2_connection, table: str) -> bool:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+            (table, COMPACT_COLUMN),
+        )
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+def add_compact_column(conn: psycopg2_connection, table: str, dims: int) -> None:
+    """embedding_compact halfvec(dims) 컬럼 추가 (차원이 다르면 재생성)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT format_type(a.atttypid, a.atttypmod) FROM pg_attribute a "
+            "WHERE a.attrelid = %s::regclass AND a.attname = %s AND NOT a.attisdropped",
+            (table, COMPACT_COLUMN),
+        )
+        row = cursor.fetchone()
+        expected = f"halfvec({dims})"
+        if row and row[0] != expected:
+            print(f"[INFO] {table}.{COMPACT_COLUMN} 타입 변경: {row[0]} → {expected}")
+            cursor.execute(f"DROP INDEX IF EXISTS {_index_name(table)}")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN {COMPACT_COLUMN}")
+            row = None
+        if not row:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {COMPACT_COLUMN} halfvec({dims})")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def populate_from_full(conn: psycopg2_connection, table: str, dims: int, only_missing: bool = True) -> int:
+    """기존 vector(1536)에서 절단 + L2 정규화로 halfvec 채우기"""
+    if dims == FULL_DIMENSIONS:
+        expr = f"embedding::halfvec({dims})"
+    else:
+        expr = f"l2_normalize(subvector(embedding, 1, {dims}))::halfvec({dims})"
+    where = "embedding IS NOT NULL"
+    if only_missing:
+        where += f" AND {COMPACT_COLUMN} IS NULL"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"UPDATE {table} SET {COMPACT_COLUMN} = {expr} WHERE {where}")
+        updated = cursor.rowcount
+        conn.commit()
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def populate_by_reembedding(
+    conn: psycopg2_connection,
+    table: str,
+    dims: int,
+    model: str = "text-embedding-3-small",
+    only_missing: bool = True,
+) -> int:
+    """OpenAI dimensions 파라미터로 재임베딩하여 채우기"""
+    from openai import OpenAI
+
+    client = OpenAI()
+    source_expr = COMPACT_TABLES[table]
+    where = f"WHERE {COMPACT_COLUMN} IS NULL" if only_missing else ""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT id, {source_expr} FROM {table} {where} ORDER BY id")
+        rows = [(doc_id, text) for doc_id, text in cursor.fetchall() if (text or "").strip()]
+        updated = 0
+        for i in range(0, len(rows), BATCH_SIZE):
+            batch = rows[i:i + BATCH_SIZE]
+            resp = client.embeddings.create(
+                model=model,
+                input=[text[:8000] for _, text in batch],
+                dimensions=dims,
+            )
+            params = [
+                ("[" + ",".join(map(str, item.embedding)) + "]", doc_id)
+                for (doc_id, _), item in zip(batch, resp.data)
+            ]
+            execute_batch(
+                cursor,
+                f"UPDATE {table} SET {COMPACT_COLUMN} = %s::halfvec({dims}) WHERE id = %s",
+                params,
+                page_size=len(params),
+            )
+            conn.commit()
+            updated += len(params)
+            print(f"[INFO] {table} 재임베딩 {updated}/{len(rows)}")
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def build_compact_index(conn: psycopg2_connection, table: str) -> None:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP INDEX IF EXISTS {_index_name(table)}")
+        cursor.execute(
+            f"CREATE INDEX {_index_name(table)} ON {table} "
+            f"USING hnsw ({COMPACT_COLUMN} halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def sync_compact_embeddings(conn: psycopg2_connection, tables: Optional[Sequence[str]] = None) -> None:
+    """
+    적재 후 호출: embedding_compact 컬럼이 있는 테이블만 누락분을 채움 (컬럼이 없으면 no-op)
+    """
+    dims = compact_dimensions()
+    for table in tables or COMPACT_TABLES.keys():
+        if not has_compact_column(conn, table):
+            continue
+        updated = populate_from_full(conn, table, dims, only_missing=True)
+        if updated:
+            print(f"[INFO] {table}.{COMPACT_COLUMN} 동기화: {updated}건")
+
+
+def migrate_table(
+    conn: psycopg2_connection,
+    table: str,
+    dims: int,
+    reembed: bool = False,
+    model: str = "text-embedding-3-small",
+) -> None:
+    print(f"[INFO] {table}: {COMPACT_COLUMN} halfvec({dims}) 마이그레이션 시작")
+    add_compact_column(conn, table, dims)
+    if reembed:
+        updated = populate_by_reembedding(conn, table, dims, model=model, only_missing=False)
+    else:
+        updated = populate_from_full(conn, table, dims, only_missing=False)
+    print(f"[INFO] {table}: {updated}건 변환")
+    build_compact_index(conn, table)
+    print(f"[INFO] {table}: HNSW(halfvec_cosine_ops) 인덱스 생성 완료")
+
+
+def _index_size(conn: psycopg2_connection, index_name: str) -> Optional[int]:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_relation_size(to_regclass(%s))", (index_name,))
+        row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+    except Exception:
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+
+
+def compare_recall(
+    conn: psycopg2_connection,
+    table: str,
+    dims: int,
+    sample_size: int = 50,
+    k: int = 10,
+    seed: int = 42,
+) -> Dict[str, float]:
+    """
+    기존 vector(1536) 정확 검색(ground truth) 대비 halfvec HNSW 검색 recall@k 비교
+    쿼리는 테이블 내 문서 임베딩을 샘플링해 사용 (자기 자신 포함)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT id FROM {table} WHERE embedding IS NOT NULL AND {COMPACT_COLUMN} IS NOT NULL")
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return {}
+        random.Random(seed).shuffle(ids)
+        sample_ids = ids[:sample_size]
+        if dims == FULL_DIMENSIONS:
+            compact_query_expr = f"q.embedding::halfvec({dims})"
+        else:
+            compact_query_expr = f"l2_normalize(subvector(q.embedding, 1, {dims}))::halfvec({dims})"
+
+        recalls: List[float] = []
+        full_ms: List[float] = []
+        compact_ms: List[float] = []
+        for doc_id in sample_ids:
+            # 쿼리 벡터를 먼저 꺼내 파라미터로 바인딩 (조인 컬럼으로는 HNSW 인덱스 스캔이 안 됨)
+            cursor.execute(
+                f"SELECT q.embedding::text, ({compact_query_expr})::text FROM {table} q WHERE q.id = %s",
+                (doc_id,),
+            )
+            row = cursor.fetchone()
+            if not row:
+                continue
+            full_vec, compact_vec = row
+
+            # ground truth: 인덱스 미사용 정확 검색
+            cursor.execute("SET LOCAL enable_indexscan = off")
+            cursor.execute(
+                f"SELECT id FROM {table} WHERE embedding IS NOT NULL "
+                f"ORDER BY embedding <=> %s::vector LIMIT %s",
+                (full_vec, k),
+            )
+            truth = {row[0] for row in cursor.fetchall()}
+            conn.rollback()
+
+            # 기존 HNSW(vector) 경로 지연
+            start = time.perf_counter()
+            cursor.execute(
+                f"SELECT id FROM {table} ORDER BY embedding <=> %s::vector LIMIT %s",
+                (full_vec, k),
+            )
+            cursor.fetchall()
+            full_ms.append((time.perf_counter() - start) * 1000)
+
+            # halfvec HNSW 경로
+            start = time.perf_counter()
+            cursor.execute(
+                f"SELECT id FROM {table} ORDER BY {COMPACT_COLUMN} <=> %s::halfvec({dims}) LIMIT %s",
+                (compact_vec, k),
+            )
+            got = {row[0] for row in cursor.fetchall()}
+            compact_ms.append((time.perf_counter() - start) * 1000)
+            if truth:
+                recalls.append(len(truth & got) / len(truth))
+        conn.rollback()
+    finally:
+        cursor.close()
+
+    def _avg(values: List[float]) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    full_index = _index_size(conn, f"idx_{table}_embedding_hnsw")
+    compact_index = _index_size(conn, _index_name(table))
+    result = {
+        "samples": float(len(recalls)),
+        f"recall@{k}": _avg(recalls),
+        "full_avg_ms": _avg(full_ms),
+        "compact_avg_ms": _avg(compact_ms),
+        "full_index_bytes": float(full_index or 0),
+        "compact_index_bytes": float(compact_index or 0),
+    }
+    print(
+        f"[INFO] {table}: recall@{k}={result[f'recall@{k}']:.3f} "
+        f"latency(full/compact)={result['full_avg_ms']:.1f}/{result['compact_avg_ms']:.1f}ms "
+        f"index(full/compact)={full_index or 0:,}/{compact_index or 0:,} bytes"
+    )
+    return result
@@ -0,0 +1,142 @@
+"""
+토큰 예산 기반 문서 컨텍스트 빌더 (카드/가이드 프롬프트용)
+
+build_doc_block(글자 수 자르기) 대신 실제 토큰 수로 예산을 채운다.
+- 문서별 문장 경계(offset)는 내용 기준으로 한 번만 계산해 재사용
+- 문서마다 쿼리 용어가 많이 들어간 문장부터 고르고, 출력은 원문 순서 유지
+- 앞 문서가 다 못 쓴 예산은 뒤 문서로 넘어감
+- 라우트별 예산: RAG_CARD_CONTEXT_TOKENS(_MAP), GUIDE_CONTEXT_TOKENS
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import os
+
+from app.guide.text_utils import (
+    _BAD_DETAIL_PATTERN,
+    _SENT_SPLIT,
+    doc_text,
+    extract_query_terms_for_guide,
+    redact,
+)
+from app.llm.tokenizer import count_tokens, truncate_to_tokens
+
+RAG_CARD_CONTEXT_TOKENS = int(os.getenv("RAG_CARD_CONTEXT_TOKENS", "900"))
+RAG_CARD_CONTEXT_TOKENS_MAP = os.getenv("RAG_CARD_CONTEXT_TOKENS_MAP", "card_info=1200")  # "route=tokens,..."
+GUIDE_CONTEXT_TOKENS = int(os.getenv("GUIDE_CONTEXT_TOKENS", "500"))
+# 남은 예산이 이보다 적으면 문장을 중간에서 자르지 않고 본문 생략
+_MIN_TRUNCATE_TOKENS = 16
+
+
+def _parse_budget_map(raw: str) -> Dict[str, int]:
+    budgets: Dict[str, int] = {}
+    for part in raw.split(","):
+        name, _, value = part.strip().rpartition("=")
+        if name and value.strip().isdigit():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+_CARD_BUDGETS = _parse_budget_map(RAG_CARD_CONTEXT_TOKENS_MAP)
+
+
+def card_context_budget(route: Optional[str]) -> int:
+    return _CARD_BUDGETS.get(route or "", RAG_CARD_CONTEXT_TOKENS)
+
+
+@lru_cache(maxsize=2048)
+def sentence_spans(content: str) -> Tuple[Tuple[int, int], ...]:
+    """문장 (start, end) offset. 앞뒤 공백 제외"""
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for match in _SENT_SPLIT.finditer(content):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(content)))
+    out = []
+    for s, e in spans:
+        while s < e and content[s].isspace():
+            s += 1
+        while e > s and content[e - 1].isspace():
+            e -= 1
+        if s < e:
+            out.append((s, e))
+    return tuple(out)
+
+
+def _select_sentences(terms: List[str], content: str, budget: int, model: Optional[str]) -> Tuple[str, int]:
+    """예산 안에서 쿼리 관련 문장 선택 → (본문, 토큰 수)"""
+    candidates: List[Tuple[int, int, str, int]] = []  # (용어 적중 수, 위치, 문장, 토큰)
+    for pos, (s, e) in enumerate(sentence_spans(content)):
+        sent = content[s:e]
+        if _BAD_DETAIL_PATTERN.search(sent):
+            continue
+        chunk = redact(sent)
+        if not chunk:
+            continue
+        lowered = chunk.lower()
+        hits = sum(1 for t in terms if t in lowered)
+        candidates.append((hits, pos, chunk, count_tokens(chunk, model) + 1))
+    if not candidates:
+        return "", 0
+
+    # 쿼리 용어가 들어간 문장만, 없으면 앞 문장부터
+    matched = [c for c in candidates if c[0] > 0]
+    ranked = sorted(matched, key=lambda c: (-c[0], c[1])) if matched else candidates
+    picked: List[Tuple[int, str]] = []
+    used = 0
+    for _, pos, chunk, tokens in ranked:
+        if used + tokens > budget:
+            continue
+        picked.append((pos, chunk))
+        used += tokens
+    if not picked:
+        # 첫 문장 하나도 예산을 넘으면 토큰 단위로 자름
+        if budget < _MIN_TRUNCATE_TOKENS:
+            return "", 0
+        chunk = truncate_to_tokens(ranked[0][2], budget, model)
+        return chunk, count_tokens(chunk, model)
+    picked.sort()
+    return " ".join(chunk for _, chunk in picked), used
+
+
+def build_doc_context(
+    query: str,
+    docs: List[Dict[str, Any]],
+    max_docs: int,
+    token_budget: int,
+    model: Optional[str] = None,
+) -> Tuple[str, int]:
+    """
+    build_doc_block과 같은 형식([Doc n] Title/Content)으로 token_budget 안에서 구성
+    반환: (문서 블록, 블록 토큰 수)
+    """
+    docs = docs[:max_docs]
+    terms = extract_query_terms_for_guide(query)
+    parts: List[str] = []
+    remaining = token_budget
+    for idx, doc in enumerate(docs, 1):
+        title = redact((doc.get("title") or (doc.get("metadata") or {}).get("title") or "").strip())
+        header = f"[Doc {idx}]\nTitle: {title or 'N/A'}\nContent: "
+        share = remaining // (len(docs) - idx + 1)
+        body_budget = share - count_tokens(header, model) - 2
+        snippet, used = ("", 0)
+        if body_budget > 0:
+            snippet, used = _select_sentences(terms, doc_text(doc), body_budget, model)
+        if not title and not snippet:
+            continue
+        part = header + (snippet or "N/A")
+        parts.append(part)
+        remaining -= count_tokens(part, model) + 2
+    block = "\n\n".join(parts).strip()
+    return block, count_tokens(block, model)
+
+
+__all__ = [
+    "GUIDE_CONTEXT_TOKENS",
+    "RAG_CARD_CONTEXT_TOKENS",
+    "build_doc_context",
+    "card_context_budget",
+    "sentence_spans",
+]
@@ -1,8 +1,10 @@
 import os
-from typing import Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from dotenv import find_dotenv, load_dotenv
-from openai import OpenAI
+
+from app.llm.gateway import chat_completion, chat_completion_stream, run_sync
+from app.llm.prompt_layout import prompt_cache_params, record_usage
 
 
 def _load_env() -> None:
@@ -23,18 +25,6 @@ _load_env()
 GUIDE_MODEL_NAME = "gpt-4.1-mini"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-_openai_client = None
-
-
-def _get_openai_client() -> OpenAI | None:
-    global _openai_client
-    if not OPENAI_API_KEY:
-        return None
-    if _openai_client is None:
-        _openai_client = OpenAI(api_key=OPENAI_API_KEY.strip())
-    return _openai_client
-
-
 def get_guide_model_name() -> str:
     return GUIDE_MODEL_NAME
 
@@ -46,11 +36,24 @@ def generate_guide_text(
     top_p: float = 0.9,
     timeout_sec: int = 30,
 ) -> str:
-    client = _get_openai_client()
-    if not client:
+    """동기 래퍼 (기존 호환성 유지)"""
+    return run_sync(generate_guide_text_async(messages, temperature, max_tokens, top_p, timeout_sec))
+
+
+async def generate_guide_text_async(
+    messages: List[Dict[str, str]],
+    temperature: float = 0.2,
+    max_tokens: int = 320,
+    top_p: float = 0.9,
+    timeout_sec: int = 30,
+    deadline: Optional[float] = None,
+    usage: Optional[Dict[str, int]] = None,
+) -> str:
+    """usage가 있으면 응답의 cached_tokens 등을 기록"""
+    if not OPENAI_API_KEY:
         return ""
     try:
-        resp = client.chat.completions.create(
+        resp = await chat_completion(
             model=GUIDE_MODEL_NAME,
             messages=messages,
             temperature=temperature,
@@ -58,7 +61,52 @@ def generate_guide_text(
             top_p=top_p,
             stop=["손님:", "상담사:", "고객:"],
             timeout=timeout_sec,
+            deadline=deadline,
+            **prompt_cache_params("rag_guide"),
         )
+        record_usage(usage, getattr(resp, "usage", None))
         return (resp.choices[0].message.content or "").strip()
     except Exception as exc:
         return ""
+
+
+async def stream_guide_text(
+    messages: List[Dict[str, str]],
+    temperature: float = 0.2,
+    max_tokens: int = 320,
+    top_p: float = 0.9,
+    timeout_sec: int = 30,
+    deadline: Optional[float] = None,
+    usage: Optional[Dict[str, int]] = None,
+    status: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    generate_guide_text의 스트리밍 버전 (토큰 delta 반환, 실패 시 조용히 종료)
+    status가 있으면 finish_reason / error(예외로 끊김)를 기록
+    """
+    if not OPENAI_API_KEY:
+        return
+    try:
+        async for chunk in chat_completion_stream(
+            model=GUIDE_MODEL_NAME,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            stop=["손님:", "상담사:", "고객:"],
+            timeout=timeout_sec,
+            deadline=deadline,
+            **prompt_cache_params("rag_guide"),
+        ):
+            record_usage(usage, getattr(chunk, "usage", None))
+            if not chunk.choices:
+                continue
+            finish_reason = getattr(chunk.choices[0], "finish_reason", None)
+            if finish_reason and status is not None:
+                status["finish_reason"] = finish_reason
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception:
+        if status is not None:
+            status["error"] = True
+        return
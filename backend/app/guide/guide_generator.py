@@ -4,10 +4,17 @@
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
+import hashlib
 import re
 
-from app.guide.guide_client import generate_guide_text
+from app.guide.context_builder import GUIDE_CONTEXT_TOKENS, build_doc_context
+from app.guide.guide_client import (
+    generate_guide_text,
+    generate_guide_text_async,
+    get_guide_model_name,
+    stream_guide_text,
+)
 from app.guide.text_utils import (
     MAX_DOCS,
     MAX_CONSULT_DOCS,
@@ -21,71 +28,74 @@ from app.guide.text_utils import (
     filter_docs_by_intent,
     filter_consult_by_intent,
     sort_docs_for_guide,
-    build_doc_block,
     build_consult_block,
     normalize_output,
     apply_question_policy,
+    question_allowed,
 )
+from app.llm.prompt_layout import layout_messages, order_docs_for_prompt
+from app.llm.tokenizer import count_message_tokens
+
+
+_GUIDE_SYSTEM_PROMPT = (
+    "당신은 카드사 콜센터 상담원을 돕는 내부 안내 스크립트를 작성하는 AI입니다. "
+    "고객에게 바로 읽어줄 수 있는 '완성된 안내 문장'만 작성하세요.\n\n"
+
+    "[작성 원칙]\n"
+    "1. 반드시 제공된 Documents와 Consultation cases에 포함된 정보만 사용하세요.\n"
+    "2. 문서에 없는 내용, 추측, 일반 상식, 약관 문장 그대로 인용은 절대 금지합니다.\n"
+    "3. 법조문·약관 문장은 그대로 옮기지 말고, 상담원이 말하듯 쉽게 풀어서 설명하세요.\n"
+    "4. 전화번호, URL, 이메일, 개인정보는 절대 포함하지 마세요.\n\n"
+
+    "[출력 형식]\n"
+    "- 전체는 최대 3문장\n"
+    "- 문단, 번호, 불릿, 따옴표 사용 금지.\n\n"
+
+    "[문장별 역할]\n"
+    "첫 번째 문장: 고객 상황을 한 줄로 정리하며 공감 표현을 합니다.\n"
+    "두 번째 문장: 지금 바로 안내해야 할 핵심 처리 방법 또는 절차를 명확하게 설명합니다.\n"
+    "세 번째 문장: 안내를 마친 뒤 확인해야 할 핵심 한 가지를 질문합니다.\n\n"
+
+    "[중요 제한 사항]\n"
+    "- 이미 문서에 답이 충분한 경우, 불필요한 추가 질문을 하지 마세요.\n"
+    "- '어떤 단계에서 막히셨는지', '확인 후 안내드리겠습니다' 같은 모호한 문장은 사용하지 마세요.\n"
+    "- '손님:', '고객:', '상담사:' 같은 화자 표기는 절대 쓰지 마세요.\n"
+    "- [날짜#], [금액#], [비율#], [카드사명#] 같은 대괄호 플레이스홀더는 절대 쓰지 마세요.\n"
+    "- 문서 제목, 파일명, 조항 번호, 조문 표기는 고객에게 절대 말하지 마세요.\n"
+    "- '잠시만 기다려 주세요', '확인 후 안내드리겠습니다', '기다려주셔서 감사합니다' 같은 관용구는 절대 쓰지 마세요.\n"
+    "- 예방 수칙, 일반 주의사항, 배경 설명은 포함하지 마세요.\n"
+    "- 답을 모를 경우에만 한 문장으로 정보 추가 요청을 하세요.\n\n"
+    "[근거 사용]\n"
+    "- 반드시 Documents 내용에 근거한 문장만 작성하세요.\n"
+    "- Documents에 없는 절차/정책/요금/기간/조건은 절대 만들지 마세요.\n\n"
+    "[필수 디테일]\n"
+    "- Documents에 포함된 구체적 디테일을 최소 1개는 반드시 포함하세요.\n\n"
+
+    "항상 상담원이 고객에게 바로 읽어주는 상황을 가정하고, 간결하고 단정하게 작성하세요."
+)
+# 가이드 캐시 키용 프롬프트 버전 (system 프롬프트가 바뀌면 이전 캐시를 쓰지 않음)
+GUIDE_PROMPT_VERSION = hashlib.sha1(_GUIDE_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
 
 
 def _build_messages(query: str, docs: List[Dict[str, Any]], consult_docs: List[Dict[str, Any]]) -> List[Dict[str, str]]:
-    """guide_generator 전용 _build_messages - 필터링/정렬 포함"""
+    """
+    guide_generator 전용 _build_messages - 필터링/정렬 포함
+    관련도 상위 MAX_DOCS개를 고른 뒤 프롬프트에는 결정적 순서로 배치 (정적 system → 문서 → 질문)
+    """
     docs = filter_docs_by_intent(query, docs)
-    docs = sort_docs_for_guide(query, docs)
-    doc_block = build_doc_block(query, docs, MAX_DOCS)
+    docs = order_docs_for_prompt(sort_docs_for_guide(query, docs)[:MAX_DOCS])
+    doc_block, _ = build_doc_context(query, docs, MAX_DOCS, GUIDE_CONTEXT_TOKENS, get_guide_model_name())
     consult_docs = filter_consult_by_intent(query, consult_docs)
     if docs:
         consult_docs = []
     consult_block = build_consult_block(consult_docs, MAX_CONSULT_DOCS)
 
-    system_prompt = (
-        "당신은 카드사 콜센터 상담원을 돕는 내부 안내 스크립트를 작성하는 AI입니다. "
-        "고객에게 바로 읽어줄 수 있는 '완성된 안내 문장'만 작성하세요.\n\n"
-
-        "[작성 원칙]\n"
-        "1. 반드시 제공된 Documents와 Consultation cases에 포함된 정보만 사용하세요.\n"
-        "2. 문서에 없는 내용, 추측, 일반 상식, 약관 문장 그대로 인용은 절대 금지합니다.\n"
-        "3. 법조문·약관 문장은 그대로 옮기지 말고, 상담원이 말하듯 쉽게 풀어서 설명하세요.\n"
-        "4. 전화번호, URL, 이메일, 개인정보는 절대 포함하지 마세요.\n\n"
-
-        "[출력 형식]\n"
-        "- 전체는 최대 3문장\n"
-        "- 문단, 번호, 불릿, 따옴표 사용 금지.\n\n"
-
-        "[문장별 역할]\n"
-        "첫 번째 문장: 고객 상황을 한 줄로 정리하며 공감 표현을 합니다.\n"
-        "두 번째 문장: 지금 바로 안내해야 할 핵심 처리 방법 또는 절차를 명확하게 설명합니다.\n"
-        "세 번째 문장: 안내를 마친 뒤 확인해야 할 핵심 한 가지를 질문합니다.\n\n"
-
-        "[중요 제한 사항]\n"
-        "- 이미 문서에 답이 충분한 경우, 불필요한 추가 질문을 하지 마세요.\n"
-        "- '어떤 단계에서 막히셨는지', '확인 후 안내드리겠습니다' 같은 모호한 문장은 사용하지 마세요.\n"
-        "- '손님:', '고객:', '상담사:' 같은 화자 표기는 절대 쓰지 마세요.\n"
-        "- [날짜#], [금액#], [비율#], [카드사명#] 같은 대괄호 플레이스홀더는 절대 쓰지 마세요.\n"
-        "- 문서 제목, 파일명, 조항 번호, 조문 표기는 고객에게 절대 말하지 마세요.\n"
-        "- '잠시만 기다려 주세요', '확인 후 안내드리겠습니다', '기다려주셔서 감사합니다' 같은 관용구는 절대 쓰지 마세요.\n"
-        "- 예방 수칙, 일반 주의사항, 배경 설명은 포함하지 마세요.\n"
-        "- 답을 모를 경우에만 한 문장으로 정보 추가 요청을 하세요.\n\n"
-        "[근거 사용]\n"
-        "- 반드시 Documents 내용에 근거한 문장만 작성하세요.\n"
-        "- Documents에 없는 절차/정책/요금/기간/조건은 절대 만들지 마세요.\n\n"
-        "[필수 디테일]\n"
-        "- Documents에 포함된 구체적 디테일을 최소 1개는 반드시 포함하세요.\n\n"
-
-        "항상 상담원이 고객에게 바로 읽어주는 상황을 가정하고, 간결하고 단정하게 작성하세요."
-    )
-
-    user_prompt = (
-        f"User query:\n{query}\n\n"
-        f"Documents:\n{doc_block or 'NONE'}\n\n"
-        f"Consultation cases:\n{consult_block or 'NONE'}"
+    return layout_messages(
+        _GUIDE_SYSTEM_PROMPT,
+        context=f"Documents:\n{doc_block or 'NONE'}\n\nConsultation cases:\n{consult_block or 'NONE'}",
+        request=f"User query:\n{query}",
     )
 
-    return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
-    ]
-
 
 def _fallback_message(query: str) -> str:
     intent = detect_intent(query)
@@ -123,9 +133,29 @@ def generate_guide_message(
 ) -> str:
     if not docs:
         return ""
-    intent = detect_intent(query)
+    output = generate_guide_text(_build_messages(query, docs, consult_docs))
+    return _finalize_message(output, query, docs)
+
+
+async def generate_guide_message_async(
+    query: str,
+    docs: List[Dict[str, Any]],
+    consult_docs: List[Dict[str, Any]],
+    deadline: Optional[float] = None,
+    usage: Optional[Dict[str, int]] = None,
+) -> str:
+    """usage가 있으면 prompt_tokens/cached_tokens 기록"""
+    if not docs:
+        return ""
     messages = _build_messages(query, docs, consult_docs)
-    output = generate_guide_text(messages)
+    if usage is not None:
+        usage["prompt_tokens"] = count_message_tokens(messages, get_guide_model_name())
+    output = await generate_guide_text_async(messages, deadline=deadline, usage=usage)
+    return _finalize_message(output, query, docs)
+
+
+def _finalize_message(output: str, query: str, docs: List[Dict[str, Any]]) -> str:
+    intent = detect_intent(query)
     normalized = normalize_output(output, intent)
     normalized = apply_question_policy(normalized, query)
     if normalized:
@@ -139,6 +169,18 @@ def generate_guide_message(
             normalized = " ".join(sents[:3]).strip()
         return normalized
     # 마지막 안전장치: 문서 기반 간단 템플릿으로 구성
+    return _template_message(query, docs)
+
+
+def template_guide_message(query: str, docs: List[Dict[str, Any]]) -> str:
+    """LLM 없이 문서 기반 템플릿 가이드 (시간이 부족할 때)"""
+    if not docs:
+        return ""
+    return _template_message(query, docs)
+
+
+def _template_message(query: str, docs: List[Dict[str, Any]]) -> str:
+    intent = detect_intent(query)
     top = docs[0]
     content = redact(str(top.get("content") or ""))
     if content:
@@ -153,4 +195,81 @@ def generate_guide_message(
     return ""
 
 
-__all__ = ["generate_guide_message"]
+async def stream_guide_message(
+    query: str,
+    docs: List[Dict[str, Any]],
+    consult_docs: List[Dict[str, Any]],
+    deadline: Optional[float] = None,
+    usage: Optional[Dict[str, int]] = None,
+    status: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    generate_guide_message의 스트리밍 버전: 완성된 문장을 검사 통과 즉시 하나씩 반환
+    - 문장마다 normalize_output (금지 패턴 제거 / sanitize_risky_sentence 완화)
+    - 두 번째 문장까지 문서 디테일이 없으면 두 번째 문장을 디테일로 대체
+    - 세 번째 문장은 question_allowed를 통과한 질문만
+    status가 있으면 status["complete"]에 LLM 스트림이 정상 종료(stop)했는지 기록
+    (오류/길이 초과로 끊겼거나 템플릿 폴백이면 False → 캐시하지 않음)
+    """
+    if status is not None:
+        status["complete"] = False
+    if not docs:
+        return
+    intent = detect_intent(query)
+    detail = pick_doc_detail(docs)
+    messages = _build_messages(query, docs, consult_docs)
+    if usage is not None:
+        usage["prompt_tokens"] = count_message_tokens(messages, get_guide_model_name())
+    emitted: List[str] = []
+
+    def _accept(raw: str) -> List[str]:
+        out = []
+        normalized = normalize_output(raw, intent)
+        for sent in (s.strip() for s in _SENT_SPLIT.split(normalized) if s and s.strip()):
+            idx = len(emitted) + len(out)
+            if idx >= 3:
+                break
+            if idx == 1 and detail and detail not in " ".join(emitted + out + [sent]):
+                sent = detail
+            if idx == 2 and not question_allowed(sent, intent):
+                continue
+            out.append(sent)
+        return out
+
+    pending = ""
+    stream_status: Dict[str, Any] = {}
+    async for delta in stream_guide_text(messages, deadline=deadline, usage=usage, status=stream_status):
+        pending += delta
+        parts = _SENT_SPLIT.split(pending)
+        pending = parts[-1]
+        for raw in parts[:-1]:
+            for sent in _accept(raw):
+                emitted.append(sent)
+                yield sent
+        if len(emitted) >= 3:
+            # 세 문장이 다 찼으면 나머지 스트림은 버려도 완성된 스크립트
+            if status is not None:
+                status["complete"] = True
+            return
+    if status is not None:
+        status["complete"] = bool(emitted) and not stream_status.get("error") and stream_status.get("finish_reason") == "stop"
+    if pending.strip():
+        for sent in _accept(pending):
+            emitted.append(sent)
+            yield sent
+
+    if len(emitted) == 1 and detail and detail not in emitted[0]:
+        yield detail
+    elif not emitted:
+        fallback = _template_message(query, docs)
+        for sent in (s.strip() for s in _SENT_SPLIT.split(fallback) if s and s.strip()):
+            yield sent
+
+
+__all__ = [
+    "GUIDE_PROMPT_VERSION",
+    "generate_guide_message",
+    "generate_guide_message_async",
+    "stream_guide_message",
+    "template_guide_message",
+]
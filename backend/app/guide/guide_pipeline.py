@@ -1,18 +1,46 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
 import os
 import time
 
 from app.guide.guide_client import get_guide_model_name
-from app.guide.guide_generator import generate_guide_message
+from app.guide.guide_generator import (
+    GUIDE_PROMPT_VERSION,
+    generate_guide_message_async,
+    stream_guide_message,
+    template_guide_message,
+)
+from app.guide.text_utils import detect_intent
+from app.rag.cache.card_cache import doc_cache_id
+from app.rag.cache.guide_cache import GUIDE_CACHE_ENABLED, build_guide_cache_key, guide_cache_get, guide_cache_set
+from app.rag.pipeline.deadline import RAG_GUIDE_LLM_MIN_MS, Deadline, deadline_at, remaining_ms
+from app.rag.postprocess.keywords import normalize_text
 from app.rag.postprocess.sections import clean_card_docs
 from app.rag.pipeline.utils import format_ms
 
 LOG_TIMING = os.getenv("RAG_LOG_TIMING", "1") != "0"
 
 
+def _guide_cache_key(query: str, routing: Optional[Dict[str, Any]], docs: List[Dict[str, Any]]) -> Optional[tuple]:
+    if not GUIDE_CACHE_ENABLED or not docs:
+        return None
+    template = normalize_text((routing or {}).get("query_template") or "") or normalize_text(query)
+    return build_guide_cache_key(
+        model=get_guide_model_name(),
+        intent=detect_intent(query),
+        normalized_query_template=template,
+        doc_ids=[doc_cache_id(doc) for doc in docs],
+        prompt_version=GUIDE_PROMPT_VERSION,
+    )
+
+
+def _is_template(message: str, query: str, docs: List[Dict[str, Any]]) -> bool:
+    """LLM 실패/시간 초과로 템플릿 폴백이 나온 경우 (캐시하지 않음)"""
+    template = template_guide_message(query, docs)
+    return "".join(message.split()) == "".join(template.split())
+
+
 async def build_guide_response(
     *,
     query: str,
@@ -22,10 +50,30 @@ async def build_guide_response(
     t_start: float,
     t_route: float,
     t_retrieve: float,
+    deadline: Optional[Deadline] = None,
 ) -> Dict[str, Any]:
+    """
+    같은 (모델, intent, 쿼리 템플릿, 문서)면 캐시된 가이드를 그대로 사용 (LLM 생략)
+    캐시가 없고 deadline이 RAG_GUIDE_LLM_MIN_MS보다 적게 남았으면 LLM 없이 템플릿 가이드
+    """
     guide_start = time.perf_counter()
     docs = clean_card_docs(docs, query)
-    message = await asyncio.to_thread(generate_guide_message, query, docs, consult_docs)
+    cache_key = _guide_cache_key(query, routing, docs)
+    cache_status = "off" if cache_key is None else "miss"
+    usage: Dict[str, int] = {}
+    cached = await guide_cache_get(cache_key)
+    if cached:
+        message, cache_backend = cached
+        cache_status = f"hit({cache_backend})"
+    elif remaining_ms(deadline) < RAG_GUIDE_LLM_MIN_MS:
+        message = template_guide_message(query, docs)
+        cache_status = "skip(deadline)"
+    else:
+        message = await generate_guide_message_async(
+            query, docs, consult_docs, deadline=deadline_at(deadline), usage=usage
+        )
+        if message and not _is_template(message, query, docs):
+            await guide_cache_set(cache_key, message)
     guide_end = time.perf_counter()
 
     if LOG_TIMING:
@@ -35,8 +83,56 @@ async def build_guide_response(
     return {
         "guidanceScript": message or "",
         "guide_script": {"message": message or ""},
-        "meta": {"guide_model": get_guide_model_name()},
+        "meta": {
+            "guide_model": get_guide_model_name(),
+            "guide_cache": cache_status,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "cached_tokens": usage.get("cached_tokens", 0),
+        },
     }
 
 
-__all__ = ["build_guide_response"]
+async def stream_guide_response(
+    *,
+    query: str,
+    docs: List[Dict[str, Any]],
+    consult_docs: List[Dict[str, Any]],
+    routing: Optional[Dict[str, Any]] = None,
+    deadline: Optional[Deadline] = None,
+    usage: Optional[Dict[str, int]] = None,
+) -> AsyncIterator[str]:
+    """
+    가이드 스크립트를 검사 통과한 문장 단위로 반환 (캐시 히트면 저장된 가이드 한 번)
+    usage가 있으면 LLM 호출 시 prompt_tokens/cached_tokens 기록
+    """
+    docs = clean_card_docs(docs, query)
+    cache_key = _guide_cache_key(query, routing, docs)
+    cached = await guide_cache_get(cache_key)
+    if cached:
+        yield cached[0]
+        return
+    if remaining_ms(deadline) < RAG_GUIDE_LLM_MIN_MS:
+        message = template_guide_message(query, docs)
+        if message:
+            yield message
+        return
+    sentences: List[str] = []
+    stream_status: Dict[str, Any] = {}
+    async for sentence in stream_guide_message(
+        query, docs, consult_docs, deadline=deadline_at(deadline), usage=usage, status=stream_status
+    ):
+        sentences.append(sentence)
+        yield sentence
+
+    # 정상 종료한 스트림만 캐시 (오류/끊김/템플릿 폴백은 제외: build_guide_response와 같은 기준)
+    message = " ".join(sentences)
+    if (
+        message
+        and stream_status.get("complete")
+        and not _is_template(message, query, docs)
+        and not (deadline is not None and deadline.expired)
+    ):
+        await guide_cache_set(cache_key, message)
+
+
+__all__ = ["build_guide_response", "stream_guide_response"]
@@ -13,3 +13,4 @@ def get_openai_client() -> OpenAI:
     if not api_key:
         raise ValueError("OPENAI_API_KEY is not set")
     return OpenAI(api_key=api_key.strip())
+
@@ -1,11 +1,13 @@
 import json
 import re
 import os
-from typing import Dict, List, Optional
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
 
 from app.core.prompt import REFINEMENT_PROMPT
+from app.llm.gateway import get_llm_client
 
 load_dotenv()
 
@@ -15,10 +17,24 @@ VOCAB_PATH = os.path.join(
 
 _CORRECTION_MAP_CACHE: Optional[Dict[str, str]] = None
 
-client = AsyncOpenAI(
-    base_url=os.getenv("ACW_CORRECT_RUNPOD_URL"),
-    api_key=os.getenv("RUNPOD_API_KEY")
-)
+# 한 번에 보내는 발화 수 / 전체 세션 합계 동시 sLLM 호출 수
+REFINE_CHUNK_SIZE = int(os.getenv("REFINE_CHUNK_SIZE", "20"))
+REFINE_MAX_CONCURRENCY = int(os.getenv("REFINE_MAX_CONCURRENCY", "4"))
+
+_REFINE_SEMAPHORE: Optional[asyncio.Semaphore] = None
+_REFINE_SEMAPHORE_LOOP = None
+
+# ACW_CORRECT_RUNPOD_URL / RUNPOD_API_KEY
+client = get_llm_client("runpod_correct")
+
+
+def _get_refine_semaphore() -> asyncio.Semaphore:
+    global _REFINE_SEMAPHORE, _REFINE_SEMAPHORE_LOOP
+    loop = asyncio.get_running_loop()
+    if _REFINE_SEMAPHORE is None or _REFINE_SEMAPHORE_LOOP is not loop:
+        _REFINE_SEMAPHORE = asyncio.Semaphore(max(1, REFINE_MAX_CONCURRENCY))
+        _REFINE_SEMAPHORE_LOOP = loop
+    return _REFINE_SEMAPHORE
 
 
 def load_correction_map() -> Dict[str, str]:
@@ -78,64 +94,114 @@ def extract_json_content(text: str) -> Optional[str]:
     return None
 
 
-async def refine_diarized_batch(utterances: List[Dict]) -> List[Dict]:
-    if not utterances:
-        return []
-    
-    correction_map = load_correction_map()
-    
-    for utt in utterances:
-        utt['_corrected'] = apply_correction_map(utt.get('message', ''), correction_map)
-    
+async def _refine_chunk(utterances: List[Dict], correction_map: Dict[str, str]) -> Tuple[List[str], bool]:
+    """
+    sLLM 1회 호출로 발화 묶음 교정 → (교정된 메시지 리스트, sLLM 결과 여부)
+    호출/파싱 실패 시 (사전 치환 결과, False): 일시 오류일 수 있으므로 캐시하지 않음
+    """
+    corrected = [apply_correction_map(utt.get('message', ''), correction_map) for utt in utterances]
+
     input_lines = []
-    for i, utt in enumerate(utterances, 1):
+    for i, (utt, text) in enumerate(zip(utterances, corrected), 1):
         speaker_kr = "상담원" if utt.get("speaker") == "agent" else "고객"
         
-        input_lines.append(f"[{i}] ({speaker_kr}) {utt['_corrected']}")
+        input_lines.append(f"[{i}] ({speaker_kr}) {text}")
     
     user_content = "다음 발화들을 교정하세요:\n\n" + "\n".join(input_lines)
 
     result_json_str = None
     try:
-        response = await client.chat.completions.create(
-            model="kakaocorp/kanana-1.5-8b-instruct-2505",
-            messages=[
-                {"role": "system", "content": REFINEMENT_PROMPT},
-                {"role": "user", "content": user_content}
-            ],
-            temperature=0.0,
-            max_tokens=2048,
-            stop=["[|", "[|end|]", "[|user|]", "\n"] 
-        )
+        async with _get_refine_semaphore():
+            response = await client.chat.completions.create(
+                model="kakaocorp/kanana-1.5-8b-instruct-2505",
+                messages=[
+                    {"role": "system", "content": REFINEMENT_PROMPT},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=0.0,
+                max_tokens=2048,
+                stop=["[|", "[|end|]", "[|user|]", "\n"] 
+            )
         result_content = response.choices[0].message.content
         result_json_str = extract_json_content(result_content)
         
     except Exception as e:
         print(f"[Refiner] sLLM 호출 실패: {e}")
     
-    refined_texts = [utt['_corrected'] for utt in utterances]
-    
-    if result_json_str:
-        try:
-            results = json.loads(result_json_str)
+    refined_texts = list(corrected)
+    if not result_json_str:
+        return refined_texts, False
+
+    try:
+        results = json.loads(result_json_str)
+        
+        for i in range(len(utterances)):
+            case_id = i + 1
+            found = next((r for r in results if r.get('id') == case_id), None)
             
-            for i in range(len(utterances)):
-                case_id = i + 1
-                found = next((r for r in results if r.get('id') == case_id), None)
+            if found and found.get('refined'):
+                refined_texts[i] = found['refined']
                 
-                if found and found.get('refined'):
-                    refined_texts[i] = found['refined']
-                    
-        except json.JSONDecodeError as e:
-            print(f"[Refiner] JSON 파싱 에러: {e}")
-        except Exception as e:
-            print(f"[Refiner] 결과 처리 중 에러: {e}")
-            
+    except json.JSONDecodeError as e:
+        print(f"[Refiner] JSON 파싱 에러: {e}")
+        return list(corrected), False
+    except Exception as e:
+        print(f"[Refiner] 결과 처리 중 에러: {e}")
+        return list(corrected), False
+
+    return refined_texts, True
+
+
+def utterance_key(utt: Dict) -> str:
+    """캐시 키: 화자 + 원문 해시 (원문이 바뀌면 다시 교정)"""
+    raw = f"{utt.get('speaker', 'unknown')}\x1f{utt.get('message', '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def refine_diarized_batch(
+    utterances: List[Dict],
+    cache: Optional[Dict[str, str]] = None,
+    chunk_size: int = REFINE_CHUNK_SIZE,
+) -> List[Dict]:
+    """
+    화자 분리 발화 교정
+    - cache(세션별 dict: utterance_key → 교정 메시지)에 있는 발화는 재사용
+    - sLLM 호출이 실패한 묶음은 사전 치환 결과를 반환하되 캐시하지 않음 (다음 호출/최종 패스에서 재시도)
+    - 나머지는 chunk_size개씩 나눠 병렬 호출 (전역 REFINE_MAX_CONCURRENCY 제한)
+    """
+    if not utterances:
+        return []
+    
+    correction_map = load_correction_map()
+    cache = cache if cache is not None else {}
+
+    keys = [utterance_key(utt) for utt in utterances]
+    fallback: Dict[str, str] = {}
+    missing = []
+    seen = set()
+    for idx, key in enumerate(keys):
+        if key not in cache and key not in seen:
+            seen.add(key)
+            missing.append(idx)
+
+    if missing:
+        size = max(1, chunk_size)
+        chunks = [missing[i:i + size] for i in range(0, len(missing), size)]
+        results = await asyncio.gather(
+            *[_refine_chunk([utterances[idx] for idx in chunk], correction_map) for chunk in chunks]
+        )
+        for chunk, (refined_texts, ok) in zip(chunks, results):
+            target = cache if ok else fallback
+            for idx, refined_msg in zip(chunk, refined_texts):
+                target[keys[idx]] = refined_msg
+        if len(missing) < len(utterances):
+            print(f"[Refiner] 캐시 재사용 {len(utterances) - len(missing)}개, 신규 교정 {len(missing)}개 ({len(chunks)}회 호출)")
+
     final_result = []
-    for utt, refined_msg in zip(utterances, refined_texts):
+    for utt, key in zip(utterances, keys):
         final_result.append({
             "speaker": utt.get("speaker", "unknown"),
-            "message": refined_msg
+            "message": cache[key] if key in cache else fallback[key]
         })
     
-    return final_result
\ No newline at end of file
+    return final_result
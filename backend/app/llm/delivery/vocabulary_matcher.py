@@ -163,6 +163,20 @@ def load_card_products(force_reload: bool = False, silent: bool = False) -> List
     if _CARD_PRODUCTS_CACHE is not None and not force_reload:
         return _CARD_PRODUCTS_CACHE
 
+    # 공유 CardCatalog 우선 사용 (리트리버와 동일한 인메모리 카탈로그)
+    try:
+        from app.rag.retriever.card_catalog import get_card_catalog
+
+        catalog = get_card_catalog(force_reload=force_reload)
+    except Exception:
+        catalog = None
+    if catalog is not None and len(catalog) > 0:
+        products = _dedupe_products(catalog.products())
+        _CARD_PRODUCTS_CACHE = products
+        if not silent:
+            print(f"[VocabularyMatcher] 카드상품명 {len(catalog)}개 → 정규화 후 {len(products)}개 로드 완료 (CardCatalog)")
+        return products
+
     conn = connect_db()
     cursor = conn.cursor()
 
@@ -176,32 +190,14 @@ def load_card_products(force_reload: bool = False, silent: bool = False) -> List
         cursor.execute(query)
         rows = cursor.fetchall()
 
-        products = []
-        seen_normalized = set()  # 중복 제거용
-
-        for row in rows:
-            card_id = row[0]
-            card_name = row[1]
-            card_type = row[2]
-            brand = row[3]
-
-            # 카드명 정규화
-            normalized_name = normalize_card_name(card_name)
-
-            # 중복 제거: 동일한 정규화 이름은 1번만 추가
-            if normalized_name not in seen_normalized:
-                products.append({
-                    "id": card_id,
-                    "name": card_name,  # 전체 상품명
-                    "normalized_name": normalized_name,  # 정규화된 카드명
-                    "card_type": card_type,
-                    "brand": brand
-                })
-                seen_normalized.add(normalized_name)
+        products = _dedupe_products(
+            {"id": row[0], "name": row[1], "card_type": row[2], "brand": row[3]}
+            for row in rows
+        )
 
         _CARD_PRODUCTS_CACHE = products
         if not silent:
-            print(f"[VocabularyMatcher] 카드상품명 {len(products)}개 로드 완료 (정규화: {len(seen_normalized)}개)")
+            print(f"[VocabularyMatcher] 카드상품명 {len(rows)}개 → 정규화 후 {len(products)}개 로드 완료")
 
         return products
 
@@ -214,6 +210,30 @@ def load_card_products(force_reload: bool = False, silent: bool = False) -> List
         conn.close()
 
 
+def _dedupe_products(rows) -> List[Dict]:
+    """카드명 정규화 후 동일한 정규화 이름은 1번만 추가"""
+    products = []
+    seen_normalized = set()  # 중복 제거용
+
+    for row in rows:
+        card_name = row["name"]
+
+        # 카드명 정규화
+        normalized_name = normalize_card_name(card_name)
+
+        if normalized_name not in seen_normalized:
+            products.append({
+                "id": row["id"],
+                "name": card_name,  # 전체 상품명
+                "normalized_name": normalized_name,  # 정규화된 카드명
+                "card_type": row["card_type"],
+                "brand": row["brand"]
+            })
+            seen_normalized.add(normalized_name)
+
+    return products
+
+
 def normalize_text(text: str) -> str:
     """
     텍스트 정규화: 띄어쓰기 제거, 소문자 변환
@@ -1,9 +1,9 @@
 import os
 import json
-import asyncio
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+
+from app.llm.gateway import get_llm_client, run_sync
 
 load_dotenv()
 
@@ -11,11 +11,8 @@ SIM_RUNPOD_URL = os.getenv("SIM_RUNPOD_URL")
 RUNPOD_API_KEY = os.getenv("RUNPOD_API_KEY")
 RUNPOD_MODEL_NAME = "WindyAle/kanana-nano-2.1B-customer-emotional"
 
-# AsyncOpenAI 클라이언트
-client = AsyncOpenAI(
-    base_url=SIM_RUNPOD_URL,
-    api_key=RUNPOD_API_KEY
-)
+# 공용 LLM 게이트웨이 (SIM_RUNPOD_URL / RUNPOD_API_KEY)
+client = get_llm_client("runpod_sim")
 
 
 async def generate_text_async(
@@ -61,24 +58,11 @@ def generate_text(
     max_tokens: int = 500,
     json_output: bool = False
 ) -> str:
-    """동기 래퍼 (기존 호환성 유지)"""
-    try:
-        # 이벤트 루프가 이미 실행 중인지 확인
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        # 실행 중인 루프 없음 - 새로 실행
-        return asyncio.run(generate_text_async(
-            prompt, system_prompt, temperature, max_tokens, json_output
-        ))
-
-    # 이미 실행 중인 루프가 있으면 새 스레드에서 실행
-    import concurrent.futures
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(
-            asyncio.run,
-            generate_text_async(prompt, system_prompt, temperature, max_tokens, json_output)
-        )
-        return future.result(timeout=60)
+    """동기 래퍼 (기존 호환성 유지): 메인 루프의 게이트웨이로 넘겨 커넥션/동시성 제한 공유"""
+    return run_sync(
+        generate_text_async(prompt, system_prompt, temperature, max_tokens, json_output),
+        timeout=60,
+    )
 
 
 async def generate_json_async(
@@ -111,17 +95,7 @@ def generate_json(
     max_tokens: int = 500
 ) -> Dict[str, Any]:
     """동기 래퍼 (기존 호환성 유지)"""
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        return asyncio.run(generate_json_async(
-            prompt, system_prompt, temperature, max_tokens
-        ))
-
-    import concurrent.futures
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(
-            asyncio.run,
-            generate_json_async(prompt, system_prompt, temperature, max_tokens)
-        )
-        return future.result(timeout=60)
+    return run_sync(
+        generate_json_async(prompt, system_prompt, temperature, max_tokens),
+        timeout=60,
+    )
@@ -1,17 +1,13 @@
 import pandas as pd
 import random
-import os
+import asyncio
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 load_dotenv()
 
-from openai import OpenAI
-
-# OpenAI API 클라이언트 초기화
-api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key)
+from app.llm.gateway import chat_completion, run_sync
+from app.llm.scheduler import set_llm_priority
 
 # 1. 데이터 로드
 df = pd.read_csv("hana.csv")
@@ -51,13 +47,18 @@ def make_rewrite_prompt(counselor_utterance, customer_utterance, emotion):
 """
     return prompt
 
-# 3. OpenAI GPT API 호출 (단일 행 처리)
+# 3. OpenAI GPT API 호출 (단일 행 처리, 공용 게이트웨이의 batch 우선순위)
 def process_single_row(idx, row, emotion, model="gpt-4o-mini"):
     """단일 행을 GPT로 처리"""
+    return run_sync(process_single_row_async(idx, row, emotion, model))
+
+
+async def process_single_row_async(idx, row, emotion, model="gpt-4o-mini"):
     prompt = make_rewrite_prompt(row['counselor_utterance'], row['customer_utterance'], emotion)
     
     try:
-        response = client.chat.completions.create(
+        response = await chat_completion(
+            priority="batch",
             model=model,
             messages=[
                 {"role": "system", "content": "당신은 드라마 대사 작가입니다. 주어진 대사를 지정된 감정에 맞게 각색하세요."},
@@ -86,6 +87,19 @@ def process_single_row(idx, row, emotion, model="gpt-4o-mini"):
         }
 
 # 4. 선별된 9,688개 행 병렬 처리
+async def _process_rows_async(tasks, model, max_workers, pbar):
+    set_llm_priority("batch")
+    sem = asyncio.Semaphore(max_workers)
+
+    async def _one(idx, row, emotion):
+        async with sem:
+            result = await process_single_row_async(idx, row, emotion, model)
+        pbar.update(1)
+        return result
+
+    return await asyncio.gather(*(_one(idx, row, emotion) for idx, row, emotion in tasks))
+
+
 def process_selected_rows_parallel(df, selected_indices, model="gpt-4o-mini", max_workers=20):
     """선별된 행을 병렬로 GPT 처리"""
     
@@ -102,19 +116,9 @@ def process_selected_rows_parallel(df, selected_indices, model="gpt-4o-mini", ma
         emotion = random.choices(emotions, weights=weights)[0]
         tasks.append((idx, row, emotion))
     
-    # 병렬 처리
-    results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # 모든 작업 제출
-        futures = {executor.submit(process_single_row, idx, row, emotion, model): idx 
-                   for idx, row, emotion in tasks}
-        
-        # 진행 상황 표시와 함께 결과 수집
-        with tqdm(total=total, desc="GPT 처리 중", unit="행") as pbar:
-            for future in as_completed(futures):
-                result = future.result()
-                results.append(result)
-                pbar.update(1)
+    # 병렬 처리 (한 이벤트 루프에서 게이트웨이 커넥션 풀/RPM·TPM 한도 공유)
+    with tqdm(total=total, desc="GPT 처리 중", unit="행") as pbar:
+        results = asyncio.run(_process_rows_async(tasks, model, max_workers, pbar))
     
     print(f"완료: {total}/{total} (100.0%)")
     print("=" * 60)
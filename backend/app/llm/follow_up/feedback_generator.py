@@ -1,13 +1,8 @@
 import json
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
-import os
+from app.llm.gateway import get_llm_client
+from app.llm.prompt_layout import prompt_cache_params
 
-load_dotenv()
-
-client = AsyncOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+client = get_llm_client("openai")
 
 async def generate_feedback(script, system_prompt):
     try:
@@ -18,7 +13,8 @@ async def generate_feedback(script, system_prompt):
                 {"role": "user", "content": f"상담 스크립트:\n{script}"}
             ],
             temperature=0,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            **prompt_cache_params("followup_feedback")
         )
 
         content = response.choices[0].message.content
@@ -1,16 +1,10 @@
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
-import os
 from collections import Counter
 import time
 from app.core.prompt import PERSONALITY_SYSTEM_PROMPT
+from app.llm.gateway import get_llm_client
 
-load_dotenv()
-
-client = AsyncOpenAI(
-    base_url=os.getenv("ACW_TYPE_RUNPOD_URL"),
-    api_key=os.getenv("RUNPOD_API_KEY")
-)
+# ACW_TYPE_RUNPOD_URL / RUNPOD_API_KEY
+client = get_llm_client("runpod_type")
 
 async def get_personality(script):
     try:
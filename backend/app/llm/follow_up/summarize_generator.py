@@ -1,14 +1,9 @@
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
 import json
-import os
 from app.core.prompt import SUMMARIZE_SYSTEM_PROMPT
+from app.llm.gateway import get_llm_client
+from app.llm.prompt_layout import prompt_cache_params
 
-load_dotenv()
-
-client = AsyncOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+client = get_llm_client("openai")
 
 async def get_summarize(script):
     try:
@@ -19,7 +14,8 @@ async def get_summarize(script):
                 {"role": "user", "content": f"상담 전문:\n{script}"}
             ],
             temperature=0.0,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            **prompt_cache_params("followup_summary")
         )
 
         # 답변 반환
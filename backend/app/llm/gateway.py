@@ -0,0 +1,554 @@
+"""
+공용 비동기 LLM 게이트웨이
+
+모든 chat completion 호출을 한 곳으로 모아 통화 중 카드 생성이 후처리 폭주에 밀리지 않게 한다.
+- 프로바이더(base URL)별 AsyncOpenAI 1개 + httpx 커넥션 풀 (h2 설치 시 HTTP/2)
+- 프로바이더별 우선순위 스케줄러 (app.llm.scheduler): live > edu > followup > batch, RPM/TPM 한도,
+  모델별 동시 호출 한도 (LLM_MODEL_CONCURRENCY, 모델별 덮어쓰기 LLM_MODEL_CONCURRENCY_MAP)
+- 연결 오류/429/5xx는 지터 포함 지수 백오프로 재시도 (SDK 자체 재시도는 끔)
+- 프로바이더별 서킷 브레이커: 연속 실패 시 일정 시간 즉시 실패
+- deadline(time.monotonic 기준 절대 시각)이 있으면 대기/시도 타임아웃을 남은 시간으로 제한
+
+동기 코드는 run_sync로 메인 이벤트 루프(bind_loop)에 호출을 넘겨 같은 풀/세마포어를 공유한다.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from app.llm.prompt_layout import cached_tokens
+from app.llm.scheduler import Grant, LLMScheduler, estimate_tokens, get_llm_priority, set_llm_priority
+
+load_dotenv()
+
+T = TypeVar("T")
+
+LLM_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SEC = float(os.getenv("LLM_RETRY_BASE_SEC", "0.3"))
+LLM_RETRY_MAX_SEC = float(os.getenv("LLM_RETRY_MAX_SEC", "4"))
+LLM_MODEL_CONCURRENCY = int(os.getenv("LLM_MODEL_CONCURRENCY", "8"))
+LLM_MODEL_CONCURRENCY_MAP = os.getenv("LLM_MODEL_CONCURRENCY_MAP", "")  # "gpt-4.1-mini=16,model=4"
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "32"))
+LLM_CB_FAILURES = int(os.getenv("LLM_CB_FAILURES", "5"))
+LLM_CB_COOLDOWN_SEC = float(os.getenv("LLM_CB_COOLDOWN_SEC", "15"))
+
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# 프로바이더 이름 → (base URL 환경변수, API 키 환경변수). base URL이 None이면 OpenAI 기본값
+_PROVIDERS: Dict[str, Tuple[Optional[str], str]] = {
+    "openai": (None, "OPENAI_API_KEY"),
+    "runpod_type": ("ACW_TYPE_RUNPOD_URL", "RUNPOD_API_KEY"),
+    "runpod_correct": ("ACW_CORRECT_RUNPOD_URL", "RUNPOD_API_KEY"),
+    "runpod_sim": ("SIM_RUNPOD_URL", "RUNPOD_API_KEY"),
+}
+
+_RETRYABLE = (
+    openai.APIConnectionError,  # APITimeoutError 포함
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷이 열려 호출하지 않고 즉시 실패"""
+
+
+class _CircuitBreaker:
+    """연속 실패 LLM_CB_FAILURES회 → LLM_CB_COOLDOWN_SEC 동안 차단 → 시험 호출 1회 허용 (half-open)"""
+
+    def __init__(self, failures: int = LLM_CB_FAILURES, cooldown_sec: float = LLM_CB_COOLDOWN_SEC):
+        self.failures = max(1, failures)
+        self.cooldown_sec = cooldown_sec
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.cooldown_sec:
+                return False
+            self._trial = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release_trial(self) -> None:
+        """시험 호출이 결과 없이 끝남 (취소/대기 타임아웃) → 다음 호출이 다시 시험"""
+        with self._lock:
+            self._trial = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self._trial or self._consecutive >= self.failures:
+                if self._opened_at is None or self._trial:
+                    print(f"[LLM Gateway] 서킷 열림 (연속 실패 {self._consecutive}회)")
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self._trial else "open"
+
+
+_breakers: Dict[str, _CircuitBreaker] = {}
+# 이벤트 루프별 클라이언트/스케줄러 (httpx 커넥션과 asyncio 대기열은 루프에 묶임)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, LLMScheduler]]" = weakref.WeakKeyDictionary()
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _parse_concurrency_map(raw: str) -> Dict[str, int]:
+    limits: Dict[str, int] = {}
+    for part in raw.split(","):
+        name, _, value = part.strip().rpartition("=")
+        if name and value.strip().isdigit():
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+_MODEL_LIMITS = _parse_concurrency_map(LLM_MODEL_CONCURRENCY_MAP)
+
+
+# register_provider로 직접 지정한 프로바이더 (base URL, API 키 값)
+_STATIC_PROVIDERS: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+
+def register_provider(name: str, base_url: Optional[str], api_key: Optional[str]) -> None:
+    """환경변수 하나로 표현하기 어려운 프로바이더 등록 (예: IP/PORT 조합 URL)"""
+    _STATIC_PROVIDERS[name] = (base_url, api_key)
+    for per_loop in list(_clients.values()):
+        per_loop.pop(name, None)
+
+
+def _provider_settings(provider: str) -> Tuple[Optional[str], Optional[str]]:
+    if provider in _STATIC_PROVIDERS:
+        base_url, api_key = _STATIC_PROVIDERS[provider]
+    elif provider in _PROVIDERS:
+        url_env, key_env = _PROVIDERS[provider]
+        base_url = os.getenv(url_env) if url_env else None
+        api_key = os.getenv(key_env)
+    else:
+        raise ValueError(f"알 수 없는 LLM 프로바이더: {provider}")
+    return base_url, (api_key or "").strip() or None
+
+
+def _get_client(provider: str) -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    per_loop = _clients.setdefault(loop, {})
+    client = per_loop.get(provider)
+    if client is None:
+        base_url, api_key = _provider_settings(provider)
+        http_client = httpx.AsyncClient(
+            http2=_HTTP2,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT_SEC, connect=5.0),
+        )
+        client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key or "EMPTY",
+            max_retries=0,  # 재시도는 게이트웨이에서
+            http_client=http_client,
+        )
+        per_loop[provider] = client
+    return client
+
+
+def _get_scheduler(provider: str) -> LLMScheduler:
+    loop = asyncio.get_running_loop()
+    per_loop = _schedulers.setdefault(loop, {})
+    scheduler = per_loop.get(provider)
+    if scheduler is None:
+        scheduler = LLMScheduler(
+            provider,
+            model_limits=_MODEL_LIMITS,
+            default_model_limit=max(1, LLM_MODEL_CONCURRENCY),
+        )
+        per_loop[provider] = scheduler
+    return scheduler
+
+
+def _get_breaker(provider: str) -> _CircuitBreaker:
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        breaker = _breakers.setdefault(provider, _CircuitBreaker())
+    return breaker
+
+
+def _remaining(deadline: Optional[float], timeout: Optional[float]) -> float:
+    budget = LLM_TIMEOUT_SEC if timeout is None else timeout
+    if deadline is not None:
+        budget = min(budget, deadline - time.monotonic())
+    if budget <= 0:
+        raise asyncio.TimeoutError("LLM deadline exceeded")
+    return budget
+
+
+def _is_provider_failure(error: BaseException, attempt_timeout: float) -> bool:
+    """
+    서킷 브레이커에 실패로 셀 오류인지
+    - 429는 스케줄러 한도 축소/대기로 처리 (프로바이더 장애 아님)
+    - 타임아웃은 LLM_TIMEOUT_SEC 전체를 받은 시도만 (호출자 deadline/timeout으로 줄어든 시도는 제외)
+    """
+    if isinstance(error, openai.RateLimitError):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError)):
+        return attempt_timeout >= LLM_TIMEOUT_SEC
+    return True
+
+
+def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    # full jitter: [0, base * 2^attempt], 서버가 Retry-After를 주면 그 이상 대기
+    delay = random.uniform(0, min(LLM_RETRY_MAX_SEC, LLM_RETRY_BASE_SEC * (2 ** attempt)))
+    if retry_after:
+        delay = max(delay, min(retry_after, LLM_RETRY_MAX_SEC))
+    return delay
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _rate_limit_headers(exc: BaseException) -> Optional[Tuple[float, float]]:
+    """429 응답 헤더의 계정 한도 (rpm, tpm). 헤더가 없으면 None"""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    limits = []
+    for name in ("x-ratelimit-limit-requests", "x-ratelimit-limit-tokens"):
+        try:
+            limits.append(float(response.headers.get(name) or 0))
+        except ValueError:
+            limits.append(0.0)
+    return (limits[0], limits[1]) if any(limits) else None
+
+
+# 모델별 누적 토큰 (프롬프트 캐시 적중률/비용 확인용)
+_usage_totals: Dict[str, Dict[str, int]] = {}
+
+
+def _record_usage(model: str, usage: Any) -> None:
+    if usage is None:
+        return
+    totals = _usage_totals.setdefault(
+        model, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+    )
+    totals["requests"] += 1
+    for key in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, key, None)
+        if isinstance(value, int):
+            totals[key] += value
+    totals["cached_tokens"] += cached_tokens(usage)
+
+
+def _used_tokens(result: Any) -> Optional[int]:
+    usage = getattr(result, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return total if isinstance(total, int) else None
+
+
+async def _with_retries(
+    provider: str,
+    model: str,
+    call,
+    deadline: Optional[float],
+    timeout: Optional[float],
+    retries: Optional[int],
+    keep_permit: bool = False,
+    priority: Optional[str] = None,
+    tokens: int = 0,
+):
+    """
+    call(attempt_timeout) → 결과 (keep_permit=True면 (결과, Grant), 호출자가 Grant 반납)
+    스케줄러 대기 시간도 deadline/timeout에 포함
+    """
+    breaker = _get_breaker(provider)
+    scheduler = _get_scheduler(provider)
+    max_retries = LLM_MAX_RETRIES if retries is None else max(0, retries)
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"LLM 프로바이더 {provider} 서킷 열림")
+        try:
+            grant: Grant = await asyncio.wait_for(
+                scheduler.acquire(model, tokens, priority), _remaining(deadline, timeout)
+            )
+        except BaseException:
+            breaker.release_trial()
+            raise
+        try:
+            attempt_timeout = _remaining(deadline, timeout)
+        except asyncio.TimeoutError:
+            grant.release()
+            breaker.release_trial()
+            raise
+        try:
+            result = await asyncio.wait_for(call(attempt_timeout), attempt_timeout)
+        except _RETRYABLE as e:
+            rate_limited = isinstance(e, openai.RateLimitError)
+            grant.release(
+                rate_limited=rate_limited,
+                retry_after=_retry_after(e),
+                limits=_rate_limit_headers(e) if rate_limited else None,
+            )
+            if _is_provider_failure(e, attempt_timeout):
+                breaker.failure()
+            else:
+                breaker.release_trial()
+            if attempt >= max_retries:
+                raise
+            delay = _backoff(attempt, _retry_after(e))
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            print(f"[LLM Gateway] {provider}/{model} 재시도 {attempt + 1}/{max_retries} ({delay:.2f}s 후): {e}")
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        except openai.APIStatusError:
+            # 4xx 등 요청 자체의 문제: 프로바이더는 살아 있음
+            grant.release()
+            breaker.success()
+            raise
+        except BaseException:
+            grant.release()
+            breaker.release_trial()
+            raise
+        breaker.success()
+        if keep_permit:
+            return result, grant
+        grant.release(used_tokens=_used_tokens(result))
+        return result
+
+
+async def chat_completion(
+    provider: str = "openai",
+    *,
+    model: str,
+    deadline: Optional[float] = None,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    priority: Optional[str] = None,
+    **params: Any,
+):
+    """chat.completions.create와 같은 인자로 호출 → ChatCompletion (priority 생략 시 컨텍스트 우선순위)"""
+    _remember_loop()
+    client = _get_client(provider)
+
+    async def _call(attempt_timeout: float):
+        return await client.chat.completions.create(model=model, timeout=attempt_timeout, **params)
+
+    result = await _with_retries(
+        provider, model, _call, deadline, timeout, retries,
+        priority=priority, tokens=estimate_tokens(params),
+    )
+    _record_usage(model, getattr(result, "usage", None))
+    return result
+
+
+async def chat_completion_stream(
+    provider: str = "openai",
+    *,
+    model: str,
+    deadline: Optional[float] = None,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    priority: Optional[str] = None,
+    **params: Any,
+) -> AsyncIterator[Any]:
+    """
+    stream=True 호출 → 청크 반환. 재시도는 첫 응답(헤더) 전까지만
+    스케줄러 슬롯은 스트림을 다 읽거나 닫을 때까지 보유
+    """
+    _remember_loop()
+    client = _get_client(provider)
+    breaker = _get_breaker(provider)
+    params.pop("stream", None)
+    if provider == "openai":
+        # 마지막 청크로 usage(캐시 토큰 포함)를 받음
+        params.setdefault("stream_options", {"include_usage": True})
+
+    async def _call(attempt_timeout: float):
+        return await client.chat.completions.create(
+            model=model, timeout=attempt_timeout, stream=True, **params
+        )
+
+    started = time.monotonic()
+    stream, grant = await _with_retries(
+        provider, model, _call, deadline, timeout, retries,
+        keep_permit=True, priority=priority, tokens=estimate_tokens(params),
+    )
+    used_tokens = None
+    try:
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            _record_usage(model, usage)
+            if usage is not None:
+                used_tokens = _used_tokens(chunk)
+            yield chunk
+    except Exception as e:
+        budget = LLM_TIMEOUT_SEC if timeout is None else timeout
+        if deadline is not None:
+            budget = min(budget, deadline - started)
+        if _is_provider_failure(e, budget):
+            breaker.failure()
+        raise
+    finally:
+        # 마지막 청크의 usage로 추정 토큰과의 차이를 버킷에 반영 (usage 없이 끊기면 추정치 유지)
+        grant.release(used_tokens=used_tokens)
+        close = getattr(stream, "close", None)
+        if close is not None:
+            try:
+                await close()
+            except Exception:
+                pass
+
+
+class _Completions:
+    def __init__(self, provider: str):
+        self._provider = provider
+
+    async def create(self, *, model: str, stream: bool = False, **params: Any):
+        if stream:
+            return chat_completion_stream(self._provider, model=model, **params)
+        return await chat_completion(self._provider, model=model, **params)
+
+
+class _Chat:
+    def __init__(self, provider: str):
+        self.completions = _Completions(provider)
+
+
+class GatewayClient:
+    """client.chat.completions.create(...) 형태를 그대로 쓰는 기존 코드용 어댑터"""
+
+    def __init__(self, provider: str = "openai"):
+        self.provider = provider
+        self.chat = _Chat(provider)
+
+
+_gateway_clients: Dict[str, GatewayClient] = {}
+
+
+def get_llm_client(provider: str = "openai") -> GatewayClient:
+    client = _gateway_clients.get(provider)
+    if client is None:
+        client = _gateway_clients.setdefault(provider, GatewayClient(provider))
+    return client
+
+
+# =========================
+# 동기 호출 / 수명 관리
+# =========================
+
+def _remember_loop() -> None:
+    global _main_loop
+    if _main_loop is None and threading.current_thread() is threading.main_thread():
+        _main_loop = asyncio.get_running_loop()
+
+
+def bind_loop(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """앱 시작 시 메인 루프 등록 (run_sync가 이 루프로 호출을 넘김)"""
+    global _main_loop
+    _main_loop = loop or asyncio.get_running_loop()
+
+
+async def _with_priority(coro: Awaitable[T], priority: str) -> T:
+    set_llm_priority(priority)
+    return await coro
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    동기 코드(스레드)에서 게이트웨이 호출
+    메인 루프가 돌고 있으면 그 루프에서 실행해 커넥션 풀/스케줄러를 공유, 아니면 asyncio.run
+    (호출한 쪽 컨텍스트의 LLM 우선순위 유지)
+    """
+    coro = _with_priority(coro, get_llm_priority())
+    loop = _main_loop
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not loop:
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+            return future.result(timeout)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # 이벤트 루프 스레드에서 동기 호출된 경우: 별도 스레드의 새 루프에서 실행
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result(timeout)
+
+
+async def aclose() -> None:
+    """현재 루프의 클라이언트 커넥션 정리 (앱 종료 시)"""
+    global _main_loop
+    per_loop = _clients.pop(asyncio.get_running_loop(), {})
+    for client in per_loop.values():
+        try:
+            await client.close()
+        except Exception:
+            pass
+    _main_loop = None
+
+
+def get_gateway_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"http2": _HTTP2, "circuits": {}, "schedulers": {}}
+    for name, breaker in _breakers.items():
+        stats["circuits"][name] = breaker.state
+    try:
+        per_loop = _schedulers.get(asyncio.get_running_loop(), {})
+    except RuntimeError:
+        per_loop = {}
+    for provider, scheduler in per_loop.items():
+        stats["schedulers"][provider] = scheduler.snapshot()
+    stats["usage"] = {model: dict(totals) for model, totals in _usage_totals.items()}
+    return stats
+
+
+__all__ = [
+    "CircuitOpenError",
+    "GatewayClient",
+    "aclose",
+    "bind_loop",
+    "chat_completion",
+    "chat_completion_stream",
+    "get_gateway_stats",
+    "get_llm_client",
+    "register_provider",
+    "run_sync",
+]
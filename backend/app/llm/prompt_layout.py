@@ -0,0 +1,95 @@
+"""
+프롬프트 배치 (프로바이더 프롬프트 캐시 활용)
+
+OpenAI는 앞부분이 같은 요청(1024토큰 이상)의 입력을 캐시해 첫 토큰 지연과 입력 비용을 줄인다.
+- 정적 지시문/예시(few-shot)는 항상 같은 순서로 앞에 둔다 (system → 예시 user/assistant 쌍)
+- 요청마다 바뀌는 내용은 마지막 user 메시지 하나에: 문서 컨텍스트 → 질문 순
+- 문서는 결정적 순서 (핀 문서 먼저, 나머지는 ID 순): 같은 문서 조합이면 질문만 달라도 문서 블록까지 캐시
+- prompt_cache_key로 같은 프롬프트 계열 요청을 같은 캐시로 라우팅 (LLM_PROMPT_CACHE_KEY=0이면 끔)
+응답의 usage.prompt_tokens_details.cached_tokens는 cached_tokens로 읽어 meta에 기록한다.
+
+정적 prefix만으로는 1024토큰에 못 미친다 (카드 system ≈190, 가이드 system ≈530 tok).
+문서 예산을 가득 채운 최대 프롬프트는 card_info ≈1400, 그 외 카드 라우트 ≈1100, 가이드 ≈1040 tok이라
+캐시는 문서 블록이 예산을 거의 채우고 같은 문서 조합이 반복될 때만 적중한다
+(가이드·card_usage는 문서가 짧으면 캐시 대상 아님). 확인: python tests/rag_performance_test.py --mode prompt-prefix
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+
+PROMPT_CACHE_KEY_ENABLED = os.getenv("LLM_PROMPT_CACHE_KEY", "1") != "0"
+PROMPT_CACHE_KEY_PREFIX = os.getenv("LLM_PROMPT_CACHE_KEY_PREFIX", "hana")
+# prompt_cache_key를 받는 프로바이더 (runpod vLLM 등은 모르는 인자를 거부할 수 있음)
+_CACHE_KEY_PROVIDERS = {"openai"}
+
+
+def layout_messages(
+    system: str,
+    *,
+    examples: Sequence[Tuple[str, str]] = (),
+    context: str = "",
+    request: str = "",
+) -> List[Dict[str, str]]:
+    """[정적 system, 정적 예시 쌍..., 가변 user(context → request)]"""
+    messages = [{"role": "system", "content": system}]
+    for user, assistant in examples:
+        messages.append({"role": "user", "content": user})
+        messages.append({"role": "assistant", "content": assistant})
+    variable = "\n\n".join(part for part in (context, request) if part)
+    messages.append({"role": "user", "content": variable})
+    return messages
+
+
+def _doc_id(doc: Dict[str, Any]) -> str:
+    meta = doc.get("metadata") or {}
+    return str(doc.get("id") or meta.get("id") or "")
+
+
+def order_docs_for_prompt(docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """핀 문서(_pin_rank 순) 먼저, 나머지는 문서 ID 순 (ID 없는 문서는 원래 순서로 맨 뒤)"""
+    indexed = list(enumerate(docs))
+
+    def _key(item: Tuple[int, Dict[str, Any]]) -> Tuple[int, int, str, int]:
+        pos, doc = item
+        if doc.get("_pinned"):
+            return (0, int(doc.get("_pin_rank") or 0), _doc_id(doc), pos)
+        doc_id = _doc_id(doc)
+        return (1 if doc_id else 2, 0, doc_id, pos)
+
+    return [doc for _, doc in sorted(indexed, key=_key)]
+
+
+def prompt_cache_params(name: str, provider: str = "openai") -> Dict[str, str]:
+    """chat.completions 인자에 합칠 prompt_cache_key (프롬프트 계열 이름 기준)"""
+    if not PROMPT_CACHE_KEY_ENABLED or provider not in _CACHE_KEY_PROVIDERS:
+        return {}
+    return {"prompt_cache_key": f"{PROMPT_CACHE_KEY_PREFIX}:{name}"}
+
+
+def cached_tokens(usage: Any) -> int:
+    """응답 usage에서 캐시 적중 입력 토큰 수 (없으면 0)"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is None and isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details")
+    value = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    return value if isinstance(value, int) else 0
+
+
+def record_usage(target: Optional[Dict[str, int]], usage: Any) -> None:
+    """응답 usage를 meta용 dict에 기록 (provider_prompt_tokens / cached_tokens)"""
+    if target is None or usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    if isinstance(prompt_tokens, int):
+        target["provider_prompt_tokens"] = prompt_tokens
+    target["cached_tokens"] = cached_tokens(usage)
+
+
+__all__ = [
+    "cached_tokens",
+    "layout_messages",
+    "order_docs_for_prompt",
+    "prompt_cache_params",
+    "record_usage",
+]
@@ -4,7 +4,7 @@
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import json
 import os
 import re
@@ -27,7 +27,11 @@ from app.guide.text_utils import (
     normalize_output,
     question_allowed,
 )
-from app.llm.base import get_openai_client
+from app.guide.context_builder import RAG_CARD_CONTEXT_TOKENS, build_doc_context
+from app.llm.gateway import chat_completion, chat_completion_stream, run_sync
+from app.llm.prompt_layout import layout_messages, order_docs_for_prompt, prompt_cache_params, record_usage
+from app.llm.tokenizer import count_message_tokens
+from app.llm.rag_llm.json_stream import JsonArrayStreamParser
 
 
 _CARD_FIELDS = (
@@ -169,31 +173,51 @@ def _extract_json(text: str) -> Optional[Any]:
     return None
 
 
-def _build_card_messages(query: str, docs: List[Dict[str, Any]], max_cards: int) -> List[Dict[str, str]]:
-    doc_block = build_doc_block(query, docs, max_cards)
-    system_prompt = (
-        "당신은 카드사 내부 상담 시나리오 카드를 작성하는 AI입니다.\n"
-        "아래 Documents에 있는 내용만 사용하여 카드 JSON 배열을 생성하세요.\n\n"
-        "[출력 형식]\n"
-        "- 반드시 JSON만 출력하세요. (코드블록/설명 금지)\n"
-        "- 최상위는 배열 또는 {\"cards\": [...]} 둘 중 하나로 출력합니다.\n\n"
-        "[카드 필드]\n"
-        "- id, title, keywords, content (1~2문장 요약)\n"
-        "- requiredChecks/exceptions: 배열 (없으면 빈 배열)\n"
-        "- fullText는 생성하지 마세요 (시스템이 자동 삽입)\n\n"
-        "[제약]\n"
-        "- 문서에 없는 절차/정책/기간/조건은 절대 만들지 마세요.\n"
-        "- 요약은 문서에서 근거가 보이는 내용만 사용하세요.\n"
-    )
-    user_prompt = (
-        f"User query:\n{query}\n\n"
-        f"Documents:\n{doc_block or 'NONE'}\n\n"
-        f"카드 개수는 최대 {max_cards}개까지만 생성하세요."
+_CARD_SYSTEM_PROMPT = (
+    "당신은 카드사 내부 상담 시나리오 카드를 작성하는 AI입니다.\n"
+    "아래 Documents에 있는 내용만 사용하여 카드 JSON 배열을 생성하세요.\n\n"
+    "[출력 형식]\n"
+    "- 반드시 JSON만 출력하세요. (코드블록/설명 금지)\n"
+    "- 최상위는 배열 또는 {\"cards\": [...]} 둘 중 하나로 출력합니다.\n\n"
+    "[카드 필드]\n"
+    "- id, title, keywords, content (1~2문장 요약)\n"
+    "- requiredChecks/exceptions: 배열 (없으면 빈 배열)\n"
+    "- fullText는 생성하지 마세요 (시스템이 자동 삽입)\n\n"
+    "[제약]\n"
+    "- 문서에 없는 절차/정책/기간/조건은 절대 만들지 마세요.\n"
+    "- 요약은 문서에서 근거가 보이는 내용만 사용하세요.\n"
+)
+
+
+def _build_card_messages(
+    query: str,
+    docs: List[Dict[str, Any]],
+    max_cards: int,
+    context_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+) -> List[Dict[str, str]]:
+    """정적 system → 문서 블록 → 질문 순 (docs는 order_docs_for_prompt로 정렬된 상태)"""
+    doc_block, _ = build_doc_context(query, docs, max_cards, context_tokens or RAG_CARD_CONTEXT_TOKENS, model)
+    return layout_messages(
+        _CARD_SYSTEM_PROMPT,
+        context=f"Documents:\n{doc_block or 'NONE'}",
+        request=f"User query:\n{query}\n\n카드 개수는 최대 {max_cards}개까지만 생성하세요.",
     )
-    return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
-    ]
+
+
+def _card_for_doc(doc: Optional[Dict[str, Any]], item: Dict[str, Any]) -> Dict[str, Any]:
+    """LLM 카드를 프롬프트 문서와 병합. LLM은 [Doc n]만 보고 id를 지어내므로 문서 id를 유지"""
+    base = _doc_to_card_base(doc)
+    merged = _merge_card(base, item)
+    if base.get("id"):
+        merged["id"] = base["id"]
+    return merged
+
+
+def _in_doc_order(cards: List[Dict[str, Any]], docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """프롬프트 순서로 만든 카드를 원래 문서(관련도) 순서로 되돌림"""
+    positions = {str(doc.get("id") or (doc.get("metadata") or {}).get("id") or ""): i for i, doc in enumerate(docs)}
+    return sorted(cards, key=lambda card: positions.get(str(card.get("id") or ""), len(positions)))
 
 
 def build_rule_cards(query: str, docs: List[Dict[str, Any]], max_cards: int = 4) -> tuple[List[Dict[str, Any]], str]:
@@ -214,21 +238,44 @@ def generate_detail_cards(
     temperature: float = 0.0,
     max_llm_cards: int = 4,
 ) -> tuple[List[Dict[str, Any]], str]:
+    """동기 래퍼 (기존 호환성 유지)"""
+    return run_sync(generate_detail_cards_async(query, docs, model, temperature, max_llm_cards))
+
+
+async def generate_detail_cards_async(
+    query: str,
+    docs: List[Dict[str, Any]],
+    model: str = "",
+    temperature: float = 0.0,
+    max_llm_cards: int = 4,
+    deadline: Optional[float] = None,
+    context_tokens: Optional[int] = None,
+    usage: Optional[Dict[str, int]] = None,
+) -> tuple[List[Dict[str, Any]], str]:
+    """
+    deadline(time.monotonic 기준)을 넘기면 규칙 카드로 폴백 (output은 "")
+    context_tokens: 문서 컨텍스트 토큰 예산, usage가 있으면 prompt_tokens 기록
+    """
     if not docs:
         return [], ""
 
     model = model or os.getenv("RAG_CARD_MODEL", "gpt-4.1-mini")
-    messages = _build_card_messages(query, docs, max_llm_cards)
+    prompt_docs = order_docs_for_prompt(docs[:max_llm_cards])
+    messages = _build_card_messages(query, prompt_docs, max_llm_cards, context_tokens, model)
+    if usage is not None:
+        usage["prompt_tokens"] = count_message_tokens(messages, model)
 
     try:
-        client = get_openai_client()
-        resp = client.chat.completions.create(
+        resp = await chat_completion(
             model=model,
             messages=messages,
             temperature=temperature,
             max_tokens=500,
             top_p=0.9,
+            deadline=deadline,
+            **prompt_cache_params("rag_card"),
         )
+        record_usage(usage, getattr(resp, "usage", None))
         output = (resp.choices[0].message.content or "").strip()
     except Exception:
         return build_rule_cards(query, docs, max_cards=max_llm_cards)
@@ -239,19 +286,92 @@ def generate_detail_cards(
     if not isinstance(parsed, list):
         return build_rule_cards(query, docs, max_cards=max_llm_cards)
 
-    # docs 순서대로 매칭 (LLM이 생성한 id는 무시하고 원본 문서 순서 사용)
+    # 프롬프트 문서 순서대로 매칭 (LLM이 생성한 id는 무시)
     cards: List[Dict[str, Any]] = []
     for idx, item in enumerate(parsed[:max_llm_cards]):
         if not isinstance(item, dict):
             continue
-        doc = docs[idx] if idx < len(docs) else None
-        base = _doc_to_card_base(doc)
-        merged = _merge_card(base, item)
-        cards.append(merged)
+        doc = prompt_docs[idx] if idx < len(prompt_docs) else None
+        cards.append(_card_for_doc(doc, item))
 
     if not cards:
         return build_rule_cards(query, docs, max_cards=max_llm_cards)
-    return cards, output
+    return _in_doc_order(cards, docs), output
+
+
+async def stream_detail_cards(
+    query: str,
+    docs: List[Dict[str, Any]],
+    model: str = "",
+    temperature: float = 0.0,
+    max_llm_cards: int = 4,
+    deadline: Optional[float] = None,
+    context_tokens: Optional[int] = None,
+    usage: Optional[Dict[str, int]] = None,
+    status: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    generate_detail_cards의 스트리밍 버전: 카드 JSON 객체가 닫히는 즉시 카드 하나씩 반환
+    카드는 프롬프트 문서 순서(order_docs_for_prompt)로 나오므로 호출부는 id로 자리를 찾는다
+    LLM 카드만 반환 (규칙 카드 폴백은 호출부 몫). status가 있으면 status["complete"]에
+    스트림이 오류 없이 끝나 JSON 배열을 다 읽었는지 기록 (캐시 저장 여부 판단용)
+    """
+    if status is not None:
+        status["complete"] = False
+    if not docs:
+        return
+
+    model = model or os.getenv("RAG_CARD_MODEL", "gpt-4.1-mini")
+    prompt_docs = order_docs_for_prompt(docs[:max_llm_cards])
+    messages = _build_card_messages(query, prompt_docs, max_llm_cards, context_tokens, model)
+    if usage is not None:
+        usage["prompt_tokens"] = count_message_tokens(messages, model)
+    parser = JsonArrayStreamParser()
+    emitted = 0
+    failed = False
+
+    try:
+        async for chunk in chat_completion_stream(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=500,
+            top_p=0.9,
+            deadline=deadline,
+            **prompt_cache_params("rag_card"),
+        ):
+            # 배열이 닫히거나 카드가 다 찬 뒤에도 마지막 usage 청크까지 읽음 (캐시 토큰 기록)
+            record_usage(usage, getattr(chunk, "usage", None))
+            if not chunk.choices or parser.done or emitted >= max_llm_cards:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            for item in parser.feed(delta):
+                if emitted >= max_llm_cards:
+                    break
+                # 프롬프트 문서 순서대로 매칭 (LLM이 생성한 id는 무시)
+                doc = prompt_docs[emitted] if emitted < len(prompt_docs) else None
+                yield _card_for_doc(doc, item)
+                emitted += 1
+    except Exception:
+        failed = True
+        if emitted:
+            return
+
+    if emitted:
+        if status is not None:
+            status["complete"] = parser.done or emitted >= max_llm_cards
+        return
+
+    # 스트림 파싱 실패 시 전체 텍스트로 한 번 더 시도 (스트림이 끊겼으면 불완전)
+    parsed = _extract_json(parser.text)
+    if isinstance(parsed, dict):
+        parsed = parsed.get("cards")
+    items = [it for it in parsed[:max_llm_cards] if isinstance(it, dict)] if isinstance(parsed, list) else []
+    for idx, item in enumerate(items):
+        doc = prompt_docs[idx] if idx < len(prompt_docs) else None
+        yield _card_for_doc(doc, item)
+    if status is not None:
+        status["complete"] = bool(items) and not failed
 
 
 def _apply_question_policy(text: str, query: str) -> str:
@@ -449,4 +569,10 @@ def generate_guide_message(
     return _fallback_message(query)
 
 
-__all__ = ["generate_guide_message", "generate_detail_cards", "build_rule_cards"]
+__all__ = [
+    "generate_guide_message",
+    "generate_detail_cards",
+    "generate_detail_cards_async",
+    "stream_detail_cards",
+    "build_rule_cards",
+]
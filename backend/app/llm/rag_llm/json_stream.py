@@ -0,0 +1,81 @@
+"""
+스트리밍 LLM 출력용 점진 JSON 배열 파서
+
+카드 생성 응답(`[...]` 또는 `{"cards": [...]}`)을 토큰 단위로 받아
+첫 번째 배열의 원소 객체가 닫히는 즉시 dict로 돌려준다.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+class JsonArrayStreamParser:
+    """feed(chunk) → 이번 chunk로 완성된 배열 원소(dict) 리스트"""
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._stack: List[str] = []      # 열린 괄호 ('{' / '[')
+        self._array_depth: Optional[int] = None  # 카드 배열의 stack 깊이
+        self._item_start: Optional[int] = None   # 현재 원소 시작 위치 (_buf 인덱스)
+        self._in_string = False
+        self._escape = False
+        self.done = False                # 카드 배열이 닫힘
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        if self.done or not chunk:
+            return items
+        for ch in chunk:
+            pos = len(self._buf)
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                # 배열/객체 밖의 문자열(코드블록 설명 등)은 무시
+                if self._stack:
+                    self._in_string = True
+                continue
+            if ch in "[{":
+                if ch == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = pos
+                self._stack.append(ch)
+                if ch == "[" and self._array_depth is None:
+                    self._array_depth = len(self._stack)
+                continue
+            if ch in "]}":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if self._array_depth is None:
+                    continue
+                if ch == "}" and self._item_start is not None and len(self._stack) == self._array_depth:
+                    item = self._parse("".join(self._buf[self._item_start:pos + 1]))
+                    self._item_start = None
+                    if item is not None:
+                        items.append(item)
+                elif ch == "]" and len(self._stack) == self._array_depth - 1:
+                    self.done = True
+                    break
+        return items
+
+    @staticmethod
+    def _parse(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except Exception:
+            return None
+        return value if isinstance(value, dict) else None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buf)
+
+
+__all__ = ["JsonArrayStreamParser"]
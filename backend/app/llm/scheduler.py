@@ -0,0 +1,369 @@
+"""
+우선순위 LLM 작업 스케줄러 (게이트웨이 내부에서 사용)
+
+실시간 통화 카드/가이드가 교대 종료 직후 몰리는 followup 요약·피드백에 밀리지 않도록
+프로바이더마다 우선순위 큐를 두고 슬롯/요청 수/토큰 수 한도 안에서만 호출을 내보낸다.
+- 우선순위: live(/ws/call) > edu(/ws/edu) > followup(/followup) > batch(오프라인 스크립트)
+- live는 선점: 대기 중이면 항상 먼저 나가고, LLM_LIVE_RESERVE 슬롯은 live 전용
+- 나머지는 가중치(LLM_PRIORITY_WEIGHTS) 기반 stride 스케줄링으로 공정하게 배분
+- RPM/TPM 토큰 버킷 (LLM_RATE_LIMITS, 기본 무제한), 429를 받으면 한도를 줄이고 Retry-After 동안 정지, 성공하면 서서히 복구
+  429 응답의 x-ratelimit-limit-requests/tokens 헤더가 있으면 그 값을 계정 한도로 사용 (등급별 하드코딩 없음)
+- 대기열이 LLM_QUEUE_MAX를 넘으면 더 높은 우선순위 요청이 들어올 때 가장 낮은 우선순위 대기 작업을 밀어냄
+
+우선순위는 contextvar로 전달: 엔드포인트에서 set_llm_priority("live") 후 생성한 태스크가 모두 상속
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+PRIORITIES = ("live", "edu", "followup", "batch")
+DEFAULT_PRIORITY = os.getenv("LLM_DEFAULT_PRIORITY", "followup")
+
+LLM_PROVIDER_CONCURRENCY = int(os.getenv("LLM_PROVIDER_CONCURRENCY", "32"))
+LLM_LIVE_RESERVE = int(os.getenv("LLM_LIVE_RESERVE", "4"))
+LLM_PRIORITY_WEIGHTS = os.getenv("LLM_PRIORITY_WEIGHTS", "edu=4,followup=2,batch=1")
+# 프로바이더별 "rpm:tpm" (0 = 제한 없음, 429 헤더로 학습)
+LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "")
+LLM_QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", "200"))
+LLM_RATE_DECREASE = float(os.getenv("LLM_RATE_DECREASE", "0.7"))
+LLM_RATE_INCREASE = float(os.getenv("LLM_RATE_INCREASE", "0.02"))
+
+_STRIDE = 1_000_000
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default=DEFAULT_PRIORITY)
+
+
+class LLMPreempted(RuntimeError):
+    """대기열 포화로 더 높은 우선순위 요청에 자리를 내줌"""
+
+
+def set_llm_priority(priority: str) -> contextvars.Token:
+    """현재 컨텍스트(와 이후 생성되는 태스크)의 LLM 우선순위 지정"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"알 수 없는 LLM 우선순위: {priority}")
+    return _priority.set(priority)
+
+
+def get_llm_priority() -> str:
+    return _priority.get()
+
+
+def _parse_map(raw: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for part in raw.split(","):
+        name, _, value = part.strip().partition("=")
+        if name and value:
+            out[name.strip()] = value.strip()
+    return out
+
+
+def _parse_weights(raw: str) -> Dict[str, int]:
+    weights = {p: 1 for p in PRIORITIES}
+    for name, value in _parse_map(raw).items():
+        if name in weights and value.isdigit():
+            weights[name] = max(1, int(value))
+    return weights
+
+
+def _parse_rate_limits(raw: str) -> Dict[str, Tuple[float, float]]:
+    limits: Dict[str, Tuple[float, float]] = {}
+    for name, value in _parse_map(raw).items():
+        rpm, _, tpm = value.partition(":")
+        try:
+            limits[name] = (float(rpm or 0), float(tpm or 0))
+        except ValueError:
+            continue
+    return limits
+
+
+_WEIGHTS = _parse_weights(LLM_PRIORITY_WEIGHTS)
+_RATE_LIMITS = _parse_rate_limits(LLM_RATE_LIMITS)
+
+
+def estimate_tokens(params: Dict[str, Any]) -> int:
+    """요청 토큰 대략치: 메시지 글자 수 / 2 (한국어 기준 보수적) + max_tokens"""
+    chars = 0
+    for message in params.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            chars += len(content)
+    return chars // 2 + int(params.get("max_tokens") or 256)
+
+
+class _TokenBucket:
+    """분당 한도 → 초당 충전. limit 0이면 무제한"""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, factor: float) -> None:
+        now = time.monotonic()
+        capacity = self.per_minute * factor
+        self.level = min(capacity, self.level + (now - self.updated) * capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float) -> float:
+        if not self.per_minute:
+            return 0.0
+        capacity = self.per_minute * factor
+        need = min(amount, capacity)  # 버킷보다 큰 요청은 가득 찼을 때 허용
+        if self.level >= need:
+            return 0.0
+        return (need - self.level) * 60.0 / capacity
+
+    def take(self, amount: float) -> None:
+        if self.per_minute:
+            self.level -= amount
+
+    def give(self, amount: float) -> None:
+        if self.per_minute:
+            self.level = min(self.per_minute, self.level + amount)
+
+    def set_limit(self, per_minute: float) -> None:
+        """프로바이더가 알려준 한도로 교체 (무제한이던 버킷은 빈 상태로 시작)"""
+        if per_minute <= 0 or per_minute == self.per_minute:
+            return
+        self.level = min(self.level, per_minute) if self.per_minute else 0.0
+        self.per_minute = per_minute
+        self.updated = time.monotonic()
+
+
+class _Waiter:
+    __slots__ = ("priority", "model", "tokens", "future", "enqueued_at")
+
+    def __init__(self, priority: str, model: str, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.model = model
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class Grant:
+    """디스패치된 호출 1건 (release로 반납)"""
+
+    __slots__ = ("scheduler", "priority", "model", "tokens", "released")
+
+    def __init__(self, scheduler: "LLMScheduler", priority: str, model: str, tokens: int):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.model = model
+        self.tokens = tokens
+        self.released = False
+
+    def release(self, used_tokens: Optional[int] = None, rate_limited: bool = False,
+                retry_after: Optional[float] = None,
+                limits: Optional[Tuple[float, float]] = None) -> None:
+        """limits: 429 응답 헤더의 (rpm, tpm) (0이면 해당 한도 모름)"""
+        if self.released:
+            return
+        self.released = True
+        self.scheduler._release(self, used_tokens, rate_limited, retry_after, limits)
+
+
+class LLMScheduler:
+    """프로바이더 하나의 우선순위 큐 (이벤트 루프 스레드 전용)"""
+
+    def __init__(
+        self,
+        provider: str,
+        concurrency: int = LLM_PROVIDER_CONCURRENCY,
+        live_reserve: int = LLM_LIVE_RESERVE,
+        model_limits: Optional[Dict[str, int]] = None,
+        default_model_limit: int = 8,
+        rate_limits: Optional[Tuple[float, float]] = None,
+        weights: Optional[Dict[str, int]] = None,
+        queue_max: int = LLM_QUEUE_MAX,
+    ):
+        self.provider = provider
+        self.concurrency = max(1, concurrency)
+        self.live_reserve = min(max(0, live_reserve), self.concurrency - 1)
+        self.model_limits = model_limits or {}
+        self.default_model_limit = max(1, default_model_limit)
+        rpm, tpm = rate_limits if rate_limits is not None else _RATE_LIMITS.get(provider, (0.0, 0.0))
+        self._requests = _TokenBucket(rpm)
+        self._tokens = _TokenBucket(tpm)
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self.weights = weights or _WEIGHTS
+        self.queue_max = max(1, queue_max)
+        self._queues: Dict[str, Deque[_Waiter]] = {p: deque() for p in PRIORITIES}
+        self._pass: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._inflight = 0
+        self._model_inflight: Dict[str, int] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {p: {"dispatched": 0, "wait_ms": 0.0, "preempted": 0} for p in PRIORITIES}
+        self.stats["rate_limited"] = 0
+
+    # ---------- 외부 API ----------
+
+    async def acquire(self, model: str, tokens: int, priority: Optional[str] = None) -> Grant:
+        priority = priority if priority in PRIORITIES else get_llm_priority()
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(priority, model, tokens, future)
+        queue = self._queues[priority]
+        if not queue:
+            # 쉬던 클래스가 밀린 몫을 한꺼번에 쓰지 않도록 현재 최소 pass에 맞춤
+            active = [self._pass[p] for p, q in self._queues.items() if q]
+            if active:
+                self._pass[priority] = max(self._pass[priority], min(active))
+        queue.append(waiter)
+        self._preempt(priority)
+        self._dispatch()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                future.result().release()
+            else:
+                try:
+                    queue.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def queued(self) -> Dict[str, int]:
+        return {p: len(q) for p, q in self._queues.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "inflight": self._inflight,
+            "queued": self.queued(),
+            "rate_factor": round(self.rate_factor, 3),
+            "rate_limits": (self._requests.per_minute, self._tokens.per_minute),
+            "stats": self.stats,
+        }
+
+    # ---------- 내부 ----------
+
+    def _model_limit(self, model: str) -> int:
+        return self.model_limits.get(model, self.default_model_limit)
+
+    def _preempt(self, priority: str) -> None:
+        total = sum(len(q) for q in self._queues.values())
+        if total <= self.queue_max:
+            return
+        rank = PRIORITIES.index(priority)
+        for lower in reversed(PRIORITIES[rank + 1:]):
+            queue = self._queues[lower]
+            while queue and total > self.queue_max:
+                victim = queue.popleft()
+                total -= 1
+                self.stats[lower]["preempted"] += 1
+                if not victim.future.done():
+                    victim.future.set_exception(LLMPreempted(f"{lower} 대기 작업이 {priority} 요청에 밀림"))
+            if total <= self.queue_max:
+                return
+
+    def _rate_wait(self, tokens: int) -> float:
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._requests.refill(self.rate_factor)
+        self._tokens.refill(self.rate_factor)
+        return max(self._requests.wait_time(1, self.rate_factor), self._tokens.wait_time(tokens, self.rate_factor))
+
+    def _eligible(self, priority: str) -> Optional[_Waiter]:
+        """큐에서 모델 한도가 남은 첫 대기자 (모델별 한도로 다른 모델 요청이 막히지 않도록)"""
+        for waiter in self._queues[priority]:
+            if waiter.future.done():
+                continue
+            if self._model_inflight.get(waiter.model, 0) < self._model_limit(waiter.model):
+                return waiter
+        return None
+
+    def _pick(self) -> Optional[_Waiter]:
+        # live 선점: 대기 중이면 항상 먼저
+        waiter = self._eligible("live")
+        if waiter is not None:
+            return waiter
+        if self._inflight >= self.concurrency - self.live_reserve:
+            return None
+        best = None
+        for priority in PRIORITIES[1:]:
+            candidate = self._eligible(priority)
+            if candidate is None:
+                continue
+            if best is None or self._pass[priority] < self._pass[best.priority]:
+                best = candidate
+        return best
+
+    def _dispatch(self) -> None:
+        for priority, queue in self._queues.items():
+            while queue and queue[0].future.done():
+                queue.popleft()
+        while self._inflight < self.concurrency:
+            waiter = self._pick()
+            if waiter is None:
+                return
+            wait = self._rate_wait(waiter.tokens)
+            if wait > 0:
+                self._schedule(wait)
+                return
+            self._queues[waiter.priority].remove(waiter)
+            self._pass[waiter.priority] += _STRIDE // self.weights.get(waiter.priority, 1)
+            self._requests.take(1)
+            self._tokens.take(waiter.tokens)
+            self._inflight += 1
+            self._model_inflight[waiter.model] = self._model_inflight.get(waiter.model, 0) + 1
+            stat = self.stats[waiter.priority]
+            stat["dispatched"] += 1
+            stat["wait_ms"] += (time.monotonic() - waiter.enqueued_at) * 1000
+            waiter.future.set_result(Grant(self, waiter.priority, waiter.model, waiter.tokens))
+
+    def _schedule(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None:
+            # 이미 걸린 타이머가 더 이르면 유지, 늦으면 (큰 batch 대기 뒤 짧은 live 등) 다시 검
+            if self._timer.when() <= when:
+                return
+            self._timer.cancel()
+
+        def _fire() -> None:
+            self._timer = None
+            self._dispatch()
+
+        self._timer = loop.call_at(when, _fire)
+
+    def _release(self, grant: Grant, used_tokens: Optional[int], rate_limited: bool,
+                 retry_after: Optional[float], limits: Optional[Tuple[float, float]] = None) -> None:
+        self._inflight -= 1
+        self._model_inflight[grant.model] = max(0, self._model_inflight.get(grant.model, 1) - 1)
+        if used_tokens is not None:
+            # 추정치와 실제 사용량 차이 반영
+            self._tokens.give(grant.tokens - used_tokens)
+        if limits is not None:
+            self._requests.set_limit(limits[0])
+            self._tokens.set_limit(limits[1])
+        if rate_limited:
+            self.stats["rate_limited"] += 1
+            self.rate_factor = max(0.1, self.rate_factor * LLM_RATE_DECREASE)
+            self.paused_until = max(self.paused_until, time.monotonic() + (retry_after or 1.0))
+            print(f"[LLM Scheduler] {self.provider} 429 → 한도 {self.rate_factor:.2f}배로 축소")
+        elif used_tokens is not None:
+            self.rate_factor = min(1.0, self.rate_factor + LLM_RATE_INCREASE)
+        try:
+            self._dispatch()
+        except RuntimeError:
+            # 루프 종료 중 (call_later 불가)
+            pass
+
+
+__all__ = [
+    "DEFAULT_PRIORITY",
+    "Grant",
+    "LLMPreempted",
+    "LLMScheduler",
+    "PRIORITIES",
+    "estimate_tokens",
+    "get_llm_priority",
+    "set_llm_priority",
+]
@@ -0,0 +1,77 @@
+"""
+로컬 토크나이저 (tiktoken)
+
+프롬프트 컨텍스트를 글자 수가 아니라 실제 토큰 수로 맞추기 위해 사용.
+- 모델별 인코딩은 tiktoken.encoding_for_model, 모르는 모델은 TOKENIZER_ENCODING(o200k_base)
+- tiktoken이 없거나 인코딩 파일을 못 받으면 글자 수 / 2 (한국어 기준 보수적) 근사치로 대체
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import os
+
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+# chat 포맷 오버헤드 (메시지당 / 응답 프라이밍)
+_TOKENS_PER_MESSAGE = 3
+_TOKENS_PER_REPLY = 3
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str) -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        return None
+
+
+def is_exact(model: Optional[str] = None) -> bool:
+    """근사치가 아니라 실제 토크나이저로 세는지"""
+    return _encoding(model or "") is not None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    enc = _encoding(model or "")
+    if enc is None:
+        return (len(text) + 1) // 2
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    total = _TOKENS_PER_REPLY
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        total += _TOKENS_PER_MESSAGE + count_tokens(content if isinstance(content, str) else "", model)
+    return total
+
+
+def truncate_to_tokens(text: str, limit: int, model: Optional[str] = None) -> str:
+    """limit 토큰 이하로 자름"""
+    if limit <= 0 or not text:
+        return ""
+    enc = _encoding(model or "")
+    if enc is None:
+        return text[: limit * 2]
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= limit:
+        return text
+    # 멀티바이트 문자가 토큰 경계에서 잘리면 깨진 글자는 버림
+    return enc.decode(tokens[:limit]).rstrip("�").strip()
+
+
+__all__ = ["count_message_tokens", "count_tokens", "is_exact", "truncate_to_tokens"]
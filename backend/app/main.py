@@ -5,14 +5,25 @@ from fastapi.staticfiles import StaticFiles
 from app.api.v1.routers import api_router
 from app.llm.delivery.keyword_extractor import warmup
 from app.rag.retriever.db import warmup_embed_cache
+from app.rag.cache.pin_store import warmup_pin_store
+from app.rag.retriever.card_catalog import warmup_card_catalog
+from app.audio.stt_backends import warmup_stt_backend
+from app.rag.rerank.service import warmup_reranker
+from app.llm import gateway as llm_gateway
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 애플리케이션 시작 시 워밍업 실행
+    warmup_card_catalog()  # card_products 인메모리 카탈로그 (형태소 사전/리트리버 공용)
     warmup(silent=True)  # 형태소 분석기 로드
     warmup_embed_cache()  # 자주 쓰는 쿼리 임베딩 사전 캐싱
+    warmup_pin_store()  # 핀 문서 메모리 로드
+    warmup_stt_backend()  # STT 백엔드 준비 (local이면 faster-whisper 모델 로드)
+    warmup_reranker()  # Cross-Encoder 리랭커 백그라운드 로드 (로드 전 요청은 리랭킹 생략)
+    llm_gateway.bind_loop()  # 스레드의 동기 LLM 호출도 메인 루프의 커넥션 풀/세마포어 사용
     yield
     # 애플리케이션 종료 시 정리 작업 (필요 시)
+    await llm_gateway.aclose()
 
 origins = [
     "http://localhost:5173",
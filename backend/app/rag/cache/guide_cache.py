@@ -0,0 +1,114 @@
+from typing import Dict, List, Optional
+
+import json
+import os
+import time
+
+try:
+    import redis.asyncio as redis_async
+except Exception:
+    redis_async = None
+
+GUIDE_CACHE_TTL_SEC = float(os.getenv("RAG_GUIDE_CACHE_TTL", "3600"))
+GUIDE_CACHE_ENABLED = GUIDE_CACHE_TTL_SEC > 0 and os.getenv("RAG_GUIDE_CACHE", "1") != "0"
+REDIS_URL = os.getenv("RAG_REDIS_URL")
+REDIS_ENABLED = GUIDE_CACHE_ENABLED and bool(REDIS_URL) and redis_async is not None
+
+_REDIS_CLIENT = None
+# key -> (저장 시각, normalize_output 이후 최종 가이드 문장)
+_GUIDE_CACHE: Dict[tuple, tuple[float, str]] = {}
+
+
+def _redis_client():
+    global _REDIS_CLIENT
+    if not REDIS_ENABLED:
+        return None
+    if _REDIS_CLIENT is None:
+        _REDIS_CLIENT = redis_async.from_url(REDIS_URL, decode_responses=True)
+    return _REDIS_CLIENT
+
+
+def _prune_guide_cache(now: float) -> None:
+    if not _GUIDE_CACHE:
+        return
+    expired = [key for key, (ts, _) in _GUIDE_CACHE.items() if now - ts > GUIDE_CACHE_TTL_SEC]
+    for key in expired:
+        _GUIDE_CACHE.pop(key, None)
+
+
+def build_guide_cache_key(
+    model: str,
+    intent: str,
+    normalized_query_template: str,
+    doc_ids: List[str],
+    prompt_version: str,
+) -> Optional[tuple]:
+    """
+    (가이드 모델, intent, 프롬프트 버전, 쿼리 템플릿, 문서 ID) 기준 키
+    쿼리 템플릿이 없으면 호출 측에서 정규화된 쿼리를 넘긴다 (같은 문서라도 다른 질문끼리 섞이지 않게)
+    prompt_version: system 프롬프트 해시 (프롬프트 변경 시 Redis에 남은 이전 가이드를 쓰지 않음)
+    """
+    if not doc_ids or any(not doc_id for doc_id in doc_ids):
+        return None
+    if not normalized_query_template:
+        return None
+    return (
+        model,
+        intent or "general",
+        prompt_version,
+        normalized_query_template,
+        tuple(sorted(doc_ids)),
+    )
+
+
+def _cache_key_str(key: tuple) -> str:
+    return "rag:guide:" + json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+
+async def guide_cache_get(key: Optional[tuple]) -> Optional[tuple[str, str]]:
+    """(가이드 문장, "redis"|"mem") 또는 None"""
+    if not GUIDE_CACHE_ENABLED:
+        return None
+    if not key:
+        return None
+
+    if REDIS_ENABLED:
+        client = _redis_client()
+        if client:
+            try:
+                message = await client.get(_cache_key_str(key))
+                if message:
+                    return message, "redis"
+            except Exception:
+                pass
+
+    now = time.time()
+    _prune_guide_cache(now)
+    entry = _GUIDE_CACHE.get(key)
+    if not entry:
+        return None
+    ts, message = entry
+    if now - ts > GUIDE_CACHE_TTL_SEC:
+        _GUIDE_CACHE.pop(key, None)
+        return None
+    return message, "mem"
+
+
+async def guide_cache_set(key: Optional[tuple], message: str) -> None:
+    if not GUIDE_CACHE_ENABLED:
+        return
+    if not key or not message:
+        return
+
+    if REDIS_ENABLED:
+        client = _redis_client()
+        if client:
+            try:
+                ttl = max(1, int(GUIDE_CACHE_TTL_SEC))
+                await client.setex(_cache_key_str(key), ttl, message)
+            except Exception:
+                pass
+
+    now = time.time()
+    _prune_guide_cache(now)
+    _GUIDE_CACHE[key] = (now, message)
@@ -0,0 +1,127 @@
+"""
+핀 문서 인메모리 스토어
+
+policy_pins에서 참조하는 핀 문서(분실/도난, 수수료/약관, 엔티티 guide 등)를
+시작 시 한 번에 로드해 두고 retrieve_docs의 핀 보강을 메모리에서 처리한다.
+- 만료(RAG_PIN_STORE_REFRESH_SEC) 시 백그라운드 스레드로 재로드 (요청 경로 비차단)
+- 로드 실패 시 RAG_PIN_STORE_RETRY_SEC 뒤에 재시도 (DB 장애 중 요청마다 재로드하지 않음)
+- 스토어에 없는 ID만 DB(fetch_docs_by_ids)로 폴백
+
+최신성: 핀 목록은 코드(policy_pins) 상수라 배포 시 다시 로드되고, 핀 문서(service_guide_documents)는
+app/db/scripts 적재 스크립트가 별도 프로세스로만 수정하므로 서버에 변경 알림 경로가 없다.
+문서 수정 후 최대 RAG_PIN_STORE_REFRESH_SEC(기본 600초) + 재로드 1회 시간 동안 이전 본문이 나갈 수 있음
+(즉시 반영이 필요하면 서버 재시작, 더 짧은 상한이 필요하면 RAG_PIN_STORE_REFRESH_SEC를 낮춤)
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.rag.policy.policy_pins import all_pin_doc_ids
+from app.rag.retriever.db import fetch_docs_by_ids
+
+logger = logging.getLogger(__name__)
+
+PIN_STORE_ENABLED = os.getenv("RAG_PIN_STORE", "1") != "0"
+PIN_STORE_REFRESH_SEC = float(os.getenv("RAG_PIN_STORE_REFRESH_SEC", "600"))
+PIN_STORE_RETRY_SEC = float(os.getenv("RAG_PIN_STORE_RETRY_SEC", "30"))
+
+_PIN_DOCS: Dict[Tuple[str, str], Dict[str, Any]] = {}
+# 로드 시도한 (table, id): DB에 없는 ID를 매 요청 재조회하지 않기 위함
+_PIN_KNOWN_IDS: frozenset = frozenset()
+_PIN_LOADED_AT = 0.0
+# 마지막 로드 시도 시각 (성공/실패 무관)
+_PIN_ATTEMPTED_AT = 0.0
+_PIN_LOCK = threading.Lock()
+_PIN_REFRESHING = False
+
+
+def _load_pin_docs() -> Tuple[Dict[Tuple[str, str], Dict[str, Any]], frozenset]:
+    loaded: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    known = set()
+    for table, ids in all_pin_doc_ids().items():
+        known.update((table, str(doc_id)) for doc_id in ids)
+        for doc in fetch_docs_by_ids(table, ids):
+            doc_id = str(doc.get("id") or "")
+            if doc_id:
+                loaded[(table, doc_id)] = doc
+    return loaded, frozenset(known)
+
+
+def refresh_pin_store() -> int:
+    """핀 문서 전체 재로드 (시작 시 warmup, 이후 만료 시 백그라운드 스레드). 로드된 문서 수 반환"""
+    global _PIN_DOCS, _PIN_KNOWN_IDS, _PIN_LOADED_AT, _PIN_ATTEMPTED_AT, _PIN_REFRESHING
+    if not PIN_STORE_ENABLED:
+        return 0
+    try:
+        loaded, known = _load_pin_docs()
+    except Exception as exc:
+        logger.warning("[pin_store] refresh failed: %s", exc)
+        with _PIN_LOCK:
+            _PIN_ATTEMPTED_AT = time.time()
+            _PIN_REFRESHING = False
+        return 0
+    with _PIN_LOCK:
+        _PIN_DOCS = loaded
+        _PIN_KNOWN_IDS = known
+        _PIN_LOADED_AT = _PIN_ATTEMPTED_AT = time.time()
+        _PIN_REFRESHING = False
+    return len(loaded)
+
+
+def warmup_pin_store() -> int:
+    """애플리케이션 시작 시 핀 문서 사전 로드"""
+    return refresh_pin_store()
+
+
+def _schedule_refresh_if_stale(now: float) -> None:
+    global _PIN_REFRESHING
+    if PIN_STORE_REFRESH_SEC <= 0:
+        return
+    with _PIN_LOCK:
+        if _PIN_REFRESHING or (now - _PIN_LOADED_AT) <= PIN_STORE_REFRESH_SEC:
+            return
+        if (now - _PIN_ATTEMPTED_AT) <= PIN_STORE_RETRY_SEC:
+            # 직전 시도가 실패: 재시도 간격 전까지는 스레드/DB 조회를 새로 띄우지 않음
+            return
+        _PIN_REFRESHING = True
+    threading.Thread(target=refresh_pin_store, name="pin-store-refresh", daemon=True).start()
+
+
+def get_pinned_docs(table: str, ids: List[str]) -> List[Dict[str, Any]]:
+    """핀 문서 조회: 메모리 우선, 누락 ID만 DB 조회"""
+    if not ids:
+        return []
+    if not PIN_STORE_ENABLED:
+        return fetch_docs_by_ids(table, ids)
+    now = time.time()
+    _schedule_refresh_if_stale(now)
+    docs: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    with _PIN_LOCK:
+        store = _PIN_DOCS
+        known = _PIN_KNOWN_IDS
+    for doc_id in ids:
+        key = (table, str(doc_id))
+        doc = store.get(key)
+        if doc is None:
+            if key not in known:
+                missing.append(doc_id)
+            continue
+        docs.append(copy.deepcopy(doc))
+    if missing:
+        docs.extend(fetch_docs_by_ids(table, missing))
+    return docs
+
+
+def pin_store_stats() -> Dict[str, Any]:
+    with _PIN_LOCK:
+        return {
+            "enabled": PIN_STORE_ENABLED,
+            "doc_count": len(_PIN_DOCS),
+            "loaded_at": _PIN_LOADED_AT,
+        }
@@ -1,5 +1,6 @@
 from app.rag.pipeline.config import RAGConfig
-from app.rag.pipeline.pipeline import run_rag
+from app.rag.pipeline.deadline import Deadline
+from app.rag.pipeline.pipeline import RAG_PROGRESSIVE_CARDS, run_rag, run_rag_progressive
 from app.rag.pipeline.search import route
 from app.rag.pipeline.retrieve import retrieve_docs
 from app.rag.pipeline.utils import (
@@ -13,7 +14,10 @@ from app.rag.pipeline.utils import (
 
 __all__ = [
     "RAGConfig",
+    "Deadline",
     "run_rag",
+    "run_rag_progressive",
+    "RAG_PROGRESSIVE_CARDS",
     "route",
     "retrieve_docs",
     "apply_session_context",
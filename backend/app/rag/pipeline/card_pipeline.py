@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
 import os
 import re
-import time
 
-from app.llm.rag_llm.card_generator import generate_detail_cards, build_rule_cards
+from app.guide.context_builder import card_context_budget
+from app.llm.rag_llm.card_generator import build_rule_cards, generate_detail_cards_async, stream_detail_cards
 from app.rag.cache.card_cache import (
     CARD_CACHE_ENABLED,
     build_card_cache_key,
@@ -14,6 +13,7 @@ from app.rag.cache.card_cache import (
     card_cache_set,
     doc_cache_id,
 )
+from app.rag.pipeline.deadline import RAG_CARD_LLM_MIN_MS, Deadline, deadline_at, remaining_ms
 from app.rag.pipeline.utils import format_ms
 from app.rag.postprocess.cards import omit_empty, promote_definition_doc, split_cards_by_query
 from app.rag.postprocess.keywords import collect_query_keywords, extract_query_terms, normalize_text
@@ -179,35 +179,13 @@ def _ensure_benefit_phrase(cards: List[Dict[str, Any]], query: str) -> List[Dict
     return cards
 
 
-async def _generate_detail_cards_async(
-    *,
-    query: str,
-    docs: List[Dict[str, Any]],
-    model: str,
-    temperature: float,
-    max_llm_cards: int,
-) -> tuple[List[Dict[str, Any]], str]:
-    return await asyncio.to_thread(
-        generate_detail_cards,
-        query=query,
-        docs=docs,
-        model=model,
-        temperature=temperature,
-        max_llm_cards=max_llm_cards,
-    )
-
-
-async def build_card_response(
-    *,
+def _select_card_docs(
     query: str,
     routing: Dict[str, Any],
     docs: List[Dict[str, Any]],
     config: Any,
-    t_start: float,
-    t_route: float,
-    t_retrieve: float,
-    retrieve_cache_status: str,
-) -> Dict[str, Any]:
+) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]], int]:
+    """라우트별 카드 문서 선택 → (docs, llm_docs, rule_docs, llm_card_top_n)"""
     llm_card_top_n = max(1, config.llm_card_top_n)
 
     docs = clean_card_docs(docs, query)
@@ -257,42 +235,37 @@ async def build_card_response(
             llm_docs = []
             routing["card_info_no_products"] = True
 
-    cache_status = "off"
-    cards: List[Dict[str, Any]]
-    ordered_doc_ids = [doc_cache_id(doc) for doc in llm_docs]
-    if not llm_docs:
-        cards, _ = build_rule_cards(query, docs)
-    elif CARD_CACHE_ENABLED and llm_card_top_n > 0:
-        cache_key = build_card_cache_key(
-            route=routing.get("route") or "",
-            model=config.model,
-            llm_card_top_n=llm_card_top_n,
-            normalized_query_template=normalize_text(routing.get("query_template") or ""),
-            normalized_query=normalize_text(query),
-            doc_ids=ordered_doc_ids,
-        )
-        cached = await card_cache_get(cache_key, ordered_doc_ids)
-        if cached:
-            cards, _, cache_backend = cached
-            cache_status = f"hit({cache_backend})"
-        else:
-            cards, _ = await _generate_detail_cards_async(
-                query=query,
-                docs=llm_docs,
-                model=config.model,
-                temperature=0.0,
-                max_llm_cards=llm_card_top_n,
-            )
-            await card_cache_set(cache_key, cards, "")
-            cache_status = "miss"
-    else:
-        cards, _ = await _generate_detail_cards_async(
-            query=query,
-            docs=llm_docs,
-            model=config.model,
-            temperature=0.0,
-            max_llm_cards=llm_card_top_n,
-        )
+    return docs, llm_docs, rule_docs, llm_card_top_n
+
+
+def _card_cache_key(query: str, routing: Dict[str, Any], config: Any, llm_card_top_n: int, doc_ids: List[str]) -> str:
+    return build_card_cache_key(
+        route=routing.get("route") or "",
+        model=config.model,
+        llm_card_top_n=llm_card_top_n,
+        normalized_query_template=normalize_text(routing.get("query_template") or ""),
+        normalized_query=normalize_text(query),
+        doc_ids=doc_ids,
+    )
+
+
+def _finalize_card_response(
+    *,
+    cards: List[Dict[str, Any]],
+    query: str,
+    routing: Dict[str, Any],
+    docs: List[Dict[str, Any]],
+    llm_docs: List[Dict[str, Any]],
+    rule_docs: List[Dict[str, Any]],
+    config: Any,
+    usage: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """
+    LLM(또는 규칙) 카드에 규칙 카드 보충 + 후처리 후 응답 dict 구성
+    usage: LLM 호출의 prompt_tokens/cached_tokens (호출이 없으면 0)
+    """
+    usage = usage or {}
+    route_name = routing.get("route") or routing.get("ui_route")
     # card_info인 경우: 나머지 문서는 규칙 기반으로 카드 추가
     if route_name == "card_info" and rule_docs:
         rule_cards, _ = build_rule_cards(query, rule_docs, max_cards=2)
@@ -306,8 +279,6 @@ async def build_card_response(
             extra_rule_cards, _ = build_rule_cards(query, remaining_docs, max_cards=4 - len(cards))
             cards = cards + extra_rule_cards
 
-    t_cards = time.perf_counter()
-
     query_keywords = collect_query_keywords(query, routing, config.normalize_keywords)
     if not cards:
         cards = []
@@ -323,14 +294,189 @@ async def build_card_response(
     if cards is None:
         cards = []
     current_cards, next_cards = split_cards_by_query(cards, query)
-    t_post = time.perf_counter()
 
     return {
         "currentSituation": current_cards,
         "nextStep": next_cards,
         "routing": routing,
-        "meta": {"model": config.model, "doc_count": len(docs), "context_chars": 0},
+        "meta": {
+            "model": config.model,
+            "doc_count": len(docs),
+            "context_chars": 0,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "cached_tokens": usage.get("cached_tokens", 0),
+        },
     }
 
 
-__all__ = ["build_card_response"]
+def _fill_placeholder(llm_cards: List[Dict[str, Any]], placeholder: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """LLM 카드를 같은 문서(id)의 규칙 카드 자리에 끼움 (id가 안 맞으면 앞쪽 빈 자리)"""
+    out = list(placeholder)
+    filled = [False] * len(out)
+    slots = {str(card.get("id") or ""): i for i, card in enumerate(placeholder)}
+    for card in llm_cards:
+        idx = slots.get(str(card.get("id") or ""))
+        if idx is None or filled[idx]:
+            idx = next((i for i, done in enumerate(filled) if not done), None)
+        if idx is None:
+            out.append(card)
+            continue
+        out[idx] = card
+        filled[idx] = True
+    return out
+
+
+async def build_card_response(
+    *,
+    query: str,
+    routing: Dict[str, Any],
+    docs: List[Dict[str, Any]],
+    config: Any,
+    t_start: float,
+    t_route: float,
+    t_retrieve: float,
+    retrieve_cache_status: str,
+    rule_only: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Dict[str, Any]:
+    """
+    rule_only=True면 LLM 호출 없이 같은 문서/배치로 규칙 기반 카드만 생성 (점진 응답 1단계)
+    deadline이 RAG_CARD_LLM_MIN_MS보다 적게 남았으면 캐시만 보고 규칙 카드로 대체
+    """
+    docs, llm_docs, rule_docs, llm_card_top_n = _select_card_docs(query, routing, docs, config)
+
+    cache_status = "off"
+    cards: List[Dict[str, Any]]
+    usage: Dict[str, int] = {}
+    context_tokens = card_context_budget(routing.get("route"))
+    ordered_doc_ids = [doc_cache_id(doc) for doc in llm_docs]
+    llm_allowed = remaining_ms(deadline) >= RAG_CARD_LLM_MIN_MS
+    if not llm_docs:
+        cards, _ = build_rule_cards(query, docs)
+    elif rule_only:
+        cards, _ = build_rule_cards(query, llm_docs, max_cards=llm_card_top_n)
+    elif CARD_CACHE_ENABLED and llm_card_top_n > 0:
+        cache_key = _card_cache_key(query, routing, config, llm_card_top_n, ordered_doc_ids)
+        cached = await card_cache_get(cache_key, ordered_doc_ids)
+        if cached:
+            cards, _, cache_backend = cached
+            cache_status = f"hit({cache_backend})"
+        elif llm_allowed:
+            cards, output = await generate_detail_cards_async(
+                query=query,
+                docs=llm_docs,
+                model=config.model,
+                temperature=0.0,
+                max_llm_cards=llm_card_top_n,
+                deadline=deadline_at(deadline),
+                context_tokens=context_tokens,
+                usage=usage,
+            )
+            if output:  # 규칙 카드 폴백(실패/시간 초과)은 캐시하지 않음
+                await card_cache_set(cache_key, cards, "")
+            cache_status = "miss"
+        else:
+            cards, _ = build_rule_cards(query, llm_docs, max_cards=llm_card_top_n)
+            cache_status = "skip(deadline)"
+    elif llm_allowed:
+        cards, _ = await generate_detail_cards_async(
+            query=query,
+            docs=llm_docs,
+            model=config.model,
+            temperature=0.0,
+            max_llm_cards=llm_card_top_n,
+            deadline=deadline_at(deadline),
+            context_tokens=context_tokens,
+            usage=usage,
+        )
+    else:
+        cards, _ = build_rule_cards(query, llm_docs, max_cards=llm_card_top_n)
+
+    return _finalize_card_response(
+        cards=cards,
+        query=query,
+        routing=routing,
+        docs=docs,
+        llm_docs=llm_docs,
+        rule_docs=rule_docs,
+        config=config,
+        usage=usage,
+    )
+
+
+async def stream_card_responses(
+    *,
+    query: str,
+    routing: Dict[str, Any],
+    docs: List[Dict[str, Any]],
+    config: Any,
+    deadline: Optional[Deadline] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    build_card_response의 스트리밍 버전
+    LLM 카드가 하나 완성될 때마다 (완성된 LLM 카드 + 나머지 문서의 규칙 카드)로 전체 응답을 다시 구성해 반환
+    마지막 반환값이 최종 응답 (캐시 히트/LLM 문서 없음이면 한 번만 반환)
+    """
+    docs, llm_docs, rule_docs, llm_card_top_n = _select_card_docs(query, routing, docs, config)
+    usage: Dict[str, int] = {}
+
+    def _response(cards: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return _finalize_card_response(
+            cards=[dict(card) for card in cards],
+            query=query,
+            routing=routing,
+            docs=docs,
+            llm_docs=llm_docs,
+            rule_docs=rule_docs,
+            config=config,
+            usage=usage,
+        )
+
+    if not llm_docs:
+        cards, _ = build_rule_cards(query, docs)
+        yield _response(cards)
+        return
+
+    ordered_doc_ids = [doc_cache_id(doc) for doc in llm_docs]
+    cache_key = ""
+    if CARD_CACHE_ENABLED:
+        cache_key = _card_cache_key(query, routing, config, llm_card_top_n, ordered_doc_ids)
+        cached = await card_cache_get(cache_key, ordered_doc_ids)
+        if cached:
+            yield _response(cached[0])
+            return
+
+    # 아직 LLM 카드가 안 나온 자리는 같은 문서의 규칙 카드로 채움
+    placeholder, _ = build_rule_cards(query, llm_docs, max_cards=llm_card_top_n)
+    if remaining_ms(deadline) < RAG_CARD_LLM_MIN_MS:
+        yield _response(placeholder)
+        return
+    llm_cards: List[Dict[str, Any]] = []
+    stream_status: Dict[str, Any] = {}
+    async for card in stream_detail_cards(
+        query=query,
+        docs=llm_docs,
+        model=config.model,
+        temperature=0.0,
+        max_llm_cards=llm_card_top_n,
+        deadline=deadline_at(deadline),
+        context_tokens=card_context_budget(routing.get("route")),
+        usage=usage,
+        status=stream_status,
+    ):
+        llm_cards.append(card)
+        yield _response(_fill_placeholder(llm_cards, placeholder))
+
+    if not llm_cards:
+        # LLM 실패/빈 결과: 규칙 카드 유지 (캐시하지 않음)
+        yield _response(placeholder)
+        return
+    # 오류 없이 끝까지 받았고 모든 자리가 LLM 카드로 찬 경우만 캐시 (배치 경로와 같은 기준)
+    complete = stream_status.get("complete") and len(llm_cards) >= min(llm_card_top_n, len(llm_docs))
+    if cache_key and complete and not (deadline is not None and deadline.expired):
+        await card_cache_set(cache_key, llm_cards, "")
+    # 최종 응답: 카드는 마지막 부분 응답과 같고 meta에 스트림 끝의 usage(cached_tokens) 반영
+    yield _response(_fill_placeholder(llm_cards, placeholder))
+
+
+__all__ = ["build_card_response", "stream_card_responses"]
@@ -13,3 +13,4 @@ class RAGConfig:
     strict_guidance_script: bool = True
     llm_card_top_n: int = 2
     enable_consult_search: bool = True
+    deadline_ms: int = 0  # 요청 단위 deadline (0이면 RAG_DEADLINE_MS)
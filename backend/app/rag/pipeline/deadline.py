@@ -0,0 +1,79 @@
+"""
+RAG 요청 단위 deadline
+
+run_rag(_progressive)에서 한 번 만들어 검색/카드/가이드 단계로 넘긴다.
+- 각 단계는 남은 시간으로 더 싼 전략을 고름 (폴백 검색 생략, 규칙 카드만, 템플릿 가이드)
+- LLM 호출은 deadline.at을 게이트웨이에 넘겨 대기/시도 타임아웃을 남은 시간으로 제한
+- deadline이 지나면 남은 비동기 작업은 취소
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+RAG_DEADLINE_MS = int(os.getenv("RAG_DEADLINE_MS", "4000"))
+# 이만큼도 안 남으면 해당 단계는 싼 전략으로
+RAG_FALLBACK_MIN_MS = int(os.getenv("RAG_FALLBACK_MIN_MS", "2500"))  # 폴백 검색 단계
+RAG_CONSULT_MIN_MS = int(os.getenv("RAG_CONSULT_MIN_MS", "2000"))    # 상담 사례 검색
+RAG_CARD_LLM_MIN_MS = int(os.getenv("RAG_CARD_LLM_MIN_MS", "1200"))  # LLM 카드 (미만이면 규칙 카드)
+RAG_GUIDE_LLM_MIN_MS = int(os.getenv("RAG_GUIDE_LLM_MIN_MS", "1000"))  # LLM 가이드 (미만이면 템플릿)
+
+
+class Deadline:
+    """time.monotonic 기준 만료 시각 (게이트웨이 deadline과 같은 시계)"""
+
+    __slots__ = ("at",)
+
+    def __init__(self, at: float):
+        self.at = at
+
+    @classmethod
+    def after_ms(cls, ms: Optional[float] = None) -> "Deadline":
+        ms = RAG_DEADLINE_MS if not ms else ms
+        return cls(time.monotonic() + ms / 1000)
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.at - time.monotonic()) * 1000)
+
+    def has(self, ms: float) -> bool:
+        """ms 이상 남았는지"""
+        return self.remaining_ms() >= ms
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.at
+
+    async def wait(self, aw: Awaitable[T], default: Any = None) -> T:
+        """deadline까지 기다리고, 지나면 작업을 취소하고 default 반환"""
+        task = asyncio.ensure_future(aw)
+        try:
+            return await asyncio.wait_for(task, self.remaining_ms() / 1000)
+        except asyncio.TimeoutError:
+            return default
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining_ms={self.remaining_ms():.0f})"
+
+
+def remaining_ms(deadline: Optional[Deadline]) -> float:
+    return deadline.remaining_ms() if deadline is not None else float("inf")
+
+
+def deadline_at(deadline: Optional[Deadline]) -> Optional[float]:
+    return deadline.at if deadline is not None else None
+
+
+__all__ = [
+    "Deadline",
+    "RAG_CARD_LLM_MIN_MS",
+    "RAG_CONSULT_MIN_MS",
+    "RAG_DEADLINE_MS",
+    "RAG_FALLBACK_MIN_MS",
+    "RAG_GUIDE_LLM_MIN_MS",
+    "deadline_at",
+    "remaining_ms",
+]
@@ -119,8 +119,8 @@ async def enhanced_search(
     if use_rerank and docs and not cache_hit:
         t0 = time.time()
         try:
-            from app.rag.rerank.cross_encoder import rerank
-            docs = rerank(query, docs, top_k=top_k)
+            from app.rag.rerank.cross_encoder import rerank_async
+            docs = await rerank_async(query, docs, top_k=top_k)
             reranked = True
         except Exception as e:
             print(f"[enhanced_search] Rerank failed: {e}")
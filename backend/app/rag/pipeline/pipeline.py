@@ -1,20 +1,44 @@
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
 import asyncio
 import os
+import uuid
 
-from app.guide.guide_pipeline import build_guide_response
+from app.guide.guide_client import get_guide_model_name
+from app.guide.guide_pipeline import build_guide_response, stream_guide_response
 from app.rag.pipeline.config import RAGConfig
-from app.rag.pipeline.card_pipeline import build_card_response
+from app.rag.pipeline.card_pipeline import build_card_response, stream_card_responses
+from app.rag.pipeline.deadline import Deadline
 from app.rag.pipeline.search import run_search
 from app.rag.cache.doc_title_cache import record_doc_titles
 from app.rag.router.signals import has_vocab_match
 
+# 점진 응답: 규칙 카드 즉시 → LLM 카드(rag_update) → 가이드(rag_guide)
+RAG_PROGRESSIVE_CARDS = os.getenv("RAG_PROGRESSIVE_CARDS", "0") == "1"
+# 점진 응답에서 LLM 카드/가이드를 스트리밍으로 받아 카드 단위·문장 단위로 전송
+RAG_STREAM_LLM = os.getenv("RAG_STREAM_LLM", "1") == "1"
+
+Emit = Callable[[Dict[str, Any]], Awaitable[None]]
+
+async def _cancel_pending(*tasks: asyncio.Task) -> None:
+    pending = [task for task in tasks if not task.done()]
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
 async def run_rag(
     query: str,
     config: Optional[RAGConfig] = None,
     session_state: Optional[Dict[str, Any]] = None,
+    deadline: Optional[Deadline] = None,
 ) -> Dict[str, Any]:
+    """
+    deadline: 요청 단위 시간 예산 (없으면 cfg.deadline_ms / RAG_DEADLINE_MS로 생성)
+    검색/카드/가이드가 남은 시간에 맞춰 싼 전략을 고르고, 시간이 지나면 남은 작업은 취소 후 폴백 결과 사용
+    """
     cfg = config or RAGConfig()
+    deadline = deadline or Deadline.after_ms(cfg.deadline_ms)
     require_vocab_match = os.getenv("RAG_REQUIRE_VOCAB_MATCH", "1") != "0"
     if require_vocab_match and not has_vocab_match(query):
         return {
@@ -36,6 +60,7 @@ async def run_rag(
         top_k=cfg.top_k,
         enable_consult_search=cfg.enable_consult_search,
         session_state=session_state,
+        deadline=deadline,
     )
     if not search.should_search:
         return {
@@ -62,6 +87,7 @@ async def run_rag(
             t_route=search.t_route,
             t_retrieve=search.t_retrieve,
             retrieve_cache_status=search.retrieve_cache_status,
+            deadline=deadline,
         )
     )
     guide_task = asyncio.create_task(
@@ -73,10 +99,38 @@ async def run_rag(
             t_start=search.t_start,
             t_route=search.t_route,
             t_retrieve=search.t_retrieve,
+            deadline=deadline,
         )
     )
 
-    card_result, guide_result = await asyncio.gather(card_task, guide_task, return_exceptions=True)
+    try:
+        await asyncio.wait({card_task, guide_task}, timeout=deadline.remaining_ms() / 1000)
+    finally:
+        # deadline 초과(또는 상위 취소) 시 남은 LLM 호출 취소
+        await _cancel_pending(card_task, guide_task)
+
+    def _result(task: asyncio.Task) -> Any:
+        if task.cancelled():
+            return asyncio.TimeoutError("RAG deadline exceeded")
+        return task.exception() or task.result()
+
+    card_result, guide_result = _result(card_task), _result(guide_task)
+    if isinstance(card_result, asyncio.TimeoutError):
+        # LLM 카드가 시간 안에 안 나오면 같은 문서의 규칙 카드
+        try:
+            card_result = await build_card_response(
+                query=query,
+                routing=card_routing,
+                docs=search.docs,
+                config=cfg,
+                t_start=search.t_start,
+                t_route=search.t_route,
+                t_retrieve=search.t_retrieve,
+                retrieve_cache_status=search.retrieve_cache_status,
+                rule_only=True,
+            )
+        except Exception as e:
+            card_result = e
 
     if isinstance(card_result, Exception):
         card_result = {
@@ -101,3 +155,256 @@ async def run_rag(
         if getattr(cfg, "include_consult_docs", False):
             response["consult_docs"] = search.consult_docs
     return response
+
+
+async def _stream_card_updates(
+    query: str,
+    search: Any,
+    cfg: RAGConfig,
+    emit: Emit,
+    response_id: str,
+    rule_sent: asyncio.Event,
+    rule_cards: Dict[str, Any],
+    deadline: Optional[Deadline] = None,
+) -> None:
+    """
+    LLM 카드가 완성될 때마다 rag_update(partial) 전송, 끝나면 최종 rag_update
+    rule_cards["cards"]: 먼저 보낸 규칙 카드 (rule_sent 이후 채워짐). 이와 같은 결과는 보내지 않음
+    """
+    last: Optional[Dict[str, Any]] = None
+    sent_cards = None
+    updated = False
+    async for result in stream_card_responses(
+        query=query,
+        routing=dict(search.routing),
+        docs=search.docs,
+        config=cfg,
+        deadline=deadline,
+    ):
+        last = result
+        cards = (result.get("currentSituation", []), result.get("nextStep", []))
+        await rule_sent.wait()
+        if sent_cards is None:
+            sent_cards = rule_cards.get("cards")
+        if cards == sent_cards:
+            continue
+        await emit(_card_update(response_id, result, partial=True))
+        sent_cards = cards
+        updated = True
+    # LLM 카드가 규칙 카드와 끝까지 같으면(실패 폴백 포함) 최종 메시지도 생략
+    if last is not None and updated:
+        await emit(_card_update(response_id, last, partial=False))
+
+
+def _card_update(response_id: str, result: Dict[str, Any], partial: bool) -> Dict[str, Any]:
+    return {
+        "type": "rag_update",
+        "responseId": response_id,
+        "partial": partial,
+        "data": {
+            "currentSituation": result.get("currentSituation", []),
+            "nextStep": result.get("nextStep", []),
+            "routing": result.get("routing", {}),
+            "meta": result.get("meta", {}),
+        },
+    }
+
+
+async def _stream_guide_updates(
+    query: str,
+    search: Any,
+    emit: Emit,
+    response_id: str,
+    rule_sent: asyncio.Event,
+    deadline: Optional[Deadline] = None,
+) -> None:
+    """가이드 문장이 검사를 통과할 때마다 rag_guide(partial) 전송, 끝나면 전체 스크립트 전송"""
+    sentences = []
+    usage: Dict[str, int] = {}
+    async for sentence in stream_guide_response(
+        query=query,
+        docs=search.docs,
+        consult_docs=search.consult_docs,
+        routing=search.routing,
+        deadline=deadline,
+        usage=usage,
+    ):
+        sentences.append(sentence)
+        message = " ".join(sentences)
+        await rule_sent.wait()
+        await emit({
+            "type": "rag_guide",
+            "responseId": response_id,
+            "partial": True,
+            "sentence": sentence,
+            "data": {"guidanceScript": message, "guide_script": {"message": message}},
+        })
+    message = " ".join(sentences)
+    await rule_sent.wait()
+    await emit({
+        "type": "rag_guide",
+        "responseId": response_id,
+        "partial": False,
+        "data": {
+            "guidanceScript": message,
+            "guide_script": {"message": message},
+            "meta": {
+                "guide_model": get_guide_model_name(),
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "cached_tokens": usage.get("cached_tokens", 0),
+            },
+        },
+    })
+
+
+async def run_rag_progressive(
+    query: str,
+    emit: Emit,
+    config: Optional[RAGConfig] = None,
+    session_state: Optional[Dict[str, Any]] = None,
+    deadline: Optional[Deadline] = None,
+) -> Optional[str]:
+    """
+    run_rag와 같은 검색/카드/가이드를 단계별 웹소켓 메시지로 전송
+
+    1) {"type": "rag", "responseId", "phase": "rule", "data"}: 규칙 기반 카드 (LLM 대기 없음)
+    2) {"type": "rag_update", "responseId", "data"}: LLM 카드 (규칙 카드와 같으면 생략)
+    3) {"type": "rag_guide", "responseId", "data"}: 가이드 스크립트
+    RAG_STREAM_LLM=1이면 2)는 카드가 완성될 때마다 "partial": true로, 3)은 문장마다
+    "partial": true + "sentence"로 보내고 각각 마지막에 "partial": false 메시지로 마무리
+    검색 대상이 아니면 기존과 같은 단일 rag 메시지. 반환값은 responseId (없으면 None)
+    deadline이 지나면 아직 안 끝난 LLM 단계는 취소 (이미 보낸 규칙 카드가 최종)
+    """
+    cfg = config or RAGConfig()
+    deadline = deadline or Deadline.after_ms(cfg.deadline_ms)
+    require_vocab_match = os.getenv("RAG_REQUIRE_VOCAB_MATCH", "1") != "0"
+    if require_vocab_match and not has_vocab_match(query):
+        await emit({
+            "type": "rag",
+            "data": await run_rag(query, config=cfg, session_state=session_state, deadline=deadline),
+        })
+        return None
+    search = await run_search(
+        query,
+        top_k=cfg.top_k,
+        enable_consult_search=cfg.enable_consult_search,
+        session_state=session_state,
+        deadline=deadline,
+    )
+    if not search.should_search:
+        await emit({
+            "type": "rag",
+            "data": {
+                "currentSituation": [],
+                "nextStep": [],
+                "guidanceScript": "",
+                "guide_script": {"message": ""},
+                "routing": search.routing,
+                "meta": {"model": None, "doc_count": 0, "context_chars": 0},
+            },
+        })
+        return None
+
+    record_doc_titles(search.docs)
+    response_id = uuid.uuid4().hex[:12]
+    rule_sent = asyncio.Event()
+    rule_cards: Dict[str, Any] = {}
+    card_kwargs = dict(
+        query=query,
+        docs=search.docs,
+        config=cfg,
+        t_start=search.t_start,
+        t_route=search.t_route,
+        t_retrieve=search.t_retrieve,
+        retrieve_cache_status=search.retrieve_cache_status,
+    )
+
+    if RAG_STREAM_LLM:
+        card_task = asyncio.create_task(
+            _stream_card_updates(query, search, cfg, emit, response_id, rule_sent, rule_cards, deadline)
+        )
+        guide_task = asyncio.create_task(
+            _stream_guide_updates(query, search, emit, response_id, rule_sent, deadline)
+        )
+    else:
+        card_task = asyncio.create_task(
+            build_card_response(routing=dict(search.routing), deadline=deadline, **card_kwargs)
+        )
+        guide_task = asyncio.create_task(
+            build_guide_response(
+                query=query,
+                routing=dict(search.routing),
+                docs=search.docs,
+                consult_docs=search.consult_docs,
+                t_start=search.t_start,
+                t_route=search.t_route,
+                t_retrieve=search.t_retrieve,
+                deadline=deadline,
+            )
+        )
+    try:
+        rule_routing = dict(search.routing)
+        rule_result = await build_card_response(routing=rule_routing, rule_only=True, **card_kwargs)
+        first = {
+            "currentSituation": rule_result.get("currentSituation", []),
+            "nextStep": rule_result.get("nextStep", []),
+            "guidanceScript": "",
+            "guide_script": {"message": ""},
+            "routing": rule_result.get("routing", rule_routing),
+            "meta": rule_result.get("meta", {"model": None, "doc_count": len(search.docs), "context_chars": 0}),
+        }
+        if cfg.include_docs:
+            first["docs"] = search.docs
+            if getattr(cfg, "include_consult_docs", False):
+                first["consult_docs"] = search.consult_docs
+        await emit({"type": "rag", "responseId": response_id, "phase": "rule", "data": first})
+
+        if RAG_STREAM_LLM:
+            # 스트리밍 태스크가 직접 전송 (규칙 카드 전송 이후부터)
+            rule_cards["cards"] = (first["currentSituation"], first["nextStep"])
+            rule_sent.set()
+            await asyncio.wait({card_task, guide_task}, timeout=deadline.remaining_ms() / 1000)
+            return response_id
+
+        pending = {card_task, guide_task}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=deadline.remaining_ms() / 1000,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break  # deadline 초과: finally에서 취소
+            for task in done:
+                if task.exception() is not None:
+                    continue
+                result = task.result()
+                if task is card_task:
+                    cards = (result.get("currentSituation", []), result.get("nextStep", []))
+                    if cards == (first["currentSituation"], first["nextStep"]):
+                        continue
+                    await emit({
+                        "type": "rag_update",
+                        "responseId": response_id,
+                        "data": {
+                            "currentSituation": cards[0],
+                            "nextStep": cards[1],
+                            "routing": result.get("routing", first["routing"]),
+                            "meta": result.get("meta", first["meta"]),
+                        },
+                    })
+                else:
+                    await emit({
+                        "type": "rag_guide",
+                        "responseId": response_id,
+                        "data": {
+                            "guidanceScript": result.get("guidanceScript", ""),
+                            "guide_script": result.get("guide_script", {"message": ""}),
+                        },
+                    })
+    finally:
+        # 새 발화로 취소되거나 deadline이 지나면 남은 LLM 호출도 중단
+        for task in (card_task, guide_task):
+            if not task.done():
+                task.cancel()
+    return response_id
@@ -5,8 +5,8 @@ import time
 
 from app.rag.common.doc_source_filters import DOC_SOURCE_FILTERS
 from app.rag.pipeline.utils import text_has_any_compact
-from app.rag.policy.policy_pins import build_pin_requests
-from app.rag.retriever.db import fetch_docs_by_ids
+from app.rag.cache.pin_store import get_pinned_docs
+from app.rag.policy.policy_pins import LOSS_PIN_IDS, NARASARANG_LOSS_PIN_IDS, build_pin_requests
 from app.rag.retriever.consult_retriever import retrieve_consult_docs
 
 
@@ -60,6 +60,12 @@ def post_filter_docs(query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, A
     return docs
 
 
+def _budget_exhausted(budget_ms: int | None, start_ts: float | None) -> bool:
+    if budget_ms is None or start_ts is None:
+        return False
+    return (time.perf_counter() - start_ts) * 1000 >= budget_ms
+
+
 def _pin_allowed(
     retrieved_docs: List[Dict[str, Any]],
     budget_ms: int | None,
@@ -68,10 +74,8 @@ def _pin_allowed(
 ) -> bool:
     if force:
         return True
-    if budget_ms is not None and start_ts is not None:
-        elapsed_ms = (time.perf_counter() - start_ts) * 1000
-        if elapsed_ms >= budget_ms:
-            return False
+    if _budget_exhausted(budget_ms, start_ts):
+        return False
     if not retrieved_docs:
         return False
     top_score = retrieved_docs[0].get("score")
@@ -224,6 +228,7 @@ async def retrieve_docs(
     # card_usage: 결과가 없거나 점수가 낮으면 vector 재시도
     if (
         route_name == "card_usage"
+        and not _budget_exhausted(budget_ms, start_ts)
         and routing_for_retrieve.get("retrieval_mode") != "vector"
         and (routing_for_retrieve.get("document_sources") or []) != ["guide_with_terms"]
     ):
@@ -332,10 +337,10 @@ async def retrieve_docs(
     # 분실/도난 핀
     if pin_allowed and route_name == "card_usage" and any(term in normalized_query for term in loss_terms):
         if "나라사랑" in normalized_query:
-            pin_ids = ["narasarang_faq_005", "narasarang_faq_006", "카드분실_도난_관련피해_예방_및_대응방법_merged"]
+            pin_ids = list(NARASARANG_LOSS_PIN_IDS)
         else:
-            pin_ids = ["카드분실_도난_관련피해_예방_및_대응방법_merged"]
-        pinned = fetch_docs_by_ids("service_guide_documents", pin_ids)
+            pin_ids = list(LOSS_PIN_IDS)
+        pinned = get_pinned_docs("service_guide_documents", pin_ids)
         _append_pins(_mark_pin_rank(pinned or [], pin_ids))
 
     # 정책 기반 핀
@@ -345,7 +350,7 @@ async def retrieve_docs(
         matched_entity=matched_entity,
         pin_allowed=pin_allowed,
     ):
-        pinned = fetch_docs_by_ids(table, pin_ids)
+        pinned = get_pinned_docs(table, pin_ids)
         _append_pins(_mark_pin_rank(pinned or [], pin_ids))
 
     elapsed_ms = (time.perf_counter() - start) * 1000
@@ -12,6 +12,12 @@ from app.rag.cache.retrieval_cache import (
     retrieval_cache_get,
     retrieval_cache_set,
 )
+from app.rag.pipeline.deadline import (
+    RAG_CONSULT_MIN_MS,
+    RAG_FALLBACK_MIN_MS,
+    Deadline,
+    remaining_ms,
+)
 from app.rag.pipeline.retrieve import (
     post_filter_docs,
     retrieve_consult_cases,
@@ -87,6 +93,7 @@ async def run_search(
     top_k: int,
     enable_consult_search: bool = True,
     session_state: Optional[Dict[str, Any]] = None,
+    deadline: Optional[Deadline] = None,
 ) -> SearchResult:
     t_start = time.perf_counter()
     routing = apply_session_context(query, route(query), session_state)
@@ -152,7 +159,8 @@ async def run_search(
 
     consult_docs: List[Dict[str, Any]] = []
     consult_task: Optional[asyncio.Task] = None
-    if enable_consult_search and (routing.get("route") or routing.get("ui_route")) == "card_usage":
+    consult_allowed = remaining_ms(deadline) >= RAG_CONSULT_MIN_MS
+    if consult_allowed and enable_consult_search and (routing.get("route") or routing.get("ui_route")) == "card_usage":
         if should_search_consult_cases(query, routing, session_state, commit=False):
             consult_task = asyncio.create_task(
                 retrieve_consult_cases(query=query, routing=dict(routing), top_k=top_k)
@@ -165,21 +173,29 @@ async def run_search(
         effective_top_k = top_k
         if route_name == "card_usage":
             effective_top_k = min(effective_top_k, 2)
+        budget_ms = int(min(RETRIEVE_BUDGET_MS, remaining_ms(deadline)))
         if route_name == "card_info":
             docs = await retrieve_docs_card_info(
                 query=query,
                 routing=routing,
                 top_k=effective_top_k,
                 log_scores=LOG_RETRIEVER_DEBUG,
-                budget_ms=RETRIEVE_BUDGET_MS,
+                budget_ms=budget_ms,
                 start_ts=retrieve_start,
             )
             retrieve_stage = 2
         else:
-            docs = await retrieve_docs(query=query, routing=routing, top_k=effective_top_k)
+            docs = await retrieve_docs(
+                query=query,
+                routing=routing,
+                top_k=effective_top_k,
+                budget_ms=budget_ms,
+                start_ts=retrieve_start,
+            )
             retrieve_stage = 1
         elapsed_ms = (time.perf_counter() - retrieve_start) * 1000
-        budget_exceeded = elapsed_ms >= RETRIEVE_BUDGET_MS
+        # 검색 예산을 넘었거나 요청 deadline이 빠듯하면 폴백 단계 생략
+        budget_exceeded = elapsed_ms >= budget_ms or remaining_ms(deadline) < RAG_FALLBACK_MIN_MS
         stage_exceeded = retrieve_stage >= RETRIEVE_MAX_STAGES
         if allow_fallback:
             if (not budget_exceeded) and (not stage_exceeded) and _retrieval_failed(docs, routing) and routing.get("retrieval_mode") != "hybrid":
@@ -222,7 +238,10 @@ async def run_search(
             doc["score"] = 0.0
     docs.sort(key=lambda d: d.get("score", 0.0), reverse=True)
     if consult_task:
-        consult_docs = await consult_task
+        if deadline is not None:
+            consult_docs = await deadline.wait(consult_task, default=[])
+        else:
+            consult_docs = await consult_task
         if (routing.get("route") or routing.get("ui_route")) != "card_usage":
             consult_docs = []
         else:
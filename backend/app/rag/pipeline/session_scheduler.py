@@ -0,0 +1,121 @@
+"""
+세션별 RAG 스케줄러 (실시간 통화)
+
+STT 파편마다 run_rag를 순서대로 기다리면 짧은 파편이 뒤로 밀려 오래된 발화의 카드가 노출된다.
+- debounce: RAG_SESSION_DEBOUNCE_MS 동안 추가 파편이 없으면 모아서 하나의 쿼리로 실행
+  (첫 파편 이후 RAG_SESSION_MAX_WAIT_MS를 넘기면 즉시 실행)
+- supersede: 새 쿼리가 준비되면 진행 중인 RAG를 취소하고, 결과를 못 낸 이전 텍스트는
+  새 쿼리 앞에 이어 붙임 (RAG_SESSION_MAX_CHARS 초과 시 앞부분 절단)
+- 결과 콜백은 최신 세대(generation) 결과만 전달
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+RAG_SESSION_DEBOUNCE_MS = float(os.getenv("RAG_SESSION_DEBOUNCE_MS", "350"))
+RAG_SESSION_MAX_WAIT_MS = float(os.getenv("RAG_SESSION_MAX_WAIT_MS", "1200"))
+RAG_SESSION_MAX_CHARS = int(os.getenv("RAG_SESSION_MAX_CHARS", "300"))
+
+
+class SessionRagScheduler:
+    """세션 하나의 RAG 요청 병합/취소 관리 (이벤트 루프 스레드 전용)"""
+
+    def __init__(
+        self,
+        run: Callable[[str], Awaitable[Any]],
+        on_result: Callable[[str, Any], Awaitable[None]],
+        session_id: str = "",
+        debounce_ms: float = RAG_SESSION_DEBOUNCE_MS,
+        max_wait_ms: float = RAG_SESSION_MAX_WAIT_MS,
+        max_chars: int = RAG_SESSION_MAX_CHARS,
+    ):
+        self.run = run
+        self.on_result = on_result
+        self.session_id = session_id
+        self.debounce_sec = max(0.0, debounce_ms / 1000)
+        self.max_wait_sec = max(self.debounce_sec, max_wait_ms / 1000)
+        self.max_chars = max_chars
+        self._pending: List[str] = []
+        self._pending_since: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._inflight_text = ""
+        self._generation = 0
+        self._closed = False
+        self.stats = {"fragments": 0, "runs": 0, "superseded": 0, "delivered": 0, "errors": 0}
+
+    def submit(self, text: str) -> None:
+        """파편 등록 (즉시 반환)"""
+        text = (text or "").strip()
+        if not text or self._closed:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.stats["fragments"] += 1
+        self._pending.append(text)
+        if self._pending_since is None:
+            self._pending_since = now
+        if self._timer:
+            self._timer.cancel()
+        delay = min(self.debounce_sec, max(0.0, self._pending_since + self.max_wait_sec - now))
+        self._timer = loop.call_later(delay, self._flush)
+
+    def _join(self, parts: List[str]) -> str:
+        text = " ".join(p for p in parts if p)
+        if self.max_chars and len(text) > self.max_chars:
+            text = text[-self.max_chars:].lstrip()
+        return text
+
+    def _flush(self) -> None:
+        self._timer = None
+        if self._closed or not self._pending:
+            return
+        parts = self._pending
+        self._pending = []
+        self._pending_since = None
+        if self._inflight and not self._inflight.done():
+            # 새 발화가 도착해 진행 중인 요청은 무효: 취소하고 텍스트는 새 쿼리에 포함
+            self._inflight.cancel()
+            self.stats["superseded"] += 1
+            parts = [self._inflight_text, *parts]
+        query = self._join(parts)
+        self._generation += 1
+        self._inflight_text = query
+        self._inflight = asyncio.get_running_loop().create_task(self._run(query, self._generation))
+
+    async def _run(self, query: str, generation: int) -> None:
+        self.stats["runs"] += 1
+        start = time.perf_counter()
+        try:
+            result = await self.run(query)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[{self.session_id}] 처리 중 에러 : {e}")
+            return
+        if generation != self._generation or self._closed:
+            return
+        self._inflight_text = ""
+        if os.getenv("RAG_LOG_TIMING") == "1":
+            print(f"[{self.session_id}] RAG 완료 ({(time.perf_counter() - start) * 1000:.0f}ms) : {query}")
+        try:
+            # 전송 도중 새 쿼리로 취소되어도 이미 받은 결과는 끝까지 전송
+            await asyncio.shield(self.on_result(query, result))
+            self.stats["delivered"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[{self.session_id}] 결과 전송 중 에러 : {e}")
+
+    def close(self) -> None:
+        """세션 종료: 대기 파편 폐기 및 진행 중 요청 취소"""
+        self._closed = True
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = []
+        if self._inflight and not self._inflight.done():
+            self._inflight.cancel()
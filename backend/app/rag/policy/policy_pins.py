@@ -1,5 +1,23 @@
 from __future__ import annotations
 
+# 분실/도난 핀 (retrieve_docs에서 사용)
+LOSS_PIN_IDS = ["카드분실_도난_관련피해_예방_및_대응방법_merged"]
+NARASARANG_LOSS_PIN_IDS = ["narasarang_faq_005", "narasarang_faq_006", "카드분실_도난_관련피해_예방_및_대응방법_merged"]
+
+# build_pin_requests 분기에서 직접 참조하는 문서 (POLICY_PINS 외)
+ENTITY_GUIDE_PIN_IDS = {
+    "K-패스": ["k패스_13", "k패스_14", "k패스_2"],
+    "다둥이": ["dadungi_013"],
+    "국민행복": ["국민행복카드_28"],
+    "나라사랑": ["narasarang_faq_005", "narasarang_faq_006"],
+}
+LOAN_PIN_IDS = [
+    "카드대출 예약신청_merged",
+    "카드상품별_거래조건_이자율__수수료_등__merged",
+    "sinhan_terms_credit_신용카드_개인회원_약관_040",
+    "sinhan_terms_credit_신용카드_개인회원_약관_039",
+]
+
 POLICY_PINS = [
     {
         "name": "narasarang_loss",
@@ -55,6 +73,26 @@ POLICY_PINS = [
 ]
 
 
+def all_pin_doc_ids() -> dict[str, list[str]]:
+    """핀으로 참조될 수 있는 모든 문서 ID (테이블별, 순서 유지)"""
+    by_table: dict[str, list[str]] = {}
+
+    def _add(table: str, ids: list[str]) -> None:
+        bucket = by_table.setdefault(table, [])
+        for doc_id in ids:
+            if doc_id and doc_id not in bucket:
+                bucket.append(doc_id)
+
+    _add("service_guide_documents", LOSS_PIN_IDS)
+    _add("service_guide_documents", NARASARANG_LOSS_PIN_IDS)
+    for ids in ENTITY_GUIDE_PIN_IDS.values():
+        _add("service_guide_documents", ids)
+    _add("service_guide_documents", LOAN_PIN_IDS)
+    for pin in POLICY_PINS:
+        _add(str(pin.get("table") or "service_guide_documents"), list(pin.get("doc_ids") or []))
+    return by_table
+
+
 def _append_unique(target: list[tuple[str, list[str]]], table: str, ids: list[str]) -> None:
     if not ids:
         return
@@ -78,16 +116,7 @@ def build_pin_requests(
 
     # 엔티티 guide 문서를 최소 1개 보강
     if pin_allowed and route_name == "card_info" and matched_entity:
-        if matched_entity == "K-패스":
-            guide_ids = ["k패스_13", "k패스_14", "k패스_2"]
-        elif matched_entity == "다둥이":
-            guide_ids = ["dadungi_013"]
-        elif matched_entity == "국민행복":
-            guide_ids = ["국민행복카드_28"]
-        elif matched_entity == "나라사랑":
-            guide_ids = ["narasarang_faq_005", "narasarang_faq_006"]
-        else:
-            guide_ids = []
+        guide_ids = list(ENTITY_GUIDE_PIN_IDS.get(matched_entity, []))
         _append_unique(requests, "service_guide_documents", guide_ids)
 
     # 예약/대출/수수료/이자 관련은 필수 문서 핀으로 보강
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import os
 import re
 
 from app.rag.postprocess.keywords import extract_query_terms
@@ -11,6 +14,8 @@ _BLOCK_SPLIT_RE = re.compile(r"\n{2,}")
 _BLOCK_NORM_RE = re.compile(r"\s+")
 _TOKEN_RE = re.compile(r"[0-9a-zA-Z가-힣]+")
 
+SECTION_INDEX_MAX = int(os.getenv("RAG_SECTION_INDEX_MAX", "4096"))
+
 _SECTION_HINTS = {
     "연회비",
     "발급",
@@ -101,6 +106,63 @@ def _extract_matching_section(text: str, query: str) -> Optional[str]:
     return "\n\n".join(matched[:2])
 
 
+@dataclass
+class SectionIndex:
+    """
+    문서 본문 1건의 사전 계산 결과 (블록 중복 제거 + 섹션 분리 + 제목 postings)
+    clean_card_docs는 요청마다 정규식으로 다시 파싱하지 않고 이 인덱스를 조회한다.
+    """
+    deduped: str
+    titles: Tuple[str, ...]  # 제목 있는 섹션의 소문자 제목
+    bodies: Tuple[str, ...]
+    # 제목 토큰의 모든 부분 문자열 → 섹션 번호 (term in title 과 같은 의미)
+    postings: Dict[str, Tuple[int, ...]]
+    _joined: Dict[Tuple[int, ...], str] = field(default_factory=dict, repr=False)
+
+    def match_sections(self, terms: List[str]) -> List[int]:
+        matched = set()
+        for term in terms:
+            if _TOKEN_RE.fullmatch(term):
+                matched.update(self.postings.get(term, ()))
+            else:
+                matched.update(i for i, title in enumerate(self.titles) if term in title)
+        return sorted(matched)
+
+    def section_text(self, idxs: Tuple[int, ...]) -> str:
+        # 같은 조합은 같은 문자열 객체를 돌려줘 하위 단계(문장 offset 캐시 등) 재사용
+        text = self._joined.get(idxs)
+        if text is None:
+            text = self._joined.setdefault(idxs, "\n\n".join(self.bodies[i] for i in idxs))
+        return text
+
+
+def _title_postings(titles: Iterable[str]) -> Dict[str, Tuple[int, ...]]:
+    postings: Dict[str, List[int]] = {}
+    for idx, title in enumerate(titles):
+        subs = set()
+        for token in _TOKEN_RE.findall(title):
+            for i in range(len(token)):
+                for j in range(i + 1, len(token) + 1):
+                    subs.add(token[i:j])
+        for sub in subs:
+            postings.setdefault(sub, []).append(idx)
+    return {key: tuple(value) for key, value in postings.items()}
+
+
+@lru_cache(maxsize=SECTION_INDEX_MAX)
+def build_section_index(content: str) -> SectionIndex:
+    """본문 기준 인덱스 (같은 본문은 한 번만 계산, 카탈로그 로드 시 미리 계산)"""
+    deduped = _dedupe_blocks(content)
+    titled = [(title.lower(), body) for title, body in _split_sections(deduped) if title]
+    titles = tuple(title for title, _ in titled)
+    return SectionIndex(
+        deduped=deduped,
+        titles=titles,
+        bodies=tuple(body for _, body in titled),
+        postings=_title_postings(titles),
+    )
+
+
 def _is_card_doc(doc: Dict[str, Any]) -> bool:
     meta = doc.get("metadata") or {}
     source_table = meta.get("source_table")
@@ -117,20 +179,20 @@ def _is_card_doc(doc: Dict[str, Any]) -> bool:
 
 
 def clean_card_docs(docs: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
-
+    """카드 문서는 중복 블록 제거 후 쿼리와 맞는 섹션(최대 2개)만, 없으면 전체 본문"""
+    terms = [t.lower() for t in _query_section_terms(query)]
     cleaned: List[Dict[str, Any]] = []
     for doc in docs:
         if not _is_card_doc(doc):
             cleaned.append(doc)
             continue
-        content = doc.get("content") or ""
-        trimmed = _dedupe_blocks(content)
-        section = _extract_matching_section(trimmed, query)
-        if section:
-            doc = dict(doc)
-            doc["content"] = section
-        else:
-            doc = dict(doc)
-            doc["content"] = trimmed
+        index = build_section_index(doc.get("content") or "")
+        section = None
+        if index.titles and terms:
+            matched = index.match_sections(terms)
+            if matched:
+                section = index.section_text(tuple(matched[:2]))
+        doc = dict(doc)
+        doc["content"] = section or index.deduped
         cleaned.append(doc)
     return cleaned
@@ -2,14 +2,21 @@ from app.rag.rerank.cross_encoder import (
     Reranker,
     get_reranker,
     rerank,
+    rerank_async,
     rerank_with_cross_encoder,
+    rerank_with_cross_encoder_async,
     rerank_with_llm,
 )
+from app.rag.rerank.service import get_rerank_stats, warmup_reranker
 
 __all__ = [
     "Reranker",
     "get_reranker",
+    "get_rerank_stats",
     "rerank",
+    "rerank_async",
     "rerank_with_cross_encoder",
+    "rerank_with_cross_encoder_async",
     "rerank_with_llm",
+    "warmup_reranker",
 ]
@@ -2,49 +2,21 @@
 Cross-Encoder 리랭킹 모듈
 
 초기 검색 결과를 정밀 재순위화하여 Precision 향상
-- Cross-Encoder 모델 (sentence-transformers)
+- Cross-Encoder 모델 (service.py: 시작 시 백그라운드 로드, 요청 간 배치 추론, 점수 캐시)
 - LLM 기반 폴백 옵션
 """
 
+import asyncio
 import os
 import json
 from typing import List, Dict, Any, Optional, Tuple
-from functools import lru_cache
+
+from app.rag.rerank.service import get_rerank_service
 
 _RERANK_ENABLED = os.getenv("RAG_RERANK", "1") != "0"
-_RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "ms-marco-MiniLM-L-6-v2")
 _RERANK_TOP_K = int(os.getenv("RAG_RERANK_TOP_K", "10"))
 _USE_LLM_RERANK = os.getenv("RAG_RERANK_USE_LLM", "0") == "1"
 
-_cross_encoder = None
-_LLM_CLIENT = None
-
-
-def _get_llm_client():
-    global _LLM_CLIENT
-    if _LLM_CLIENT is None:
-        from openai import OpenAI
-        _LLM_CLIENT = OpenAI()
-    return _LLM_CLIENT
-
-
-def _load_cross_encoder():
-    """Cross-Encoder 모델 로드 (lazy loading)"""
-    global _cross_encoder
-    if _cross_encoder is not None:
-        return _cross_encoder
-
-    try:
-        from sentence_transformers import CrossEncoder
-        _cross_encoder = CrossEncoder(_RERANK_MODEL)
-        return _cross_encoder
-    except ImportError:
-        print("[rerank] sentence-transformers not installed, using LLM fallback")
-        return None
-    except Exception as e:
-        print(f"[rerank] Failed to load cross-encoder: {e}")
-        return None
-
 
 def _extract_doc_text(doc: Dict[str, Any]) -> str:
     """문서에서 텍스트 추출"""
@@ -55,43 +27,70 @@ def _extract_doc_text(doc: Dict[str, Any]) -> str:
     return content[:500] or title
 
 
+def _doc_items(docs: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """(문서 ID, 리랭킹 입력 텍스트)"""
+    items = []
+    for doc in docs:
+        meta = doc.get("metadata") or {}
+        items.append((str(doc.get("id") or meta.get("id") or ""), _extract_doc_text(doc)))
+    return items
+
+
+def _apply_scores(
+    docs: List[Dict[str, Any]],
+    scores: List[float],
+    top_k: int,
+) -> List[Dict[str, Any]]:
+    """점수 기준 정렬 후 리랭킹 점수 추가"""
+    scored_docs = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
+    result = []
+    for doc, score in scored_docs[:top_k]:
+        doc_copy = doc.copy()
+        doc_copy["rerank_score"] = float(score)
+        doc_copy["original_score"] = doc.get("score", 0)
+        result.append(doc_copy)
+    return result
+
+
 def rerank_with_cross_encoder(
     query: str,
     docs: List[Dict[str, Any]],
     top_k: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    """Cross-Encoder로 리랭킹"""
+    """Cross-Encoder로 리랭킹 (모델 로드 전이면 기다리지 않고 폴백)"""
     if not docs:
         return docs
 
     top_k = top_k or _RERANK_TOP_K
-    encoder = _load_cross_encoder()
+    scores = get_rerank_service().score(query, _doc_items(docs))
 
-    if encoder is None:
+    if scores is None:
         # 폴백: LLM 리랭킹 또는 원본 반환
         if _USE_LLM_RERANK:
             return rerank_with_llm(query, docs, top_k)
         return docs
 
-    # 쿼리-문서 쌍 생성
-    pairs = [(query, _extract_doc_text(doc)) for doc in docs]
+    return _apply_scores(docs, scores, top_k)
 
-    # 점수 계산
-    scores = encoder.predict(pairs)
 
-    # 점수 기준 정렬
-    scored_docs = list(zip(docs, scores))
-    scored_docs.sort(key=lambda x: x[1], reverse=True)
+async def rerank_with_cross_encoder_async(
+    query: str,
+    docs: List[Dict[str, Any]],
+    top_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """rerank_with_cross_encoder의 비동기 버전 (동시 요청의 쌍이 한 배치로 묶임)"""
+    if not docs:
+        return docs
+
+    top_k = top_k or _RERANK_TOP_K
+    scores = await get_rerank_service().ascore(query, _doc_items(docs))
 
-    # 리랭킹 점수 추가
-    result = []
-    for doc, score in scored_docs[:top_k]:
-        doc_copy = doc.copy()
-        doc_copy["rerank_score"] = float(score)
-        doc_copy["original_score"] = doc.get("score", 0)
-        result.append(doc_copy)
+    if scores is None:
+        if _USE_LLM_RERANK:
+            return await asyncio.to_thread(rerank_with_llm, query, docs, top_k)
+        return docs
 
-    return result
+    return _apply_scores(docs, scores, top_k)
 
 
 LLM_RERANK_PROMPT = """다음 문서들이 질문에 얼마나 관련있는지 평가해주세요.
@@ -125,8 +124,8 @@ def rerank_with_llm(
     ])
 
     try:
-        client = _get_llm_client()
-        response = client.chat.completions.create(
+        from app.llm.gateway import chat_completion, run_sync
+        response = run_sync(chat_completion(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "JSON 배열로만 응답하세요."},
@@ -135,7 +134,7 @@ def rerank_with_llm(
             temperature=0,
             max_tokens=500,
             response_format={"type": "json_object"},
-        )
+        ))
 
         result_text = response.choices[0].message.content
         # JSON 파싱
@@ -181,6 +180,21 @@ def rerank(
     return rerank_with_cross_encoder(query, docs, top_k)
 
 
+async def rerank_async(
+    query: str,
+    docs: List[Dict[str, Any]],
+    top_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """메인 리랭킹 함수 (비동기)"""
+    if not _RERANK_ENABLED or not docs:
+        return docs[:top_k] if top_k else docs
+
+    if _USE_LLM_RERANK:
+        return await asyncio.to_thread(rerank_with_llm, query, docs, top_k)
+
+    return await rerank_with_cross_encoder_async(query, docs, top_k)
+
+
 class Reranker:
     """리랭커 클래스"""
 
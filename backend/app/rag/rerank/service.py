@@ -0,0 +1,428 @@
+"""
+Cross-Encoder 리랭커 서비스 (CPU 배치 추론 + 점수 캐시)
+
+- 모델은 시작 시 백그라운드 스레드에서 로드 (warmup_reranker). 로드 전 요청은 기다리지 않고 폴백
+- 여러 요청의 (쿼리, 문서) 쌍을 RAG_RERANK_BATCH_WAIT_MS 동안 모아 최대 RAG_RERANK_BATCH_SIZE개씩 한 번에 추론
+- (쿼리 해시, 문서 ID) → 점수 LRU 캐시: 같은 질문/문서 조합은 재추론하지 않음
+- 배치별 지연(ms)은 get_rerank_stats()로 확인
+
+백엔드:
+- onnx : onnxruntime CPU 추론 (int8 양자화 ONNX 모델, 기본값)
+- st   : sentence-transformers CrossEncoder
+- stub : 모델 없이 쿼리 용어 겹침으로 점수 (테스트용)
+
+환경변수:
+    RAG_RERANK_BACKEND=onnx|st|stub
+    RAG_RERANK_MODEL=ms-marco-MiniLM-L-6-v2   ("/"가 없으면 cross-encoder/ 조직 모델)
+    RAG_RERANK_ONNX_PATH=                     (로컬 ONNX 파일, 비우면 모델 저장소에서 받음)
+    RAG_RERANK_ONNX_FILE=onnx/model_qint8_avx512.onnx
+    RAG_RERANK_MAX_LENGTH=256
+    RAG_RERANK_CPU_THREADS=0                  (0이면 onnxruntime 기본값)
+    RAG_RERANK_BATCH_SIZE=32
+    RAG_RERANK_BATCH_WAIT_MS=5
+    RAG_RERANK_CACHE_SIZE=20000
+    RAG_RERANK_TIMEOUT_MS=3000
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "ms-marco-MiniLM-L-6-v2")
+RERANK_BATCH_SIZE = max(1, int(os.getenv("RAG_RERANK_BATCH_SIZE", "32")))
+RERANK_BATCH_WAIT_MS = float(os.getenv("RAG_RERANK_BATCH_WAIT_MS", "5"))
+RERANK_CACHE_SIZE = int(os.getenv("RAG_RERANK_CACHE_SIZE", "20000"))
+RERANK_TIMEOUT_MS = float(os.getenv("RAG_RERANK_TIMEOUT_MS", "3000"))
+# 배치 지연 분포 계산용 최근 샘플 수
+_LATENCY_SAMPLES = 256
+
+Pair = Tuple[str, str]
+
+
+def _model_repo(model: str) -> str:
+    return model if "/" in model else f"cross-encoder/{model}"
+
+
+class RerankBackend:
+    """리랭커 백엔드 인터페이스"""
+
+    name = "base"
+
+    def load(self) -> None:
+        """모델 로드 (백그라운드 스레드에서 한 번 호출)"""
+
+    def score(self, pairs: Sequence[Pair]) -> List[float]:
+        raise NotImplementedError
+
+
+class OnnxRerankBackend(RerankBackend):
+    """onnxruntime CPU 백엔드 (int8 양자화 모델 + HF tokenizers)"""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        onnx_path: Optional[str] = None,
+        max_length: Optional[int] = None,
+        cpu_threads: Optional[int] = None,
+    ):
+        self.repo = _model_repo(model or RERANK_MODEL)
+        self.onnx_path = onnx_path or os.getenv("RAG_RERANK_ONNX_PATH", "")
+        self.onnx_file = os.getenv("RAG_RERANK_ONNX_FILE", "onnx/model_qint8_avx512.onnx")
+        self.max_length = max_length or int(os.getenv("RAG_RERANK_MAX_LENGTH", "256"))
+        self.cpu_threads = cpu_threads if cpu_threads is not None else int(os.getenv("RAG_RERANK_CPU_THREADS", "0"))
+        self._session = None
+        self._tokenizer = None
+        self._input_names: List[str] = []
+
+    def load(self) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = self.onnx_path
+        if not path:
+            from huggingface_hub import hf_hub_download
+
+            path = hf_hub_download(self.repo, self.onnx_file)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.cpu_threads > 0:
+            options.intra_op_num_threads = self.cpu_threads
+        self._session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self._session.get_inputs()]
+
+        tokenizer = Tokenizer.from_pretrained(self.repo)
+        tokenizer.enable_truncation(max_length=self.max_length)
+        tokenizer.enable_padding()
+        self._tokenizer = tokenizer
+
+    def score(self, pairs: Sequence[Pair]) -> List[float]:
+        import numpy as np
+
+        encodings = self._tokenizer.encode_batch(list(pairs))
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self._session.run(None, {name: features[name] for name in self._input_names})[0]
+        return [float(row[0]) for row in logits.reshape(len(pairs), -1)]
+
+
+class SentenceTransformersRerankBackend(RerankBackend):
+    name = "st"
+
+    def __init__(self, model: Optional[str] = None):
+        self.repo = _model_repo(model or RERANK_MODEL)
+        self._model = None
+
+    def load(self) -> None:
+        from sentence_transformers import CrossEncoder
+
+        self._model = CrossEncoder(self.repo, device="cpu")
+
+    def score(self, pairs: Sequence[Pair]) -> List[float]:
+        scores = self._model.predict(list(pairs), batch_size=len(pairs), show_progress_bar=False)
+        return [float(s) for s in scores]
+
+
+_TERM_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+
+
+class StubRerankBackend(RerankBackend):
+    """모델 없이 쿼리 용어 겹침 비율로 점수 (테스트용)"""
+
+    name = "stub"
+
+    def __init__(self):
+        self.calls: List[int] = []  # 배치별 쌍 개수
+
+    def score(self, pairs: Sequence[Pair]) -> List[float]:
+        self.calls.append(len(pairs))
+        scores = []
+        for query, text in pairs:
+            terms = set(_TERM_RE.findall(query.lower()))
+            lowered = text.lower()
+            scores.append(sum(1 for t in terms if t in lowered) / len(terms) if terms else 0.0)
+        return scores
+
+
+def create_rerank_backend(name: Optional[str] = None) -> RerankBackend:
+    name = (name or os.getenv("RAG_RERANK_BACKEND", "onnx")).strip().lower()
+    if name == "st":
+        return SentenceTransformersRerankBackend()
+    if name == "stub":
+        return StubRerankBackend()
+    if name != "onnx":
+        print(f"[rerank] 알 수 없는 RAG_RERANK_BACKEND={name}, onnx 사용")
+    return OnnxRerankBackend()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class RerankService:
+    """
+    백엔드 하나를 감싸는 프로세스 공용 리랭커
+    score/ascore는 모델 로드 전이면 None (호출 측 폴백), 이후엔 입력 순서대로 점수 리스트
+    """
+
+    def __init__(
+        self,
+        backend: RerankBackend,
+        batch_size: int = RERANK_BATCH_SIZE,
+        batch_wait_ms: float = RERANK_BATCH_WAIT_MS,
+        cache_size: int = RERANK_CACHE_SIZE,
+        timeout_ms: float = RERANK_TIMEOUT_MS,
+    ):
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.batch_wait_ms = batch_wait_ms
+        self.cache_size = cache_size
+        self.timeout_ms = timeout_ms
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._load_started = False
+        self.load_error: Optional[str] = None
+        self.load_sec = 0.0
+        # (쿼리 해시, 문서 키) → 점수
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[List[Pair], Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._latencies: deque = deque(maxlen=_LATENCY_SAMPLES)
+        self._stats = {"batches": 0, "pairs": 0, "cache_hits": 0, "cache_misses": 0, "errors": 0}
+
+    # ---- 모델 로드 ----
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, background: bool = True) -> None:
+        """모델 로드 시작 (중복 호출 무시)"""
+        with self._load_lock:
+            if self._load_started:
+                return
+            self._load_started = True
+        if background:
+            threading.Thread(target=self._load, name="rerank-load", daemon=True).start()
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        start = time.perf_counter()
+        try:
+            self.backend.load()
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"[rerank] {self.backend.name} 리랭커 로드 실패: {e}")
+            return
+        self.load_sec = time.perf_counter() - start
+        self._worker = threading.Thread(target=self._batch_loop, name="rerank-batch", daemon=True)
+        self._worker.start()
+        self._ready.set()
+        print(f"[rerank] {self.backend.name} 리랭커 로드 완료 ({self.load_sec:.1f}s)")
+
+    # ---- 점수 캐시 ----
+    @staticmethod
+    def query_key(query: str) -> str:
+        normalized = " ".join((query or "").split()).lower()
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def doc_key(doc_id: str, text: str) -> str:
+        """문서 ID, 없으면 본문 해시"""
+        return doc_id or "h:" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._cache_lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, keys: List[Tuple[str, str]], scores: List[float]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ---- 점수 계산 ----
+    def _submit(self, query: str, items: Sequence[Tuple[str, str]]) -> Optional[Tuple[List[Optional[float]], Future, List[int], List[Tuple[str, str]]]]:
+        """캐시 조회 후 미스만 배치 큐로. items: (문서 ID, 본문)"""
+        if not self.ready:
+            return None
+        qkey = self.query_key(query)
+        scores: List[Optional[float]] = []
+        miss_idx: List[int] = []
+        miss_keys: List[Tuple[str, str]] = []
+        for idx, (doc_id, text) in enumerate(items):
+            key = (qkey, self.doc_key(doc_id, text))
+            score = self._cache_get(key)
+            scores.append(score)
+            if score is None:
+                miss_idx.append(idx)
+                miss_keys.append(key)
+        self._stats["cache_hits"] += len(items) - len(miss_idx)
+        self._stats["cache_misses"] += len(miss_idx)
+        future: Future = Future()
+        if miss_idx:
+            self._queue.put(([(query, items[i][1]) for i in miss_idx], future))
+        else:
+            future.set_result([])
+        return scores, future, miss_idx, miss_keys
+
+    def _merge(self, scores: List[Optional[float]], fresh: List[float], miss_idx: List[int], miss_keys: List[Tuple[str, str]]) -> List[float]:
+        self._cache_put(miss_keys, fresh)
+        for idx, score in zip(miss_idx, fresh):
+            scores[idx] = score
+        return [float(s) for s in scores]
+
+    def score(self, query: str, items: Sequence[Tuple[str, str]]) -> Optional[List[float]]:
+        """동기 호출용 (스레드에서). 타임아웃이면 TimeoutError"""
+        submitted = self._submit(query, items)
+        if submitted is None:
+            return None
+        scores, future, miss_idx, miss_keys = submitted
+        try:
+            fresh = future.result(timeout=self.timeout_ms / 1000)
+        except FutureTimeoutError:
+            raise TimeoutError(f"rerank timeout ({self.timeout_ms:.0f}ms)")
+        return self._merge(scores, fresh, miss_idx, miss_keys)
+
+    async def ascore(self, query: str, items: Sequence[Tuple[str, str]]) -> Optional[List[float]]:
+        """이벤트 루프를 막지 않고 배치 결과를 기다림"""
+        submitted = self._submit(query, items)
+        if submitted is None:
+            return None
+        scores, future, miss_idx, miss_keys = submitted
+        fresh = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_ms / 1000)
+        return self._merge(scores, fresh, miss_idx, miss_keys)
+
+    # ---- 배칭 ----
+    def _collect(self) -> List[Tuple[List[Pair], Future]]:
+        """첫 요청 후 batch_wait_ms 동안 (또는 batch_size 쌍이 찰 때까지) 다른 요청을 모음"""
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.batch_wait_ms / 1000
+        while size < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run_batch(self, pairs: List[Pair]) -> List[float]:
+        scores: List[float] = []
+        for start in range(0, len(pairs), self.batch_size):
+            chunk = pairs[start:start + self.batch_size]
+            t0 = time.perf_counter()
+            scores.extend(self.backend.score(chunk))
+            self._latencies.append((time.perf_counter() - t0) * 1000)
+            self._stats["batches"] += 1
+            self._stats["pairs"] += len(chunk)
+        return scores
+
+    def _batch_loop(self) -> None:
+        while True:
+            batch = self._collect()
+            pairs = [pair for item_pairs, _ in batch for pair in item_pairs]
+            try:
+                scores = self._run_batch(pairs)
+            except Exception as e:
+                self._stats["errors"] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            offset = 0
+            for item_pairs, future in batch:
+                if not future.done():
+                    future.set_result(scores[offset:offset + len(item_pairs)])
+                offset += len(item_pairs)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = list(self._latencies)
+        return {
+            "backend": self.backend.name,
+            "ready": self.ready,
+            "load_sec": round(self.load_sec, 3),
+            "load_error": self.load_error,
+            "cache_size": len(self._cache),
+            **self._stats,
+            "batch_ms_avg": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "batch_ms_p50": round(_percentile(latencies, 0.5), 2),
+            "batch_ms_p95": round(_percentile(latencies, 0.95), 2),
+            "batch_ms_max": round(max(latencies), 2) if latencies else 0.0,
+        }
+
+
+_SERVICE: Optional[RerankService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_rerank_service() -> RerankService:
+    """프로세스 공용 리랭커 서비스 (로드는 warmup_reranker에서)"""
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = RerankService(create_rerank_backend())
+    return _SERVICE
+
+
+def set_rerank_service(service: Optional[RerankService]) -> None:
+    """서비스 교체 (테스트에서 stub 백엔드 주입용)"""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        _SERVICE = service
+
+
+def warmup_reranker() -> None:
+    """리랭킹이 켜져 있으면 백그라운드 스레드에서 모델 로드 시작 (요청은 로드 완료 전까지 폴백)"""
+    from app.rag.rerank.cross_encoder import _RERANK_ENABLED, _USE_LLM_RERANK
+
+    if not _RERANK_ENABLED or _USE_LLM_RERANK:
+        return
+    try:
+        get_rerank_service().start()
+    except Exception as e:
+        print(f"[rerank] 워밍업 실패: {e}")
+
+
+def get_rerank_stats() -> Dict[str, Any]:
+    return get_rerank_service().snapshot()
+
+
+__all__ = [
+    "OnnxRerankBackend",
+    "RerankBackend",
+    "RerankService",
+    "SentenceTransformersRerankBackend",
+    "StubRerankBackend",
+    "create_rerank_backend",
+    "get_rerank_service",
+    "get_rerank_stats",
+    "set_rerank_service",
+    "warmup_reranker",
+]
@@ -0,0 +1,329 @@
+"""
+card_products 인메모리 카탈로그
+
+card_products는 수백 건 규모의 정적 카탈로그이므로 한 번 로드해 두고
+카드명 해석(text_search 1·2차 후보 추출), 본문 term 필터, id 조회,
+VocabularyMatcher용 상품명 목록을 모두 메모리에서 처리한다.
+- SQL(LOWER/REPLACE = ANY, LIKE/ILIKE ANY)과 동일한 매칭 의미를 유지
+- 로드 실패 시 None을 반환해 호출부가 기존 SQL 경로로 폴백
+- 로드 시 본문 섹션/블록 인덱스와 문장 offset도 미리 계산 (후처리는 조회만)
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CARD_CATALOG_ENABLED = os.getenv("RAG_CARD_CATALOG", "1") != "0"
+CARD_CATALOG_TTL_SEC = float(os.getenv("RAG_CARD_CATALOG_TTL", "0"))
+
+_CARD_ROWS_SQL = (
+    "SELECT id, name, card_type::text, brand::text, main_benefits, performance_condition, "
+    "metadata, structured, keywords FROM card_products ORDER BY id"
+)
+
+Row = Tuple[object, str, Dict[str, Any], Optional[Dict[str, Any]], float]
+
+
+def _compact(text: object) -> str:
+    return str(text or "").replace(" ", "")
+
+
+def _like_to_regex(pattern: str) -> "re.Pattern[str]":
+    """SQL LIKE 패턴(%/_)을 정규식으로 변환"""
+    parts = []
+    for ch in pattern:
+        if ch == "%":
+            parts.append(".*")
+        elif ch == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(ch))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+@dataclass
+class CardEntry:
+    id: object
+    name: str
+    card_type: str
+    brand: str
+    content: str
+    metadata: Dict[str, Any]
+    structured: Optional[Dict[str, Any]]
+    keywords: List[str]
+    meta_card_name: str
+    meta_title: str
+    compact_lower_names: Tuple[str, ...] = field(default_factory=tuple)
+    synonyms: Tuple[str, ...] = field(default_factory=tuple)
+
+    def card_meta(self) -> Dict[str, Any]:
+        """text_search 카드명 경로의 metadata (name/title/card_name 덮어쓰기)"""
+        meta = dict(self.metadata)
+        meta.update({"title": self.name, "card_name": self.name, "name": self.name})
+        return meta
+
+    def source_meta(self) -> Dict[str, Any]:
+        """_source_sql(card_products)과 동일한 metadata"""
+        meta = dict(self.metadata)
+        meta.update(
+            {
+                "title": self.name,
+                "card_name": self.name,
+                "category": self.card_type or None,
+                "category1": self.card_type or None,
+                "category2": self.brand or None,
+                "source_table": "card_products",
+            }
+        )
+        return meta
+
+
+def _entry_from_row(row: tuple) -> CardEntry:
+    doc_id, name, card_type, brand, main_benefits, performance_condition, metadata, structured, keywords = row
+    meta = metadata if isinstance(metadata, dict) else {}
+    name = name or ""
+    content = "\n\n".join([name, main_benefits or "", performance_condition or ""])
+    meta_card_name = str(meta.get("card_name") or "")
+    keyword_list = [str(k) for k in (keywords or []) if k]
+    synonyms = [name, meta_card_name, *keyword_list]
+    for key in ("aliases", "synonyms"):
+        value = meta.get(key)
+        if isinstance(value, list):
+            synonyms.extend(str(v) for v in value if v)
+    return CardEntry(
+        id=doc_id,
+        name=name,
+        card_type=card_type or "",
+        brand=brand or "",
+        content=content,
+        metadata=meta,
+        structured=structured if isinstance(structured, dict) else None,
+        keywords=keyword_list,
+        meta_card_name=meta_card_name,
+        meta_title=str(meta.get("title") or ""),
+        compact_lower_names=tuple(v for v in (_compact(meta_card_name).lower(), _compact(name).lower()) if v),
+        synonyms=tuple(dict.fromkeys(_compact(s).lower() for s in synonyms if s)),
+    )
+
+
+def _load_rows() -> List[tuple]:
+    from app.rag.retriever.db import _db_conn
+
+    with _db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_CARD_ROWS_SQL)
+            return cur.fetchall()
+
+
+class CardCatalog:
+    """card_products 전체를 메모리에 보관하고 카드명/term 조회를 처리"""
+
+    def __init__(self, entries: Iterable[CardEntry]):
+        self.entries: List[CardEntry] = list(entries)
+        self.by_id: Dict[str, CardEntry] = {str(e.id): e for e in self.entries}
+        self.by_brand: Dict[str, List[CardEntry]] = {}
+        self.by_type: Dict[str, List[CardEntry]] = {}
+        self._by_compact_name: Dict[str, List[CardEntry]] = {}
+        self._by_synonym: Dict[str, List[CardEntry]] = {}
+        for entry in self.entries:
+            self.by_brand.setdefault(entry.brand, []).append(entry)
+            self.by_type.setdefault(entry.card_type, []).append(entry)
+            for key in entry.compact_lower_names:
+                self._by_compact_name.setdefault(key, []).append(entry)
+            for key in entry.synonyms:
+                self._by_synonym.setdefault(key, []).append(entry)
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "CardCatalog":
+        return cls(_entry_from_row(row) for row in rows)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # ---- 카드명 해석 ----
+    def match_card_ids(self, card_values: List[object], limit: int = 20) -> List[object]:
+        """
+        text_search 1차(정확/접두) → 2차(부분 포함, 대소문자 무시) 후보 추출과 동일한 결과
+        """
+        values = [str(v) for v in card_values if v is not None]
+        if not values:
+            return []
+        eq_any = {v.replace(" ", "").lower() for v in values}
+        matched: Dict[str, CardEntry] = {}
+        for key in eq_any:
+            for entry in self._by_compact_name.get(key, []):
+                matched.setdefault(str(entry.id), entry)
+        for entry in self.entries:
+            if str(entry.id) in matched:
+                continue
+            if any(
+                entry.meta_card_name.startswith(v) or entry.name.startswith(v) or entry.meta_title.startswith(v)
+                for v in values
+            ):
+                matched[str(entry.id)] = entry
+        if matched:
+            ordered = [e for e in self.entries if str(e.id) in matched]
+            return [e.id for e in ordered[:limit]]
+
+        like_any = [v.lower() for v in values]
+        no_space_any = [v.replace(" ", "").lower() for v in values]
+        fallback: List[object] = []
+        for entry in self.entries:
+            card_name = entry.meta_card_name.lower()
+            name = entry.name.lower()
+            title = entry.meta_title.lower()
+            if (
+                any(ns in _compact(card_name) or ns in _compact(name) for ns in no_space_any)
+                or any(v in card_name or v in name or v in title for v in like_any)
+            ):
+                fallback.append(entry.id)
+                if len(fallback) >= limit:
+                    break
+        return fallback
+
+    def lookup_synonym(self, term: str) -> List[CardEntry]:
+        return list(self._by_synonym.get(_compact(term).lower(), []))
+
+    # ---- 행 생성 (text_search 반환 형식) ----
+    def rows_for_ids(self, ids: List[object], terms: List[str], limit: int) -> List[Row]:
+        """2차 본문 검색: 후보 id 중 term 포함 행, 없으면 후보 전체"""
+        candidates = [self.by_id[str(i)] for i in ids if str(i) in self.by_id]
+        lowered = [t.lower() for t in terms if t]
+        rows = candidates
+        if lowered:
+            rows = [e for e in candidates if any(t in e.content.lower() for t in lowered)]
+            if not rows:
+                rows = candidates
+        return [(e.id, e.content, e.card_meta(), e.structured, 0.0) for e in rows[:limit]]
+
+    def rows_for_terms(self, terms: List[str], limit: int) -> List[Row]:
+        """카드명 후보가 없을 때 terms 기반 본문 검색"""
+        lowered = [t.lower() for t in terms if t]
+        if not lowered:
+            return []
+        rows = [e for e in self.entries if any(t in e.content.lower() for t in lowered)]
+        return [(e.id, e.content, dict(e.metadata), e.structured, 0.0) for e in rows[:limit]]
+
+    def search_terms(
+        self,
+        terms: List[str],
+        limit: int,
+        *,
+        id_prefix: Optional[str] = None,
+        exclude_like_any: Optional[List[str]] = None,
+    ) -> List[Row]:
+        """
+        card_products 일반 ILIKE 검색 (content/title/category/category1/category2)
+        """
+        lowered = [t.lower() for t in terms if t]
+        excludes = [_like_to_regex(str(p).lower()) for p in (exclude_like_any or []) if p]
+        out: List[Row] = []
+        for entry in self.entries:
+            if id_prefix and not str(entry.id).startswith(id_prefix):
+                continue
+            fields = (entry.content, entry.name, entry.card_type, entry.card_type, entry.brand)
+            fields_lower = [f.lower() for f in fields]
+            if lowered and not any(t in f for t in lowered for f in fields_lower):
+                continue
+            if excludes:
+                targets = (entry.content.lower(), entry.name.lower(), str(entry.id).lower())
+                if any(rx.fullmatch(t) for rx in excludes for t in targets):
+                    continue
+            out.append((entry.id, entry.content, entry.source_meta(), entry.structured, 0.0))
+            if len(out) >= limit:
+                break
+        return out
+
+    def docs_by_ids(self, ids: List[str], table: str) -> Optional[List[Dict[str, Any]]]:
+        """fetch_docs_by_ids 형식 문서 (모든 id가 있을 때만 반환)"""
+        docs: List[Dict[str, Any]] = []
+        for doc_id in ids:
+            entry = self.by_id.get(str(doc_id))
+            if entry is None:
+                return None
+            meta = entry.source_meta()
+            docs.append(
+                {
+                    "id": str(entry.id),
+                    "db_id": entry.id,
+                    "title": meta.get("title") or meta.get("name") or meta.get("card_name"),
+                    "content": entry.content,
+                    "metadata": meta,
+                    "structured": entry.structured,
+                    "table": table,
+                }
+            )
+        return docs
+
+    def products(self) -> List[Dict[str, Any]]:
+        """VocabularyMatcher용 상품 목록 (id 순)"""
+        return [
+            {"id": e.id, "name": e.name, "card_type": e.card_type, "brand": e.brand}
+            for e in self.entries
+        ]
+
+
+_CATALOG: Optional[CardCatalog] = None
+_CATALOG_LOCK = threading.Lock()
+_CATALOG_FAILED_AT = 0.0
+_CATALOG_RETRY_SEC = 30.0
+
+
+def get_card_catalog(
+    force_reload: bool = False,
+    loader: Optional[Callable[[], List[tuple]]] = None,
+) -> Optional[CardCatalog]:
+    """공유 카탈로그 반환 (최초 1회 로드). 비활성/로드 실패 시 None"""
+    global _CATALOG, _CATALOG_FAILED_AT
+    if not CARD_CATALOG_ENABLED:
+        return None
+    catalog = _CATALOG
+    now = time.time()
+    stale = (
+        catalog is not None
+        and CARD_CATALOG_TTL_SEC > 0
+        and (now - catalog.loaded_at) > CARD_CATALOG_TTL_SEC
+    )
+    if catalog is not None and not force_reload and not stale:
+        return catalog
+    if catalog is None and not force_reload and (now - _CATALOG_FAILED_AT) < _CATALOG_RETRY_SEC:
+        return None
+    with _CATALOG_LOCK:
+        if _CATALOG is not None and _CATALOG is not catalog and not force_reload:
+            return _CATALOG
+        try:
+            rows = (loader or _load_rows)()
+        except Exception as exc:
+            logger.warning("[card_catalog] load failed: %s", exc)
+            _CATALOG_FAILED_AT = now
+            return _CATALOG
+        _CATALOG = CardCatalog.from_rows(rows)
+        logger.info("[card_catalog] loaded %d card products", len(_CATALOG))
+        _warmup_section_index(_CATALOG)
+        return _CATALOG
+
+
+def _warmup_section_index(catalog: CardCatalog) -> None:
+    """카드 본문의 섹션/블록 인덱스를 로드 시점에 미리 계산 (clean_card_docs가 조회만 하도록)"""
+    from app.guide.context_builder import sentence_spans
+    from app.rag.postprocess.sections import build_section_index
+
+    try:
+        for entry in catalog.entries:
+            if entry.content:
+                sentence_spans(build_section_index(entry.content).deduped)
+    except Exception as exc:
+        logger.warning("[card_catalog] section index warmup failed: %s", exc)
+
+
+def warmup_card_catalog() -> int:
+    catalog = get_card_catalog()
+    return len(catalog) if catalog else 0
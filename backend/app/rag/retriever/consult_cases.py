@@ -8,11 +8,30 @@ from pgvector import Vector
 from pgvector.psycopg2 import register_vector
 
 from app.rag.retriever.db import _db_conn, _escape_pyformat_percent, embed_query
+from app.rag.retriever.embedding_store import (
+    binary_expr,
+    binary_quant_enabled,
+    bq_candidate_limit,
+    embedding_column,
+    mark_binary_quant_failed,
+    query_cast,
+)
 
 
 logger = logging.getLogger(__name__)
 
 _DEFAULT_TEXT_WEIGHT = 0.2
+_TABLE = "consultation_documents"
+_SELECT_COLUMNS = (
+    "SELECT id, consultation_id, title, content, category, metadata, usage_count, "
+    "effectiveness_score, "
+)
+_TSCORE_SQL = (
+    "ts_rank_cd("
+    "to_tsvector('simple', COALESCE(title, '') || ' ' || COALESCE(content, '')),"
+    "plainto_tsquery('simple', %s)"
+    ") AS tscore "
+)
 
 
 def _as_list(value: Any) -> List[str]:
@@ -67,29 +86,48 @@ def search_consultation_documents(
     categories = _collect_category_candidates(routing)
     emb = Vector(embed_query(query))
     text_query = (query or "").strip()
+    column = embedding_column()
+    cast = query_cast()
 
-    def _run_query(apply_category_filter: bool) -> List[Tuple[Any, ...]]:
+    def _run_query(apply_category_filter: bool, use_bq: bool) -> List[Tuple[Any, ...]]:
         category_params: List[object] = []
-        where_parts = ["embedding IS NOT NULL"]
+        where_parts = [f"{column} IS NOT NULL"]
         if apply_category_filter:
             category_clause = _build_category_filter(categories, category_params)
             if category_clause:
                 where_parts.append(category_clause)
         where_sql = " WHERE " + " AND ".join(where_parts)
-        params: List[object] = [emb, text_query, *category_params, emb, top_k]
-        sql = (
-            "SELECT id, consultation_id, title, content, category, metadata, usage_count, "
-            "effectiveness_score, "
-            "1 - (embedding <=> %s) AS vscore, "
-            "ts_rank_cd("
-            "to_tsvector('simple', COALESCE(title, '') || ' ' || COALESCE(content, '')),"
-            "plainto_tsquery('simple', %s)"
-            ") AS tscore "
-            "FROM consultation_documents"
-            f"{where_sql} "
-            "ORDER BY (embedding <=> %s) ASC "
-            "LIMIT %s"
-        )
+        if use_bq:
+            # 1단계: bit(Hamming) 후보 추출 → 2단계: 원본 벡터 코사인 재정렬
+            params: List[object] = [
+                emb,
+                text_query,
+                *category_params,
+                emb,
+                bq_candidate_limit(_TABLE, top_k),
+                emb,
+                top_k,
+            ]
+            sql = (
+                f"{_SELECT_COLUMNS}"
+                f"1 - ({column} <=> %s{cast}) AS vscore, "
+                f"{_TSCORE_SQL}"
+                f"FROM (SELECT * FROM {_TABLE}{where_sql} "
+                f"ORDER BY {binary_expr(column)} <~> {binary_expr(f'%s{cast}')} LIMIT %s) candidates "
+                f"ORDER BY ({column} <=> %s{cast}) ASC "
+                "LIMIT %s"
+            )
+        else:
+            params = [emb, text_query, *category_params, emb, top_k]
+            sql = (
+                f"{_SELECT_COLUMNS}"
+                f"1 - ({column} <=> %s{cast}) AS vscore, "
+                f"{_TSCORE_SQL}"
+                f"FROM {_TABLE}"
+                f"{where_sql} "
+                f"ORDER BY ({column} <=> %s{cast}) ASC "
+                "LIMIT %s"
+            )
         with _db_conn() as conn:
             register_vector(conn)
             with conn.cursor() as cur:
@@ -97,20 +135,26 @@ def search_consultation_documents(
                 return cur.fetchall()
 
     start = time.perf_counter()
-    rows: List[Tuple[Any, ...]] = _run_query(apply_category_filter=True)
+    use_bq = binary_quant_enabled(_TABLE)
+    try:
+        rows: List[Tuple[Any, ...]] = _run_query(apply_category_filter=True, use_bq=use_bq)
+    except Exception as exc:
+        if not use_bq:
+            raise
+        # bit 인덱스/함수 미적용 DB: 기존 HNSW 경로로 폴백 (실패를 기록해 다음 요청부터 바로 HNSW)
+        logger.debug("[consult_retriever] binary quant search failed err=%s", exc)
+        mark_binary_quant_failed(_TABLE, exc)
+        use_bq = False
+        rows = _run_query(apply_category_filter=True, use_bq=use_bq)
     if categories and not rows:
-        rows = _run_query(apply_category_filter=False)
+        rows = _run_query(apply_category_filter=False, use_bq=use_bq)
     if not rows:
         params: List[object] = [text_query, top_k]
         sql = (
-            "SELECT id, consultation_id, title, content, category, metadata, usage_count, "
-            "effectiveness_score, "
+            f"{_SELECT_COLUMNS}"
             "0.0 AS vscore, "
-            "ts_rank_cd("
-            "to_tsvector('simple', COALESCE(title, '') || ' ' || COALESCE(content, '')),"
-            "plainto_tsquery('simple', %s)"
-            ") AS tscore "
-            "FROM consultation_documents "
+            f"{_TSCORE_SQL}"
+            f"FROM {_TABLE} "
             "WHERE COALESCE(title, '') <> '' OR COALESCE(content, '') <> '' "
             "ORDER BY tscore DESC NULLS LAST "
             "LIMIT %s"
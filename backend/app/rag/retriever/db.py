@@ -22,28 +22,29 @@ from app.rag.retriever.terms import (
     _expand_payment_terms,
     _extract_query_terms,
 )
+from app.rag.retriever.card_catalog import get_card_catalog
+from app.rag.retriever.embedding_store import (
+    binary_expr,
+    binary_quant_enabled,
+    bq_candidate_limit,
+    embedding_column,
+    embedding_type,
+    mark_binary_quant_failed,
+    query_cast,
+    query_dimensions,
+)
+from app.rag.retriever.sql_templates import (
+    escape_pyformat_percent,
+    execute_template,
+    get_template,
+)
 
 logger = logging.getLogger(__name__)
 
 
 def _escape_pyformat_percent(sql: str) -> str:
     """Escape literal '%' characters so psycopg2 does not treat them as placeholders."""
-    escaped: list[str] = []
-    i = 0
-    length = len(sql)
-    while i < length:
-        ch = sql[i]
-        if ch == "%":
-            if i + 1 < length and sql[i + 1] == "s":
-                escaped.append("%s")
-                i += 2
-                continue
-            escaped.append("%%")
-            i += 1
-            continue
-        escaped.append(ch)
-        i += 1
-    return "".join(escaped)
+    return escape_pyformat_percent(sql)
 
 load_dotenv()
 
@@ -153,7 +154,8 @@ def _prune_embed_cache(now: float) -> None:
 
 
 def embed_query(text: str, model: str = "text-embedding-3-small") -> List[float]:
-    cache_key = f"{model}:{text}"
+    dimensions = query_dimensions()
+    cache_key = f"{model}:{text}" if dimensions is None else f"{model}:{dimensions}:{text}"
     now = time.time()
 
     if _EMBED_CACHE_ENABLED:
@@ -166,7 +168,10 @@ def embed_query(text: str, model: str = "text-embedding-3-small") -> List[float]
                     return embedding
 
     client = get_openai_client()
-    resp = client.embeddings.create(model=model, input=text)
+    if dimensions is None:
+        resp = client.embeddings.create(model=model, input=text)
+    else:
+        resp = client.embeddings.create(model=model, input=text, dimensions=dimensions)
     embedding = resp.data[0].embedding
 
     if _EMBED_CACHE_ENABLED:
@@ -240,7 +245,7 @@ def _source_sql(table: str, include_embedding: bool) -> str:
             "'source_table', 'card_products'"
             ")"
         )
-        embedding_expr = "NULL::vector(1536) AS embedding"
+        embedding_expr = f"NULL::{embedding_type()} AS embedding"
     elif actual == "service_guide_documents":
         content_expr = "content"
         metadata_expr = (
@@ -251,11 +256,11 @@ def _source_sql(table: str, include_embedding: bool) -> str:
             "'source_table', 'service_guide_documents'"
             ")"
         )
-        embedding_expr = "embedding"
+        embedding_expr = f"{embedding_column()} AS embedding"
     else:
         content_expr = "content"
         metadata_expr = "metadata"
-        embedding_expr = "embedding"
+        embedding_expr = f"{embedding_column()} AS embedding"
     select_parts = ["id", f"{content_expr} AS content", f"{metadata_expr} AS metadata", "structured"]
     if include_embedding:
         select_parts.append(embedding_expr)
@@ -266,11 +271,19 @@ def fetch_docs_by_ids(table: str, ids: List[str]) -> List[Dict[str, object]]:
     if not ids:
         return []
     safe_table = _safe_table(table)
-    sql = _source_sql(safe_table, include_embedding=False) + " WHERE id = ANY(%s)"
+    if _is_card_table(safe_table):
+        catalog = get_card_catalog()
+        cached_docs = catalog.docs_by_ids(ids, safe_table) if catalog else None
+        if cached_docs is not None:
+            return cached_docs
+    template = get_template(
+        safe_table,
+        "ids",
+        _source_sql(safe_table, include_embedding=False) + " WHERE id = ANY(%s)",
+    )
     with _db_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (ids,))
-            rows = cur.fetchall()
+            rows = execute_template(conn, cur, template, [list(ids)], prepare=_DB_POOL_ENABLED)
     docs: List[Dict[str, object]] = []
     for row in rows:
         doc_id, content, metadata, structured = row[0], row[1], row[2], row[3] if len(row) > 3 else None
@@ -460,40 +473,60 @@ def vector_search(
             terms = [query.strip()]
         return text_search(table=table, terms=terms, limit=limit, filters=filters)
     emb = Vector(embed_query(query))
+    cast = query_cast()
     where_sql, where_params = build_where_clause(filters, table)
     with _db_conn() as conn:
         register_vector(conn)
         with conn.cursor() as cur:
-            def _run(where_sql: str, where_params: List[str]):
-                sql = (
+            def _run_bq(where_sql: str, where_params: List[str]):
+                # 1단계: bit(Hamming) 후보 추출 → 2단계: 원본 벡터 코사인 재정렬
+                params = [*where_params, emb, bq_candidate_limit(actual_table, limit), emb, emb, limit]
+                template = get_template(
+                    table,
+                    "vector_bq",
                     "WITH source AS ("
                     f"{_source_sql(table, include_embedding=True)}"
+                    "), candidates AS ("
+                    f"SELECT * FROM source{where_sql} "
+                    f"ORDER BY {binary_expr('embedding')} <~> {binary_expr(f'%s{cast}')} LIMIT %s"
                     ") "
-                    "SELECT id, content, metadata, structured, 1 - (embedding <=> %s) AS score "
-                    f"FROM source{where_sql} ORDER BY embedding <=> %s LIMIT %s"
+                    f"SELECT id, content, metadata, structured, 1 - (embedding <=> %s{cast}) AS score "
+                    f"FROM candidates ORDER BY embedding <=> %s{cast} LIMIT %s",
                 )
-                params = [emb, *where_params, emb, limit]
-                # logger.debug("[vector_search] FINAL_SQL where_clause: %s", where_sql)
-                # logger.debug("[vector_search] FINAL_PARAMS: %s", params)
-                def _execute(sql_text: str, params_list: List[object]) -> List[tuple]:
-                    exec_start = time.perf_counter()
-                    cur.execute(_escape_pyformat_percent(sql_text), params_list)
-                    exec_ms = (time.perf_counter() - exec_start) * 1000
-                    rows = cur.fetchall()
-                    return rows
+                return execute_template(conn, cur, template, params, prepare=_DB_POOL_ENABLED)
 
+            def _run(where_sql: str, where_params: List[str]):
+                if binary_quant_enabled(actual_table):
+                    try:
+                        return _run_bq(where_sql, where_params)
+                    except Exception as exc:
+                        conn.rollback()
+                        logger.debug("[vector_search] binary quant search failed table=%s err=%s", table, exc)
+                        mark_binary_quant_failed(actual_table, exc)
+                params = [emb, *where_params, emb, limit]
+                template = get_template(
+                    table,
+                    "vector_cos",
+                    "WITH source AS ("
+                    f"{_source_sql(table, include_embedding=True)}"
+                    ") "
+                    f"SELECT id, content, metadata, structured, 1 - (embedding <=> %s{cast}) AS score "
+                    f"FROM source{where_sql} ORDER BY embedding <=> %s{cast} LIMIT %s",
+                )
                 try:
-                    return _execute(sql, params)
+                    return execute_template(conn, cur, template, params, prepare=_DB_POOL_ENABLED)
                 except Exception:
                     conn.rollback()
-                    sql = (
+                    template = get_template(
+                        table,
+                        "vector_l2",
                         "WITH source AS ("
                         f"{_source_sql(table, include_embedding=True)}"
                         ") "
-                        "SELECT id, content, metadata, structured, 1 - (embedding <-> %s) AS score "
-                        f"FROM source{where_sql} ORDER BY embedding <-> %s LIMIT %s"
+                        f"SELECT id, content, metadata, structured, 1 - (embedding <-> %s{cast}) AS score "
+                        f"FROM source{where_sql} ORDER BY embedding <-> %s{cast} LIMIT %s",
                     )
-                    return _execute(sql, params)
+                    return execute_template(conn, cur, template, params, prepare=_DB_POOL_ENABLED)
 
             results = _run(where_sql, where_params)
             if not results and where_sql and filters:
@@ -593,6 +626,25 @@ def text_search(
         card_values = _as_list(filters.get("card_name"))
         require_card_name_match = bool(filters.get("require_card_name_match"))
         logger.info(f"[text_search] card_table={actual_table}, card_values={card_values}, terms={terms}")
+        catalog = get_card_catalog()
+        if catalog is not None:
+            # 인메모리 카탈로그: 카드명 해석/본문 필터를 DB 왕복 없이 처리
+            if card_values:
+                id_candidates = catalog.match_card_ids(card_values, limit=20)
+                if not id_candidates:
+                    if require_card_name_match:
+                        return []
+                    return catalog.rows_for_terms(terms, limit)
+                rows = catalog.rows_for_ids(id_candidates, terms, limit)
+                logger.info(f"[text_search] Returning {len(rows)} card_products rows (catalog)")
+                return rows
+            if not scope_filter:
+                return catalog.search_terms(
+                    terms,
+                    limit,
+                    id_prefix=str(filters.get("id_prefix")) if filters.get("id_prefix") else None,
+                    exclude_like_any=_as_list(filters.get("exclude_like_any")),
+                )
         if card_values:
             # 1차: normalized card_name 인덱스 기반 후보 추출
             eq_any = [str(v).replace(' ', '').lower() for v in card_values]
@@ -694,16 +746,20 @@ def text_search(
     
     id_prefix = filters.get("id_prefix")
     if id_prefix:
-        id_prefix_str = str(id_prefix)
-        id_prefix_condition = f"id LIKE '{id_prefix_str}%'"
+        # 값은 파라미터로 전달해 shape(템플릿)가 재사용되도록 함
+        id_prefix_param = f"{id_prefix}%"
+        id_prefix_condition = "id LIKE %s"
         if use_trgm and trgm_where:
             trgm_where = _and_conditions(trgm_where, id_prefix_condition)
+            trgm_params.append(id_prefix_param)
         elif use_trgm and trgm_where == "":
             trgm_where = id_prefix_condition
+            trgm_params.append(id_prefix_param)
         if like_where:
             like_where = _and_conditions(like_where, id_prefix_condition)
         else:
             like_where = id_prefix_condition
+        like_params.append(id_prefix_param)
     
     if scope_filter:
         scope_filter_sql = str(scope_filter)
@@ -769,7 +825,7 @@ def text_search(
     # DB 연결 및 SQL 실행 (EXPLAIN 포함)
     with _db_conn() as conn:
         with conn.cursor() as cur:
-            def _run(where_sql: str, where_params: List[str]):
+            def _run(where_sql: str, where_params: List[str], mode: str):
                 source_sql_text = _source_sql(table, include_embedding=False)
                 sql = (
                     "WITH source AS ("
@@ -780,26 +836,23 @@ def text_search(
                     + "ORDER BY score DESC LIMIT %s"
                 )
                 params = [*score_params, *where_params, limit]
+                template = get_template(table, f"text_{mode}", sql)
                 # SQL 및 EXPLAIN 로그: mogrify 결과만 출력, 파싱 없음
                 if _EXPLAIN_ENABLED:
                     try:
-                        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {template.sql}", params)
                         cur.fetchall()
                     except Exception:
                         conn.rollback()
-                exec_start = time.perf_counter()
-                cur.execute(_escape_pyformat_percent(sql), params)
-                exec_ms = (time.perf_counter() - exec_start) * 1000
-                rows = cur.fetchall()
-                return rows
+                return execute_template(conn, cur, template, params, prepare=_DB_POOL_ENABLED)
 
             results: List[Tuple[object, str, Dict[str, object], float]] = []
             if _TRGM_ENABLED and trgm_where:
                 try:
-                    results = _run(trgm_where, trgm_params)
+                    results = _run(trgm_where, trgm_params, "trgm")
                 except Exception:
                     conn.rollback()
                     results = []
             if not results and like_where:
-                results = _run(like_where, like_params)
+                results = _run(like_where, like_params, "like")
             return results
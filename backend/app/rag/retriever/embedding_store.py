@@ -0,0 +1,123 @@
+"""
+임베딩 저장 형식 설정 (vector(1536) ↔ halfvec(N))
+
+- RAG_EMBED_STORAGE=vector  : 기존 embedding vector(1536) 컬럼 사용 (기본값)
+- RAG_EMBED_STORAGE=halfvec : embedding_compact halfvec(N) 컬럼 사용
+  (app/db/scripts/15_migrate_compact_embeddings.py로 컬럼/HNSW 인덱스 생성)
+- RAG_EMBED_DIMENSIONS=N    : halfvec 모드에서 text-embedding-3 `dimensions` 축소 (기본 1536)
+- RAG_BQ_TABLES=table[:factor],... : 2단계 검색 테이블
+  (binary_quantize bit 인덱스 Hamming 후보 추출 → 원본 벡터 코사인 재정렬,
+   app/db/scripts/16_build_binary_quant_index.py로 인덱스 생성)
+  bit 인덱스/함수가 없어 실패한 테이블은 RAG_BQ_RETRY_SEC 동안 기존 HNSW 경로만 사용
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FULL_DIMENSIONS = 1536
+FULL_COLUMN = "embedding"
+COMPACT_COLUMN = "embedding_compact"
+
+EMBED_STORAGE = os.getenv("RAG_EMBED_STORAGE", "vector").strip().lower()
+EMBED_DIMENSIONS = int(os.getenv("RAG_EMBED_DIMENSIONS", str(FULL_DIMENSIONS)))
+BQ_RERANK_FACTOR = int(os.getenv("RAG_BQ_RERANK_FACTOR", "10"))
+BQ_MIN_CANDIDATES = int(os.getenv("RAG_BQ_MIN_CANDIDATES", "100"))
+BQ_RETRY_SEC = float(os.getenv("RAG_BQ_RETRY_SEC", "600"))
+
+if EMBED_STORAGE not in ("vector", "halfvec"):
+    logger.warning("[embedding_store] unknown RAG_EMBED_STORAGE=%s, fallback to vector", EMBED_STORAGE)
+    EMBED_STORAGE = "vector"
+if EMBED_STORAGE == "vector" and EMBED_DIMENSIONS != FULL_DIMENSIONS:
+    # vector(1536) 컬럼과 차원이 맞지 않으므로 축소 차원은 halfvec 모드에서만 허용
+    logger.warning("[embedding_store] RAG_EMBED_DIMENSIONS is ignored in vector storage mode")
+    EMBED_DIMENSIONS = FULL_DIMENSIONS
+
+
+def compact_enabled() -> bool:
+    return EMBED_STORAGE == "halfvec"
+
+
+def embedding_column() -> str:
+    """검색에 사용할 임베딩 컬럼명"""
+    return COMPACT_COLUMN if compact_enabled() else FULL_COLUMN
+
+
+def embedding_type() -> str:
+    if compact_enabled():
+        return f"halfvec({EMBED_DIMENSIONS})"
+    return f"vector({FULL_DIMENSIONS})"
+
+
+def query_cast() -> str:
+    """쿼리 임베딩 파라미터 캐스트 (%s 뒤에 붙임)"""
+    return f"::{embedding_type()}" if compact_enabled() else ""
+
+
+def query_dimensions() -> Optional[int]:
+    """embeddings.create에 넘길 dimensions (축소하지 않으면 None)"""
+    if compact_enabled() and EMBED_DIMENSIONS != FULL_DIMENSIONS:
+        return EMBED_DIMENSIONS
+    return None
+
+
+def active_dimensions() -> int:
+    return EMBED_DIMENSIONS if compact_enabled() else FULL_DIMENSIONS
+
+
+def _parse_bq_tables(raw: str) -> Dict[str, int]:
+    """"consultation_documents:20,notices" → {"consultation_documents": 20, "notices": 기본 배수}"""
+    tables: Dict[str, int] = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, factor = item.partition(":")
+        try:
+            tables[name.strip()] = max(1, int(factor)) if factor else BQ_RERANK_FACTOR
+        except ValueError:
+            logger.warning("[embedding_store] invalid RAG_BQ_TABLES entry: %s", item)
+    return tables
+
+
+BQ_TABLES = _parse_bq_tables(os.getenv("RAG_BQ_TABLES", ""))
+# 2단계 검색이 실패한 테이블 → 실패 시각 (BQ_TABLES 범위로 제한)
+_BQ_FAILED_AT: Dict[str, float] = {}
+_BQ_LOCK = threading.Lock()
+
+
+def binary_quant_enabled(table: str) -> bool:
+    if table not in BQ_TABLES:
+        return False
+    failed_at = _BQ_FAILED_AT.get(table)
+    return failed_at is None or (time.monotonic() - failed_at) >= BQ_RETRY_SEC
+
+
+def mark_binary_quant_failed(table: str, exc: BaseException) -> None:
+    """2단계 검색 실패 기록: BQ_RETRY_SEC 동안 binary_quant_enabled가 False (매 요청 실패·재시도 방지)"""
+    if table not in BQ_TABLES:
+        return
+    with _BQ_LOCK:
+        first = table not in _BQ_FAILED_AT
+        _BQ_FAILED_AT[table] = time.monotonic()
+    if first:
+        logger.warning(
+            "[embedding_store] binary quant search unavailable table=%s, using HNSW for %.0fs: %s",
+            table, BQ_RETRY_SEC, exc,
+        )
+
+
+def bq_candidate_limit(table: str, top_k: int) -> int:
+    """1단계(Hamming) 후보 수: top_k × 테이블별 배수, 최소 RAG_BQ_MIN_CANDIDATES"""
+    factor = BQ_TABLES.get(table, BQ_RERANK_FACTOR)
+    return max(top_k * factor, BQ_MIN_CANDIDATES, top_k)
+
+
+def binary_expr(expr: str) -> str:
+    """bit 인덱스 표현식과 동일한 형태 (인덱스 매칭을 위해 차원 캐스트 포함)"""
+    return f"binary_quantize({expr})::bit({active_dimensions()})"
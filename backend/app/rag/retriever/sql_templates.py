@@ -0,0 +1,200 @@
+"""
+리트리버 SQL 템플릿 캐시 + 서버측 prepared statement
+
+- 쿼리 shape (table, mode, WHERE 구조)별로 이스케이프된 SQL을 한 번만 만들어 보관
+- 풀 커넥션마다 PREPARE 후 EXECUTE로 실행해 Postgres 파싱/플래닝 비용 절감
+- PREPARE 실패 shape는 기억해두고 일반 실행으로 폴백 (템플릿 캐시와 같은 크기로 제한, LRU)
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import hashlib
+import logging
+import os
+import re
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+PREPARED_ENABLED = os.getenv("RAG_PREPARED_STATEMENTS", "1") != "0"
+TEMPLATE_CACHE_MAX = int(os.getenv("RAG_SQL_TEMPLATE_MAX", "128"))
+PREPARED_PER_CONN_MAX = int(os.getenv("RAG_PREPARED_PER_CONN_MAX", "64"))
+
+_PERCENT_RE = re.compile(r"%(s?)")
+_PLACEHOLDER_RE = re.compile(r"%%|%s")
+_DUPLICATE_PREPARED = "42P05"
+
+
+def escape_pyformat_percent(sql: str) -> str:
+    """Escape literal '%' characters so psycopg2 does not treat them as placeholders."""
+    return _PERCENT_RE.sub(lambda m: "%s" if m.group(1) else "%%", sql)
+
+
+def _to_dollar_params(escaped_sql: str) -> Tuple[str, int]:
+    """pyformat(%s/%%) SQL을 PREPARE용 $n 형식으로 변환"""
+    counter = 0
+
+    def _sub(match: "re.Match[str]") -> str:
+        nonlocal counter
+        if match.group(0) == "%%":
+            return "%"
+        counter += 1
+        return f"${counter}"
+
+    return _PLACEHOLDER_RE.sub(_sub, escaped_sql), counter
+
+
+@dataclass(frozen=True)
+class SqlTemplate:
+    key: Tuple[str, str, str]
+    sql: str
+    name: str
+    prepared_sql: str
+    param_count: int
+
+    @property
+    def execute_sql(self) -> str:
+        if not self.param_count:
+            return f"EXECUTE {self.name}"
+        return f"EXECUTE {self.name} (" + ", ".join(["%s"] * self.param_count) + ")"
+
+
+_TEMPLATES: "OrderedDict[Tuple[str, str, str], SqlTemplate]" = OrderedDict()
+_TEMPLATES_LOCK = threading.Lock()
+# PREPARE/EXECUTE 실패 shape 키 (워커 스레드에서 갱신: _UNPREPARABLE_LOCK)
+_UNPREPARABLE: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
+_UNPREPARABLE_LOCK = threading.Lock()
+# 커넥션별 PREPARE 완료 statement 이름 (LRU)
+_PREPARED_BY_CONN: "weakref.WeakKeyDictionary[object, OrderedDict[str, None]]" = weakref.WeakKeyDictionary()
+_PREPARED_LOCK = threading.Lock()
+
+
+def get_template(table: str, mode: str, sql: str) -> SqlTemplate:
+    """shape 키로 템플릿 조회 (없으면 이스케이프/변환 후 등록)"""
+    key = (table, mode, sql)
+    with _TEMPLATES_LOCK:
+        template = _TEMPLATES.get(key)
+        if template is not None:
+            _TEMPLATES.move_to_end(key)
+            return template
+    escaped = escape_pyformat_percent(sql)
+    prepared_sql, param_count = _to_dollar_params(escaped)
+    digest = hashlib.sha1(f"{table}|{mode}|{sql}".encode("utf-8")).hexdigest()[:16]
+    template = SqlTemplate(
+        key=key,
+        sql=escaped,
+        name=f"rag_q_{digest}",
+        prepared_sql=prepared_sql,
+        param_count=param_count,
+    )
+    with _TEMPLATES_LOCK:
+        _TEMPLATES[key] = template
+        while len(_TEMPLATES) > TEMPLATE_CACHE_MAX:
+            _TEMPLATES.popitem(last=False)
+    return template
+
+
+def _prepared_names(conn) -> Optional["OrderedDict[str, None]"]:
+    try:
+        with _PREPARED_LOCK:
+            names = _PREPARED_BY_CONN.get(conn)
+            if names is None:
+                names = OrderedDict()
+                _PREPARED_BY_CONN[conn] = names
+            return names
+    except TypeError:
+        # weakref 미지원 커넥션 객체
+        return None
+
+
+def _mark_unpreparable(key: Tuple[str, str, str]) -> None:
+    with _UNPREPARABLE_LOCK:
+        _UNPREPARABLE[key] = None
+        _UNPREPARABLE.move_to_end(key)
+        while len(_UNPREPARABLE) > max(1, TEMPLATE_CACHE_MAX):
+            _UNPREPARABLE.popitem(last=False)
+
+
+def _is_unpreparable(key: Tuple[str, str, str]) -> bool:
+    with _UNPREPARABLE_LOCK:
+        return key in _UNPREPARABLE
+
+
+def _ensure_prepared(conn, cur, template: SqlTemplate) -> bool:
+    names = _prepared_names(conn)
+    if names is None:
+        return False
+    if template.name in names:
+        names.move_to_end(template.name)
+        return True
+    try:
+        cur.execute(f"PREPARE {template.name} AS {template.prepared_sql}")
+    except Exception as exc:
+        conn.rollback()
+        if getattr(exc, "pgcode", None) == _DUPLICATE_PREPARED:
+            names[template.name] = None
+            return True
+        _mark_unpreparable(template.key)
+        logger.debug("[sql_templates] PREPARE failed name=%s err=%s", template.name, exc)
+        return False
+    names[template.name] = None
+    while len(names) > PREPARED_PER_CONN_MAX:
+        stale, _ = names.popitem(last=False)
+        try:
+            cur.execute(f"DEALLOCATE {stale}")
+        except Exception:
+            conn.rollback()
+    return True
+
+
+def forget_connection(conn) -> None:
+    """커넥션 폐기/재연결 시 PREPARE 기록 제거"""
+    try:
+        with _PREPARED_LOCK:
+            _PREPARED_BY_CONN.pop(conn, None)
+    except TypeError:
+        pass
+
+
+def execute_template(
+    conn,
+    cur,
+    template: SqlTemplate,
+    params: Sequence[object],
+    *,
+    prepare: bool = True,
+) -> List[tuple]:
+    """템플릿 실행: 가능하면 prepared statement, 아니면 이스케이프된 SQL로 실행"""
+    use_prepared = (
+        prepare
+        and PREPARED_ENABLED
+        and not _is_unpreparable(template.key)
+        and len(params) == template.param_count
+        and _ensure_prepared(conn, cur, template)
+    )
+    if use_prepared:
+        try:
+            cur.execute(template.execute_sql, list(params))
+            return cur.fetchall()
+        except Exception as exc:
+            # 타입 추론 불일치 등: 이 shape는 이후 일반 실행
+            conn.rollback()
+            _mark_unpreparable(template.key)
+            logger.debug("[sql_templates] EXECUTE failed name=%s err=%s", template.name, exc)
+    cur.execute(template.sql, list(params))
+    return cur.fetchall()
+
+
+def template_stats() -> dict:
+    with _TEMPLATES_LOCK:
+        template_count = len(_TEMPLATES)
+    with _UNPREPARABLE_LOCK:
+        unpreparable_count = len(_UNPREPARABLE)
+    return {
+        "templates": template_count,
+        "unpreparable": unpreparable_count,
+        "prepared_enabled": PREPARED_ENABLED,
+    }
@@ -1,4 +1,6 @@
 import json
+import time
+import asyncio
 import redis.asyncio as redis
 from app.core.config import DIALOGUE_REDIS_URL
 import re
@@ -38,19 +40,7 @@ async def get_dialogue(session_id: str, check_processing: bool = True):
 
     try:
         data = json.loads(raw_data)
-
-        # 화자 매핑 딕셔너리 생성
-        speaker_map = {
-            "agent": "상담원",
-            "customer": "고객"
-        }
-
-        # 매핑 정보를 사용하여 텍스트 변환
-        formatted_text = "\n".join([
-            f"{speaker_map.get(i['speaker'], i['speaker'])}: {i['message']}"
-            for i in data
-        ])
-
+        formatted_text = format_dialogue(data)
         print(f"[get_dialogue] Redis key '{key}' 데이터 조회 성공: {len(data)}개 발화")
         return formatted_text, data
 
@@ -59,6 +49,79 @@ async def get_dialogue(session_id: str, check_processing: bool = True):
         return "", None  # ⭐ 항상 tuple 반환
 
 
+def format_dialogue(data):
+    """발화 리스트 → "상담원: ..." / "고객: ..." 줄 단위 텍스트"""
+    # 화자 매핑 딕셔너리 생성
+    speaker_map = {
+        "agent": "상담원",
+        "customer": "고객"
+    }
+
+    # 매핑 정보를 사용하여 텍스트 변환
+    return "\n".join([
+        f"{speaker_map.get(i['speaker'], i['speaker'])}: {i['message']}"
+        for i in data
+    ])
+
+
+async def get_settled_dialogue(session_id: str):
+    """
+    통화 중 점진 저장된 확정 발화(stt:{session_id}:items) 조회
+    최종 저장(stt:{session_id}) 전이라 마지막 몇 발화는 빠져 있을 수 있음
+
+    Returns:
+        tuple: (formatted_text, json_data) - 데이터 없으면 ("", None)
+    """
+    try:
+        raw_items = await redis_client.lrange(f"stt:{session_id}:items", 0, -1)
+        data = [json.loads(raw) for raw in raw_items]
+    except Exception as e:
+        print(f"[get_dialogue] 점진 저장 발화 조회 실패: {e}")
+        return "", None
+    if not data:
+        return "", None
+    return format_dialogue(data), data
+
+
+async def wait_for_dialogue(session_id: str, timeout: float = 30.0):
+    """
+    대화 데이터가 준비될 때까지 대기 후 조회 (폴링 대신 완료 리스트 BLPOP)
+
+    DiarizationManager가 저장을 마치면 stt:{session_id}:ready 에 push 한다.
+    timeout까지 최종 결과가 없으면 통화 중 점진 저장된 확정 발화(stt:{session_id}:items)로 대체
+
+    Returns:
+        tuple: (formatted_text, json_data) - 둘 다 없으면 ("", None)
+    """
+    script, data = await get_dialogue(session_id)
+    if script:
+        return script, data
+
+    ready_key = f"stt:{session_id}:ready"
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            script, data = await get_settled_dialogue(session_id)
+            if script:
+                print(f"[get_dialogue] '{session_id}' 최종 결과 대기 시간 초과: 점진 저장 발화 {len(data)}개 사용")
+            return script, data
+        try:
+            popped = await redis_client.blpop(ready_key, timeout=max(0.1, remaining))
+        except Exception as e:
+            # BLPOP 실패 시 기존 방식(1초 폴링)으로 대기
+            print(f"[get_dialogue] 완료 알림 대기 실패, 폴링으로 전환: {e}")
+            await asyncio.sleep(min(1.0, remaining))
+            popped = None
+        if popped:
+            # 같은 세션을 기다리는 다른 요청도 깨울 수 있도록 알림 복구
+            await redis_client.rpush(ready_key, "1")
+            await redis_client.expire(ready_key, 120)
+        script, data = await get_dialogue(session_id)
+        if script or popped:
+            return script, data
+
+
 def refine_script(script):
     noise_patterns = [
         "안녕하세요", "예", "네", "알겠습니다", "수고하십니다", "감사합니다"
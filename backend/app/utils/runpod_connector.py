@@ -1,8 +1,9 @@
 import os
-import requests
 from typing import Dict, Optional
 from dotenv import load_dotenv
 
+from app.llm.gateway import chat_completion, register_provider, run_sync
+
 load_dotenv()
 
 # RunPod API 설정
@@ -11,7 +12,7 @@ RUNPOD_PORT = os.getenv("RUNPOD_PORT")
 RUNPOD_API_KEY = os.getenv("RUNPOD_API_KEY")
 
 RUNPOD_API_URL = f"http://{RUNPOD_IP}:{RUNPOD_PORT}/v1/chat/completions"
-_session = requests.Session()
+register_provider("runpod", f"http://{RUNPOD_IP}:{RUNPOD_PORT}/v1", RUNPOD_API_KEY)
 
 
 def call_runpod(
@@ -20,54 +21,40 @@ def call_runpod(
     timeout: int = 30
 ) -> Optional[str]:
     """
-    Runpod API에 요청을 보냅니다.
+    Runpod API에 요청을 보냅니다. (동기 래퍼, 공용 LLM 게이트웨이 경유)
     
     Args:
         payload: 요청 본문 데이터 (model, messages, params 등)
-        headers: 추가 헤더 (기본적으로 Authorization 헤더는 자동 추가됨)
+        headers: 추가 헤더 (Authorization 헤더는 게이트웨이 클라이언트가 추가)
         timeout: 요청 타임아웃 (기본값 30초)
     
     Returns:
         응답 텍스트 (content) 또는 None
     """
+    return run_sync(call_runpod_async(payload, headers, timeout))
+
+
+async def call_runpod_async(
+    payload: Dict,
+    headers: Optional[Dict] = None,
+    timeout: int = 30
+) -> Optional[str]:
+    """call_runpod의 비동기 버전"""
+    params = dict(payload)
+    params.pop("stream", None)
+    model = params.pop("model", "")
+    if headers:
+        params["extra_headers"] = headers
     try:
-        # 기본 헤더 설정
-        default_headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {RUNPOD_API_KEY}"
-        }
-        
-        # 사용자 정의 헤더가 있다면 병합 (사용자 정의가 우선)
-        if headers:
-            default_headers.update(headers)
-            
-        response = _session.post(
-            RUNPOD_API_URL, 
-            json=payload, 
-            headers=default_headers, 
-            timeout=timeout
-        )
-        
-        if response.status_code != 200:
-            print(f"[RunPod] API 오류 ({response.status_code}): {response.text}")
-            return None
-        
-        result = response.json()
-        
-        try:
-            output = result['choices'][0]['message']['content'].strip()
-            return output
-        except (KeyError, IndexError):
-            print(f"[RunPod] 응답 구조가 예상과 다릅니다: {result}")
-            return None
-            
-    except requests.exceptions.RequestException as e:
-        print(f"[RunPod] 네트워크 오류: {e}")
-        return None
+        response = await chat_completion("runpod", model=model, timeout=timeout, **params)
     except Exception as e:
-        print(f"[RunPod] 처리 중 문제 발생: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"[RunPod] 요청 실패: {e}")
+        return None
+
+    try:
+        return (response.choices[0].message.content or "").strip()
+    except (AttributeError, IndexError):
+        print(f"[RunPod] 응답 구조가 예상과 다릅니다: {response}")
         return None
 
 
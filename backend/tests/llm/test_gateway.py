@@ -0,0 +1,145 @@
+"""
+LLM 게이트웨이 재시도/서킷 브레이커/모델 동시성 확인 (네트워크 호출 없음)
+
+실행: python -m pytest tests/llm/test_gateway.py -q
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.llm import gateway
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_retry_then_success(monkeypatch):
+    monkeypatch.setattr(gateway, "LLM_RETRY_BASE_SEC", 0.0)
+    calls = []
+
+    async def call(attempt_timeout):
+        calls.append(attempt_timeout)
+        if len(calls) < 3:
+            raise asyncio.TimeoutError()
+        return "ok"
+
+    result = _run(gateway._with_retries("test_retry", "m", call, None, 1.0, retries=2))
+    assert result == "ok"
+    assert len(calls) == 3
+    assert gateway._get_breaker("test_retry").state == "closed"
+
+
+def test_breaker_opens_and_recovers(monkeypatch):
+    monkeypatch.setattr(gateway, "LLM_RETRY_BASE_SEC", 0.0)
+    monkeypatch.setattr(gateway, "LLM_TIMEOUT_SEC", 1.0)
+    breaker = gateway._breakers["test_cb"] = gateway._CircuitBreaker(failures=2, cooldown_sec=0.05)
+
+    async def fail(attempt_timeout):
+        raise asyncio.TimeoutError()
+
+    async def ok(attempt_timeout):
+        return "ok"
+
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            _run(gateway._with_retries("test_cb", "m", fail, None, 1.0, retries=0))
+    assert breaker.state == "open"
+    with pytest.raises(gateway.CircuitOpenError):
+        _run(gateway._with_retries("test_cb", "m", ok, None, 1.0, retries=0))
+
+    time.sleep(0.06)
+    assert _run(gateway._with_retries("test_cb", "m", ok, None, 1.0, retries=0)) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_deadline_capped_timeouts_do_not_open_breaker(monkeypatch):
+    """호출자 deadline으로 줄어든 시도의 타임아웃은 프로바이더 장애로 세지 않음"""
+    monkeypatch.setattr(gateway, "LLM_RETRY_BASE_SEC", 0.0)
+    breaker = gateway._breakers["test_cb_deadline"] = gateway._CircuitBreaker(failures=2, cooldown_sec=10)
+
+    async def fail(attempt_timeout):
+        raise asyncio.TimeoutError()
+
+    for _ in range(3):
+        with pytest.raises(asyncio.TimeoutError):
+            deadline = time.monotonic() + 0.5
+            _run(gateway._with_retries("test_cb_deadline", "m", fail, deadline, None, retries=0))
+    assert breaker.state == "closed"
+
+
+def test_model_concurrency_and_deadline(monkeypatch):
+    monkeypatch.setitem(gateway._MODEL_LIMITS, "slow-model", 2)
+    active = []
+    peak = []
+
+    async def call(attempt_timeout):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.05)
+        active.pop()
+        return attempt_timeout
+
+    async def main():
+        deadline = time.monotonic() + 0.08
+        jobs = [
+            gateway._with_retries("test_sem", "slow-model", call, deadline, 5.0, retries=0)
+            for _ in range(4)
+        ]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    results = _run(main())
+    assert max(peak) == 2
+    # 앞의 2개는 남은 시간(<=0.08s)으로 타임아웃이 줄고, 뒤의 2개는 세마포어 대기 중 deadline 초과
+    assert all(r <= 0.08 for r in results[:2] if isinstance(r, float))
+    assert sum(isinstance(r, asyncio.TimeoutError) for r in results) >= 1
+
+
+def test_stream_releases_grant_with_final_usage(monkeypatch):
+    released = []
+    original_release = gateway.Grant.release
+
+    def spy_release(self, used_tokens=None, **kwargs):
+        released.append(used_tokens)
+        original_release(self, used_tokens=used_tokens, **kwargs)
+
+    class _Usage:
+        total_tokens = 321
+        prompt_tokens = 300
+        completion_tokens = 21
+        prompt_tokens_details = None
+
+    class _Chunk:
+        def __init__(self, usage=None):
+            self.choices = []
+            self.usage = usage
+
+    class _Stream:
+        def __init__(self, chunks):
+            self._chunks = iter(chunks)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self._chunks)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    class _Completions:
+        async def create(self, **kwargs):
+            return _Stream([_Chunk(), _Chunk(_Usage())])
+
+    class _Client:
+        chat = type("_Chat", (), {"completions": _Completions()})()
+
+    monkeypatch.setattr(gateway.Grant, "release", spy_release)
+    monkeypatch.setattr(gateway, "_get_client", lambda provider: _Client())
+
+    async def main():
+        return [c async for c in gateway.chat_completion_stream("test_stream", model="m", messages=[])]
+
+    assert len(_run(main())) == 2
+    assert released == [321]
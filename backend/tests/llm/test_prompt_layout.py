@@ -0,0 +1,36 @@
+"""
+프롬프트 배치 확인 (정적 prefix 유지 / 문서 결정적 순서 / cached_tokens 읽기)
+
+실행: python -m pytest tests/llm/test_prompt_layout.py -q
+"""
+from types import SimpleNamespace
+
+from app.llm.prompt_layout import cached_tokens, layout_messages, order_docs_for_prompt
+
+
+def test_static_prefix_identical_across_requests():
+    a = layout_messages("SYS", examples=[("q", "a")], context="Documents:\nD1", request="User query:\n분실")
+    b = layout_messages("SYS", examples=[("q", "a")], context="Documents:\nD1", request="User query:\n연회비")
+    assert a[:-1] == b[:-1]
+    assert a[-1]["content"].startswith("Documents:\nD1")
+    assert a[-1]["content"].endswith("분실")
+
+
+def test_docs_ordered_pinned_first_then_by_id():
+    docs = [
+        {"id": "B"},
+        {"id": "C", "_pinned": True, "_pin_rank": 1},
+        {"metadata": {"id": "A"}},
+        {"title": "no id"},
+        {"id": "D", "_pinned": True, "_pin_rank": 0},
+    ]
+    ordered = order_docs_for_prompt(docs)
+    assert [d.get("id") or (d.get("metadata") or {}).get("id") or "-" for d in ordered] == ["D", "C", "A", "B", "-"]
+    assert order_docs_for_prompt(list(reversed(docs[:3]))) == order_docs_for_prompt(docs[:3])
+
+
+def test_cached_tokens_from_usage():
+    usage = SimpleNamespace(prompt_tokens=2048, prompt_tokens_details=SimpleNamespace(cached_tokens=1920))
+    assert cached_tokens(usage) == 1920
+    assert cached_tokens(SimpleNamespace(prompt_tokens=10, prompt_tokens_details=None)) == 0
+    assert cached_tokens({"prompt_tokens_details": {"cached_tokens": 128}}) == 128
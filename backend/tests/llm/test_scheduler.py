@@ -0,0 +1,186 @@
+"""
+우선순위 LLM 스케줄러 확인 (live 선점 / 가중치 공정 배분 / 429 적응 / 대기열 선점)
+
+실행: python -m pytest tests/llm/test_scheduler.py -q
+"""
+import asyncio
+import random
+
+import pytest
+
+from app.llm.scheduler import LLMPreempted, LLMScheduler
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _scheduler(**kwargs):
+    kwargs.setdefault("rate_limits", (0, 0))
+    kwargs.setdefault("live_reserve", 0)
+    return LLMScheduler("test", **kwargs)
+
+
+def test_live_dispatched_before_queued_low_priority():
+    async def main():
+        sched = _scheduler(concurrency=1)
+        holder = await sched.acquire("m", 10, "batch")
+        order = []
+
+        async def job(priority):
+            grant = await sched.acquire("m", 10, priority)
+            order.append(priority)
+            grant.release()
+
+        tasks = [asyncio.create_task(job(p)) for p in ("batch", "followup", "edu", "live")]
+        await asyncio.sleep(0)
+        holder.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert _run(main())[0] == "live"
+
+
+def test_weighted_fair_share_between_classes():
+    async def main():
+        sched = _scheduler(concurrency=1, weights={"live": 1, "edu": 4, "followup": 2, "batch": 1})
+        holder = await sched.acquire("m", 10, "batch")
+        order = []
+
+        async def job(priority):
+            grant = await sched.acquire("m", 10, priority)
+            order.append(priority)
+            await asyncio.sleep(0)
+            grant.release()
+
+        tasks = [asyncio.create_task(job(p)) for p in ["edu"] * 40 + ["batch"] * 40]
+        await asyncio.sleep(0)
+        holder.release()
+        await asyncio.gather(*tasks)
+        return order[:25]
+
+    first = _run(main())
+    # 둘 다 밀려 있는 동안은 약 4:1
+    assert 18 <= first.count("edu") <= 22
+    assert first.count("batch") >= 3
+
+
+def test_live_reserve_keeps_slot_free():
+    async def main():
+        sched = _scheduler(concurrency=3, live_reserve=1)
+        grants = [await sched.acquire("m", 10, "followup") for _ in range(2)]
+        blocked = asyncio.create_task(sched.acquire("m", 10, "followup"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        live = await asyncio.wait_for(sched.acquire("m", 10, "live"), 0.1)
+        live.release()
+        grants[0].release()
+        (await blocked).release()
+        grants[1].release()
+
+    _run(main())
+
+
+def test_model_limit_does_not_block_other_models():
+    async def main():
+        sched = _scheduler(concurrency=4, model_limits={"slow": 1})
+        slow = await sched.acquire("slow", 10, "followup")
+        waiting = asyncio.create_task(sched.acquire("slow", 10, "followup"))
+        other = await asyncio.wait_for(sched.acquire("fast", 10, "followup"), 0.1)
+        assert not waiting.done()
+        slow.release()
+        (await waiting).release()
+        other.release()
+
+    _run(main())
+
+
+def test_rate_limit_adapts_on_429():
+    async def main():
+        sched = _scheduler(concurrency=4, rate_limits=(600, 0))
+        grant = await sched.acquire("m", 10, "live")
+        grant.release(rate_limited=True, retry_after=0.05)
+        assert sched.rate_factor < 1.0
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        (await sched.acquire("m", 10, "live")).release(used_tokens=10)
+        return loop.time() - start
+
+    assert _run(main()) >= 0.04
+
+
+def test_unlimited_scheduler_learns_limits_from_429():
+    async def main():
+        sched = _scheduler(concurrency=4)
+        grant = await sched.acquire("m", 10, "live")
+        grant.release(rate_limited=True, retry_after=0.01, limits=(6000, 0))
+        assert sched.snapshot()["rate_limits"] == (6000, 0)
+        # 학습 직후 버킷은 비어 있어 바로 나가지 않음
+        assert sched._rate_wait(10) > 0
+        (await sched.acquire("m", 10, "live")).release(used_tokens=10)
+
+    _run(main())
+
+
+def test_short_live_wait_rearms_long_batch_timer():
+    """큰 batch 요청이 긴 토큰 대기 타이머를 걸어도 짧게 기다리면 되는 live는 먼저 나감"""
+
+    async def main():
+        sched = _scheduler(concurrency=4, rate_limits=(0, 1000))
+        (await sched.acquire("m", 1000, "live")).release()
+        batch = asyncio.create_task(sched.acquire("m", 1000, "batch"))
+        await asyncio.sleep(0)
+        live = await asyncio.wait_for(sched.acquire("m", 5, "live"), 1.0)
+        live.release()
+        assert not batch.done()
+        batch.cancel()
+
+    _run(main())
+
+
+def test_queue_overflow_preempts_lowest_priority():
+    async def main():
+        sched = _scheduler(concurrency=1, queue_max=2)
+        holder = await sched.acquire("m", 10, "batch")
+        batch = [asyncio.create_task(sched.acquire("m", 10, "batch")) for _ in range(2)]
+        await asyncio.sleep(0)
+        live = asyncio.create_task(sched.acquire("m", 10, "live"))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMPreempted):
+            await batch[0]
+        holder.release()
+        (await live).release()
+        (await batch[1]).release()
+        assert sched.stats["batch"]["preempted"] == 1
+
+    _run(main())
+
+
+def test_live_wait_flat_under_followup_burst():
+    """followup 50건이 한꺼번에 몰려도 live 대기 시간은 슬롯 하나가 빌 때까지 정도"""
+
+    async def main():
+        rng = random.Random(0)
+        sched = _scheduler(concurrency=8, live_reserve=2)
+        loop = asyncio.get_running_loop()
+        live_waits = []
+
+        async def call(priority):
+            start = loop.time()
+            grant = await sched.acquire("m", 100, priority)
+            if priority == "live":
+                live_waits.append(loop.time() - start)
+            await asyncio.sleep(rng.uniform(0.02, 0.05))
+            grant.release(used_tokens=100)
+
+        followups = [asyncio.create_task(call("followup")) for _ in range(50)]
+        lives = []
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            lives.append(asyncio.create_task(call("live")))
+        await asyncio.gather(*followups, *lives)
+        return sorted(live_waits)
+
+    waits = _run(main())
+    p95 = waits[int(len(waits) * 0.95) - 1]
+    assert p95 < 0.01
@@ -0,0 +1,86 @@
+"""
+sLLM 발화 교정 확인 (세션 캐시 적중·누락 / chunk_size 단위 호출 / 호출 실패 시 사전 치환 결과·캐시 안 함)
+
+sLLM 클라이언트는 가짜로 대체 (네트워크 호출 없음)
+
+실행: python -m pytest tests/llm/test_sllm_refiner.py -q
+"""
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+from app.llm.delivery import sllm_refiner
+
+_LINE = re.compile(r"^\[(\d+)\] \((?:상담원|고객)\) (.*)$")
+
+
+class _FakeClient:
+    """[n] (화자) 텍스트 줄마다 "교정:" 접두어를 붙여 JSON으로 응답. fail=True면 예외"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        lines = [m.groups() for m in map(_LINE.match, kwargs["messages"][1]["content"].splitlines()) if m]
+        self.calls.append([text for _, text in lines])
+        if self.fail:
+            raise RuntimeError("sLLM 연결 실패")
+        content = json.dumps([{"id": int(i), "refined": f"교정:{text}"} for i, text in lines], ensure_ascii=False)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _utts(*messages):
+    return [{"speaker": "customer" if i % 2 else "agent", "message": m} for i, m in enumerate(messages)]
+
+
+def _refine(monkeypatch, client, utterances, cache=None, chunk_size=20):
+    monkeypatch.setattr(sllm_refiner, "client", client)
+    monkeypatch.setattr(sllm_refiner, "load_correction_map", lambda: {"카두": "카드"})
+    monkeypatch.setattr(sllm_refiner, "_REFINE_SEMAPHORE", None)
+    return asyncio.run(sllm_refiner.refine_diarized_batch(utterances, cache=cache, chunk_size=chunk_size))
+
+
+def test_cache_hit_skips_refined_utterances(monkeypatch):
+    client = _FakeClient()
+    cache = {}
+    first = _refine(monkeypatch, client, _utts("카두 분실", "네 잃어버렸어요"), cache=cache)
+    # 사전 치환 후 sLLM에 전달
+    assert [u["message"] for u in first] == ["교정:카드 분실", "교정:네 잃어버렸어요"]
+    assert len(cache) == 2
+
+    second = _refine(monkeypatch, client, _utts("카두 분실", "네 잃어버렸어요", "재발급 해주세요"), cache=cache)
+    assert client.calls[1] == ["재발급 해주세요"]  # 캐시 누락분만 호출
+    assert [u["message"] for u in second][:2] == [u["message"] for u in first]
+    assert second[2] == {"speaker": "agent", "message": "교정:재발급 해주세요"}
+
+
+def test_chunks_split_by_chunk_size(monkeypatch):
+    client = _FakeClient()
+    messages = [f"발화 {i}" for i in range(5)]
+    result = _refine(monkeypatch, client, _utts(*messages), chunk_size=2)
+    assert client.calls == [["발화 0", "발화 1"], ["발화 2", "발화 3"], ["발화 4"]]
+    assert [u["message"] for u in result] == [f"교정:{m}" for m in messages]
+
+
+def test_duplicate_utterances_refined_once(monkeypatch):
+    client = _FakeClient()
+    result = _refine(monkeypatch, client, [{"speaker": "agent", "message": "네"}] * 3)
+    assert client.calls == [["네"]]
+    assert [u["message"] for u in result] == ["교정:네"] * 3
+
+
+def test_failed_call_returns_dictionary_fix_uncached(monkeypatch):
+    cache = {}
+    result = _refine(monkeypatch, _FakeClient(fail=True), _utts("카두 분실"), cache=cache)
+    assert result == [{"speaker": "agent", "message": "카드 분실"}]
+    assert cache == {}
+
+    # 다음 호출에서 재시도되어 교정 결과가 캐시됨
+    client = _FakeClient()
+    retried = _refine(monkeypatch, client, _utts("카두 분실"), cache=cache)
+    assert client.calls == [["카드 분실"]]
+    assert retried[0]["message"] == "교정:카드 분실"
+    assert len(cache) == 1
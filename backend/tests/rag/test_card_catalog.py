@@ -0,0 +1,140 @@
+"""
+card_products 인메모리 카탈로그 확인 (text_search SQL과 같은 매칭 결과)
+
+- match_card_ids: 1차 LOWER(REPLACE(..,' ','')) = ANY / LIKE 'v%' ANY, 없으면 2차 ILIKE '%v%' ANY
+- search_terms: content/title/category ILIKE + id_prefix + exclude_like_any (NOT ILIKE ANY)
+SQL 조건은 아래 _like(대소문자 구분 LIKE / ILIKE)로 그대로 옮겨 비교 (DB 연결 없음)
+
+실행: python -m pytest tests/rag/test_card_catalog.py -q
+"""
+import re
+
+from app.rag.retriever.card_catalog import CardCatalog
+
+# (id, name, card_type, brand, main_benefits, performance_condition, metadata, structured, keywords)
+ROWS = [
+    ("CARD-001", "신한 딥 드림", "credit", "Shinhan", "모든 가맹점 0.7% 적립", "전월 실적 없음",
+     {"card_name": "신한카드 Deep Dream", "title": "딥드림 카드"}, None, ["딥드림"]),
+    ("CARD-002", "KB Pay 카드", "check", "KB", "간편결제 10% 할인", "전월 30만원", {}, None, []),
+    ("CARD-003", "K-패스 체크", "check", "Hana", "대중교통 20% 환급", None, {"card_name": None}, None, None),
+    ("CARD-004", "", "credit", "Lotte", "연회비 면제", "", None, None, []),
+    ("CARD-005", "로카 365", "credit", "Lotte", "생활 영역 할인 100%", "전월 50만원",
+     {"title": "LOCA 365"}, None, ["로카365"]),
+]
+
+
+def _like(value, pattern, ci=False):
+    """SQL LIKE/ILIKE (NULL은 매칭 안 됨)"""
+    if value is None:
+        return False
+    regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.fullmatch(regex, value, re.DOTALL | (re.IGNORECASE if ci else 0)) is not None
+
+
+def _sql_match_card_ids(card_values, limit=20):
+    """text_search 카드명 후보 SQL (1차 → 없으면 2차)"""
+    values = [str(v) for v in card_values if v is not None]
+    eq_any = [v.replace(" ", "").lower() for v in values]
+    prefix_any = [f"{v}%" for v in values]
+    first = []
+    for doc_id, name, *_rest, meta, _structured, _keywords in ROWS:
+        meta = meta or {}
+        card_name, title, name = meta.get("card_name"), meta.get("title"), name or ""
+        if (
+            (card_name is not None and card_name.replace(" ", "").lower() in eq_any)
+            or name.replace(" ", "").lower() in eq_any
+            or any(_like(card_name, p) or _like(name, p) or _like(title or "", p) for p in prefix_any)
+        ):
+            first.append(doc_id)
+    if first:
+        return first[:limit]
+    like_any = [f"%{v}%" for v in values]
+    no_space_any = [f"%{v.replace(' ', '')}%" for v in values]
+    second = []
+    for doc_id, name, *_rest, meta, _structured, _keywords in ROWS:
+        meta = meta or {}
+        card_name, title, name = meta.get("card_name"), meta.get("title"), name or ""
+        if (
+            any(_like(card_name.replace(" ", "") if card_name else None, p, ci=True) for p in no_space_any)
+            or any(_like(name.replace(" ", ""), p, ci=True) for p in no_space_any)
+            or any(_like(card_name, p, ci=True) or _like(name, p, ci=True) or _like(title or "", p, ci=True)
+                   for p in like_any)
+        ):
+            second.append(doc_id)
+    return second[:limit]
+
+
+def test_match_card_ids_matches_sql():
+    catalog = CardCatalog.from_rows(ROWS)
+    cases = [
+        ["신한딥드림"],            # 공백 제거 = ANY
+        ["kb pay카드"],            # LOWER + 공백 제거
+        ["신한카드 deepdream"],    # metadata card_name 정규화
+        ["KB"],                    # 1차 접두 LIKE (대소문자 구분)
+        ["kb"],                    # 1차 실패 → 2차 ILIKE
+        ["딥드림"],                # metadata title 접두
+        ["LOCA"],                  # title 접두만
+        ["365"],                   # 2차 부분 포함
+        ["딥 드림"],               # 2차: 공백 제거 포함
+        ["pay 카드", None],        # None 무시
+        ["K-패스", "로카"],        # 여러 값 OR
+        ["없는카드"],
+        [None],
+    ]
+    for values in cases:
+        assert catalog.match_card_ids(values) == _sql_match_card_ids(values), values
+
+
+def test_match_card_ids_expected_and_limit():
+    catalog = CardCatalog.from_rows(ROWS)
+    assert catalog.match_card_ids(["신한딥드림"]) == ["CARD-001"]
+    assert catalog.match_card_ids(["kb"]) == ["CARD-002"]
+    assert catalog.match_card_ids(["카드"], limit=1) == _sql_match_card_ids(["카드"], limit=1)
+
+
+def _sql_search_terms(terms, limit, id_prefix=None, exclude_like_any=None):
+    """card_products 일반 ILIKE 검색 SQL"""
+    out = []
+    for doc_id, name, card_type, brand, benefits, condition, *_ in ROWS:
+        name = name or ""
+        content = "\n\n".join([name, benefits or "", condition or ""])
+        fields = (content, name, card_type, card_type, brand)
+        if terms and not any(_like(f, f"%{t}%", ci=True) for t in terms for f in fields):
+            continue
+        if id_prefix and not _like(doc_id, f"{id_prefix}%"):
+            continue
+        if exclude_like_any and any(
+            _like(target, p, ci=True) for p in exclude_like_any for target in (content, name, doc_id)
+        ):
+            continue
+        out.append(doc_id)
+    return out[:limit]
+
+
+def test_search_terms_matches_sql():
+    catalog = CardCatalog.from_rows(ROWS)
+    cases = [
+        (["적립"], {}),
+        (["LOTTE"], {}),                                        # brand 대소문자 무시
+        (["CHECK"], {}),                                        # card_type
+        (["할인"], {"exclude_like_any": ["%kb%"]}),             # 제외 (대소문자 무시)
+        (["할인"], {"exclude_like_any": ["로카 36_"]}),         # _ 한 글자, 전체 일치
+        (["전월"], {"id_prefix": "CARD-00"}),
+        (["전월"], {"id_prefix": "CARD-003"}),
+        ([], {"exclude_like_any": ["card-00%"]}),
+        (["100%"], {}),                                         # term 안의 %는 그대로 (본문 '100%')
+        (["없는말"], {}),
+    ]
+    for terms, kwargs in cases:
+        rows = catalog.search_terms(terms, 10, **kwargs)
+        assert [r[0] for r in rows] == _sql_search_terms(terms, 10, **kwargs), (terms, kwargs)
+
+
+def test_search_terms_source_meta_and_limit():
+    catalog = CardCatalog.from_rows(ROWS)
+    rows = catalog.search_terms(["전월"], 1)
+    assert len(rows) == 1
+    doc_id, content, meta, _, score = rows[0]
+    assert doc_id == "CARD-001" and content.startswith("신한 딥 드림\n\n")
+    assert meta["title"] == meta["card_name"] == "신한 딥 드림"
+    assert meta["category2"] == "Shinhan" and meta["source_table"] == "card_products"
@@ -0,0 +1,37 @@
+"""
+요청 단위 deadline 확인 (남은 시간 계산 / 만료 시 작업 취소)
+
+실행: python -m pytest tests/rag/test_deadline.py -q
+"""
+import asyncio
+
+from app.rag.pipeline.deadline import Deadline, remaining_ms
+
+
+def test_remaining_and_expiry():
+    deadline = Deadline.after_ms(50)
+    assert 0 < deadline.remaining_ms() <= 50
+    assert deadline.has(10) and not deadline.has(100)
+    assert remaining_ms(None) == float("inf")
+    assert Deadline.after_ms(-1).expired
+
+
+def test_wait_cancels_outstanding_work():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "late"
+
+    async def main():
+        deadline = Deadline.after_ms(30)
+        fast = await deadline.wait(asyncio.sleep(0, result="ok"), default="fallback")
+        late = await deadline.wait(slow(), default="fallback")
+        return fast, late
+
+    assert asyncio.run(main()) == ("ok", "fallback")
+    assert cancelled == [True]
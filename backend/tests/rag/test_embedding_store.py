@@ -0,0 +1,28 @@
+"""
+2단계(binary quant) 검색 실패 기록 확인 (실패한 테이블은 RAG_BQ_RETRY_SEC 동안 HNSW 경로만 사용)
+
+실행: python -m pytest tests/rag/test_embedding_store.py -q
+"""
+from app.rag.retriever import embedding_store
+
+
+def test_failed_table_skips_binary_quant_until_retry(monkeypatch):
+    monkeypatch.setattr(embedding_store, "BQ_TABLES", {"consultation_documents": 20})
+    monkeypatch.setattr(embedding_store, "_BQ_FAILED_AT", {})
+    monkeypatch.setattr(embedding_store, "BQ_RETRY_SEC", 600.0)
+    assert embedding_store.binary_quant_enabled("consultation_documents")
+
+    embedding_store.mark_binary_quant_failed("consultation_documents", RuntimeError("function binary_quantize does not exist"))
+    assert not embedding_store.binary_quant_enabled("consultation_documents")
+
+    # 재시도 시간이 지나면 다시 2단계 검색 시도 (인덱스를 나중에 만든 경우)
+    monkeypatch.setattr(embedding_store, "BQ_RETRY_SEC", 0.0)
+    assert embedding_store.binary_quant_enabled("consultation_documents")
+
+
+def test_unconfigured_table_is_not_recorded(monkeypatch):
+    monkeypatch.setattr(embedding_store, "BQ_TABLES", {})
+    monkeypatch.setattr(embedding_store, "_BQ_FAILED_AT", {})
+    embedding_store.mark_binary_quant_failed("notices", RuntimeError("x"))
+    assert embedding_store._BQ_FAILED_AT == {}
+    assert not embedding_store.binary_quant_enabled("notices")
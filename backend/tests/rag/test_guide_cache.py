@@ -0,0 +1,86 @@
+"""
+가이드 스크립트 캐시 확인 (키 구성·프롬프트 버전 / 메모리 캐시 저장·조회 / TTL 만료 / 스트림 정상 종료 시에만 저장)
+
+실행: python -m pytest tests/rag/test_guide_cache.py -q
+"""
+import asyncio
+
+from app.rag.cache import guide_cache
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_key_ignores_doc_order_and_requires_ids():
+    a = guide_cache.build_guide_cache_key("m", "loss", "카드 분실", ["d2", "d1"], "v1")
+    b = guide_cache.build_guide_cache_key("m", "loss", "카드 분실", ["d1", "d2"], "v1")
+    assert a == b
+    assert guide_cache.build_guide_cache_key("m", "loan", "카드 분실", ["d1", "d2"], "v1") != a
+    assert guide_cache.build_guide_cache_key("m", "loss", "카드 분실", ["d1", ""], "v1") is None
+    assert guide_cache.build_guide_cache_key("m", "loss", "", ["d1"], "v1") is None
+    assert guide_cache.build_guide_cache_key("m", "loss", "카드 분실", ["d1", "d2"], "v2") != a
+
+
+def test_set_get_and_expire(monkeypatch):
+    monkeypatch.setattr(guide_cache, "REDIS_ENABLED", False)
+    monkeypatch.setattr(guide_cache, "_GUIDE_CACHE", {})
+    key = guide_cache.build_guide_cache_key("m", "loss", "카드 분실", ["d1"], "v1")
+
+    _run(guide_cache.guide_cache_set(key, "분실 신고를 도와드리겠습니다."))
+    assert _run(guide_cache.guide_cache_get(key)) == ("분실 신고를 도와드리겠습니다.", "mem")
+
+    monkeypatch.setattr(guide_cache, "GUIDE_CACHE_TTL_SEC", -1)
+    assert _run(guide_cache.guide_cache_get(key)) is None
+
+
+_DOCS = [
+    {"id": "g1", "title": "분실 신고", "content": "카드를 분실하면 앱에서 즉시 분실 신고를 할 수 있습니다."},
+]
+_GUIDE = "카드를 잃어버리셔서 걱정되시겠어요. 앱에서 즉시 분실 신고를 할 수 있습니다. 재발급도 함께 신청하시겠어요?"
+
+
+def _stream_guide(monkeypatch, fake_stream):
+    """가짜 LLM 스트림으로 stream_guide_response 실행 → (반환 문장들, 메모리 캐시)"""
+    import app.rag  # noqa: F401  (app.rag → app.guide 순서로 import)
+    from app.guide import guide_client, guide_pipeline
+
+    monkeypatch.setattr(guide_cache, "REDIS_ENABLED", False)
+    monkeypatch.setattr(guide_cache, "_GUIDE_CACHE", {})
+    monkeypatch.setattr(guide_client, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(guide_client, "chat_completion_stream", fake_stream)
+
+    async def collect():
+        return [s async for s in guide_pipeline.stream_guide_response(query="카드 분실", docs=_DOCS, consult_docs=[])]
+
+    return _run(collect()), guide_cache._GUIDE_CACHE
+
+
+def _chunk(text, finish_reason=None):
+    from types import SimpleNamespace
+
+    choice = SimpleNamespace(delta=SimpleNamespace(content=text), finish_reason=finish_reason)
+    return SimpleNamespace(choices=[choice], usage=None)
+
+
+def test_stream_cached_only_on_clean_stop(monkeypatch):
+    async def clean(**kwargs):
+        yield _chunk(_GUIDE)
+        yield _chunk("", finish_reason="stop")
+
+    sentences, cache = _stream_guide(monkeypatch, clean)
+    assert sentences and len(cache) == 1
+
+
+def test_stream_error_or_truncation_not_cached(monkeypatch):
+    async def dropped(**kwargs):
+        yield _chunk("카드를 잃어버리셔서 걱정되시겠어요. 앱에서 즉시")
+        raise RuntimeError("stream dropped")
+
+    async def truncated(**kwargs):
+        yield _chunk("카드를 잃어버리셔서 걱정되시겠어요. 앱에서 즉시")
+        yield _chunk("", finish_reason="length")
+
+    for fake in (dropped, truncated):
+        sentences, cache = _stream_guide(monkeypatch, fake)
+        assert sentences and cache == {}
@@ -0,0 +1,152 @@
+"""
+점진 RAG 응답 확인 (규칙 카드 → rag_update → rag_guide 순서 / 규칙 카드와 같은 LLM 카드 생략 /
+새 발화·deadline 시 남은 LLM 단계 취소)
+
+검색·카드·가이드 단계는 가짜로 대체 (네트워크·LLM 호출 없음)
+
+실행: python -m pytest tests/rag/test_rag_progressive.py -q
+"""
+import asyncio
+from types import SimpleNamespace
+
+import app.rag  # noqa: F401  (app.rag 패키지 초기화 순서)
+from app.rag.pipeline import pipeline
+from app.rag.pipeline.config import RAGConfig
+from app.rag.pipeline.deadline import Deadline
+
+DOCS = [{"id": "A-1", "title": "분실 신고", "content": "카드 분실 시 즉시 분실 신고를 해주세요."}]
+RULE_CARD = {"id": "A-1", "title": "분실 신고"}
+LLM_CARD = {"id": "A-1", "title": "분실 신고 안내"}
+
+
+def _cards(card):
+    return {"currentSituation": [card], "nextStep": [], "routing": {"route": "card_loss"}, "meta": {}}
+
+
+def _patch(monkeypatch, card_stream, guide_stream):
+    async def run_search(query, **kwargs):
+        return SimpleNamespace(
+            should_search=True, docs=DOCS, consult_docs=[], routing={"route": "card_loss"},
+            t_start=0.0, t_route=0.0, t_retrieve=0.0, retrieve_cache_status="miss",
+        )
+
+    async def build_card_response(rule_only=False, **kwargs):
+        assert rule_only
+        return _cards(RULE_CARD)
+
+    async def stream_guide_response(usage=None, **kwargs):
+        async for sentence in guide_stream():
+            yield sentence
+
+    async def stream_card_responses(**kwargs):
+        async for result in card_stream():
+            yield result
+
+    monkeypatch.setattr(pipeline, "has_vocab_match", lambda query: True)
+    monkeypatch.setattr(pipeline, "run_search", run_search)
+    monkeypatch.setattr(pipeline, "record_doc_titles", lambda docs: None)
+    monkeypatch.setattr(pipeline, "build_card_response", build_card_response)
+    monkeypatch.setattr(pipeline, "stream_card_responses", stream_card_responses)
+    monkeypatch.setattr(pipeline, "stream_guide_response", stream_guide_response)
+    monkeypatch.setattr(pipeline, "get_guide_model_name", lambda: "guide-model")
+    monkeypatch.setattr(pipeline, "RAG_STREAM_LLM", True)
+
+
+def _run(cancel_after=None):
+    sent = []
+
+    async def emit(message):
+        sent.append(message)
+
+    async def main():
+        task = asyncio.create_task(pipeline.run_rag_progressive(
+            "카드 분실", emit, config=RAGConfig(), deadline=Deadline.after_ms(2000),
+        ))
+        if cancel_after is None:
+            return await task
+        await asyncio.sleep(cancel_after)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.05)  # 취소 후 추가 전송이 없는지 확인할 여유
+
+    return asyncio.run(main()), sent
+
+
+def _kinds(sent):
+    return [(m["type"], m.get("partial")) for m in sent]
+
+
+def test_rule_then_card_update_then_guide(monkeypatch):
+    async def card_stream():
+        yield _cards(LLM_CARD)  # 규칙 카드 전송 전에 나와도 규칙 카드 뒤로 전송
+
+    async def guide_stream():
+        await asyncio.sleep(0.02)
+        yield "분실 신고 도와드리겠습니다."
+
+    _patch(monkeypatch, card_stream, guide_stream)
+    response_id, sent = _run()
+    assert _kinds(sent) == [
+        ("rag", None),
+        ("rag_update", True), ("rag_update", False),
+        ("rag_guide", True), ("rag_guide", False),
+    ]
+    assert all(m["responseId"] == response_id for m in sent)
+    assert sent[0]["data"]["currentSituation"] == [RULE_CARD]
+    assert sent[2]["data"]["currentSituation"] == [LLM_CARD]
+    assert sent[-1]["data"]["guidanceScript"] == "분실 신고 도와드리겠습니다."
+
+
+def test_update_identical_to_rule_cards_is_skipped(monkeypatch):
+    async def card_stream():
+        yield _cards(RULE_CARD)  # LLM 실패 폴백: 규칙 카드 그대로
+
+    async def guide_stream():
+        return
+        yield  # pragma: no cover
+
+    _patch(monkeypatch, card_stream, guide_stream)
+    _, sent = _run()
+    assert [m["type"] for m in sent] == ["rag", "rag_guide"]
+
+
+def _hanging(cancelled):
+    async def stream():
+        try:
+            await asyncio.sleep(10)
+            yield "늦은 결과"
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    return stream
+
+
+def test_supersede_cancels_pending_llm_stages(monkeypatch):
+    cancelled = []
+    _patch(monkeypatch, _hanging(cancelled), _hanging(cancelled))
+    _, sent = _run(cancel_after=0.05)
+    assert [m["type"] for m in sent] == ["rag"]
+    assert len(cancelled) == 2
+
+
+def test_deadline_cancels_pending_llm_stages(monkeypatch):
+    cancelled = []
+    _patch(monkeypatch, _hanging(cancelled), _hanging(cancelled))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        sent = []
+
+        async def emit(message):
+            sent.append(message)
+
+        await pipeline.run_rag_progressive("카드 분실", emit, config=RAGConfig(), deadline=Deadline.after_ms(100))
+        elapsed = loop.time() - start
+        await asyncio.sleep(0.01)  # 취소된 태스크 정리
+        return elapsed, sent, len(cancelled)
+
+    elapsed, sent, n_cancelled = asyncio.run(main())
+    assert elapsed < 1.0
+    assert [m["type"] for m in sent] == ["rag"]
+    assert n_cancelled == 2
@@ -0,0 +1,62 @@
+"""
+리랭커 서비스 확인 (stub 백엔드: 로드 전 폴백 / 요청 간 배치 / 점수 캐시 / 정렬)
+
+실행: python -m pytest tests/rag/test_rerank_service.py -q
+"""
+import asyncio
+
+import app.rag  # noqa: F401  (app.rag 패키지 초기화 순서)
+from app.rag.rerank import cross_encoder
+from app.rag.rerank.service import RerankService, StubRerankBackend, set_rerank_service
+
+DOCS = [
+    {"id": "d1", "title": "연회비 안내", "content": "연회비는 카드별로 다릅니다."},
+    {"id": "d2", "title": "분실 신고", "content": "카드 분실 시 즉시 분실 신고를 해주세요."},
+    {"id": "d3", "title": "포인트", "content": "포인트 적립 기준입니다."},
+]
+
+
+def _service(**kwargs) -> RerankService:
+    return RerankService(StubRerankBackend(), **kwargs)
+
+
+def test_not_ready_returns_docs_unchanged():
+    service = _service()
+    set_rerank_service(service)
+    try:
+        assert cross_encoder.rerank_with_cross_encoder("카드 분실", DOCS) is DOCS
+    finally:
+        set_rerank_service(None)
+
+
+def test_rerank_orders_by_score_and_caches():
+    service = _service(batch_wait_ms=0)
+    service.start(background=False)
+    set_rerank_service(service)
+    try:
+        result = cross_encoder.rerank_with_cross_encoder("카드 분실 신고", DOCS, top_k=2)
+        assert [d["id"] for d in result] == ["d2", "d1"]
+        assert "rerank_score" in result[0]
+
+        cross_encoder.rerank_with_cross_encoder("카드  분실 신고", DOCS, top_k=2)
+        assert service.backend.calls == [3]
+        assert service.snapshot()["cache_hits"] == 3
+    finally:
+        set_rerank_service(None)
+
+
+def test_concurrent_requests_share_a_batch():
+    service = _service(batch_wait_ms=50)
+    service.start(background=False)
+    items = [(d["id"], d["content"]) for d in DOCS]
+
+    async def _both():
+        return await asyncio.gather(
+            service.ascore("카드 분실", items[:2]),
+            service.ascore("포인트 적립", items),
+        )
+
+    first, second = asyncio.run(_both())
+    assert len(first) == 2 and len(second) == 3
+    assert service.backend.calls == [5]
+    assert service.snapshot()["batches"] == 1
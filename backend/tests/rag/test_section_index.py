@@ -0,0 +1,35 @@
+"""
+사전 계산 섹션 인덱스 확인 (clean_card_docs 결과가 기존 정규식 파싱과 동일한지)
+
+실행: python -m pytest tests/rag/test_section_index.py -q
+"""
+from app.rag.postprocess import sections
+
+_CONTENT = (
+    "테스트 카드\n\n"
+    "## 연회비\n국내 전용 1만원, 해외 겸용 1만 2천원\n\n"
+    "## 발급 대상\n만 19세 이상 개인\n\n"
+    "## 연회비\n국내 전용 1만원, 해외 겸용 1만 2천원\n\n"
+    "## 적립 혜택\n온라인 결제 시 1% 적립\n\n"
+    "온라인 결제 시 1% 적립"
+)
+_DOC = {"id": "CARD-1", "content": _CONTENT, "metadata": {"source_table": "card_products"}}
+
+
+def _legacy(content, query):
+    trimmed = sections._dedupe_blocks(content)
+    return sections._extract_matching_section(trimmed, query) or trimmed
+
+
+def test_clean_card_docs_matches_legacy_parsing():
+    for query in ["테스트카드 연회비 얼마", "발급 대상 알려줘", "적립 혜택이랑 연회비", "해외 결제", "대상"]:
+        cleaned = sections.clean_card_docs([_DOC], query)[0]
+        assert cleaned["content"] == _legacy(_CONTENT, query), query
+
+
+def test_index_built_once_per_content():
+    index = sections.build_section_index(_CONTENT)
+    assert sections.build_section_index(_CONTENT) is index
+    assert index.titles == ("연회비", "발급 대상", "적립 혜택")
+    assert index.match_sections(["대상"]) == [1]
+    assert index.section_text((0, 2)) is index.section_text((0, 2))
@@ -0,0 +1,135 @@
+"""
+세션별 RAG 스케줄러 확인 (debounce 병합 / 최대 대기 / 새 쿼리로 진행 중 요청 취소·텍스트 이어 붙임 /
+최신 세대 결과만 전달 / 세션 종료)
+
+run_rag는 가짜로 대체 (검색·LLM 호출 없음)
+
+실행: python -m pytest tests/rag/test_session_scheduler.py -q
+"""
+import asyncio
+
+from app.rag.pipeline.session_scheduler import SessionRagScheduler
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class _FakeRag:
+    """쿼리 기록 + delay 후 결과 반환. swallow_cancel=True면 취소를 무시하고 끝까지 실행"""
+
+    def __init__(self, delay=0.0, swallow_cancel=False):
+        self.delay = delay
+        self.swallow_cancel = swallow_cancel
+        self.queries = []
+        self.cancelled = []
+        self.delivered = []
+
+    async def run(self, query):
+        self.queries.append(query)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(query)
+            if not self.swallow_cancel:
+                raise
+            await asyncio.sleep(self.delay)
+        return f"결과:{query}"
+
+    async def on_result(self, query, result):
+        self.delivered.append((query, result))
+
+
+def _scheduler(rag, **kwargs):
+    kwargs.setdefault("debounce_ms", 30)
+    kwargs.setdefault("max_wait_ms", 1000)
+    return SessionRagScheduler(rag.run, rag.on_result, session_id="test", **kwargs)
+
+
+def test_debounce_merges_close_fragments():
+    rag = _FakeRag()
+
+    async def main():
+        sched = _scheduler(rag)
+        sched.submit("카드를")
+        await asyncio.sleep(0.01)
+        sched.submit("잃어버렸어요")
+        await asyncio.sleep(0.01)
+        assert rag.queries == []  # 아직 debounce 중
+        await asyncio.sleep(0.06)
+
+    _run(main())
+    assert rag.queries == ["카드를 잃어버렸어요"]
+    assert rag.delivered == [("카드를 잃어버렸어요", "결과:카드를 잃어버렸어요")]
+
+
+def test_max_wait_flushes_continuous_speech():
+    rag = _FakeRag()
+
+    async def main():
+        sched = _scheduler(rag, debounce_ms=40, max_wait_ms=80)
+        # 20ms마다 파편: debounce만으로는 끝날 때까지 실행되지 않음
+        for i in range(8):
+            sched.submit(f"파편{i}")
+            await asyncio.sleep(0.02)
+        first_runs = list(rag.queries)
+        await asyncio.sleep(0.1)
+        return first_runs
+
+    first_runs = _run(main())
+    assert first_runs and first_runs[0].startswith("파편0")
+    assert "파편7" not in first_runs[0]
+    assert rag.queries[-1].endswith("파편7")
+
+
+def test_new_query_supersedes_inflight_run():
+    rag = _FakeRag(delay=0.1)
+
+    async def main():
+        sched = _scheduler(rag)
+        sched.submit("카드 분실")
+        await asyncio.sleep(0.05)  # 첫 RAG 진행 중
+        sched.submit("재발급 문의")
+        await asyncio.sleep(0.2)
+        return sched.stats
+
+    stats = _run(main())
+    assert rag.cancelled == ["카드 분실"]
+    # 결과를 못 낸 이전 텍스트는 새 쿼리 앞에 이어 붙음
+    assert rag.queries == ["카드 분실", "카드 분실 재발급 문의"]
+    assert rag.delivered == [("카드 분실 재발급 문의", "결과:카드 분실 재발급 문의")]
+    assert stats["superseded"] == 1 and stats["delivered"] == 1
+
+
+def test_stale_generation_result_is_dropped():
+    # 취소를 무시하고 끝난 이전 세대 결과는 전달하지 않음
+    rag = _FakeRag(delay=0.05, swallow_cancel=True)
+
+    async def main():
+        sched = _scheduler(rag)
+        sched.submit("카드 분실")
+        await asyncio.sleep(0.04)
+        sched.submit("재발급 문의")
+        await asyncio.sleep(0.25)
+
+    _run(main())
+    assert len(rag.queries) == 2
+    assert [query for query, _ in rag.delivered] == ["카드 분실 재발급 문의"]
+
+
+def test_close_cancels_inflight_and_drops_pending():
+    rag = _FakeRag(delay=0.1)
+
+    async def main():
+        sched = _scheduler(rag)
+        sched.submit("카드 분실")
+        await asyncio.sleep(0.05)
+        sched.submit("재발급 문의")  # 아직 debounce 중
+        sched.close()
+        sched.submit("종료 후 파편")
+        await asyncio.sleep(0.2)
+
+    _run(main())
+    assert rag.queries == ["카드 분실"]
+    assert rag.cancelled == ["카드 분실"]
+    assert rag.delivered == []
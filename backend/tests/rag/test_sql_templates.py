@@ -0,0 +1,70 @@
+"""
+SQL 템플릿 prepared statement 폴백 확인 (PREPARE 실패 shape 기억 / 기록 크기 제한 / 스레드 동시 기록)
+
+실행: python -m pytest tests/rag/test_sql_templates.py -q
+"""
+import threading
+
+from app.rag.retriever import sql_templates
+
+
+class _FakeConn:
+    def rollback(self):
+        pass
+
+
+class _FakeCursor:
+    """PREPARE는 항상 실패, 일반 SQL은 실행 기록 후 빈 결과"""
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if sql.startswith("PREPARE"):
+            raise RuntimeError("could not determine data type of parameter $1")
+
+    def fetchall(self):
+        return []
+
+
+def _reset(monkeypatch, max_templates=128):
+    monkeypatch.setattr(sql_templates, "_UNPREPARABLE", sql_templates.OrderedDict())
+    monkeypatch.setattr(sql_templates, "TEMPLATE_CACHE_MAX", max_templates)
+    monkeypatch.setattr(sql_templates, "PREPARED_ENABLED", True)
+
+
+def test_failed_prepare_is_remembered(monkeypatch):
+    _reset(monkeypatch)
+    template = sql_templates.get_template("notices", "like", "SELECT id FROM notices WHERE title ILIKE %s")
+    conn, cur = _FakeConn(), _FakeCursor()
+    sql_templates.execute_template(conn, cur, template, ["%카드%"])
+    sql_templates.execute_template(conn, cur, template, ["%분실%"])
+    # 두 번째 실행은 PREPARE를 다시 시도하지 않고 바로 일반 실행
+    assert [sql.split()[0] for sql in cur.executed] == ["PREPARE", "SELECT", "SELECT"]
+    assert sql_templates.template_stats()["unpreparable"] == 1
+
+
+def test_unpreparable_record_is_bounded(monkeypatch):
+    _reset(monkeypatch, max_templates=4)
+    keys = [("notices", "like", f"SELECT {i}") for i in range(10)]
+    for key in keys:
+        sql_templates._mark_unpreparable(key)
+    assert list(sql_templates._UNPREPARABLE) == keys[-4:]
+    assert not sql_templates._is_unpreparable(keys[0])
+
+
+def test_concurrent_marks_stay_bounded(monkeypatch):
+    _reset(monkeypatch, max_templates=16)
+
+    def worker(n):
+        for i in range(200):
+            sql_templates._mark_unpreparable(("t", str(n), str(i)))
+            sql_templates._is_unpreparable(("t", str(n), str(i)))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(sql_templates._UNPREPARABLE) == 16
@@ -0,0 +1,52 @@
+"""
+카드 순서 확인 (프롬프트는 문서 ID 순, 결과 카드는 관련도 순 / LLM이 지어낸 id 무시)
+
+실행: python -m pytest tests/rag_llm/test_card_order.py -q
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import app.rag  # noqa: F401  (app.rag 패키지 초기화 순서)
+from app.llm.rag_llm import card_generator
+from app.rag.pipeline.card_pipeline import _fill_placeholder
+
+# 관련도 순: Z-9 → A-1 (프롬프트에는 A-1 → Z-9 순으로 들어감)
+DOCS = [
+    {"id": "Z-9", "title": "분실 신고", "content": "카드 분실 시 즉시 분실 신고를 해주세요."},
+    {"id": "A-1", "title": "재발급", "content": "재발급은 영업일 기준 5일이 걸립니다."},
+]
+# LLM은 [Doc n]만 보므로 id를 "1", "2"로 지어냄
+LLM_OUTPUT = json.dumps(
+    [{"id": "1", "title": "재발급 안내"}, {"id": "2", "title": "분실 신고 안내"}],
+    ensure_ascii=False,
+)
+
+
+def test_cards_restored_to_relevance_order(monkeypatch):
+    async def fake_completion(**kwargs):
+        message = SimpleNamespace(content=LLM_OUTPUT)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    monkeypatch.setattr(card_generator, "chat_completion", fake_completion)
+    cards, _ = asyncio.run(card_generator.generate_detail_cards_async("카드 분실", DOCS, model="m"))
+    assert [c["id"] for c in cards] == ["Z-9", "A-1"]
+    assert [c["title"] for c in cards] == ["분실 신고 안내", "재발급 안내"]
+
+
+def test_streamed_cards_fill_their_own_slots(monkeypatch):
+    async def fake_stream(**kwargs):
+        delta = SimpleNamespace(content=LLM_OUTPUT)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+    async def collect():
+        return [card async for card in card_generator.stream_detail_cards("카드 분실", DOCS, model="m")]
+
+    monkeypatch.setattr(card_generator, "chat_completion_stream", fake_stream)
+    placeholder, _ = card_generator.build_rule_cards("카드 분실", DOCS)
+    streamed = asyncio.run(collect())
+    filled = _fill_placeholder(streamed[:1], placeholder)
+    # 첫 카드(A-1)는 A-1 자리(두 번째)에, 첫 자리는 Z-9 규칙 카드 유지
+    assert [c["id"] for c in filled] == ["Z-9", "A-1"]
+    assert filled[1]["title"] == "재발급 안내"
+    assert filled[0]["title"] == "분실 신고"
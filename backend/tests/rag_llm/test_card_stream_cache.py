@@ -0,0 +1,87 @@
+"""
+스트리밍 카드 캐시 조건 확인 (깨끗하게 끝난 LLM 카드만 캐시 / 실패·중단·규칙 카드 폴백은 캐시하지 않음)
+
+실행: python -m pytest tests/rag_llm/test_card_stream_cache.py -q
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import app.rag  # noqa: F401  (app.rag 패키지 초기화 순서)
+from app.llm.rag_llm import card_generator
+from app.rag.pipeline import card_pipeline
+from app.rag.pipeline.config import RAGConfig
+
+DOCS = [
+    {"id": "A-1", "title": "분실 신고", "content": "카드 분실 시 즉시 분실 신고를 해주세요."},
+    {"id": "B-2", "title": "재발급", "content": "재발급은 영업일 기준 5일이 걸립니다."},
+]
+CARDS_JSON = json.dumps(
+    [{"id": "1", "title": "분실 신고 안내"}, {"id": "2", "title": "재발급 안내"}],
+    ensure_ascii=False,
+)
+
+
+def _chunk(text=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=text))] if text is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def _titles(response):
+    return [c.get("title") for c in response["currentSituation"] + response["nextStep"]]
+
+
+def _run_stream(monkeypatch, fake_stream):
+    stored = []
+
+    async def cache_get(key, doc_ids):
+        return None
+
+    async def cache_set(key, cards, output):
+        stored.append(cards)
+
+    monkeypatch.setattr(card_pipeline, "CARD_CACHE_ENABLED", True)
+    monkeypatch.setattr(card_pipeline, "card_cache_get", cache_get)
+    monkeypatch.setattr(card_pipeline, "card_cache_set", cache_set)
+    monkeypatch.setattr(card_generator, "chat_completion_stream", fake_stream)
+
+    async def collect():
+        return [
+            resp async for resp in card_pipeline.stream_card_responses(
+                query="카드 분실", routing={"route": "card_loss"}, docs=[dict(d) for d in DOCS], config=RAGConfig(),
+            )
+        ]
+
+    return asyncio.run(collect()), stored
+
+
+def test_clean_stream_is_cached_and_drains_usage(monkeypatch):
+    usage = SimpleNamespace(prompt_tokens=1200, prompt_tokens_details={"cached_tokens": 1024})
+
+    async def fake_stream(**kwargs):
+        yield _chunk(CARDS_JSON)
+        yield _chunk(usage=usage)
+
+    responses, stored = _run_stream(monkeypatch, fake_stream)
+    assert len(stored) == 1 and len(stored[0]) == 2
+    assert responses[-1]["meta"]["cached_tokens"] == 1024
+
+
+def test_failed_stream_keeps_rule_cards_uncached(monkeypatch):
+    async def fake_stream(**kwargs):
+        raise RuntimeError("provider error")
+        yield  # pragma: no cover
+
+    responses, stored = _run_stream(monkeypatch, fake_stream)
+    assert stored == []
+    assert _titles(responses[-1])[:2] == ["분실 신고", "재발급"]
+
+
+def test_stream_cut_after_all_cards_is_not_cached(monkeypatch):
+    async def fake_stream(**kwargs):
+        yield _chunk(CARDS_JSON[:-1])  # 두 카드는 닫혔지만 배열은 안 닫힘
+        raise RuntimeError("stream dropped")
+
+    responses, stored = _run_stream(monkeypatch, fake_stream)
+    assert stored == []
+    assert _titles(responses[-1])[0] == "분실 신고 안내"
@@ -0,0 +1,35 @@
+"""
+토큰 예산 컨텍스트 빌더 확인 (예산 준수 / 쿼리 관련 문장 우선 / 원문 순서 유지)
+
+실행: python -m pytest tests/rag_llm/test_context_builder.py -q
+"""
+import app.rag  # noqa: F401  (app.rag → app.guide 순서로 import)
+from app.guide.context_builder import build_doc_context, sentence_spans
+from app.llm.tokenizer import count_tokens
+
+_DOCS = [
+    {
+        "title": "카드 분실 신고",
+        "content": (
+            "연회비는 환불되지 않습니다. 카드를 분실하면 즉시 분실 신고를 해야 합니다. "
+            "해외 결제는 차단됩니다. 분실 신고 후 재발급을 신청할 수 있습니다."
+        ),
+    },
+    {"title": "재발급", "content": "재발급은 영업일 기준 5일이 걸립니다. 배송지는 변경 가능합니다."},
+]
+
+
+def test_sentence_spans_strip_whitespace():
+    content = "첫 문장입니다.  두 번째 문장!\n세 번째"
+    assert [content[s:e] for s, e in sentence_spans(content)] == ["첫 문장입니다.", "두 번째 문장!", "세 번째"]
+
+
+def test_budget_respected_and_relevant_first():
+    for budget in (60, 120, 400):
+        block, tokens = build_doc_context("카드 분실 신고 방법", _DOCS, 2, budget)
+        assert tokens == count_tokens(block)
+        assert tokens <= budget
+    block, _ = build_doc_context("카드 분실 신고 방법", _DOCS, 2, 400)
+    first = block.split("[Doc 2]")[0]
+    assert "연회비" not in first
+    assert first.index("즉시 분실 신고") < first.index("재발급을 신청")
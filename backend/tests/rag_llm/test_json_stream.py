@@ -0,0 +1,47 @@
+"""
+점진 JSON 배열 파서 확인 (카드 객체가 닫히는 시점에 바로 반환)
+
+실행: python -m pytest tests/rag_llm/test_json_stream.py -q
+"""
+import json
+
+from app.llm.rag_llm.json_stream import JsonArrayStreamParser
+
+CARDS = [
+    {"id": "1", "title": "분실 신고", "content": "앱에서 \"분실신고\" 메뉴 {즉시}", "requiredChecks": ["본인 확인"]},
+    {"id": "2", "title": "재발급", "content": "영업일 [3~5]일 소요\\n", "exceptions": []},
+]
+
+
+def _feed_in_pieces(text, size):
+    parser = JsonArrayStreamParser()
+    got = []
+    arrivals = []
+    for i in range(0, len(text), size):
+        items = parser.feed(text[i:i + size])
+        got.extend(items)
+        arrivals.extend([i + size] * len(items))
+    return parser, got, arrivals
+
+
+def test_top_level_array_char_by_char():
+    text = json.dumps(CARDS, ensure_ascii=False)
+    parser, got, arrivals = _feed_in_pieces(text, 1)
+    assert got == CARDS
+    assert parser.done
+    # 첫 카드는 전체 출력이 끝나기 전에 나와야 함
+    assert arrivals[0] < len(text) // 2 + 10
+
+
+def test_wrapped_object_with_code_fence():
+    text = "```json\n" + json.dumps({"cards": CARDS}, ensure_ascii=False, indent=2) + "\n```"
+    parser, got, _ = _feed_in_pieces(text, 7)
+    assert got == CARDS
+    assert parser.done
+
+
+def test_truncated_output_keeps_closed_items():
+    text = json.dumps(CARDS, ensure_ascii=False)
+    cut = text[: text.index('"id": "2"') + 5]
+    _, got, _ = _feed_in_pieces(cut, 3)
+    assert got == CARDS[:1]
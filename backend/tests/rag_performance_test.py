@@ -492,6 +492,137 @@ async def test_routing_only(test_cases: List[TestCase] = None) -> Dict[str, Any]
     }
 
 
+async def run_prompt_cache_report(
+    test_cases: List[TestCase] = None,
+    passes: int = 2,
+    price_input: float = 0.40,
+    price_cached: float = 0.10,
+) -> Dict[str, Any]:
+    """
+    프롬프트 캐시 효과 리포트 (카드/가이드 LLM 호출 포함, OPENAI_API_KEY 필요)
+    같은 케이스를 passes번 실행해 1회차(콜드) 대비 이후 회차의 지연/입력 토큰 비용 비교
+    카드/가이드 결과 캐시를 꺼야 매번 LLM이 호출됨: RAG_CARD_CACHE=0 RAG_GUIDE_CACHE=0
+    가격은 입력 100만 토큰당 USD (기본값: gpt-4.1-mini 입력 / 캐시 입력)
+    1024토큰 미만 프롬프트는 캐시되지 않음: 라우트별 도달 여부는 run_prompt_prefix_report로 먼저 확인
+    """
+    from app.llm.gateway import get_gateway_stats
+    from app.rag.pipeline.pipeline import run_rag
+
+    if test_cases is None:
+        test_cases = TEST_CASES
+
+    def _usage_totals() -> Dict[str, int]:
+        totals = {"prompt_tokens": 0, "cached_tokens": 0}
+        for usage in get_gateway_stats().get("usage", {}).values():
+            totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            totals["cached_tokens"] += usage.get("cached_tokens", 0)
+        return totals
+
+    print("=" * 70)
+    print("프롬프트 캐시 리포트")
+    print("=" * 70)
+    print(f"테스트 케이스 수: {len(test_cases)} / 회차: {passes}")
+
+    rows = []
+    for n in range(passes):
+        before = _usage_totals()
+        latencies = []
+        for test_case in test_cases:
+            start = time.perf_counter()
+            try:
+                await run_rag(test_case.query)
+            except Exception as e:
+                print(f"  ✗ {test_case.query[:40]}: {e}")
+                continue
+            latencies.append(time.perf_counter() - start)
+        after = _usage_totals()
+        prompt_tokens = after["prompt_tokens"] - before["prompt_tokens"]
+        cached = after["cached_tokens"] - before["cached_tokens"]
+        cost = ((prompt_tokens - cached) * price_input + cached * price_cached) / 1_000_000
+        row = {
+            "pass": n + 1,
+            "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0,
+            "p95_ms": PerformanceMetrics()._percentile(latencies, 95) * 1000 if latencies else 0,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached,
+            "cached_ratio": cached / prompt_tokens if prompt_tokens else 0,
+            "input_cost_usd": cost,
+        }
+        rows.append(row)
+        print(
+            f"  [{row['pass']}회차] 평균 {row['mean_ms']:>7.1f}ms | P95 {row['p95_ms']:>7.1f}ms | "
+            f"입력 {prompt_tokens:>7} tok | 캐시 {cached:>7} tok ({row['cached_ratio']*100:5.1f}%) | "
+            f"입력 비용 ${cost:.4f}"
+        )
+
+    if len(rows) >= 2:
+        cold, warm = rows[0], rows[-1]
+
+        def _reduction(a: float, b: float) -> float:
+            return (a - b) / a * 100 if a else 0
+
+        print("\n📊 1회차 대비 마지막 회차")
+        print(f"  평균 지연 감소:    {_reduction(cold['mean_ms'], warm['mean_ms']):.1f}%")
+        print(f"  P95 지연 감소:     {_reduction(cold['p95_ms'], warm['p95_ms']):.1f}%")
+        print(f"  입력 비용 감소:    {_reduction(cold['input_cost_usd'], warm['input_cost_usd']):.1f}%")
+    print("=" * 70)
+    return {"passes": rows}
+
+
+def run_prompt_prefix_report(min_cacheable: int = 1024) -> Dict[str, Any]:
+    """
+    프롬프트 캐시 가능 길이 리포트 (LLM/DB 호출 없음)
+    라우트별로 정적 prefix(system)와 문서 예산을 가득 채운 최대 프롬프트 토큰을 계산해
+    프로바이더 캐시 최소 길이(min_cacheable)에 닿는지 확인
+    캐시되는 부분은 요청 간 같은 앞부분(system + 같은 문서 조합의 문서 블록)뿐이므로
+    최대 길이가 min_cacheable 미만인 라우트는 캐시 적중이 없음
+    """
+    from app.guide import guide_generator
+    from app.guide.context_builder import GUIDE_CONTEXT_TOKENS, card_context_budget
+    from app.guide.guide_client import get_guide_model_name
+    from app.llm.rag_llm import card_generator
+    from app.llm.tokenizer import count_message_tokens, is_exact
+    from app.rag.pipeline.config import RAGConfig
+
+    query = "나라사랑카드 연회비 혜택 발급"
+    # 예산보다 충분히 긴 문서 (쿼리 용어가 든 문장 반복)
+    filler = " ".join(f"나라사랑카드 연회비와 혜택, 발급 조건 안내 문장 {i}입니다." for i in range(400))
+    docs = [{"id": f"DOC-{i}", "title": f"문서 {i}", "content": filler} for i in range(4)]
+
+    rows = []
+
+    def _row(name: str, static: int, budget: int, full: int) -> None:
+        rows.append({"prompt": name, "static": static, "budget": budget, "max_prompt": full,
+                     "cacheable": full >= min_cacheable})
+
+    card_model = RAGConfig().model
+    card_static = count_message_tokens(
+        [{"role": "system", "content": card_generator._CARD_SYSTEM_PROMPT}], card_model
+    )
+    for route in ("card_info", "card_usage", None):
+        budget = card_context_budget(route)
+        messages = card_generator._build_card_messages(query, docs, 4, budget, card_model)
+        _row(f"card:{route or 'default'}", card_static, budget, count_message_tokens(messages, card_model))
+
+    guide_model = get_guide_model_name()
+    guide_static = count_message_tokens(
+        [{"role": "system", "content": guide_generator._GUIDE_SYSTEM_PROMPT}], guide_model
+    )
+    messages = guide_generator._build_messages(query, docs, [])
+    _row("guide", guide_static, GUIDE_CONTEXT_TOKENS, count_message_tokens(messages, guide_model))
+
+    print("=" * 70)
+    print(f"프롬프트 캐시 가능 길이 리포트 (최소 {min_cacheable} tok, "
+          f"토크나이저: {'tiktoken' if is_exact() else '근사치(글자 수 / 2)'})")
+    print("=" * 70)
+    for row in rows:
+        mark = "가능" if row["cacheable"] else "불가"
+        print(f"  {row['prompt']:<16} 정적 {row['static']:>5} tok | 문서 예산 {row['budget']:>5} tok | "
+              f"최대 {row['max_prompt']:>5} tok → 캐시 {mark}")
+    print("=" * 70)
+    return {"rows": rows}
+
+
 # ============================================================================
 # 메인 실행
 # ============================================================================
@@ -500,8 +631,10 @@ async def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="RAG 검색 성능 테스트")
-    parser.add_argument("--mode", choices=["full", "routing", "speed", "ground-truth"], default="full",
-                       help="테스트 모드: full(전체), routing(라우팅만), speed(속도만), ground-truth(test_suite.py 기반)")
+    parser.add_argument("--mode", choices=["full", "routing", "speed", "ground-truth", "prompt-cache", "prompt-prefix"], default="full",
+                       help="테스트 모드: full(전체), routing(라우팅만), speed(속도만), ground-truth(test_suite.py 기반), "
+                            "prompt-cache(카드/가이드 LLM 프롬프트 캐시 효과), "
+                            "prompt-prefix(라우트별 프롬프트가 캐시 최소 길이에 닿는지, LLM 호출 없음)")
     parser.add_argument("--iterations", type=int, default=1, help="반복 횟수")
     parser.add_argument("--top-k", type=int, default=5, help="검색 결과 수")
     parser.add_argument("--verbose", action="store_true", help="상세 출력")
@@ -511,6 +644,10 @@ async def main():
 
     if args.mode == "routing":
         await test_routing_only()
+    elif args.mode == "prompt-cache":
+        await run_prompt_cache_report(passes=max(2, args.iterations))
+    elif args.mode == "prompt-prefix":
+        run_prompt_prefix_report()
     elif args.mode == "speed":
         # 동일 쿼리 반복으로 속도만 측정
         speed_cases = [
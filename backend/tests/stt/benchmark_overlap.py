@@ -0,0 +1,52 @@
+"""
+화자분리 경계 overlap 탐지 마이크로 벤치마크 (기존 전수 비교 vs Z-function + 상한 필터)
+
+사용법:
+    python tests/stt/benchmark_overlap.py
+    python tests/stt/benchmark_overlap.py --pairs 2000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.audio.diarizer import _Indel, find_best_fuzzy_overlap_suffix_prefix
+from tests.stt.test_overlap import make_pairs, reference_overlap
+
+
+def bench(fn, pairs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for a, b in pairs:
+            fn(a, b, min_chars=12, min_sim=0.92)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="suffix/prefix overlap 탐지 속도 비교")
+    parser.add_argument("--pairs", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pairs = make_pairs(seed=args.seed, n=args.pairs)
+    mismatches = sum(
+        reference_overlap(a, b) != find_best_fuzzy_overlap_suffix_prefix(a, b) for a, b in pairs
+    )
+    avg_len = sum(len(a) + len(b) for a, b in pairs) / (2 * len(pairs))
+
+    ref = bench(reference_overlap, pairs, args.repeat)
+    fast = bench(find_best_fuzzy_overlap_suffix_prefix, pairs, args.repeat)
+    print(f"[INFO] 쌍 {len(pairs)}개, 평균 길이 {avg_len:.0f}자, rapidfuzz={'on' if _Indel else 'off'}")
+    print(f"reference : {ref * 1000:9.1f} ms ({ref / len(pairs) * 1e6:8.1f} us/쌍)")
+    print(f"fast      : {fast * 1000:9.1f} ms ({fast / len(pairs) * 1e6:8.1f} us/쌍)")
+    print(f"speedup   : {ref / fast if fast else 0:.1f}x, 불일치 {mismatches}건")
+
+
+if __name__ == "__main__":
+    main()
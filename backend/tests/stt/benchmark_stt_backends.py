@@ -0,0 +1,128 @@
+"""
+STT 백엔드 벤치마크 (OpenAI whisper-1 vs 로컬 faster-whisper)
+
+녹음된 통화 WAV를 웹소켓과 같은 크기의 청크로 잘라 각 백엔드에 동시 요청하고
+청크별 지연(p50/p95)과 RTF(처리 시간 / 오디오 길이)를 비교한다.
+
+사용법:
+    python tests/stt/benchmark_stt_backends.py recordings/*.wav
+    python tests/stt/benchmark_stt_backends.py call.wav --backends local --chunk-sec 3 --concurrency 8
+    STT_LOCAL_MODEL=medium python tests/stt/benchmark_stt_backends.py call.wav --backends local
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+import wave
+from typing import Dict, List, Tuple
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.audio.stt_backends import create_stt_backend
+
+
+def split_wav(path: str, chunk_sec: float) -> List[Tuple[bytes, float]]:
+    """WAV 파일을 chunk_sec 단위 WAV 청크로 분할 → [(wav_bytes, 길이(초))]"""
+    chunks = []
+    with wave.open(path, "rb") as src:
+        params = src.getparams()
+        frames_per_chunk = max(1, int(params.framerate * chunk_sec))
+        while True:
+            frames = src.readframes(frames_per_chunk)
+            if not frames:
+                break
+            n_frames = len(frames) // (params.sampwidth * params.nchannels)
+            buf = io.BytesIO()
+            with wave.open(buf, "wb") as dst:
+                dst.setnchannels(params.nchannels)
+                dst.setsampwidth(params.sampwidth)
+                dst.setframerate(params.framerate)
+                dst.writeframes(frames)
+            chunks.append((buf.getvalue(), n_frames / params.framerate))
+    return chunks
+
+
+async def run_backend(name: str, chunks: List[Tuple[bytes, float]], concurrency: int) -> Dict[str, object]:
+    backend = create_stt_backend(name)
+    load_start = time.perf_counter()
+    backend.warmup()
+    load_sec = time.perf_counter() - load_start
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = [0.0] * len(chunks)
+    texts: List[str] = [""] * len(chunks)
+
+    async def _one(idx: int, audio: bytes):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                texts[idx] = await backend.transcribe(audio)
+            except Exception as e:
+                texts[idx] = f"<error: {e}>"
+            latencies[idx] = time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[_one(i, audio) for i, (audio, _) in enumerate(chunks)])
+    wall_sec = time.perf_counter() - wall_start
+
+    audio_sec = sum(duration for _, duration in chunks)
+    ordered = sorted(latencies)
+    return {
+        "backend": name,
+        "chunks": len(chunks),
+        "audio_sec": audio_sec,
+        "load_sec": load_sec,
+        "wall_sec": wall_sec,
+        "rtf": wall_sec / audio_sec if audio_sec else 0.0,
+        "latency_p50": statistics.median(ordered) if ordered else 0.0,
+        "latency_p95": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+        "texts": texts,
+    }
+
+
+def print_report(results: List[Dict[str, object]], show_texts: int) -> None:
+    print("\n" + "=" * 72)
+    print(f"{'backend':<10}{'chunks':>8}{'audio(s)':>10}{'load(s)':>9}{'wall(s)':>9}{'RTF':>8}{'p50(s)':>9}{'p95(s)':>9}")
+    print("-" * 72)
+    for r in results:
+        print(
+            f"{r['backend']:<10}{r['chunks']:>8}{r['audio_sec']:>10.1f}{r['load_sec']:>9.1f}"
+            f"{r['wall_sec']:>9.1f}{r['rtf']:>8.3f}{r['latency_p50']:>9.2f}{r['latency_p95']:>9.2f}"
+        )
+    print("=" * 72)
+    if show_texts and results:
+        print("\n[전사 결과 비교]")
+        for i in range(min(show_texts, len(results[0]["texts"]))):
+            for r in results:
+                print(f"  #{i:<3} {r['backend']:<8}| {r['texts'][i]}")
+            print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT 백엔드 RTF/지연 벤치마크")
+    parser.add_argument("files", nargs="+", help="녹음 WAV 파일 (16kHz mono 권장)")
+    parser.add_argument("--backends", nargs="+", default=["openai", "local"], choices=["openai", "local"])
+    parser.add_argument("--chunk-sec", type=float, default=3.0, help="청크 길이(초)")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 요청 수 (동시 통화 수 가정)")
+    parser.add_argument("--show-texts", type=int, default=5, help="비교 출력할 청크 수")
+    args = parser.parse_args()
+
+    chunks: List[Tuple[bytes, float]] = []
+    for path in args.files:
+        chunks.extend(split_wav(path, args.chunk_sec))
+    print(f"[INFO] 파일 {len(args.files)}개 → 청크 {len(chunks)}개 ({args.chunk_sec}s)")
+
+    results = [asyncio.run(run_backend(name, chunks, args.concurrency)) for name in args.backends]
+    print_report(results, args.show_texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+DiarizationManager 배치 처리 확인 (seq 순서 병합 / 글자 수·파편 수·대기 시간 배치 기준 / 세션 합계 동시 호출 제한)
+
+LLM 화자 분리(call_diarizer_fulltext)와 sLLM 보정, Redis는 가짜로 대체 (네트워크 호출 없음)
+
+실행: python -m pytest tests/stt/test_diarizer_manager.py -q
+"""
+import asyncio
+
+from app.audio import diarizer_manager as dm
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.lists = {}
+
+    async def delete(self, key):
+        self.lists.pop(key, None)
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    async def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+
+    async def set(self, *args, **kwargs):
+        pass
+
+    async def expire(self, *args, **kwargs):
+        pass
+
+
+class _FakeRedisModule:
+    @staticmethod
+    def from_url(*args, **kwargs):
+        return _FakeRedis()
+
+
+async def _identity_refine(items, cache=None):
+    return [{"speaker": it["speaker"], "message": it["message"]} for it in items]
+
+
+def _patch(monkeypatch, diarize):
+    monkeypatch.setattr(dm, "redis", _FakeRedisModule)
+    monkeypatch.setattr(dm, "refine_diarized_batch", _identity_refine)
+    monkeypatch.setattr(dm, "call_diarizer_fulltext", diarize)
+    monkeypatch.setattr(dm, "_DIAR_SEMAPHORE", None)
+
+
+# 배치 텍스트 → (지연, 결과 발화). 앞 배치일수록 늦게 끝남
+_BATCHES = {
+    "첫 번째 배치": (0.06, "agent", "안녕하세요 카드 분실 신고 도와드리겠습니다"),
+    "두 번째 배치": (0.01, "customer", "네 어제 지갑을 통째로 잃어버렸어요"),
+    "세 번째 배치": (0.03, "agent", "본인 확인을 위해 생년월일 말씀 부탁드립니다"),
+}
+
+
+async def _slow_diarize(client, model, system_prompt, raw_stream_batch):
+    delay, speaker, message = _BATCHES[raw_stream_batch]
+    await asyncio.sleep(delay)
+    return [{"speaker": speaker, "message": message}], None, None
+
+
+def test_out_of_order_batches_merge_in_seq_order(monkeypatch):
+    _patch(monkeypatch, _slow_diarize)
+
+    async def main():
+        mgr = dm.DiarizationManager("test-seq", client=None)
+        tasks = [asyncio.create_task(mgr.process_diarization(text, "prompt")) for text in _BATCHES]
+        await asyncio.sleep(0.045)
+        # 2·3번째 배치는 끝났지만 첫 배치를 기다리는 중: 아무것도 병합되지 않음
+        assert mgr.merge_seq == 0
+        assert sorted(mgr.pending_results) == [1, 2]
+        assert mgr.global_items == []
+        await asyncio.gather(*tasks)
+        return mgr
+
+    mgr = _run(main())
+    assert [it["message"] for it in mgr.global_items] == [m for _, _, m in _BATCHES.values()]
+    assert mgr.pending_results == {}
+
+
+def test_failed_batch_keeps_raw_text_in_order(monkeypatch):
+    async def diarize(client, model, system_prompt, raw_stream_batch):
+        if raw_stream_batch == "두 번째 배치":
+            raise RuntimeError("LLM 오류")
+        return await _slow_diarize(client, model, system_prompt, raw_stream_batch)
+
+    _patch(monkeypatch, diarize)
+
+    async def main():
+        mgr = dm.DiarizationManager("test-raw", client=None)
+        await asyncio.gather(*[mgr.process_diarization(text, "prompt") for text in _BATCHES])
+        return mgr
+
+    items = _run(main()).global_items
+    assert [it["message"] for it in items] == [
+        _BATCHES["첫 번째 배치"][2], "두 번째 배치", _BATCHES["세 번째 배치"][2],
+    ]
+    assert items[1]["speaker"] == "unknown"
+
+
+def _batching_manager(monkeypatch, flushed):
+    _patch(monkeypatch, _slow_diarize)
+    monkeypatch.setattr(dm, "DIAR_BATCH_TARGET_CHARS", 20)
+    monkeypatch.setattr(dm, "DIAR_BATCH_MIN_FRAGMENTS", 2)
+    monkeypatch.setattr(dm, "DIAR_BATCH_MAX_FRAGMENTS", 4)
+    monkeypatch.setattr(dm, "DIAR_BATCH_MAX_WAIT_SEC", 0.05)
+    mgr = dm.DiarizationManager("test-batch", client=None)
+    mgr._flush_batch = lambda: flushed.append(mgr._take_buffer())
+    return mgr
+
+
+def test_batch_flush_thresholds(monkeypatch):
+    flushed = []
+
+    async def main():
+        mgr = _batching_manager(monkeypatch, flushed)
+        # 글자 수: 한 파편이 목표를 넘어도 최소 파편 수 전에는 보류, 두 번째에서 처리
+        await mgr.add_fragment("카드 분실 신고를 하고 싶은데요 어떻게 하나요", "prompt")
+        assert flushed == []
+        await mgr.add_fragment("네", "prompt")
+        assert len(flushed) == 1
+
+        # 파편 수: 짧은 파편이라도 최대 개수가 차면 처리
+        for text in ("네", "음", "아", "예"):
+            await mgr.add_fragment(text, "prompt")
+        assert flushed[1] == "네 음 아 예"
+
+        # 대기 시간: 글자 수가 모자라도 최대 대기 후 타이머로 처리
+        await mgr.add_fragment("네", "prompt")
+        await mgr.add_fragment("음", "prompt")
+        assert len(flushed) == 2
+        await asyncio.sleep(0.08)
+        assert flushed[2] == "네 음"
+
+        # 파편 1개뿐이면 타이머가 지나도 보류
+        await mgr.add_fragment("네", "prompt")
+        await asyncio.sleep(0.08)
+        assert len(flushed) == 3 and mgr.buffer == ["네"]
+
+    _run(main())
+
+
+def test_concurrency_cap_across_sessions(monkeypatch):
+    active = []
+    peak = []
+
+    async def diarize(client, model, system_prompt, raw_stream_batch):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.02)
+        active.pop()
+        return [{"speaker": "agent", "message": raw_stream_batch}], None, None
+
+    _patch(monkeypatch, diarize)
+    monkeypatch.setattr(dm, "DIAR_MAX_CONCURRENCY", 2)
+
+    async def main():
+        managers = [dm.DiarizationManager(f"test-cap-{i}", client=None) for i in range(3)]
+        await asyncio.gather(*[
+            mgr.process_diarization(f"세션 {i} 배치 {j}", "prompt")
+            for i, mgr in enumerate(managers)
+            for j in range(2)
+        ])
+
+    _run(main())
+    assert max(peak) == 2
@@ -0,0 +1,135 @@
+"""
+상담 스크립트 조회 확인 (완료 알림 BLPOP으로 즉시 반환 / 대기 시간 초과 /
+최종 결과 대기 시간 초과 시 점진 저장된 확정 발화로 대체)
+
+Redis는 가짜로 대체 (네트워크 호출 없음)
+
+실행: python -m pytest tests/stt/test_get_dialogue.py -q
+"""
+import asyncio
+import json
+import os
+
+os.environ.setdefault("DIALOGUE_REDIS_URL", "redis://localhost:6379/0")
+
+from app.utils import get_dialogue as gd  # noqa: E402
+
+SESSION = "test-dialogue"
+ITEMS = [
+    {"speaker": "customer", "message": "카드를 잃어버렸어요"},
+    {"speaker": "agent", "message": "분실 신고 도와드리겠습니다"},
+]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.blpops = 0
+        self.blpop_error = None
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def blpop(self, key, timeout=0):
+        self.blpops += 1
+        if self.blpop_error:
+            raise self.blpop_error
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not self.lists.get(key):
+            if asyncio.get_running_loop().time() >= deadline:
+                return None
+            await asyncio.sleep(0.005)
+        return key, self.lists[key].pop(0)
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+
+def _fake(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setattr(gd, "redis_client", fake)
+    return fake
+
+
+def _save_final(fake, delay):
+    """DiarizationManager.save_to_redis 흉내: delay 후 최종 결과 저장 + 완료 알림"""
+    async def save():
+        await asyncio.sleep(delay)
+        fake.values[f"stt:{SESSION}"] = json.dumps(ITEMS, ensure_ascii=False)
+        await fake.rpush(f"stt:{SESSION}:ready", "1")
+    return asyncio.ensure_future(save())
+
+
+def _timed(coro):
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await coro()
+        return result, loop.time() - start
+    return asyncio.run(main())
+
+
+def test_ready_notification_returns_without_waiting_for_timeout(monkeypatch):
+    fake = _fake(monkeypatch)
+
+    async def wait():
+        _save_final(fake, 0.03)
+        return await gd.wait_for_dialogue(SESSION, timeout=5.0)
+
+    (script, data), elapsed = _timed(wait)
+    assert data == ITEMS
+    assert script.startswith("고객: 카드를 잃어버렸어요")
+    assert elapsed < 1.0
+    assert fake.blpops == 1
+    # 같은 세션을 기다리는 다른 요청을 위해 알림 복구
+    assert fake.lists[f"stt:{SESSION}:ready"] == ["1"]
+
+
+def test_already_saved_dialogue_skips_blpop(monkeypatch):
+    fake = _fake(monkeypatch)
+    fake.values[f"stt:{SESSION}"] = json.dumps(ITEMS, ensure_ascii=False)
+    _, data = asyncio.run(gd.wait_for_dialogue(SESSION, timeout=5.0))
+    assert data == ITEMS
+    assert fake.blpops == 0
+
+
+def test_timeout_without_notification(monkeypatch):
+    fake = _fake(monkeypatch)
+    result, elapsed = _timed(lambda: gd.wait_for_dialogue(SESSION, timeout=0.2))
+    assert result == ("", None)
+    assert 0.15 <= elapsed < 1.0
+    assert fake.blpops >= 1
+
+
+def test_blpop_failure_falls_back_to_polling(monkeypatch):
+    fake = _fake(monkeypatch)
+    fake.blpop_error = ConnectionError("BLPOP 미지원")
+
+    async def wait():
+        _save_final(fake, 0.05)
+        return await gd.wait_for_dialogue(SESSION, timeout=3.0)
+
+    (_, data), elapsed = _timed(wait)
+    assert data == ITEMS
+    assert elapsed < 2.0
+
+
+def test_timeout_falls_back_to_settled_items(monkeypatch):
+    fake = _fake(monkeypatch)
+    fake.values[f"stt:{SESSION}:status"] = "processing"
+    fake.lists[f"stt:{SESSION}:items"] = [json.dumps(it, ensure_ascii=False) for it in ITEMS]
+
+    script, data = asyncio.run(gd.wait_for_dialogue(SESSION, timeout=0.05))
+    assert script == "고객: 카드를 잃어버렸어요\n상담원: 분실 신고 도와드리겠습니다"
+    assert data == ITEMS
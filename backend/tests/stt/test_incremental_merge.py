@@ -0,0 +1,139 @@
+"""
+IncrementalMerger == merge_batches 누적 결과 확인 (시뮬레이션 배치 + 화자분리 평가 통화)
+
+배치마다 이전 배치 끝 발화 일부를 다시 포함(겹침)시키고, 띄어쓰기 변형 / 동일 화자 연속 /
+스팸 반복 / 근사 중복 발화를 섞어 경계 보정·병합 로직이 모두 동작하도록 만든다.
+평가 통화는 tests/sllm_refine/diarized_result.txt의 CASE별 화자분리 원본 발화를 사용한다.
+
+실행: python -m pytest tests/stt/test_incremental_merge.py -q
+"""
+import random
+import re
+from pathlib import Path
+
+from app.audio.diarizer import IncrementalMerger, merge_batches
+from tests.test_data.noisy_utterances import TEST_DATASET
+
+UTTERANCES = [u for pair in TEST_DATASET for u in pair[:2]]
+DIARIZED_RESULT = Path(__file__).resolve().parents[1] / "sllm_refine" / "diarized_result.txt"
+SPAM = ["아아아아아아아아아아아", "ㅋㅋㅋㅋㅋㅋㅋㅋㅋㅋ", "네 네", "음"]
+
+
+def _respace(msg, rng):
+    # STT 재인식처럼 띄어쓰기만 바뀐 발화
+    chars = [c for c in msg if c != " "]
+    out = []
+    for c in chars:
+        out.append(c)
+        if rng.random() < 0.2:
+            out.append(" ")
+    return "".join(out).strip()
+
+
+def _simulate_batches(seed, n_batches=40):
+    rng = random.Random(seed)
+    speaker = "agent"
+    stream = []
+    for _ in range(n_batches * 4):
+        if rng.random() < 0.7:
+            speaker = "customer" if speaker == "agent" else "agent"
+        r = rng.random()
+        if r < 0.08:
+            msg = rng.choice(SPAM)
+        elif r < 0.16 and stream:
+            msg = _respace(stream[-1]["message"], rng) + rng.choice(["", "요", " 네"])
+        else:
+            msg = rng.choice(UTTERANCES)
+        stream.append({"speaker": speaker, "message": msg})
+
+    batches = []
+    pos = 0
+    while pos < len(stream):
+        size = rng.randint(2, 6)
+        overlap = rng.randint(0, min(3, pos))
+        batch = [dict(it) for it in stream[pos - overlap:pos + size]]
+        for it in batch[:overlap]:
+            if rng.random() < 0.5:
+                it["message"] = _respace(it["message"], rng)
+        batches.append(batch)
+        pos += size
+    return batches
+
+
+def _load_diarized_cases(path=DIARIZED_RESULT):
+    """[CASEn] 블록별 ([n] 상담원/고객 + 원본:) 발화 목록"""
+    cases = []
+    speaker = None
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if re.match(r"^\[CASE\d+\]", line):
+            cases.append([])
+            continue
+        m = re.match(r"^\[\d+\] (상담원|고객)\s*$", line)
+        if m:
+            speaker = "agent" if m.group(1) == "상담원" else "customer"
+            continue
+        if line.startswith("  원본:") and cases and speaker:
+            cases[-1].append({"speaker": speaker, "message": line.split(":", 1)[1].strip()})
+            speaker = None
+    return cases
+
+
+def _replay_batches(utterances, seed, respace=False):
+    # 실제 통화를 2~4개 발화 배치로 자르고 앞 배치 끝 0~2개 발화를 다시 포함
+    rng = random.Random(seed)
+    batches = []
+    pos = 0
+    while pos < len(utterances):
+        size = rng.randint(2, 4)
+        overlap = rng.randint(0, min(2, pos))
+        batch = [dict(it) for it in utterances[pos - overlap:pos + size]]
+        if respace:
+            for it in batch[:overlap]:
+                if rng.random() < 0.5:
+                    it["message"] = _respace(it["message"], rng)
+        batches.append(batch)
+        pos += size
+    return batches
+
+
+def test_diarized_cases_loaded():
+    cases = _load_diarized_cases()
+    assert [len(c) for c in cases] == [7, 20, 10, 5]
+    assert cases[0][0] == {"speaker": "agent", "message": "상담원 안수희입니다. 무엇을 도와드릴까요?"}
+
+
+def test_incremental_merge_on_diarized_cases():
+    for case_no, utterances in enumerate(_load_diarized_cases(), 1):
+        for seed in range(20):
+            for respace in (False, True):
+                merger = IncrementalMerger(max_overlap_utts=8, min_partial_overlap_chars=12)
+                expected = []
+                for i, batch in enumerate(_replay_batches(utterances, seed, respace)):
+                    expected = merge_batches(expected, batch, max_overlap_utts=8, min_partial_overlap_chars=12)
+                    assert merger.merge(batch) == expected, f"case={case_no} seed={seed} batch={i}"
+                if not respace:
+                    # 그대로 다시 포함된 겹침만 있으면 원래 통화가 그대로 복원됨 (연속 공백은 정리됨)
+                    original = [{**u, "message": " ".join(u["message"].split())} for u in utterances]
+                    assert merger.items == original, f"case={case_no} seed={seed}"
+
+
+def test_incremental_merge_matches_merge_batches():
+    for seed in range(60):
+        merger = IncrementalMerger(max_overlap_utts=8, min_partial_overlap_chars=12)
+        expected = []
+        for i, batch in enumerate(_simulate_batches(seed)):
+            expected = merge_batches(expected, batch, max_overlap_utts=8, min_partial_overlap_chars=12)
+            assert merger.merge(batch) == expected, f"seed={seed} batch={i}"
+            if i % 7 == 3:
+                # 에러 시 원문 보관 경로
+                raw = {"speaker": "unknown", "message": "  원문  보관 "}
+                expected = expected + [raw]
+                merger.append(dict(raw))
+        assert len(merger.settled) > 0
+
+
+def test_tail_window_bounded():
+    merger = IncrementalMerger(max_overlap_utts=8)
+    for batch in _simulate_batches(7, n_batches=80):
+        merger.merge(batch)
+    assert len(merger.tail) <= merger.window + 4
@@ -0,0 +1,58 @@
+"""
+find_best_fuzzy_overlap_suffix_prefix 가속 버전 == 기존(전 길이 SequenceMatcher) 구현 확인
+
+실행: python -m pytest tests/stt/test_overlap.py -q
+"""
+import random
+from difflib import SequenceMatcher
+
+from app.audio.diarizer import _norm_overlap, find_best_fuzzy_overlap_suffix_prefix
+from tests.test_data.noisy_utterances import TEST_DATASET
+
+
+def reference_overlap(a, b, min_chars=12, min_sim=0.92):
+    """기존 구현 (L = min(len) → min_chars 순서로 전수 비교)"""
+    if not a or not b:
+        return 0
+    Lmax = min(len(a), len(b))
+    for L in range(Lmax, min_chars - 1, -1):
+        sa = a[-L:]
+        sb = b[:L]
+        if sa == sb:
+            return L
+        if SequenceMatcher(None, sa, sb).ratio() >= min_sim:
+            return L
+    return 0
+
+
+def make_pairs(seed=0, n=400):
+    """STT 배치 경계처럼 앞 발화 끝부분이 다음 발화 앞에 (약간 변형되어) 반복되는 쌍"""
+    rng = random.Random(seed)
+    texts = [_norm_overlap(t) for pair in TEST_DATASET for t in pair[:2]]
+    pairs = []
+    for _ in range(n):
+        a = "".join(rng.choice(texts) for _ in range(rng.randint(1, 5)))
+        tail = a[-rng.randint(1, len(a)):]
+        chars = list(tail)
+        for _ in range(rng.choice([0, 0, 1, 2, 4])):
+            if chars:
+                chars[rng.randrange(len(chars))] = rng.choice("가나다네요을를")
+        b = "".join(chars) + "".join(rng.choice(texts) for _ in range(rng.randint(0, 3)))
+        if rng.random() < 0.2:
+            b = "".join(rng.choice(texts) for _ in range(rng.randint(1, 3)))
+        pairs.append((a, b))
+    return pairs
+
+
+def test_matches_reference():
+    for a, b in make_pairs():
+        for min_chars, min_sim in ((12, 0.92), (12, 0.94), (3, 0.92), (1, 0.5)):
+            expected = reference_overlap(a, b, min_chars=min_chars, min_sim=min_sim)
+            assert find_best_fuzzy_overlap_suffix_prefix(a, b, min_chars=min_chars, min_sim=min_sim) == expected, (a, b)
+
+
+def test_edge_cases():
+    assert find_best_fuzzy_overlap_suffix_prefix("", "abc") == 0
+    assert find_best_fuzzy_overlap_suffix_prefix("abc", "abc", min_chars=12) == 0
+    assert find_best_fuzzy_overlap_suffix_prefix("가나다라마바사아자차카타", "가나다라마바사아자차카타파하", min_chars=12) == 12
+    assert find_best_fuzzy_overlap_suffix_prefix("aaaa", "aaaa", min_chars=1, min_sim=1.0) == 4
@@ -0,0 +1,91 @@
+"""
+공용 STT 스케줄러 동작 확인 (라운드로빈 / 순서 보장 / 큐 초과 정책)
+
+실행: python -m pytest tests/stt/test_stt_scheduler.py -q
+"""
+import asyncio
+import io
+import wave
+
+from app.audio.stt_scheduler import SttScheduler, merge_wav
+
+
+def _wav(frames: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\0\0" * frames)
+    return buf.getvalue()
+
+
+async def _frame_count(audio: bytes) -> str:
+    await asyncio.sleep(0.01)
+    with wave.open(io.BytesIO(audio), "rb") as w:
+        return str(w.getnframes())
+
+
+def _run(policy: str, chunks: int = 5, queue_max: int = 2):
+    async def main():
+        scheduler = SttScheduler(_frame_count, max_concurrency=2, queue_max=queue_max, overflow_policy=policy)
+        results = {}
+        for sid in ("a", "b", "c"):
+            async def on_text(text, sid=sid):
+                results.setdefault(sid, []).append(text)
+            scheduler.register(sid, on_text)
+        for i in range(chunks):
+            for sid in ("a", "b", "c"):
+                scheduler.submit(sid, _wav(100 * (i + 1)))
+        await asyncio.sleep(0.3)
+        return results, scheduler.stats()
+
+    return asyncio.run(main())
+
+
+def test_merge_policy_keeps_all_audio_in_order():
+    results, stats = _run("merge")
+    # 큐 한도 초과분은 마지막 청크에 병합되어 전체 프레임 수 보존
+    for sid in ("a", "b", "c"):
+        assert sum(int(t) for t in results[sid]) == 1500
+    assert stats["dropped"] == 0
+    assert stats["merged"] > 0
+
+
+def test_drop_newest_bounds_queue():
+    results, stats = _run("drop_newest")
+    # 디스패치 전에 모두 제출되므로 큐 한도(2)까지만 남고 나머지는 폐기
+    for sid in ("a", "b", "c"):
+        assert results[sid] == ["100", "200"]
+    assert stats["dropped"] == 9
+
+
+def test_merge_wav_rejects_format_mismatch():
+    other = io.BytesIO()
+    with wave.open(other, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(b"\0\0" * 10)
+    assert merge_wav(_wav(10), other.getvalue()) is None
+    assert merge_wav(_wav(10), b"not a wav") is None
+
+
+def test_wait_idle_after_drain():
+    async def main():
+        scheduler = SttScheduler(_frame_count, max_concurrency=1, queue_max=8)
+        results = []
+
+        async def on_text(text):
+            await asyncio.sleep(0.02)
+            results.append(text)
+
+        scheduler.register("a", on_text)
+        for i in range(4):
+            scheduler.submit("a", _wav(100 * (i + 1)))
+        session = scheduler.unregister("a", drain=True)
+        # 대기 청크 전사 + 콜백 완료까지 기다림
+        assert await scheduler.wait_idle(session, timeout=2.0)
+        return results
+
+    assert asyncio.run(main()) == ["100", "200", "300", "400"]
@@ -0,0 +1,68 @@
+"""
+스트리밍 VAD 세그먼터 확인 (energy VAD, 합성 톤 신호)
+
+실행: python -m pytest tests/stt/test_vad.py -q
+"""
+import io
+import math
+import struct
+import wave
+
+from app.audio.vad import PcmRingBuffer, VadSegmenter
+
+SR = 16000
+
+
+def _wav(samples):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SR)
+        w.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+    return buf.getvalue()
+
+
+SILENCE = [0] * SR
+TONE = [int(8000 * math.sin(i * 2 * math.pi * 300 / SR)) for i in range(SR)]
+# 1s 무음 → 1s 발화 → 1s 무음 → 2s 발화 → 1.5s 무음
+STREAM = SILENCE + TONE + SILENCE + TONE + TONE + SILENCE + SILENCE[: SR // 2]
+
+
+def _segments(chunk_size, **kwargs):
+    segmenter = VadSegmenter(backend="energy", **kwargs)
+    out = []
+    for i in range(0, len(STREAM), chunk_size):
+        out.extend(segmenter.feed(_wav(STREAM[i:i + chunk_size])))
+    out.extend(segmenter.flush())
+    return out
+
+
+def test_voiced_segments_only():
+    segments = _segments(4096)
+    # 발화 구간(1~2s, 3~5s) ± preroll(210ms), 프레임(30ms) 단위 오차 허용
+    expected = [(790, 2210), (2790, 5210)]
+    assert len(segments) == len(expected)
+    for s, (start, end) in zip(segments, expected):
+        assert abs(s.start_ms - start) <= 30 and abs(s.end_ms - end) <= 30
+    for s in segments:
+        with wave.open(io.BytesIO(s.audio), "rb") as w:
+            assert w.getnframes() == (s.end_ms - s.start_ms) * SR // 1000
+
+
+def test_chunking_does_not_change_segments():
+    assert [s.timing() for s in _segments(4096)] == [s.timing() for s in _segments(len(STREAM))]
+
+
+def test_max_segment_forces_cut():
+    segments = _segments(4096, max_segment_ms=900)
+    assert any(s.forced_cut for s in segments)
+    assert all(s.end_ms - s.start_ms <= 900 for s in segments)
+
+
+def test_ring_buffer_wraps():
+    ring = PcmRingBuffer(8)
+    ring.write(memoryview(b"abcdef"))
+    ring.write(memoryview(b"ghij"))
+    assert b"".join(ring.slices(2, 10)) == b"cdefghij"
+    assert b"".join(ring.slices(0, 4)) == b"cd"
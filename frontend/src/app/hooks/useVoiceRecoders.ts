@@ -38,14 +38,17 @@ export interface CustomerResponseData {
 }
 
 export interface WebSocketMessage {
-  type: 'rag' | 'session' | 'stt' | 'connected' | 'customer_response';
-  data: RAGResponse | string | CustomerResponseData;
+  type: 'rag' | 'rag_update' | 'rag_guide' | 'session' | 'stt' | 'connected' | 'customer_response';
+  data: RAGResponse | Partial<RAGResponse> | string | CustomerResponseData;
   text?: string;  // STT 결과 텍스트
   ws_session_id?: string;  // connected 메시지용
+  responseId?: string;  // 점진 RAG 응답 식별자 (rag → rag_update → rag_guide 가 같은 값)
+  partial?: boolean;  // 점진 RAG: true면 중간 결과, false면 해당 단계 최종
 }
 
 interface UseVoiceRecorderOptions {
   onRagResult?: (data: RAGResponse) => void;
+  onRagUpdate?: (data: RAGResponse) => void;  // 점진 RAG: 같은 responseId의 LLM 카드/가이드를 합친 전체 응답
   onSessionId?: (sessionId: string) => void;
   onSttResult?: (text: string) => void;  // ⭐ [v24] STT 결과 콜백
   onCustomerResponse?: (data: CustomerResponseData) => void;  // ⭐ [v25] AI 고객 응답 콜백 (TTS)
@@ -68,6 +71,8 @@ export const useVoiceRecorder = (options?: UseVoiceRecorderOptions) => {
   const silenceStartRef = useRef<number | null>(null);
   const recordingStartRef = useRef<number | null>(null);
   const optionsRef = useRef(options);
+  // 점진 RAG: 마지막 rag 응답 (rag_update/rag_guide를 responseId로 합침)
+  const ragResponseRef = useRef<{ responseId: string; data: RAGResponse } | null>(null);
 
   // options 업데이트
   useEffect(() => {
@@ -161,6 +166,7 @@ export const useVoiceRecorder = (options?: UseVoiceRecorderOptions) => {
     }
 
     audioBufferRef.current = [];
+    ragResponseRef.current = null;
     isSpeakingRef.current = false;
     setIsRecording(false);
     setWsStatus('Disconnected');
@@ -224,9 +230,26 @@ export const useVoiceRecorder = (options?: UseVoiceRecorderOptions) => {
           // RAG 결과 메시지
           if (message.type === 'rag' && message.data) {
             console.log('[WebSocket] RAG 결과 수신:', message.data);
+            // responseId가 없으면 단일 응답 (이후 update 없음)
+            ragResponseRef.current = message.responseId
+              ? { responseId: message.responseId, data: message.data as RAGResponse }
+              : null;
             optionsRef.current?.onRagResult?.(message.data as RAGResponse);
           }
 
+          // ⭐ 점진 RAG: LLM 카드(rag_update) / 가이드(rag_guide)를 같은 responseId 응답에 합침
+          if ((message.type === 'rag_update' || message.type === 'rag_guide') && message.data) {
+            const current = ragResponseRef.current;
+            if (!current || current.responseId !== message.responseId) {
+              // 새 발화로 대체된 이전 응답의 늦은 메시지는 무시
+              console.log('[WebSocket] 지난 RAG 응답 무시:', message.responseId);
+              return;
+            }
+            const merged: RAGResponse = { ...current.data, ...(message.data as Partial<RAGResponse>) };
+            ragResponseRef.current = { responseId: current.responseId, data: merged };
+            optionsRef.current?.onRagUpdate?.(merged);
+          }
+
           // ⭐ [v25] AI 고객 응답 메시지 (교육 모드 TTS)
           if (message.type === 'customer_response' && message.data) {
             console.log('[WebSocket] AI 고객 응답 수신:', message.data);
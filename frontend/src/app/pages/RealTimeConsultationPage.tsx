@@ -555,6 +555,31 @@ export default function RealTimeConsultationPage() {
     }
   }, []);
 
+  // ⭐ 점진 RAG: 규칙 카드 자리를 같은 문서(id)의 LLM 카드로 교체 + 가이드 스크립트 갱신
+  const handleRagUpdate = useCallback((data: RAGResponse) => {
+    console.log('[RAG] 점진 결과 수신:', data);
+
+    const updated = new Map<string, RAGCard>();
+    [...(data.currentSituation || []), ...(data.nextStep || [])].forEach(card => {
+      if (card.id) updated.set(card.id, card);
+    });
+    const replace = (cards: RAGCard[]) => cards.map(card => (card.id && updated.get(card.id)) || card);
+
+    if (updated.size > 0) {
+      setRagCurrentCards(prev => replace(prev));
+      setRagNextCards(prev => replace(prev));
+      // 마지막 Step(= 이 응답의 규칙 카드)을 LLM 카드로 교체
+      setRagSteps(prev => prev.length === 0 ? prev : [
+        ...prev.slice(0, -1),
+        { currentCards: data.currentSituation || [], nextCards: data.nextStep || [] },
+      ]);
+    }
+
+    if (data.guidanceScript) {
+      setRagGuidanceScript(data.guidanceScript);
+    }
+  }, []);
+
   // ⭐ [v25] AI 고객 응답 수신 핸들러 (교육 모드 TTS)
   const handleCustomerResponse = useCallback((data: { text: string; turn_number: number; audio_url?: string }) => {
     console.log('[교육] AI 고객 응답:', data.text);
@@ -610,6 +635,7 @@ export default function RealTimeConsultationPage() {
 
   const { start: startRecording, stop: stopRecording, sendMessage, wsStatus, sessionId } = useVoiceRecorder({
     onRagResult: handleRagResult,
+    onRagUpdate: handleRagUpdate,
     onSttResult: handleSttResult,  // ⭐ [v24] STT 결과 콜백 연결
     onCustomerResponse: handleCustomerResponse,  // ⭐ [v25] AI 고객 응답 (TTS)
     onConnected: (wsSessionId) => {